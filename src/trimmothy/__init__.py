@@ -1,4 +1,16 @@
-from .main import main
-
 __version__ = "0.1.0"
-__all__ = ["main"]
+__all__ = ["main", "AsyncVideoProcessor"]
+
+
+def __getattr__(name):
+    # Imported on first use, so headless users never load Tk or OpenCV
+    if name == "main":
+        from .main import main
+
+        globals()["main"] = main  # Importing .main set the attribute to the submodule
+        return main
+    if name == "AsyncVideoProcessor":
+        from .headless import AsyncVideoProcessor
+
+        return AsyncVideoProcessor
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,84 @@
+"""
+On-disk cache locations for Trimmothy.
+
+Per-source data (frame indexes, probe results, thumbnails, ...) lives in a
+directory keyed by the file's path, size and modification time, so an edited
+or replaced file never reuses stale entries.
+"""
+
+import hashlib
+import json
+import os
+import platform
+from pathlib import Path
+from typing import Dict, Optional
+
+
+def get_cache_dir() -> Path:
+    """
+    Get the root cache directory, creating it if needed.
+
+    Honors TRIMMOTHY_CACHE_DIR, otherwise uses the platform's user cache location.
+
+    Returns:
+        Path to the cache directory
+    """
+    override = os.environ.get("TRIMMOTHY_CACHE_DIR")
+    if override:
+        cache_dir = Path(override)
+    elif platform.system() == "Darwin":
+        cache_dir = Path.home() / "Library" / "Caches" / "Trimmothy"
+    else:
+        cache_dir = Path(os.environ.get("XDG_CACHE_HOME", Path.home() / ".cache")) / "trimmothy"
+
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    return cache_dir
+
+
+def source_key(file_path: str) -> str:
+    """
+    Compute the cache key for a source file.
+
+    Args:
+        file_path: Path to the source file
+
+    Returns:
+        Hex string identifying this version of the file
+    """
+    stat = os.stat(file_path)
+    identity = f"{os.path.abspath(file_path)}|{stat.st_size}|{stat.st_mtime_ns}"
+    return hashlib.sha1(identity.encode("utf-8")).hexdigest()[:20]
+
+
+def source_cache_dir(file_path: str, create: bool = True) -> Path:
+    """
+    Get the cache directory for one source file.
+
+    Args:
+        file_path: Path to the source file
+        create: Create the directory if it doesn't exist
+
+    Returns:
+        Path to the source's cache directory
+    """
+    directory = get_cache_dir() / "sources" / source_key(file_path)
+    if create:
+        directory.mkdir(parents=True, exist_ok=True)
+    return directory
+
+
+def load_json(path: Path) -> Optional[Dict]:
+    """Read a cached JSON document, or None if missing or unreadable."""
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def store_json(path: Path, data: Dict) -> None:
+    """Atomically write a JSON document into the cache."""
+    tmp_path = path.with_name(path.name + ".tmp")
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(data, f)
+    os.replace(tmp_path, path)
@@ -0,0 +1,561 @@
+"""
+Command-line entry point for Trimmothy.
+
+Running `trimmothy` with no arguments starts the GUI; subcommands expose the
+headless tools.
+"""
+
+import argparse
+import multiprocessing
+import os
+import sys
+import time
+
+
+def build_parser() -> argparse.ArgumentParser:
+    """Build the argument parser with all subcommands."""
+    parser = argparse.ArgumentParser(prog="trimmothy", description="Trimmothy video trimmer")
+    subparsers = parser.add_subparsers(dest="command")
+
+    serve_parser = subparsers.add_parser("serve", help="Run the local trim service")
+    serve_parser.add_argument("--socket", help="Unix socket path to listen on")
+    serve_parser.add_argument("--port", type=int, help="Listen on this localhost TCP port instead of a Unix socket")
+    serve_parser.add_argument("--workers", type=int, help="Number of concurrent jobs")
+
+    resume_parser = subparsers.add_parser("resume", help="Resume interrupted exports")
+    resume_parser.add_argument("--list", action="store_true", help="Only list interrupted exports")
+    resume_parser.add_argument("--yes", action="store_true", help="Resume every export without asking")
+    resume_parser.add_argument("--discard", action="store_true", help="Delete interrupted exports instead")
+
+    watch_parser = subparsers.add_parser("watch", help="Pre-cache new videos dropped into a folder")
+    watch_parser.add_argument("folder", help="Folder to watch")
+    watch_parser.add_argument("--once", action="store_true", help="Ingest the current contents and exit")
+    watch_parser.add_argument("--interval", type=float, help="Seconds between folder scans")
+    watch_parser.add_argument("--no-recursive", action="store_true", help="Ignore subfolders")
+
+    library_parser = subparsers.add_parser("library", help="Index and search video files")
+    library_parser.add_argument("--db", help="Library database file")
+    library_commands = library_parser.add_subparsers(dest="library_command")
+    scan_parser = library_commands.add_parser("scan", help="Add or refresh folders in the library")
+    scan_parser.add_argument("folders", nargs="+", help="Folders to scan")
+    scan_parser.add_argument("--workers", type=int, help="Number of files probed at once")
+    scan_parser.add_argument("--no-recursive", action="store_true", help="Ignore subfolders")
+    find_parser = library_commands.add_parser("find", help="Search the library")
+    find_parser.add_argument("name", nargs="?", help="File name substring")
+    find_parser.add_argument("--min-duration", help="Minimum duration (seconds or HH:MM:SS)")
+    find_parser.add_argument("--max-duration", help="Maximum duration (seconds or HH:MM:SS)")
+    find_parser.add_argument("--codec", help="Video codec, e.g. h264 or hevc")
+    find_parser.add_argument("--audio-codec", help="Audio codec, e.g. aac")
+    find_parser.add_argument("--min-width", type=int, help="Minimum frame width")
+    find_parser.add_argument("--min-height", type=int, help="Minimum frame height")
+    find_parser.add_argument("--path", help="Only files under this folder")
+    find_parser.add_argument("--sort", choices=["path", "name", "duration", "size", "mtime"], default="path")
+    find_parser.add_argument("--limit", type=int, help="Maximum number of results")
+    library_commands.add_parser("stats", help="Show library totals")
+
+    dupes_parser = subparsers.add_parser("dupes", help="Find duplicate and re-encoded videos")
+    dupes_parser.add_argument("--db", help="Library database file")
+    dupes_parser.add_argument("--max-distance", type=int, help="Maximum fingerprint distance in bits (default 64 of 512)")
+    dupes_commands = dupes_parser.add_subparsers(dest="dupes_command")
+    dupes_scan_parser = dupes_commands.add_parser("scan", help="Fingerprint the videos in folders")
+    dupes_scan_parser.add_argument("folders", nargs="+", help="Folders to scan")
+    dupes_scan_parser.add_argument("--workers", type=int, help="Number of files fingerprinted at once")
+    dupes_scan_parser.add_argument("--no-recursive", action="store_true", help="Ignore subfolders")
+    match_parser = dupes_commands.add_parser("match", help="List fingerprinted videos that match a file")
+    match_parser.add_argument("file", help="Video file to look up")
+    match_parser.add_argument("--limit", type=int, help="Maximum number of results")
+    dupes_commands.add_parser("groups", help="List every group of duplicates")
+
+    trim_parser = subparsers.add_parser("trim", help="Export a range of a video")
+    trim_parser.add_argument("input", help="Source video file")
+    trim_parser.add_argument("output", help="Output video file")
+    trim_parser.add_argument("--start", default="0", help="Start time (seconds or HH:MM:SS)")
+    trim_parser.add_argument("--end", help="End time (seconds or HH:MM:SS); defaults to the end of the video")
+    trim_parser.add_argument("--budget", type=float, help="Finish a re-encode within this many minutes")
+    trim_parser.add_argument("--draft-first", action="store_true",
+                             help="Write a keyframe-aligned stream-copy draft right away, then replace it "
+                                  "with the frame-accurate export")
+    trim_parser.add_argument("--on-draft", metavar="COMMAND",
+                             help="Run COMMAND with the output path appended once the draft is written")
+    trim_parser.add_argument("--on-final", metavar="COMMAND",
+                             help="Run COMMAND with the output path appended once the final file is in place")
+    trim_parser.add_argument("--no-notify", action="store_true", help="Don't show a desktop notification")
+    trim_parser.add_argument("--no-cache", action="store_true",
+                             help="Neither reuse nor store the export in the export cache")
+
+    concat_parser = subparsers.add_parser("concat", help="Join ranges of several files into one video")
+    concat_parser.add_argument("output", help="Output video file")
+    concat_parser.add_argument("clips", nargs="+",
+                               help="Clips in order, as FILE or FILE@START-END (seconds or HH:MM:SS)")
+    concat_parser.add_argument("--exact", action="store_true",
+                               help="Re-encode clips that don't start on a keyframe instead of starting them early")
+    concat_parser.add_argument("--workers", type=int, help="Number of clips prepared at once")
+
+    renditions_parser = subparsers.add_parser("renditions",
+                                              help="Export a range at several resolutions from one decode")
+    renditions_parser.add_argument("input", help="Source video file")
+    renditions_parser.add_argument("output", help="Base output file; renditions are saved as NAME_<rendition>.EXT")
+    renditions_parser.add_argument("--start", default="0", help="Start time (seconds or HH:MM:SS)")
+    renditions_parser.add_argument("--end", help="End time (seconds or HH:MM:SS); defaults to the end of the video")
+    renditions_parser.add_argument("--rendition", action="append", metavar="NAME:HEIGHT[:PRESET[:CRF[:MAXRATE]]]",
+                                   help="Add a rendition, e.g. 720p:720:veryfast:23:3M (default: 1080p, 720p, 480p)")
+    renditions_parser.add_argument("--compare", action="store_true",
+                                   help="Also encode each rendition separately and compare the timings")
+
+    grab_parser = subparsers.add_parser("grab", help="Export frames of a range as images, with a manifest")
+    grab_parser.add_argument("input", help="Source video file")
+    grab_parser.add_argument("output_dir", help="Directory for the images and manifest.json")
+    grab_parser.add_argument("--start", default="0", help="Start time (seconds or HH:MM:SS)")
+    grab_parser.add_argument("--end", help="End time (seconds or HH:MM:SS); defaults to the end of the video")
+    grab_selection = grab_parser.add_mutually_exclusive_group()
+    grab_selection.add_argument("--step", type=int, help="Keep every Nth frame (default: every frame)")
+    grab_selection.add_argument("--at", metavar="TIMES",
+                                help="Keep the frames shown at these times, comma-separated (seconds or HH:MM:SS)")
+    grab_selection.add_argument("--scenes", type=float, metavar="THRESHOLD",
+                                help="Keep the first frame of every scene; threshold 0-1, e.g. 0.3")
+    grab_parser.add_argument("--format", default="jpg", choices=["jpg", "png", "webp"], help="Image format")
+    grab_parser.add_argument("--quality", type=int, help="JPEG/WebP quality (0-100) or PNG compression (0-9)")
+    grab_parser.add_argument("--width", type=int, help="Scale images down to this width")
+    grab_parser.add_argument("--workers", type=int, help="Number of encoder threads")
+
+    export_cache_parser = subparsers.add_parser("export-cache", help="Show or clear the cache of finished exports")
+    export_cache_parser.add_argument("--clear", action="store_true", help="Remove every cached export")
+    export_cache_parser.add_argument("--list", action="store_true", help="List cached exports, most recently used first")
+
+    report_parser = subparsers.add_parser("report", help="Summarize recorded export timings")
+    report_parser.add_argument("--by", choices=["codec", "container", "strategy", "resolution", "ffmpeg", "source"],
+                               default="codec", help="How to group exports (default: codec)")
+    report_parser.add_argument("--days", type=float, help="Only exports from the last N days")
+    report_parser.add_argument("--strategies", action="store_true", help="Also break each group down by strategy")
+    report_parser.add_argument("--file", help="Telemetry file to read")
+    report_parser.add_argument("--json", action="store_true", help="Print the summary as JSON")
+
+    return parser
+
+
+def parse_duration(value: str) -> float:
+    """Parse seconds or HH:MM:SS."""
+    from trimmothy.utils import time_string_to_seconds
+
+    return time_string_to_seconds(value) if ":" in value else float(value)
+
+
+def library_command(args) -> int:
+    """Scan folders into the media library or search it."""
+    from trimmothy.library import MediaLibrary
+    from trimmothy.utils import format_duration, seconds_to_time_string
+
+    if args.library_command == "scan":
+        library = MediaLibrary(args.db, max_workers=args.workers)
+        started = time.monotonic()
+        stats = library.scan(args.folders, recursive=not args.no_recursive,
+                             progress_callback=lambda done, total: print(f"\r  Probed {done}/{total}", end="", flush=True))
+        print(f"\n{stats['found']} files, {stats['probed']} probed ({stats['failed']} failed), "
+              f"{stats['unchanged']} unchanged, {stats['removed']} removed in {time.monotonic() - started:.1f}s")
+        return 0
+
+    library = MediaLibrary(args.db)
+    if args.library_command == "find":
+        rows = library.query(
+            min_duration=parse_duration(args.min_duration) if args.min_duration else None,
+            max_duration=parse_duration(args.max_duration) if args.max_duration else None,
+            video_codec=args.codec, audio_codec=args.audio_codec,
+            min_width=args.min_width, min_height=args.min_height,
+            path_prefix=args.path, name_contains=args.name,
+            order_by=args.sort, limit=args.limit
+        )
+        for row in rows:
+            print(f"{seconds_to_time_string(row['duration'])}  {row['video_codec']:<6} "
+                  f"{row['width']}x{row['height']:<5}  {row['path']}")
+        return 0
+
+    stats = library.stats()
+    print(f"{stats['files']} files ({stats['failed']} unreadable), "
+          f"{format_duration(stats['total_duration'])}, {stats['total_size'] / (1024 ** 3):.1f} GB")
+    for codec, count in stats['video_codecs'].items():
+        print(f"  {codec}: {count}")
+    return 0
+
+
+def dupes_command(args) -> int:
+    """Fingerprint folders or report duplicates."""
+    from trimmothy.fingerprint import MATCH_DISTANCE, FingerprintIndex
+
+    max_distance = MATCH_DISTANCE if args.max_distance is None else args.max_distance
+
+    if args.dupes_command == "scan":
+        index = FingerprintIndex(args.db, max_workers=args.workers)
+        started = time.monotonic()
+        stats = index.scan(args.folders, recursive=not args.no_recursive,
+                           progress_callback=lambda done, total: print(f"\r  Fingerprinted {done}/{total}", end="", flush=True))
+        print(f"\n{stats['found']} files, {stats['fingerprinted']} fingerprinted ({stats['failed']} failed), "
+              f"{stats['unchanged']} unchanged, {stats['removed']} removed in {time.monotonic() - started:.1f}s")
+        return 0
+
+    index = FingerprintIndex(args.db)
+    if args.dupes_command == "match":
+        started = time.monotonic()
+        try:
+            matches = index.matches(args.file, max_distance, args.limit)
+        except (OSError, RuntimeError) as e:
+            print(f"Fingerprinting failed: {e}", file=sys.stderr)
+            return 1
+        for path, distance in matches:
+            print(f"{distance:4d}  {path}")
+        print(f"{len(matches)} matches among {len(index)} files in {time.monotonic() - started:.3f}s")
+        return 0
+
+    started = time.monotonic()
+    groups = index.groups(max_distance)
+    for group in groups:
+        for path, distance in group:
+            print(f"{distance:4d}  {path}")
+        print()
+    print(f"{len(groups)} groups of duplicates among {len(index)} files in {time.monotonic() - started:.2f}s")
+    return 0
+
+
+def parse_clip(spec: str, processor) -> tuple:
+    """Parse FILE or FILE@START-END into (path, start, end)."""
+    path, separator, time_range = spec.rpartition("@")
+    if not separator or "-" not in time_range:
+        path = spec
+        return path, 0.0, processor.get_video_info(path)['duration']
+    start, _, end = time_range.partition("-")
+    return path, parse_duration(start), parse_duration(end)
+
+
+def run_hook(command: str, output_path: str) -> None:
+    """Run a user hook command with the output path as its last argument."""
+    import shlex
+    import subprocess
+
+    try:
+        subprocess.run(shlex.split(command) + [output_path], check=False)
+    except OSError as e:
+        print(f"Hook failed: {e}", file=sys.stderr)
+
+
+def trim_command(args) -> int:
+    """Export one range, optionally as a quick draft that is replaced by the exact cut."""
+    from trimmothy.optimistic import OptimisticExport
+    from trimmothy.video_processor import VideoProcessor
+
+    processor = VideoProcessor()
+    try:
+        start = parse_duration(args.start)
+        end = parse_duration(args.end) if args.end else processor.get_video_info(args.input)['duration']
+    except (RuntimeError, ValueError) as e:
+        print(f"Invalid range: {e}", file=sys.stderr)
+        return 1
+    time_budget = args.budget * 60 if args.budget else None
+
+    def progress_callback(fraction):
+        print(f"\r  {fraction * 100:5.1f}%", end="", flush=True)
+
+    started = time.monotonic()
+    if not args.draft_first:
+        success = processor.trim_video(args.input, args.output, start, end, progress_callback, time_budget,
+                                       use_export_cache=not args.no_cache)
+        print()
+        if not success:
+            print("Export failed", file=sys.stderr)
+            return 1
+        print(f"Exported {args.output} in {time.monotonic() - started:.1f}s")
+        if args.on_final:
+            run_hook(args.on_final, args.output)
+        return 0
+
+    export = OptimisticExport(
+        processor, args.input, args.output, start, end,
+        on_draft=(lambda path: run_hook(args.on_draft, path)) if args.on_draft else None,
+        on_final=(lambda path: run_hook(args.on_final, path)) if args.on_final else None,
+        notify=not args.no_notify, time_budget=time_budget, use_export_cache=not args.no_cache
+    )
+    if export.start(progress_callback):
+        print(f"Draft written in {export.draft_seconds:.1f}s (starts at {export.draft_start:.3f}s); "
+              f"producing the frame-accurate version...")
+    else:
+        print("Draft could not be written; producing the frame-accurate version...")
+    try:
+        success = export.wait()
+    except KeyboardInterrupt:
+        export.cancel()
+        print("\nCancelling; the draft is kept")
+        export.wait()
+        return 1
+    print()
+    if not success:
+        print(f"Export failed: {export.error}", file=sys.stderr)
+        return 1
+    print(f"Final file replaced the draft after {export.final_seconds:.1f}s -> {args.output}")
+    return 0
+
+
+def concat_command(args) -> int:
+    """Join clips into one file, re-encoding only the ones that don't match."""
+    from trimmothy.video_processor import VideoProcessor
+
+    processor = VideoProcessor()
+    try:
+        clips = [parse_clip(spec, processor) for spec in args.clips]
+    except (RuntimeError, ValueError) as e:
+        print(f"Invalid clip: {e}", file=sys.stderr)
+        return 1
+
+    report = processor.concat_clips(
+        clips, args.output, max_workers=args.workers, exact=args.exact,
+        progress_callback=lambda fraction: print(f"\r  {fraction * 100:5.1f}%", end="", flush=True)
+    )
+    print()
+    for clip in report['clips']:
+        line = f"{clip['action']:<8} {os.path.basename(clip['path'])} {clip['start']:.2f}-{clip['end']:.2f}s"
+        if clip['action'] != 'reencode' and clip['copy_start'] is not None and clip['copy_start'] < clip['start'] - 0.001:
+            line += f" (starts at keyframe {clip['copy_start']:.2f}s)"
+        if clip['reasons']:
+            line += f": {'; '.join(clip['reasons'])}"
+        print(line)
+    if not report['success']:
+        print(f"Concat failed: {report.get('error', 'unknown error')}", file=sys.stderr)
+        return 1
+    print(f"{report['copied']} copied, {report['reencoded']} re-encoded in {report['elapsed']:.1f}s -> {args.output}")
+    return 0
+
+
+def parse_rendition(spec: str) -> dict:
+    """Parse NAME:HEIGHT[:PRESET[:CRF[:MAXRATE]]] into a rendition dictionary."""
+    parts = spec.split(":")
+    if len(parts) < 2 or not parts[1].isdigit():
+        raise ValueError(f"expected NAME:HEIGHT[:PRESET[:CRF[:MAXRATE]]], got {spec!r}")
+    rendition = {'name': parts[0], 'height': int(parts[1])}
+    if len(parts) > 2 and parts[2]:
+        rendition['preset'] = parts[2]
+    if len(parts) > 3 and parts[3]:
+        rendition['crf'] = float(parts[3])
+    if len(parts) > 4 and parts[4]:
+        rendition['maxrate'] = parts[4]
+    return rendition
+
+
+def renditions_command(args) -> int:
+    """Export a rendition ladder from a single decode of the range."""
+    from trimmothy.video_processor import VideoProcessor
+
+    processor = VideoProcessor()
+    try:
+        start = parse_duration(args.start)
+        end = parse_duration(args.end) if args.end else processor.get_video_info(args.input)['duration']
+        renditions = [parse_rendition(spec) for spec in args.rendition] if args.rendition else None
+    except (RuntimeError, ValueError) as e:
+        print(f"Invalid arguments: {e}", file=sys.stderr)
+        return 1
+
+    report = processor.export_renditions(
+        args.input, args.output, start, end, renditions, compare=args.compare,
+        progress_callback=lambda fraction: print(f"\r  {fraction * 100:5.1f}%", end="", flush=True)
+    )
+    print()
+    if not report['success']:
+        print(f"Rendition export failed: {report.get('error', 'unknown error')}", file=sys.stderr)
+        return 1
+    for rendition in report['renditions']:
+        line = (f"{rendition['name']:<8} {rendition['width']}x{rendition['height']:<5} "
+                f"{rendition['bytes'] / 1024 ** 2:8.2f} MB {rendition['kbps']:8.0f} kb/s")
+        if 'separate_seconds' in rendition:
+            line += f"  alone {rendition['separate_seconds']:.1f}s"
+        print(f"{line}  {rendition['path']}")
+    print(f"{len(report['renditions'])} renditions from one decode in {report['elapsed']:.1f}s")
+    if report['separate_elapsed'] is not None:
+        print(f"Separately: {report['separate_elapsed']:.1f}s "
+              f"({report['separate_elapsed'] / max(report['elapsed'], 1e-6):.2f}x the shared encode)")
+    return 0
+
+
+def grab_command(args) -> int:
+    """Export selected frames of a range as images in one decoding pass."""
+    from trimmothy.framegrab import FrameGrabExport
+    from trimmothy.video_processor import VideoProcessor
+
+    processor = VideoProcessor()
+    try:
+        start = parse_duration(args.start)
+        end = parse_duration(args.end) if args.end else processor.get_video_info(args.input)['duration']
+        timestamps = [parse_duration(value.strip()) for value in args.at.split(",") if value.strip()] \
+            if args.at else None
+        export = FrameGrabExport(processor, args.input, args.output_dir, start, end, step=args.step,
+                                 timestamps=timestamps, scene_threshold=args.scenes, image_format=args.format,
+                                 quality=args.quality, width=args.width, workers=args.workers)
+    except (RuntimeError, ValueError) as e:
+        print(f"Invalid arguments: {e}", file=sys.stderr)
+        return 1
+
+    report = export.run(lambda fraction: print(f"\r  {fraction * 100:5.1f}%", end="", flush=True))
+    print()
+    if not report['success']:
+        print(f"Frame grab failed: {report.get('error', 'unknown error')}", file=sys.stderr)
+        return 1
+    print(f"{report['images']} images in {report['elapsed']:.1f}s "
+          f"(peak {report['peak_pending_bytes'] / 1024 ** 2:.0f} MB waiting to encode) -> {report['manifest']}")
+    return 0
+
+
+def export_cache_command(args) -> int:
+    """Print export cache usage, or clear it."""
+    from trimmothy.export_cache import ExportCache
+
+    cache = ExportCache()
+    if args.clear:
+        stats = cache.stats()
+        cache.clear()
+        print(f"Removed {stats['entries']} cached exports ({stats['bytes'] / 1024 ** 2:.1f} MB)")
+        return 0
+
+    if args.list:
+        for meta in reversed(cache.entries()):
+            print(f"{meta['key']}  {meta['size'] / 1024 ** 2:8.1f} MB  {meta.get('hits', 0):4d} hits  "
+                  f"{meta.get('strategy', '?'):<20} {time.strftime('%Y-%m-%d %H:%M', time.localtime(meta['last_used']))}")
+    stats = cache.stats()
+    print(f"{stats['entries']} cached exports, {stats['bytes'] / 1024 ** 2:.1f} MB of "
+          f"{stats['max_bytes'] / 1024 ** 2:.0f} MB, reused {stats['stored_hits']} times")
+    return 0
+
+
+def report_command(args) -> int:
+    """Print aggregated export telemetry."""
+    import json
+
+    from trimmothy.telemetry import load_records, summarize
+    from trimmothy.utils import format_duration
+
+    since = time.time() - args.days * 86400 if args.days else None
+    records = load_records(args.file, since=since)
+    if not records:
+        print("No exports recorded yet.")
+        return 0
+
+    summaries = summarize(records, args.by)
+    if args.json:
+        print(json.dumps(summaries, indent=2))
+        return 0
+
+    def factor(value):
+        return f"{value:7.1f}x" if value is not None else "       -"
+
+    print(f"{args.by:<24} {'exports':>7} {'ok':>5} {'fell':>5} {'median':>8} {'p10':>8} {'wall':>7}  media")
+    for summary in summaries:
+        median_wall = f"{summary['median_wall']:6.1f}s" if summary['median_wall'] is not None else "      -"
+        print(f"{summary['group'][:24]:<24} {summary['exports']:>7} {summary['succeeded']:>5} "
+              f"{summary['fell_through']:>5} {factor(summary['median_realtime'])} {factor(summary['p10_realtime'])} "
+              f"{median_wall}  {format_duration(summary['total_media'])}")
+        if args.strategies:
+            for name, strategy in sorted(summary['strategies'].items(), key=lambda item: -item[1]['attempts']):
+                print(f"    {name:<32} {strategy['attempts']:>5} tried  {strategy['ok']:>5} ok  "
+                      f"{strategy['declined']:>5} declined  {strategy['error']:>5} errors  "
+                      f"{strategy['seconds'] / strategy['attempts']:6.2f}s avg")
+    print(f"\n{len(records)} exports. Realtime factor = media duration / wall time; "
+          f"'fell' counts exports where a strategy failed before another succeeded.")
+    return 0
+
+
+def watch_folder(args) -> int:
+    """Run the watch-folder ingest until interrupted."""
+    from trimmothy.watcher import WatchFolder
+
+    watcher = WatchFolder(args.folder, recursive=not args.no_recursive,
+                          on_ingested=lambda path: print(f"Cached {path}"))
+    if args.interval:
+        watcher.POLL_INTERVAL = args.interval
+
+    print(f"Watching {args.folder}")
+    try:
+        watcher.run(once=args.once)
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+def resume_exports(args) -> int:
+    """Offer to resume each interrupted export."""
+    from trimmothy.resumable import ResumableExport
+    from trimmothy.utils import seconds_to_time_string
+    from trimmothy.video_processor import VideoProcessor
+
+    manifests = ResumableExport.find_interrupted()
+    if not manifests:
+        print("No interrupted exports.")
+        return 0
+
+    processor = VideoProcessor()
+    failures = 0
+    for manifest in manifests:
+        done = sum(1 for segment in manifest['segments'] if segment['done'])
+        print(f"{manifest['output_path']}  "
+              f"({seconds_to_time_string(manifest['start_time'])} - {seconds_to_time_string(manifest['end_time'])}, "
+              f"{done}/{len(manifest['segments'])} segments done)")
+        if args.list:
+            continue
+
+        export = ResumableExport.from_manifest(processor, manifest)
+        if args.discard:
+            export.discard()
+            continue
+        if not args.yes and input("  Resume? [y/N] ").strip().lower() != "y":
+            continue
+
+        if export.run(progress_callback=lambda p: print(f"\r  {p * 100:5.1f}%", end="", flush=True)):
+            print("\n  Done")
+        else:
+            print("\n  Failed")
+            failures += 1
+
+    return 1 if failures else 0
+
+
+def main(argv=None):
+    """Main entry point"""
+    # Decode workers are spawned processes; a frozen app re-runs this entry point in them
+    multiprocessing.freeze_support()
+    args = build_parser().parse_args(argv)
+
+    if args.command == "serve":
+        from trimmothy.server import serve
+        serve(socket_path=args.socket, port=args.port, max_workers=args.workers)
+        return 0
+
+    if args.command == "resume":
+        return resume_exports(args)
+
+    if args.command == "watch":
+        return watch_folder(args)
+
+    if args.command == "library":
+        return library_command(args)
+
+    if args.command == "dupes":
+        return dupes_command(args)
+
+    if args.command == "trim":
+        return trim_command(args)
+
+    if args.command == "concat":
+        return concat_command(args)
+
+    if args.command == "renditions":
+        return renditions_command(args)
+
+    if args.command == "grab":
+        return grab_command(args)
+
+    if args.command == "export-cache":
+        return export_cache_command(args)
+
+    if args.command == "report":
+        return report_command(args)
+
+    from trimmothy.main import main as gui_main
+    gui_main()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,254 @@
+"""
+Deadline-driven re-encoding for Trimmothy.
+
+Instead of a fixed x264 preset, the encoder measures how fast the actual
+source encodes on this machine and then picks the slowest (best quality)
+preset and thread count that is still predicted to finish within a
+wall-clock budget. The range is encoded in segments so the choice can be
+revised as the real encode speed becomes known. Setting the cancel event
+stops the running FFmpeg process and skips the remaining segments.
+"""
+
+import os
+import shutil
+import tempfile
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+
+# x264 presets from fastest to slowest
+PRESETS = ['ultrafast', 'superfast', 'veryfast', 'faster', 'fast', 'medium', 'slow', 'slower', 'veryslow']
+
+# Approximate encode throughput of each preset relative to 'medium'
+PRESET_SPEED = {
+    'ultrafast': 8.0,
+    'superfast': 5.5,
+    'veryfast': 3.5,
+    'faster': 2.2,
+    'fast': 1.6,
+    'medium': 1.0,
+    'slow': 0.6,
+    'slower': 0.3,
+    'veryslow': 0.12,
+}
+
+# x264 doesn't scale linearly with threads; speed ~ threads ** THREAD_SCALING
+THREAD_SCALING = 0.8
+
+
+class DeadlineEncoder:
+    """Re-encodes a time range with settings chosen to meet a deadline."""
+
+    SAMPLE_SECONDS = 4.0        # Length of the throughput measurement sample
+    SEGMENT_COUNT = 12          # Number of re-planning points for long ranges
+    MIN_SEGMENT_SECONDS = 15.0  # Don't split ranges into segments shorter than this
+    SAFETY_MARGIN = 0.85        # Plan to use at most this share of the remaining time
+    REFERENCE_PRESET = 'veryfast'
+    SMOOTHING = 0.5             # Weight of the newest speed measurement
+
+    def __init__(self, processor, crf: int = 23):
+        self.processor = processor
+        self.crf = crf
+        self.max_threads = os.cpu_count() or 4
+        # Measured 'medium' preset speed at max_threads, in media seconds per second
+        self.base_speed = None
+        # (preset, threads) chosen for each segment of the last encode
+        self.segment_settings: List[Tuple[str, int]] = []
+
+    def thread_options(self) -> List[int]:
+        """Candidate thread counts, fewest first."""
+        options = {self.max_threads, max(1, self.max_threads * 3 // 4),
+                   max(1, self.max_threads // 2), max(1, self.max_threads // 4)}
+        return sorted(options)
+
+    def predicted_speed(self, preset: str, threads: int) -> float:
+        """Predict encode speed (media seconds per second) for a setting."""
+        scale = (threads / self.max_threads) ** THREAD_SCALING
+        return self.base_speed * PRESET_SPEED[preset] * scale
+
+    def choose_settings(self, media_seconds: float, wall_seconds: float) -> Tuple[str, int]:
+        """
+        Pick the slowest preset and thread count predicted to meet the budget.
+
+        Args:
+            media_seconds: Amount of media still to encode
+            wall_seconds: Wall-clock time left
+
+        Returns:
+            Tuple of (preset, threads)
+        """
+        budget = max(wall_seconds, 0.001) * self.SAFETY_MARGIN
+        for preset in reversed(PRESETS):
+            for threads in self.thread_options():
+                if media_seconds / self.predicted_speed(preset, threads) <= budget:
+                    return preset, threads
+
+        # Nothing fits; go as fast as possible
+        return PRESETS[0], self.max_threads
+
+    def measure_throughput(self, input_path: str, start_time: float, duration: float,
+                           cancel_event: Optional[threading.Event] = None) -> float:
+        """
+        Encode a short sample of the range to calibrate the speed model.
+
+        Args:
+            input_path: Input video file path
+            start_time: Start of the range in seconds
+            duration: Length of the range in seconds
+            cancel_event: Optional event that stops the sample encode when set
+
+        Returns:
+            Measured speed of the reference preset in media seconds per second,
+            or 0.0 if the sample was cancelled
+        """
+        sample = min(self.SAMPLE_SECONDS, duration)
+        sample_start = start_time + (duration - sample) / 2  # Middle of the range is most representative
+
+        cmd = [
+            self.processor.ffmpeg_path,
+            '-y',
+            '-ss', str(sample_start),
+            '-i', input_path,
+            '-t', str(sample),
+            '-an',
+            '-c:v', 'libx264',
+            '-preset', self.REFERENCE_PRESET,
+            '-crf', str(self.crf),
+            '-threads', str(self.max_threads),
+            '-f', 'null', '-'
+        ]
+
+        success, elapsed = self.processor.run_ffmpeg(cmd, cancel_event=cancel_event)
+        if cancel_event is not None and cancel_event.is_set():
+            return 0.0
+        if not success:
+            raise RuntimeError("Throughput sample encode failed")
+
+        speed = sample / max(elapsed, 0.001)
+        self.base_speed = speed / PRESET_SPEED[self.REFERENCE_PRESET]
+        return speed
+
+    def split_segments(self, start_time: float, duration: float) -> List[Tuple[float, float]]:
+        """Split a range into (start, duration) segments."""
+        count = max(1, min(self.SEGMENT_COUNT, int(duration // self.MIN_SEGMENT_SECONDS)))
+        length = duration / count
+        return [(start_time + i * length, length) for i in range(count)]
+
+    def _update_speed(self, preset: str, threads: int, media_seconds: float, elapsed: float):
+        """Fold an observed encode speed back into the model."""
+        observed = media_seconds / max(elapsed, 0.001)
+        scale = PRESET_SPEED[preset] * (threads / self.max_threads) ** THREAD_SCALING
+        observed_base = observed / scale
+        self.base_speed = (self.SMOOTHING * observed_base
+                           + (1 - self.SMOOTHING) * self.base_speed)
+
+    def encode(self,
+               input_path: str,
+               output_path: str,
+               start_time: float,
+               duration: float,
+               video_info: Dict,
+               deadline: Optional[float] = None,
+               progress_callback: Optional[Callable[[float], None]] = None,
+               cancel_event: Optional[threading.Event] = None) -> bool:
+        """
+        Re-encode a range so that it finishes before the deadline.
+
+        Args:
+            input_path: Input video file path
+            output_path: Output video file path
+            start_time: Start time in seconds
+            duration: Length of the range in seconds
+            video_info: Result of VideoProcessor.get_video_info for the input
+            deadline: time.monotonic() value to finish by (defaults to realtime)
+            progress_callback: Optional callback for progress updates (0.0 to 1.0)
+            cancel_event: Optional event that stops the encode when set
+
+        Returns:
+            True if successful, False if it failed or was cancelled
+        """
+        if deadline is None:
+            deadline = time.monotonic() + duration
+
+        def cancelled():
+            return cancel_event is not None and cancel_event.is_set()
+
+        self.segment_settings = []
+        work_dir = tempfile.mkdtemp(prefix="trimmothy_deadline_")
+        try:
+            self.measure_throughput(input_path, start_time, duration, cancel_event)
+            if cancelled():
+                return False
+
+            segments = self.split_segments(start_time, duration)
+            # Leave a little time for the audio pass and the final mux
+            reserve = 2.0 + duration * 0.005
+            segment_paths = []
+            done_media = 0.0
+
+            for index, (segment_start, segment_duration) in enumerate(segments):
+                if cancelled():
+                    return False
+                remaining_media = duration - done_media
+                remaining_wall = deadline - time.monotonic() - reserve
+                preset, threads = self.choose_settings(remaining_media, remaining_wall)
+                self.segment_settings.append((preset, threads))
+
+                segment_path = os.path.join(work_dir, f"segment_{index:03d}.ts")
+                cmd = [
+                    self.processor.ffmpeg_path,
+                    '-y',
+                    '-ss', str(segment_start),
+                    '-i', input_path,
+                    '-t', str(segment_duration),
+                    '-map', '0:v:0',
+                    '-an',
+                    '-c:v', 'libx264',
+                    '-preset', preset,
+                    '-crf', str(self.crf),
+                    '-threads', str(threads),
+                    '-profile:v', 'high',
+                    '-pix_fmt', 'yuv420p',
+                    segment_path
+                ]
+
+                def on_progress(fraction, speed, done=done_media, length=segment_duration):
+                    if progress_callback:
+                        overall = (done + fraction * length) / duration
+                        progress_callback(0.1 + 0.8 * overall)
+
+                success, elapsed = self.processor.run_ffmpeg(cmd, segment_duration, on_progress, cancel_event)
+                if not success or cancelled():
+                    return False
+
+                self._update_speed(preset, threads, segment_duration, elapsed)
+                segment_paths.append(segment_path)
+                done_media += segment_duration
+
+            audio_path = None
+            if video_info.get('audio_codec'):
+                audio_path = os.path.join(work_dir, "audio.m4a")
+                cmd = [
+                    self.processor.ffmpeg_path,
+                    '-y',
+                    '-ss', str(start_time),
+                    '-i', input_path,
+                    '-t', str(duration),
+                    '-map', '0:a:0',
+                    '-vn',
+                    '-c:a', 'aac',
+                    '-b:a', '128k',
+                    audio_path
+                ]
+                success, _ = self.processor.run_ffmpeg(cmd, cancel_event=cancel_event)
+                if not success or cancelled():
+                    return False
+
+            if progress_callback:
+                progress_callback(0.95)
+
+            return self.processor.concat_segments(segment_paths, output_path, audio_path)
+
+        finally:
+            shutil.rmtree(work_dir, ignore_errors=True)
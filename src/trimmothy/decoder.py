@@ -0,0 +1,326 @@
+"""
+Out-of-process frame decoding for Trimmothy.
+
+Each source gets a worker process that owns its OpenCV capture and answers
+small seek/read commands sent over a pipe. Decoded frames are scaled to the
+preview size and converted to RGB inside the worker, straight into a ring of
+slots in `multiprocessing.shared_memory`; the reply only names the slot, so
+no pixel data is pickled or copied and the UI thread never holds the GIL for
+a decode or a colour conversion.
+
+A worker that crashes or stops answering is killed and restarted on the same
+shared memory, so a misbehaving codec costs one retried read instead of the
+whole app.
+"""
+
+import multiprocessing
+import signal
+import threading
+import time
+from multiprocessing.shared_memory import SharedMemory
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+
+
+class DecoderError(RuntimeError):
+    """Raised when a source can't be decoded, even after restarting its worker."""
+
+
+def _fit(width: int, height: int, max_width: int, max_height: int) -> Tuple[int, int]:
+    """Preview size of a frame, scaled down (never up) to fit the bounds."""
+    scale = min(max_width / width, max_height / height, 1.0)
+    return max(int(width * scale), 1), max(int(height * scale), 1)
+
+
+def _worker_main(conn, video_path: str, max_width: int, max_height: int):
+    """Decode worker: owns the capture and writes RGB frames into the shared ring."""
+    import cv2
+
+    # Ctrl+C in the terminal is for the app; the app shuts the worker down
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+    cap = cv2.VideoCapture(video_path)
+    if not cap.isOpened():
+        conn.send(('error', "Could not open video file"))
+        return
+
+    width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
+    height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+    fps = cap.get(cv2.CAP_PROP_FPS) or 30.0
+    frame_count = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+    out_width, out_height = _fit(width, height, max_width, max_height)
+    conn.send(('ready', {
+        'width': width,
+        'height': height,
+        'fps': fps,
+        'frame_count': frame_count,
+        'duration': frame_count / fps if fps > 0 else 0,
+        'frame_width': out_width,
+        'frame_height': out_height,
+    }))
+
+    shm = None
+    frames = None
+    try:
+        command = conn.recv()
+        if command[0] != 'attach':
+            return
+        _, name, slots = command
+        shm = SharedMemory(name=name, track=False)
+        frames = np.ndarray((slots, out_height, out_width, 3), dtype=np.uint8, buffer=shm.buf)
+
+        position = 0  # Frame the next cap.read() returns without seeking
+        while True:
+            command = conn.recv()
+            if command[0] != 'read':
+                break
+            _, frame_number, slot = command
+            if frame_number != position:
+                cap.set(cv2.CAP_PROP_POS_FRAMES, frame_number)
+            ok, frame = cap.read()
+            if not ok:
+                position = -1
+                conn.send(('eof', frame_number))
+                continue
+            position = frame_number + 1
+
+            target = frames[slot]
+            if frame.shape[1] != out_width or frame.shape[0] != out_height:
+                cv2.resize(frame, (out_width, out_height), dst=target, interpolation=cv2.INTER_AREA)
+                cv2.cvtColor(target, cv2.COLOR_BGR2RGB, dst=target)
+            else:
+                cv2.cvtColor(frame, cv2.COLOR_BGR2RGB, dst=target)
+            conn.send(('frame', frame_number, slot))
+    except (EOFError, OSError):
+        pass  # The app went away
+    finally:
+        del frames
+        if shm is not None:
+            shm.close()
+        cap.release()
+
+
+class DecodeWorker:
+    """Client side of one source's decode worker process."""
+
+    SLOTS = 4               # Frames in the shared ring
+    START_TIMEOUT = 20.0    # Seconds a new worker may take to open the source
+    READ_TIMEOUT = 5.0      # Seconds before a silent worker is considered hung
+    MAX_RESTARTS = 3        # Restarts before the source is given up on
+
+    def __init__(self, video_path: str, max_width: int = 600, max_height: int = 400,
+                 slots: Optional[int] = None):
+        """
+        Args:
+            video_path: Source file
+            max_width: Maximum width of delivered frames
+            max_height: Maximum height of delivered frames
+            slots: Number of frames in the shared ring
+        """
+        self.video_path = video_path
+        self.max_width = max_width
+        self.max_height = max_height
+        self.slots = slots or self.SLOTS
+        self.properties: Optional[Dict] = None
+
+        self._context = multiprocessing.get_context("spawn")
+        self._lock = threading.RLock()
+        self._process = None
+        self._conn = None
+        self._shm: Optional[SharedMemory] = None
+        self._frames: Optional[np.ndarray] = None
+        self._next_slot = 0
+        self._pending: Optional[Tuple[int, int]] = None  # (frame_number, slot) requested but not received
+        self._closed = False
+
+        self.reads = 0
+        self.prefetch_hits = 0
+        self.restarts = 0
+        self.read_seconds = 0.0
+
+    @property
+    def ready(self) -> bool:
+        return self._process is not None and self._frames is not None
+
+    @property
+    def closed(self) -> bool:
+        return self._closed
+
+    @property
+    def nbytes(self) -> int:
+        """Size of the shared frame ring."""
+        shm = self._shm
+        return shm.size if shm is not None else 0
+
+    def start(self) -> Dict:
+        """
+        Start the worker and wait until it has opened the source.
+
+        Returns:
+            Source properties: width, height, fps, frame_count, duration and the
+            delivered frame_width/frame_height
+
+        Raises:
+            DecoderError: If the source can't be opened
+        """
+        with self._lock:
+            if not self.ready:
+                self._spawn()
+            return self.properties
+
+    def _spawn(self):
+        """Launch a worker and attach it to the ring, creating the ring on first start."""
+        if self._closed:
+            raise DecoderError("Decoder is closed")
+        conn, child_conn = self._context.Pipe()
+        process = self._context.Process(
+            target=_worker_main, args=(child_conn, self.video_path, self.max_width, self.max_height),
+            name="trimmothy-decoder", daemon=True
+        )
+        process.start()
+        child_conn.close()
+        self._process, self._conn = process, conn
+
+        try:
+            reply = self._receive(self.START_TIMEOUT)
+        except DecoderError:
+            self._kill()
+            raise
+        if reply[0] != 'ready':
+            self._kill()
+            raise DecoderError(reply[1] if len(reply) > 1 else "Decoder failed to start")
+        properties = reply[1]
+
+        if self._shm is None:
+            self.properties = properties
+            size = self.slots * properties['frame_height'] * properties['frame_width'] * 3
+            self._shm = SharedMemory(create=True, size=max(size, 1))
+            self._frames = np.ndarray((self.slots, properties['frame_height'], properties['frame_width'], 3),
+                                      dtype=np.uint8, buffer=self._shm.buf)
+        self._conn.send(('attach', self._shm.name, self.slots))
+
+    def _receive(self, timeout: float):
+        """Wait for a reply; a dead or silent worker raises DecoderError."""
+        if not self._conn.poll(timeout):
+            raise DecoderError("Decoder stopped responding")
+        try:
+            return self._conn.recv()
+        except (EOFError, OSError):
+            raise DecoderError("Decoder exited unexpectedly")
+
+    def _kill(self):
+        """Stop the current worker process, forcefully if needed."""
+        process, conn = self._process, self._conn
+        self._process, self._conn, self._pending = None, None, None
+        if conn is not None:
+            try:
+                conn.send(('close',))
+            except (OSError, ValueError):
+                pass
+            conn.close()
+        if process is not None:
+            process.join(0.5)
+            if process.is_alive():
+                process.kill()
+                process.join(1.0)
+
+    def _restart(self, reason: str):
+        """Replace a failed worker, giving up after MAX_RESTARTS."""
+        self._kill()
+        self.restarts += 1
+        if self.restarts > self.MAX_RESTARTS:
+            raise DecoderError(f"Decoder failed too often: {reason}")
+        print(f"Decoder restart ({reason}): {self.video_path}")
+        self._spawn()
+
+    def _request(self, frame_number: int) -> int:
+        slot = self._next_slot
+        self._next_slot = (slot + 1) % self.slots
+        self._conn.send(('read', frame_number, slot))
+        self._pending = (frame_number, slot)
+        return slot
+
+    def prefetch(self, frame_number: int):
+        """
+        Ask the worker to start decoding a frame that read() will want next.
+
+        The decode overlaps with whatever the caller does in the meantime, e.g.
+        waiting for the next playback tick.
+        """
+        with self._lock:
+            if not self.ready or self._pending is not None:
+                return
+            try:
+                self._request(frame_number)
+            except (OSError, ValueError):
+                self._pending = None
+
+    def read(self, frame_number: int) -> Optional[np.ndarray]:
+        """
+        Decode one frame.
+
+        Args:
+            frame_number: Frame to decode; reading consecutive frames avoids seeks
+
+        Returns:
+            RGB frame as a read-only view into the shared ring (valid until
+            SLOTS - 1 further reads), or None past the end of the video
+
+        Raises:
+            DecoderError: If the worker keeps failing
+        """
+        with self._lock:
+            if not self.ready:
+                self._spawn()
+            started = time.monotonic()
+            for attempt in range(2):
+                try:
+                    reply = self._read_reply(frame_number)
+                    break
+                except (DecoderError, OSError, ValueError) as e:
+                    if attempt:
+                        raise DecoderError(str(e))
+                    self._restart(str(e))
+
+            self.reads += 1
+            self.read_seconds += time.monotonic() - started
+            if reply[0] != 'frame':
+                return None
+            frame = self._frames[reply[2]]
+            frame.flags.writeable = False
+            return frame
+
+    def _read_reply(self, frame_number: int):
+        """Collect the reply for a frame, reusing a matching prefetch."""
+        if self._pending is not None:
+            pending_frame, _ = self._pending
+            reply = self._receive(self.READ_TIMEOUT)
+            self._pending = None
+            if pending_frame == frame_number:
+                self.prefetch_hits += 1
+                return reply
+        self._request(frame_number)
+        reply = self._receive(self.READ_TIMEOUT)
+        self._pending = None
+        return reply
+
+    def close(self):
+        """Stop the worker and free the shared ring."""
+        with self._lock:
+            self._closed = True
+            self._kill()
+            self._frames = None
+            if self._shm is not None:
+                self._shm.close()
+                self._shm.unlink()
+                self._shm = None
+
+    def metrics(self) -> Dict:
+        """Return read counts, prefetch hits, restarts and the average read latency."""
+        return {
+            'reads': self.reads,
+            'prefetch_hits': self.prefetch_hits,
+            'restarts': self.restarts,
+            'average_read_ms': 1000 * self.read_seconds / self.reads if self.reads else None,
+        }
@@ -0,0 +1,324 @@
+"""
+Content-addressed cache of finished exports for Trimmothy.
+
+Batch jobs get re-run after a job-file edit or a crash, and every identical
+export used to be encoded again. `VideoProcessor.trim_video` now looks up a
+key built from a fast content fingerprint of the source (its size, a few
+sampled blocks and, for MP4/MOV, the whole `moov` index, so a copied or
+touched file still matches), the exact range,
+the strategy plan, the encoder settings, the output container and the FFmpeg
+version. A matching entry is materialized at the output path by reflink or
+hardlink where the filesystem allows it and a plain copy otherwise, instead
+of encoding.
+
+Entries are files in `<cache>/renders`, each with a small JSON sidecar that
+records its size, strategy and hit count. The sidecar's modification time is
+the entry's last use; the least recently used entries are evicted whenever
+the cache grows past its disk budget. An entry whose file was changed after
+it was stored (e.g. a hardlinked output edited in place) is dropped.
+
+A source rewritten in place at the same size is only told apart if one of
+the sampled blocks or the index changed. Any re-encode or remux rewrites the
+MP4 index, but a byte-level patch of media data between the samples (or of
+a fragmented MP4's fragments) goes unnoticed. Exports of such sources can
+skip the cache with `trim_video(..., use_export_cache=False)` or
+`trimmothy trim --no-cache`.
+"""
+
+import hashlib
+import json
+import os
+import shutil
+import struct
+import threading
+import time
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from trimmothy.cache import get_cache_dir, load_json, store_json
+
+
+# Bump when the strategies' command lines change, so old renders stop matching
+CACHE_VERSION = 1
+SAMPLE_BLOCKS = 16            # Blocks hashed for a source fingerprint
+SAMPLE_BLOCK_SIZE = 64 * 1024
+MAX_INDEX_BYTES = 64 * 1024 ** 2   # Most of a moov box hashed; an hour of video needs a few MB
+MAX_TOP_LEVEL_BOXES = 64           # Boxes walked looking for moov before giving up
+FICLONE = 0x40049409          # Linux ioctl that shares extents between two files
+
+_evict_lock = threading.Lock()
+
+
+def export_cache_enabled() -> bool:
+    """The export cache is on unless TRIMMOTHY_EXPORT_CACHE is set to 0."""
+    return os.environ.get("TRIMMOTHY_EXPORT_CACHE", "1") != "0"
+
+
+def source_fingerprint(file_path: str) -> str:
+    """
+    Fingerprint a file's content from its size, evenly spaced sample blocks and its MP4 index.
+
+    Reads SAMPLE_BLOCKS * SAMPLE_BLOCK_SIZE bytes plus the `moov` box (sample
+    sizes, offsets and timing) of MP4/MOV files, so remuxes and re-encodes
+    that keep the file size still change the fingerprint. Unlike
+    `cache.source_key`, the path and modification time don't matter, so
+    copies and touched files share a fingerprint.
+
+    Args:
+        file_path: Path to the file
+
+    Returns:
+        Hex digest
+    """
+    size = os.path.getsize(file_path)
+    digest = hashlib.sha1(str(size).encode("ascii"))
+    with open(file_path, "rb") as f:
+        if size <= SAMPLE_BLOCKS * SAMPLE_BLOCK_SIZE:
+            digest.update(f.read())
+        else:
+            step = (size - SAMPLE_BLOCK_SIZE) // (SAMPLE_BLOCKS - 1)
+            for index in range(SAMPLE_BLOCKS):
+                f.seek(index * step)
+                digest.update(f.read(SAMPLE_BLOCK_SIZE))
+            moov = _mp4_index_range(f, size)
+            if moov is not None:
+                offset, length = moov
+                f.seek(offset)
+                digest.update(f.read(min(length, MAX_INDEX_BYTES)))
+    return digest.hexdigest()
+
+
+def _mp4_index_range(f, size: int) -> Optional[Tuple[int, int]]:
+    """Offset and length of the top-level moov box, or None if the file isn't an MP4/MOV."""
+    offset = 0
+    for _ in range(MAX_TOP_LEVEL_BOXES):
+        if offset + 8 > size:
+            return None
+        f.seek(offset)
+        header = f.read(16)
+        box_size, box_type = struct.unpack(">I4s", header[:8])
+        if box_size == 1 and len(header) == 16:
+            box_size = struct.unpack(">Q", header[8:16])[0]
+        elif box_size == 0:
+            box_size = size - offset
+        if box_size < 8 or not box_type.isalnum():
+            return None   # Not a box structure
+        if box_type == b"moov":
+            return offset, box_size
+        offset += box_size
+    return None
+
+
+def clone_file(source: str, destination: str) -> str:
+    """
+    Make destination a copy of source as cheaply as the filesystem allows.
+
+    Tries a reflink (copy-on-write clone), then a hardlink, then a regular
+    copy. The destination appears atomically.
+
+    Returns:
+        "reflink", "hardlink" or "copy"
+    """
+    tmp_path = f"{destination}.{os.getpid()}.tmp"
+    method = None
+    try:
+        try:
+            import fcntl
+
+            with open(source, "rb") as src, open(tmp_path, "wb") as dst:
+                fcntl.ioctl(dst.fileno(), FICLONE, src.fileno())
+            method = "reflink"
+        except (ImportError, OSError):
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+            try:
+                os.link(source, tmp_path)
+                method = "hardlink"
+            except OSError:
+                shutil.copyfile(source, tmp_path)
+                method = "copy"
+        os.replace(tmp_path, destination)
+    except OSError:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+        raise
+    return method
+
+
+class ExportCache:
+    """Finished exports keyed by source content, range and settings, under a disk budget."""
+
+    MAX_BYTES = 10 * 1024 ** 3
+
+    def __init__(self, directory: Optional[Path] = None, max_bytes: Optional[int] = None):
+        """
+        Args:
+            directory: Cache directory; defaults to "renders" in the cache directory
+            max_bytes: Disk budget; TRIMMOTHY_EXPORT_CACHE_MB overrides the default
+        """
+        self.directory = Path(directory) if directory else get_cache_dir() / "renders"
+        self.directory.mkdir(parents=True, exist_ok=True)
+        if max_bytes is None and os.environ.get("TRIMMOTHY_EXPORT_CACHE_MB"):
+            max_bytes = int(float(os.environ["TRIMMOTHY_EXPORT_CACHE_MB"]) * 1024 ** 2)
+        self.max_bytes = max_bytes or self.MAX_BYTES
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def make_key(input_path: str, start_time: float, duration: float, extension: str,
+                 strategies: List[str], settings: Dict) -> str:
+        """
+        Build the cache key of an export.
+
+        Args:
+            input_path: Source video
+            start_time: Start of the range, after snapping to frame times
+            duration: Length of the range
+            extension: Output file extension, which picks the container
+            strategies: Names of the strategies trim_video will try, in order
+            settings: Encoder settings and anything else that changes the output
+
+        Returns:
+            Hex key
+        """
+        identity = json.dumps({
+            'version': CACHE_VERSION,
+            'source': source_fingerprint(input_path),
+            'start': round(start_time, 6),
+            'duration': round(duration, 6),
+            'extension': extension.lower(),
+            'strategies': strategies,
+            'settings': settings,
+        }, sort_keys=True)
+        return hashlib.sha256(identity.encode("utf-8")).hexdigest()[:32]
+
+    def _paths(self, key: str):
+        return self.directory / f"{key}.bin", self.directory / f"{key}.json"
+
+    def lookup(self, key: str) -> Optional[Dict]:
+        """
+        Find a stored export.
+
+        Returns:
+            The entry's metadata, or None if missing or stale
+        """
+        data_path, meta_path = self._paths(key)
+        meta = load_json(meta_path)
+        try:
+            stat = data_path.stat() if meta else None
+        except OSError:
+            stat = None
+        if stat is None or stat.st_size != meta.get('size') or stat.st_mtime_ns != meta.get('mtime_ns'):
+            if meta:
+                self.remove(key)
+            self.misses += 1
+            return None
+        self.hits += 1
+        return meta
+
+    def materialize(self, key: str, output_path: str) -> Optional[str]:
+        """
+        Place a stored export at output_path.
+
+        Returns:
+            How it was placed ("reflink", "hardlink" or "copy"), or None on a miss
+        """
+        meta = self.lookup(key)
+        if meta is None:
+            return None
+        data_path, meta_path = self._paths(key)
+        try:
+            method = clone_file(str(data_path), output_path)
+        except OSError as e:
+            print(f"Export cache copy failed: {e}")
+            return None
+        meta['hits'] = meta.get('hits', 0) + 1
+        meta['last_hit'] = time.time()
+        store_json(meta_path, meta)   # Also marks the entry as recently used
+        return method
+
+    def store(self, key: str, output_path: str, info: Optional[Dict] = None) -> bool:
+        """
+        Add a finished export, then evict old entries over the budget.
+
+        Args:
+            key: Key from make_key()
+            output_path: The finished file
+            info: Extra metadata to keep, e.g. the strategy that produced it
+
+        Returns:
+            True if stored
+        """
+        data_path, meta_path = self._paths(key)
+        try:
+            size = os.path.getsize(output_path)
+            if size > self.max_bytes:
+                return False
+            clone_file(output_path, str(data_path))
+            stat = data_path.stat()
+            meta = dict(info or {})
+            meta.update({'key': key, 'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns,
+                         'created': time.time(), 'hits': 0})
+            store_json(meta_path, meta)
+        except OSError as e:
+            print(f"Export cache store failed: {e}")
+            return False
+        self.evict()
+        return True
+
+    def remove(self, key: str):
+        for path in self._paths(key):
+            try:
+                path.unlink()
+            except OSError:
+                pass
+
+    def entries(self) -> List[Dict]:
+        """Metadata of every entry, least recently used first."""
+        entries = []
+        for meta_path in self.directory.glob("*.json"):
+            meta = load_json(meta_path)
+            if not meta or 'key' not in meta:
+                continue
+            try:
+                meta['last_used'] = meta_path.stat().st_mtime
+            except OSError:
+                continue
+            entries.append(meta)
+        return sorted(entries, key=lambda meta: meta['last_used'])
+
+    def evict(self, max_bytes: Optional[int] = None) -> int:
+        """
+        Remove least recently used entries until the cache fits the budget.
+
+        Returns:
+            Number of entries removed
+        """
+        budget = self.max_bytes if max_bytes is None else max_bytes
+        with _evict_lock:
+            entries = self.entries()
+            total = sum(meta['size'] for meta in entries)
+            removed = 0
+            for meta in entries:
+                if total <= budget:
+                    break
+                self.remove(meta['key'])
+                total -= meta['size']
+                removed += 1
+            return removed
+
+    def stats(self) -> Dict:
+        """Return entry count, bytes used, budget and hit counts."""
+        entries = self.entries()
+        return {
+            'entries': len(entries),
+            'bytes': sum(meta['size'] for meta in entries),
+            'max_bytes': self.max_bytes,
+            'stored_hits': sum(meta.get('hits', 0) for meta in entries),
+            'hits': self.hits,
+            'misses': self.misses,
+        }
+
+    def clear(self):
+        """Remove every entry."""
+        self.evict(0)
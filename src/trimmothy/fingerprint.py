@@ -0,0 +1,390 @@
+"""
+Perceptual fingerprints for finding duplicate and re-encoded videos.
+
+Each file is reduced to a fixed set of downscaled frames taken from the
+timeline thumbnails (so files already opened in the GUI or ingested by the
+watch folder cost nothing extra) and every frame is turned into a 64-bit DCT
+perceptual hash. The hashes of one file form a 512-bit fingerprint that
+survives re-encoding, rescaling and bitrate changes.
+
+Fingerprints are stored next to the media library in SQLite and loaded into
+one packed NumPy array, so "which files match this one" is a single
+vectorized XOR and popcount over the whole index - a few milliseconds for
+tens of thousands of files. Grouping all duplicates uses multi-index hashing:
+files are bucketed by 16-bit bands of their hashes and only files sharing a
+band are compared.
+"""
+
+import os
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from trimmothy.library import MediaLibrary, get_library_path, _prefix_bounds
+from trimmothy.video_processor import VideoProcessor
+
+
+SAMPLE_COUNT = 8        # Frames per file; matches the GUI timeline so cached thumbnails are reused
+SAMPLE_WIDTH = 120      # Thumbnail width the frames are taken at
+HASH_SIZE = 32          # Frames are reduced to HASH_SIZE x HASH_SIZE before the DCT
+FINGERPRINT_BYTES = SAMPLE_COUNT * 8
+FINGERPRINT_BITS = FINGERPRINT_BYTES * 8
+MATCH_DISTANCE = 64     # Default maximum Hamming distance (out of FINGERPRINT_BITS) for a match
+FLAT_THRESHOLD = 2.0    # Frames with less contrast than this (e.g. black) hash to all zeros
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS fingerprints (
+    path TEXT PRIMARY KEY,
+    size INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    hash BLOB,
+    computed REAL NOT NULL,
+    error TEXT
+);
+"""
+
+# Number of set bits in every byte value
+POPCOUNT = np.array([bin(value).count("1") for value in range(256)], dtype=np.uint8)
+
+
+def _dct_matrix(size: int) -> np.ndarray:
+    """Orthonormal DCT-II basis, so a 2D DCT is two matrix products."""
+    n = np.arange(size)
+    matrix = np.cos(np.pi * (2 * n[None, :] + 1) * n[:, None] / (2 * size)) * np.sqrt(2 / size)
+    matrix[0] /= np.sqrt(2)
+    return matrix.astype(np.float32)
+
+
+DCT = _dct_matrix(HASH_SIZE)
+
+
+def hash_frames(frames: np.ndarray) -> np.ndarray:
+    """
+    Compute 64-bit perceptual hashes of a batch of frames.
+
+    Args:
+        frames: Grayscale frames shaped (count, HASH_SIZE, HASH_SIZE)
+
+    Returns:
+        uint8 array shaped (count, 8), one packed hash per frame
+    """
+    frames = frames.astype(np.float32)
+    coefficients = np.einsum('ij,fjk,lk->fil', DCT, frames, DCT)
+    low = coefficients[:, :8, :8].reshape(len(frames), 64)
+    # The DC term only tracks brightness, so it's left out of the median
+    median = np.median(low[:, 1:], axis=1)
+    bits = low > median[:, None]
+    bits[frames.std(axis=(1, 2)) < FLAT_THRESHOLD] = False
+    return np.packbits(bits, axis=1)
+
+
+def hamming_distances(hashes: np.ndarray, fingerprint: np.ndarray) -> np.ndarray:
+    """Hamming distance between one fingerprint and every row of a packed array."""
+    return POPCOUNT[np.bitwise_xor(hashes, fingerprint)].sum(axis=1, dtype=np.uint16)
+
+
+class FingerprintIndex:
+    """Perceptual fingerprints of video files with fast near-duplicate lookup."""
+
+    BATCH_SIZE = 200    # Rows written per transaction during a scan
+    MAX_BUCKET = 64     # Bands shared by more files than this carry no information and are skipped
+
+    def __init__(self, db_path: Optional[str] = None, processor: Optional[VideoProcessor] = None,
+                 max_workers: Optional[int] = None):
+        """
+        Args:
+            db_path: Database file; defaults to the media library database
+            processor: VideoProcessor used to extract sample frames
+            max_workers: Number of files fingerprinted at once
+        """
+        self.db_path = str(db_path or get_library_path())
+        self.processor = processor or VideoProcessor()
+        self.max_workers = max_workers or min(4, os.cpu_count() or 2)
+        self._local = threading.local()
+
+        # Packed fingerprints of every indexed file, loaded on first lookup
+        self._lock = threading.Lock()
+        self._paths: Optional[List[str]] = None
+        self._hashes: Optional[np.ndarray] = None
+
+        with self._connect() as db:
+            db.executescript(SCHEMA)
+
+    def _connect(self) -> sqlite3.Connection:
+        """Get this thread's connection (SQLite connections can't be shared across threads)."""
+        db = getattr(self._local, "db", None)
+        if db is None:
+            db = sqlite3.connect(self.db_path, timeout=30)
+            db.execute("PRAGMA journal_mode = WAL")
+            db.execute("PRAGMA synchronous = NORMAL")
+            self._local.db = db
+        return db
+
+    def close(self):
+        """Close this thread's connection."""
+        db = getattr(self._local, "db", None)
+        if db is not None:
+            db.close()
+            self._local.db = None
+
+    def fingerprint(self, path: str) -> np.ndarray:
+        """
+        Compute the fingerprint of one file.
+
+        Args:
+            path: Video file path
+
+        Returns:
+            uint8 array of FINGERPRINT_BYTES bytes
+
+        Raises:
+            RuntimeError: If the sample frames can't be extracted
+        """
+        from PIL import Image
+
+        thumbnails = self.processor.cache_thumbnails(path, count=SAMPLE_COUNT, width=SAMPLE_WIDTH)
+        if len(thumbnails) != SAMPLE_COUNT:
+            raise RuntimeError("could not extract sample frames")
+
+        frames = np.empty((SAMPLE_COUNT, HASH_SIZE, HASH_SIZE), dtype=np.uint8)
+        for i, thumbnail in enumerate(thumbnails):
+            with Image.open(thumbnail) as image:
+                frames[i] = np.asarray(image.convert("L").resize((HASH_SIZE, HASH_SIZE), Image.BILINEAR))
+        return hash_frames(frames).reshape(-1)
+
+    def _compute(self, path: str, size: int, mtime_ns: int) -> Tuple:
+        """Fingerprint one file into a database row; failures are stored so they aren't retried."""
+        try:
+            return (path, size, mtime_ns, self.fingerprint(path).tobytes(), time.time(), None)
+        except Exception as e:
+            return (path, size, mtime_ns, None, time.time(), str(e))
+
+    def scan(self, roots: List[str], recursive: bool = True, remove_missing: bool = True,
+             progress_callback: Optional[Callable[[int, int], None]] = None,
+             cancel_event: Optional[threading.Event] = None) -> Dict:
+        """
+        Fingerprint every new or changed video file under the given directories.
+
+        Args:
+            roots: Directories to scan
+            recursive: Include subdirectories
+            remove_missing: Drop fingerprints of files under the roots that no longer exist
+            progress_callback: Optional callback receiving (files done, files to fingerprint)
+            cancel_event: Optional event that stops the scan; finished rows are kept
+
+        Returns:
+            Dictionary with counts of found, fingerprinted, unchanged, removed and failed files
+        """
+        db = self._connect()
+        stats = {'found': 0, 'fingerprinted': 0, 'unchanged': 0, 'removed': 0, 'failed': 0}
+
+        for root in roots:
+            root = os.path.abspath(root)
+            low, high = _prefix_bounds(root.rstrip(os.sep) + os.sep)
+            known = {path: (size, mtime_ns) for path, size, mtime_ns in db.execute(
+                "SELECT path, size, mtime_ns FROM fingerprints WHERE path >= ? AND path < ?", (low, high))}
+
+            changed = []
+            seen = set()
+            for path, size, mtime_ns in MediaLibrary.walk(root, recursive):
+                seen.add(path)
+                if known.get(path) == (size, mtime_ns):
+                    stats['unchanged'] += 1
+                else:
+                    changed.append((path, size, mtime_ns))
+            stats['found'] += len(seen)
+
+            if remove_missing:
+                gone = [(path,) for path in known if path not in seen]
+                if not recursive:
+                    gone = [(path,) for (path,) in gone if os.path.dirname(path) == root]
+                with db:
+                    db.executemany("DELETE FROM fingerprints WHERE path = ?", gone)
+                stats['removed'] += len(gone)
+
+            self._compute_all(db, changed, stats, progress_callback, cancel_event)
+            if cancel_event is not None and cancel_event.is_set():
+                break
+
+        self.invalidate()
+        return stats
+
+    def _compute_all(self, db: sqlite3.Connection, files: List[Tuple[str, int, int]], stats: Dict,
+                     progress_callback, cancel_event):
+        """Fingerprint files on the thread pool and write the rows in batches."""
+        if not files:
+            return
+        insert = "INSERT OR REPLACE INTO fingerprints (path, size, mtime_ns, hash, computed, error) VALUES (?, ?, ?, ?, ?, ?)"
+        batch = []
+        done = 0
+
+        with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="trimmothy-fingerprint") as executor:
+            futures = [executor.submit(self._compute, *file) for file in files]
+            try:
+                for future in as_completed(futures):
+                    row = future.result()
+                    batch.append(row)
+                    done += 1
+                    stats['fingerprinted'] += 1
+                    if row[-1] is not None:
+                        stats['failed'] += 1
+
+                    if len(batch) >= self.BATCH_SIZE:
+                        with db:
+                            db.executemany(insert, batch)
+                        batch = []
+                    if progress_callback:
+                        progress_callback(done, len(files))
+                    if cancel_event is not None and cancel_event.is_set():
+                        for pending in futures:
+                            pending.cancel()
+                        break
+            finally:
+                if batch:
+                    with db:
+                        db.executemany(insert, batch)
+
+    def invalidate(self):
+        """Drop the in-memory array so the next lookup reloads it from the database."""
+        with self._lock:
+            self._paths = None
+            self._hashes = None
+
+    def _load(self) -> Tuple[List[str], np.ndarray]:
+        """Load every stored fingerprint into one packed array."""
+        with self._lock:
+            if self._hashes is None:
+                rows = self._connect().execute(
+                    "SELECT path, hash FROM fingerprints WHERE hash IS NOT NULL ORDER BY path").fetchall()
+                self._paths = [path for path, _ in rows]
+                self._hashes = (np.frombuffer(b"".join(blob for _, blob in rows), dtype=np.uint8)
+                                .reshape(len(rows), FINGERPRINT_BYTES))
+            return self._paths, self._hashes
+
+    def __len__(self) -> int:
+        return len(self._load()[0])
+
+    def lookup(self, fingerprint: np.ndarray, max_distance: int = MATCH_DISTANCE,
+               limit: Optional[int] = None) -> List[Tuple[str, int]]:
+        """
+        Find indexed files close to a fingerprint.
+
+        Args:
+            fingerprint: Fingerprint from fingerprint()
+            max_distance: Maximum Hamming distance in bits
+            limit: Maximum number of results
+
+        Returns:
+            List of (path, distance), closest first
+        """
+        paths, hashes = self._load()
+        if not paths:
+            return []
+        distances = hamming_distances(hashes, np.asarray(fingerprint, dtype=np.uint8))
+        matches = np.flatnonzero(distances <= max_distance)
+        matches = matches[np.argsort(distances[matches], kind="stable")]
+        if limit:
+            matches = matches[:limit]
+        return [(paths[i], int(distances[i])) for i in matches]
+
+    def matches(self, path: str, max_distance: int = MATCH_DISTANCE,
+                limit: Optional[int] = None) -> List[Tuple[str, int]]:
+        """
+        Find indexed files that are duplicates or re-encodes of a file.
+
+        Uses the stored fingerprint when the file is indexed and unchanged and
+        computes it otherwise.
+
+        Args:
+            path: Video file path
+            max_distance: Maximum Hamming distance in bits
+            limit: Maximum number of results
+
+        Returns:
+            List of (path, distance), closest first, without the file itself
+        """
+        path = os.path.abspath(path)
+        row = self._connect().execute("SELECT size, mtime_ns, hash FROM fingerprints WHERE path = ?",
+                                      (path,)).fetchone()
+        stat = os.stat(path)
+        if row and row[2] is not None and (row[0], row[1]) == (stat.st_size, stat.st_mtime_ns):
+            fingerprint = np.frombuffer(row[2], dtype=np.uint8)
+        else:
+            fingerprint = self.fingerprint(path)
+
+        results = self.lookup(fingerprint, max_distance, limit + 1 if limit else None)
+        results = [(match, distance) for match, distance in results if match != path]
+        return results[:limit] if limit else results
+
+    def groups(self, max_distance: int = MATCH_DISTANCE) -> List[List[Tuple[str, int]]]:
+        """
+        Group all indexed files into sets of duplicates.
+
+        Candidate pairs come from files sharing one of the 16-bit bands of
+        their hashes (a re-encode keeps most frame hashes within a few bits,
+        so at least one band survives intact) and are then checked against
+        the full fingerprint distance.
+
+        Args:
+            max_distance: Maximum Hamming distance in bits
+
+        Returns:
+            List of groups, largest first; each group lists (path, distance to
+            the group's first file)
+        """
+        paths, hashes = self._load()
+        if len(paths) < 2:
+            return []
+
+        bands = np.ascontiguousarray(hashes).view(np.uint16)
+        left, right = [], []
+        for band in bands.T:
+            order = np.argsort(band, kind="stable")
+            values = band[order]
+            starts = np.flatnonzero(np.r_[True, values[1:] != values[:-1]])
+            sizes = np.diff(np.r_[starts, len(values)])
+            usable = np.repeat(sizes <= self.MAX_BUCKET, sizes)
+            # Pair every file with the ones 1, 2, ... places after it in the same bucket
+            for offset in range(1, min(int(sizes.max()), self.MAX_BUCKET)):
+                same = (values[:-offset] == values[offset:]) & usable[offset:]
+                if not same.any():
+                    break
+                left.append(order[:-offset][same])
+                right.append(order[offset:][same])
+        if not left:
+            return []
+
+        left, right = np.concatenate(left).astype(np.int64), np.concatenate(right).astype(np.int64)
+        keys = np.unique(np.minimum(left, right) * len(paths) + np.maximum(left, right))
+        pairs = np.column_stack([keys // len(paths), keys % len(paths)])
+        distances = POPCOUNT[np.bitwise_xor(hashes[pairs[:, 0]], hashes[pairs[:, 1]])].sum(axis=1)
+        pairs = pairs[distances <= max_distance]
+
+        # Union-find over the matching pairs
+        parent = list(range(len(paths)))
+
+        def find(i):
+            while parent[i] != i:
+                parent[i] = parent[parent[i]]
+                i = parent[i]
+            return i
+
+        for i, j in pairs:
+            root_i, root_j = find(i), find(j)
+            if root_i != root_j:
+                parent[max(root_i, root_j)] = min(root_i, root_j)
+
+        members: Dict[int, List[int]] = {}
+        for i in np.unique(pairs):
+            members.setdefault(find(i), []).append(i)
+
+        groups = []
+        for root, indices in members.items():
+            distances = hamming_distances(hashes[indices], hashes[root])
+            groups.append([(paths[i], int(distance)) for i, distance in zip(indices, distances)])
+        groups.sort(key=lambda group: (-len(group), group[0][0]))
+        return groups
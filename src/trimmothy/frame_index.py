@@ -0,0 +1,206 @@
+"""
+Exact frame timestamp index for Trimmothy.
+
+Variable-frame-rate sources (phone recordings in particular) can't be mapped
+between frame numbers and times with `frame / fps`. The index stores the
+presentation time of every video frame as a NumPy array in the source's cache
+directory and memory-maps it on load, so lookups are O(log n) binary searches
+and even multi-million-frame files cost almost no resident memory.
+
+Times are relative to the first video frame, matching the timeline the app
+shows and the `-ss` offsets passed to FFmpeg.
+"""
+
+import os
+import subprocess
+from array import array
+from pathlib import Path
+from typing import Callable, Optional
+
+import numpy as np
+
+from trimmothy.cache import load_json, source_cache_dir, store_json
+
+
+INDEX_VERSION = 1
+TIMESTAMPS_FILE = "timestamps.npy"
+KEYFRAMES_FILE = "keyframes.npy"
+META_FILE = "frame_index.json"
+
+
+class FrameIndex:
+    """Sorted frame presentation times with keyframe positions."""
+
+    # Relative deviation of frame intervals above which a source counts as VFR
+    VFR_TOLERANCE = 0.02
+
+    def __init__(self, timestamps: np.ndarray, keyframes: np.ndarray, frame_duration: float):
+        self.timestamps = timestamps
+        self.keyframes = keyframes
+        self.frame_duration = frame_duration
+
+    def __len__(self) -> int:
+        return len(self.timestamps)
+
+    @property
+    def frame_count(self) -> int:
+        return len(self.timestamps)
+
+    @property
+    def duration(self) -> float:
+        """Duration from the first frame to the end of the last frame."""
+        if not len(self.timestamps):
+            return 0.0
+        return float(self.timestamps[-1]) + self.frame_duration
+
+    @property
+    def average_fps(self) -> float:
+        return self.frame_count / self.duration if self.duration > 0 else 0.0
+
+    def is_variable_frame_rate(self) -> bool:
+        """Check whether frame intervals differ noticeably across the file."""
+        if len(self.timestamps) < 3:
+            return False
+        intervals = np.diff(self.timestamps)
+        median = float(np.median(intervals))
+        if median <= 0:
+            return False
+        return float(np.percentile(np.abs(intervals - median), 99)) > median * self.VFR_TOLERANCE
+
+    def frame_to_time(self, frame_number: int) -> float:
+        """Presentation time of a frame in seconds."""
+        if not len(self.timestamps):
+            return 0.0
+        frame_number = min(max(int(frame_number), 0), len(self.timestamps) - 1)
+        return float(self.timestamps[frame_number])
+
+    def time_to_frame(self, seconds: float) -> int:
+        """Frame on screen at the given time (the last frame starting at or before it)."""
+        if not len(self.timestamps):
+            return 0
+        index = int(np.searchsorted(self.timestamps, seconds, side="right")) - 1
+        return min(max(index, 0), len(self.timestamps) - 1)
+
+    def snap_time(self, seconds: float) -> float:
+        """Snap a time to the start of the frame shown at that time."""
+        return self.frame_to_time(self.time_to_frame(seconds))
+
+    def keyframe_at_or_before(self, frame_number: int) -> int:
+        """Frame number of the keyframe a decoder has to start from to reach a frame."""
+        if not len(self.keyframes):
+            return 0
+        index = int(np.searchsorted(self.keyframes, frame_number, side="right")) - 1
+        return int(self.keyframes[max(index, 0)])
+
+    def keyframe_after(self, frame_number: int) -> Optional[int]:
+        """Frame number of the first keyframe after a frame, or None at the end."""
+        index = int(np.searchsorted(self.keyframes, frame_number, side="right"))
+        return int(self.keyframes[index]) if index < len(self.keyframes) else None
+
+    def save(self, directory: Path) -> None:
+        """Write the index into a cache directory."""
+        for name, data in ((TIMESTAMPS_FILE, self.timestamps), (KEYFRAMES_FILE, self.keyframes)):
+            tmp_path = directory / (name + ".tmp")
+            with open(tmp_path, "wb") as f:
+                np.save(f, np.ascontiguousarray(data))
+            os.replace(tmp_path, directory / name)
+
+        store_json(directory / META_FILE, {
+            'version': INDEX_VERSION,
+            'frame_count': self.frame_count,
+            'frame_duration': self.frame_duration,
+        })
+
+    @classmethod
+    def load(cls, directory: Path) -> Optional["FrameIndex"]:
+        """Memory-map a saved index, or return None if there isn't a valid one."""
+        meta = load_json(directory / META_FILE)
+        if not meta or meta.get('version') != INDEX_VERSION:
+            return None
+        try:
+            timestamps = np.load(directory / TIMESTAMPS_FILE, mmap_mode="r")
+            keyframes = np.load(directory / KEYFRAMES_FILE, mmap_mode="r")
+        except (OSError, ValueError):
+            return None
+        if len(timestamps) != meta['frame_count']:
+            return None
+        return cls(timestamps, keyframes, float(meta['frame_duration']))
+
+    @classmethod
+    def build(cls, ffprobe_path: str, video_path: str,
+              popen: Optional[Callable[..., subprocess.Popen]] = None) -> "FrameIndex":
+        """
+        Scan a file's video packets with FFprobe and build its index.
+
+        Only packet headers are read, so no frames are decoded.
+
+        Args:
+            ffprobe_path: Path to the FFprobe executable
+            video_path: Source video path
+            popen: Optional replacement for subprocess.Popen used to start FFprobe
+                (e.g. the resource governor's)
+
+        Returns:
+            New FrameIndex
+        """
+        cmd = [
+            ffprobe_path,
+            '-v', 'error',
+            '-select_streams', 'v:0',
+            '-show_entries', 'packet=pts_time,flags',
+            '-of', 'csv=p=0',
+            video_path
+        ]
+
+        # array('d') keeps parsing compact for files with millions of packets
+        pts = array('d')
+        key_pts = array('d')
+        process = (popen or subprocess.Popen)(cmd, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True)
+        for line in process.stdout:
+            time_str, _, flags = line.strip().partition(',')
+            if not time_str or time_str == 'N/A':
+                continue
+            value = float(time_str)
+            pts.append(value)
+            if 'K' in flags:
+                key_pts.append(value)
+        process.wait()
+
+        if process.returncode != 0 or not pts:
+            raise RuntimeError(f"Could not index frames of {video_path}")
+
+        # Packets arrive in decode order; presentation order is sorted pts
+        timestamps = np.unique(np.frombuffer(pts, dtype=np.float64))
+        origin = timestamps[0]
+        timestamps = timestamps - origin
+        keyframes = np.searchsorted(timestamps, np.frombuffer(key_pts, dtype=np.float64) - origin)
+        keyframes = np.unique(np.clip(keyframes, 0, len(timestamps) - 1)).astype(np.int64)
+
+        intervals = np.diff(timestamps)
+        frame_duration = float(np.median(intervals)) if len(intervals) else 0.0
+
+        return cls(timestamps, keyframes, frame_duration)
+
+    @classmethod
+    def for_video(cls, ffprobe_path: str, video_path: str, build: bool = True,
+                  popen: Optional[Callable[..., subprocess.Popen]] = None) -> Optional["FrameIndex"]:
+        """
+        Get the index for a video from the cache, building it if allowed.
+
+        Args:
+            ffprobe_path: Path to the FFprobe executable
+            video_path: Source video path
+            build: Scan the file if no cached index exists
+            popen: Optional replacement for subprocess.Popen used to start FFprobe
+
+        Returns:
+            FrameIndex, or None if not cached and build is False
+        """
+        directory = source_cache_dir(video_path, create=build)
+        index = cls.load(directory) if directory.exists() else None
+        if index is None and build:
+            index = cls.build(ffprobe_path, video_path, popen)
+            index.save(directory)
+            # Re-open memory-mapped so the freshly built arrays can be released
+            index = cls.load(directory) or index
+        return index
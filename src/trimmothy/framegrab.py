@@ -0,0 +1,324 @@
+"""
+Frame-grab export of a range to an image sequence.
+
+`VideoProcessor.extract_frame` starts one FFmpeg process per image, each with
+its own seek, which is far too slow for pulling every Nth frame of a range.
+`FrameGrabExport` decodes the range once, front to back, in a single FFmpeg
+process. FFmpeg's select filter picks the frames:
+
+- "step": every Nth frame
+- "timestamps": the frames shown at a list of times
+- "scene": the first frame and every frame where the picture changes by more
+  than a threshold
+
+Only the picked frames are converted and piped to Python, along with their
+presentation timestamps from the showinfo filter. They are encoded to
+PNG/JPEG/WebP on a thread pool (OpenCV releases the GIL while encoding). At
+most `max_bytes` of decoded frames wait for an encoder, so memory stays
+bounded however far decoding runs ahead.
+
+A manifest.json next to the images maps every file to the exact presentation
+time of its frame, plus the frame number when the source has a frame index.
+"""
+
+import math
+import os
+import queue
+import re
+import subprocess
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+from trimmothy.cache import store_json
+
+
+MANIFEST_FILE = "manifest.json"
+IMAGE_FORMATS = ('jpg', 'png', 'webp')
+# Filtergraphs longer than this are passed to FFmpeg in a file instead of on the command line
+MAX_INLINE_FILTER = 32 * 1024
+
+_TIME_BASE = re.compile(r"config in time_base: (\d+)/(\d+)")
+_FRAME_INFO = re.compile(r"\bn:\s*\d+\s+pts:\s*(-?\d+).*?\bs:(\d+)x(\d+)")
+
+
+class FrameGrabExport:
+    """Still images of selected frames of a range, decoded in one pass."""
+
+    MAX_PENDING_BYTES = 256 * 1024 * 1024   # Decoded frames allowed to wait for an encoder
+
+    def __init__(self, processor, input_path: str, output_dir: str, start_time: float, end_time: float,
+                 step: Optional[int] = None, timestamps: Optional[List[float]] = None,
+                 scene_threshold: Optional[float] = None, image_format: str = "jpg",
+                 quality: Optional[int] = None, width: Optional[int] = None,
+                 workers: Optional[int] = None, max_bytes: Optional[int] = None, prefix: str = "frame"):
+        """
+        Args:
+            processor: VideoProcessor providing FFmpeg, probing and the frame index
+            input_path: Source video
+            output_dir: Directory for the images and the manifest
+            start_time: Start of the range in seconds
+            end_time: End of the range in seconds
+            step: Keep every step-th frame of the range (the default is every frame)
+            timestamps: Keep the frames shown at these times instead
+            scene_threshold: Keep scene changes instead; 0-1, e.g. 0.3
+            image_format: "jpg", "png" or "webp"
+            quality: JPEG/WebP quality (0-100) or PNG compression level (0-9)
+            width: Scale images down to this width, keeping the aspect ratio
+            workers: Encoder threads; defaults to the CPU count
+            max_bytes: Bytes of decoded frames allowed to wait for an encoder
+            prefix: File name prefix of the images
+        """
+        if sum(option is not None for option in (step, timestamps, scene_threshold)) > 1:
+            raise ValueError("Choose only one of step, timestamps and scene_threshold")
+        image_format = image_format.lower().lstrip(".").replace("jpeg", "jpg")
+        if image_format not in IMAGE_FORMATS:
+            raise ValueError(f"Unsupported image format: {image_format}")
+
+        self.processor = processor
+        self.input_path = input_path
+        self.output_dir = Path(output_dir)
+        self.start_time = start_time
+        self.end_time = end_time
+        self.step = max(1, int(step or 1))
+        self.timestamps = sorted(timestamps) if timestamps is not None else None
+        self.scene_threshold = scene_threshold
+        self.mode = "timestamps" if timestamps is not None else "scene" if scene_threshold is not None else "step"
+        self.image_format = image_format
+        self.quality = quality
+        self.width = width
+        self.workers = max(1, workers or os.cpu_count() or 2)
+        self.max_bytes = max_bytes or self.MAX_PENDING_BYTES
+        self.prefix = prefix
+
+        self._requested: Dict[int, List[float]] = {}
+        self._pending_bytes = 0
+        self._pending = threading.Condition()
+        self.peak_pending_bytes = 0
+
+    # Selection
+
+    def _frame_number(self, time_pos: float, frame_index, fps: float) -> int:
+        if frame_index is not None:
+            return frame_index.time_to_frame(time_pos)
+        return int(time_pos * fps + 1e-6)
+
+    def _select_expression(self, frame_index, fps: float) -> Optional[str]:
+        """FFmpeg select expression for the chosen mode; n counts frames from the start of the range."""
+        if self.mode == "scene":
+            return f"eq(n,0)+gt(scene,{self.scene_threshold:g})"
+        if self.mode == "step":
+            return f"not(mod(n,{self.step}))" if self.step > 1 else None
+
+        # Requested times per frame number; several times can fall on one frame
+        self._requested = {}
+        for time_pos in self.timestamps:
+            if self.start_time <= time_pos < self.end_time:
+                self._requested.setdefault(self._frame_number(time_pos, frame_index, fps), []).append(time_pos)
+        if not self._requested:
+            return "0"
+        # The first decoded frame: the one shown at the (snapped) start, or without
+        # an index the first one starting at or after it
+        first = frame_index.time_to_frame(self.start_time) if frame_index is not None \
+            else math.ceil(self.start_time * fps - 1e-6)
+        return "+".join(f"eq(n,{frame_number - first})" for frame_number in sorted(self._requested))
+
+    # Encoding
+
+    def _encode_params(self) -> List[int]:
+        import cv2
+
+        if self.quality is None:
+            return []
+        if self.image_format == "jpg":
+            return [cv2.IMWRITE_JPEG_QUALITY, int(self.quality)]
+        if self.image_format == "webp":
+            return [cv2.IMWRITE_WEBP_QUALITY, int(self.quality)]
+        return [cv2.IMWRITE_PNG_COMPRESSION, int(self.quality)]
+
+    def _encode(self, frame, path: Path, params: List[int]) -> bool:
+        import cv2
+
+        try:
+            ok, data = cv2.imencode(f".{self.image_format}", frame, params)
+            if ok:
+                data.tofile(str(path))
+            return ok
+        finally:
+            with self._pending:
+                self._pending_bytes -= frame.nbytes
+                self._pending.notify_all()
+
+    def _reserve(self, nbytes: int):
+        """Wait until a decoded frame fits in the pending-bytes budget."""
+        with self._pending:
+            # A single frame larger than the budget still goes through, alone
+            self._pending.wait_for(lambda: self._pending_bytes == 0
+                                   or self._pending_bytes + nbytes <= self.max_bytes)
+            self._pending_bytes += nbytes
+            self.peak_pending_bytes = max(self.peak_pending_bytes, self._pending_bytes)
+
+    # Export
+
+    def run(self, progress_callback: Optional[Callable[[float], None]] = None,
+            cancel_event: Optional[threading.Event] = None) -> Dict:
+        """
+        Decode the range and write the images and the manifest.
+
+        Args:
+            progress_callback: Optional callback for progress updates (0.0 to 1.0)
+            cancel_event: Optional event that stops the export when set
+
+        Returns:
+            Report dictionary: success, mode, number of images, elapsed seconds,
+            manifest path and peak bytes of frames waiting to be encoded
+        """
+        import numpy as np
+
+        started = time.monotonic()
+        report = {'success': False, 'mode': self.mode, 'images': 0, 'elapsed': 0.0,
+                  'manifest': str(self.output_dir / MANIFEST_FILE)}
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+
+        video_info = self.processor.get_video_info(self.input_path)
+        fps = video_info['fps'] or 30.0
+        frame_index = self.processor.get_frame_index(self.input_path, build=self.mode == "timestamps")
+        start_time = self.start_time
+        if frame_index is not None:
+            start_time = frame_index.snap_time(start_time)
+        duration = max(self.end_time - start_time, 0.0)
+
+        filters = []
+        expression = self._select_expression(frame_index, fps)
+        if expression is not None:
+            filters.append(f"select='{expression}'")
+        if self.width and self.width < video_info['width']:
+            filters.append(f"scale={int(self.width)}:-2")
+        filters.append("showinfo=checksum=0")
+        graph = ",".join(filters)
+
+        cmd = [
+            self.processor.ffmpeg_path,
+            '-hide_banner', '-nostats',
+            '-ss', str(start_time),
+            '-t', str(duration),
+            '-i', self.input_path,
+            '-map', '0:v:0',
+        ]
+        graph_path = None
+        if len(graph) > MAX_INLINE_FILTER:
+            graph_path = self.output_dir / f".{self.prefix}_filter.txt"
+            graph_path.write_text(graph, encoding="utf-8")
+            cmd += ['-filter_script:v', str(graph_path)]
+        else:
+            cmd += ['-vf', graph]
+        cmd += ['-fps_mode', 'passthrough', '-f', 'rawvideo', '-pix_fmt', 'bgr24', 'pipe:1']
+
+        process = self.processor.governor.popen(cmd, self.processor.background,
+                                                stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+
+        # showinfo reports each picked frame on stderr before its pixels reach stdout
+        frames_info = queue.Queue()
+        time_base = [None]
+        stderr_tail = deque(maxlen=20)
+
+        def read_stderr():
+            for raw_line in process.stderr:
+                line = raw_line.decode("utf-8", "replace")
+                if "showinfo" in line:
+                    match = _FRAME_INFO.search(line)
+                    if match:
+                        frames_info.put((int(match.group(1)), int(match.group(2)), int(match.group(3))))
+                        continue
+                    match = _TIME_BASE.search(line)
+                    if match and time_base[0] is None:
+                        time_base[0] = int(match.group(1)) / int(match.group(2))
+                    continue
+                stderr_tail.append(line)
+            frames_info.put(None)
+
+        reader = threading.Thread(target=read_stderr, daemon=True, name="trimmothy-framegrab")
+        reader.start()
+
+        entries = []
+        futures = []
+        params = self._encode_params()
+        cancelled = False
+        try:
+            with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="trimmothy-encode") as executor:
+                while True:
+                    if cancel_event is not None and cancel_event.is_set():
+                        cancelled = True
+                        # FFmpeg may be blocked writing to the pipe, where SIGTERM doesn't stop it
+                        self.processor.governor.terminate(process, kill=True)
+                        break
+                    try:
+                        info = frames_info.get(timeout=0.5)
+                    except queue.Empty:
+                        continue
+                    if info is None:
+                        break
+                    pts, width, height = info
+                    nbytes = width * height * 3
+                    data = process.stdout.read(nbytes)
+                    if len(data) < nbytes:
+                        break
+                    frame = np.frombuffer(data, dtype=np.uint8).reshape(height, width, 3)
+
+                    time_pos = start_time + pts * (time_base[0] or 0.0)
+                    frame_number = None
+                    if frame_index is not None:
+                        frame_number = frame_index.time_to_frame(time_pos + frame_index.frame_duration / 4)
+                        time_pos = frame_index.frame_to_time(frame_number)
+                    name = f"{self.prefix}_{len(entries) + 1:06d}.{self.image_format}"
+                    entry = {'file': name, 'time': round(time_pos, 6)}
+                    if frame_number is not None:
+                        entry['frame'] = frame_number
+                    if self.mode == "timestamps":
+                        number = frame_number if frame_number is not None else self._frame_number(time_pos, None, fps)
+                        entry['requested'] = self._requested.get(number, [])
+                    entries.append(entry)
+
+                    self._reserve(nbytes)
+                    futures.append(executor.submit(self._encode, frame, self.output_dir / name, params))
+                    if progress_callback and duration > 0:
+                        progress_callback(min(0.99, (time_pos - start_time) / duration))
+
+            process.wait()
+            reader.join(timeout=1.0)
+            encoded = [future.result() for future in futures]
+            report['images'] = sum(encoded)
+            if cancelled:
+                report['error'] = "Cancelled"
+            elif process.returncode != 0:
+                report['error'] = f"FFmpeg exited with {process.returncode}: {''.join(stderr_tail).strip()[-500:]}"
+            elif not all(encoded):
+                report['error'] = f"{len(encoded) - sum(encoded)} images could not be encoded"
+            else:
+                store_json(self.output_dir / MANIFEST_FILE, {
+                    'source': os.path.abspath(self.input_path),
+                    'start': start_time,
+                    'end': self.end_time,
+                    'mode': self.mode,
+                    'step': self.step if self.mode == "step" else None,
+                    'scene_threshold': self.scene_threshold,
+                    'format': self.image_format,
+                    'frames': entries,
+                })
+                report['success'] = True
+                if progress_callback:
+                    progress_callback(1.0)
+        except Exception as e:
+            report['error'] = str(e)
+            print(f"Frame grab failed: {e}")
+            self.processor.governor.terminate(process, kill=True)
+        finally:
+            if graph_path is not None and graph_path.exists():
+                graph_path.unlink()
+
+        report['elapsed'] = round(time.monotonic() - started, 3)
+        report['peak_pending_bytes'] = self.peak_pending_bytes
+        return report
@@ -0,0 +1,306 @@
+"""
+GOP-buffered decoding for frame stepping and reverse playback.
+
+Stepping back one frame with a plain capture means seeking, which decodes
+from the previous keyframe every time; on long GOPs that makes holding
+"previous frame" or playing backwards unusable. `GopBuffer` decodes a whole
+span between two keyframes once, on a background thread, into a bounded
+buffer of preview-sized RGB frames, then serves every frame of that span from
+memory. While one span is being consumed, the neighbouring span in the
+direction of travel is decoded ahead, so reverse playback keeps moving.
+
+Spans come from the keyframes of the source's frame index. Until the index is
+known (or if a GOP alone would not fit the memory cap) spans are fixed-size
+blocks instead; a block that doesn't start on a keyframe costs the capture one
+seek, which is still far cheaper than one seek per frame.
+
+Unlike the preview frame, spans are decoded in this process rather than in
+the source's `DecodeWorker`. A span is only useful in memory the UI can read
+without a round trip, and passing a whole GOP through the worker's slot ring
+would copy every frame once more, which is the cost the buffer exists to
+avoid. The capture's read(), resize and colour conversion release the GIL, so
+the buffer's thread doesn't hold up Tk. A buffer is only created once the
+worker has decoded frames of the same source.
+"""
+
+import os
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+import cv2
+import numpy as np
+
+from trimmothy.decoder import _fit
+from trimmothy.memory import get_memory_governor
+
+
+class GopBuffer:
+    """Whole GOPs of one video, decoded ahead in the direction of travel."""
+
+    MEMORY_LIMIT = 256 * 1024 * 1024   # Bytes of decoded frames kept
+    BLOCK_FRAMES = 60                  # Span length when keyframes are unknown
+    MEMORY_COST = 1.0                  # Relative cost of a byte for the memory governor: decoded in bulk
+
+    def __init__(self, video_path: str, frame_count: int, keyframes: Optional[np.ndarray] = None,
+                 max_width: int = 600, max_height: int = 400, memory_limit: Optional[int] = None):
+        """
+        Args:
+            video_path: Source video path
+            frame_count: Number of frames in the video
+            keyframes: Sorted keyframe frame numbers, from the frame index
+            max_width: Maximum width of buffered frames
+            max_height: Maximum height of buffered frames
+            memory_limit: Byte budget for buffered frames
+        """
+        self.video_path = video_path
+        self.frame_count = max(1, frame_count)
+        self.max_width = max_width
+        self.max_height = max_height
+        self.memory_limit = memory_limit or self.MEMORY_LIMIT
+
+        self._lock = threading.Lock()
+        self._changed = threading.Condition(self._lock)
+        self._keyframes = keyframes
+        self._starts: Optional[np.ndarray] = None   # First frame of every span
+        self._generation = 0
+        self._frame_bytes: Optional[int] = None
+        self._frames: Dict[int, np.ndarray] = {}
+        self._spans: "OrderedDict[int, Tuple[int, int]]" = OrderedDict()  # Decoded spans -> (first, end)
+        self._nbytes = 0
+        self._wanted: List[int] = []
+        self._decoding: Optional[int] = None
+        self._focus = 0
+        self._closed = False
+        self._failed = False
+        self._worker = None
+        self._capture = None
+
+        # Metrics
+        self.hits = 0
+        self.misses = 0
+        self.spans_decoded = 0
+        self.evicted = 0
+
+        self._memory = get_memory_governor()
+        self._memory.register(self, f"gop buffer: {os.path.basename(video_path)}", self.MEMORY_COST)
+
+    # Spans
+
+    def set_keyframes(self, keyframes: Optional[np.ndarray], frame_count: Optional[int] = None):
+        """Switch to keyframe-aligned spans once the frame index is known."""
+        with self._lock:
+            self._keyframes = keyframes
+            if frame_count:
+                self.frame_count = frame_count
+            if self._frame_bytes is not None:
+                self._build_spans()
+
+    def _build_spans(self):
+        """Split the video into spans: GOPs, cut down to what fits a third of the budget."""
+        max_frames = max(1, self.memory_limit // (3 * self._frame_bytes))
+        if self._keyframes is not None and len(self._keyframes):
+            bounds = np.append(np.asarray(self._keyframes, dtype=np.int64), self.frame_count)
+            if bounds[0] != 0:
+                bounds = np.insert(bounds, 0, 0)
+        else:
+            bounds = np.array([0, self.frame_count], dtype=np.int64)
+            max_frames = min(max_frames, self.BLOCK_FRAMES)
+        starts = []
+        for first, end in zip(bounds[:-1], bounds[1:]):
+            starts.extend(range(int(first), int(end), max_frames))
+        self._starts = np.array(starts, dtype=np.int64)
+        # Span numbers change, so start over; a span being decoded is abandoned
+        self._generation += 1
+        self._frames.clear()
+        self._spans.clear()
+        self._nbytes = 0
+        self._wanted = []
+
+    def _span_of(self, frame_number: int) -> int:
+        return int(np.searchsorted(self._starts, frame_number, side="right")) - 1
+
+    def _span_bounds(self, span: int) -> Tuple[int, int]:
+        end = int(self._starts[span + 1]) if span + 1 < len(self._starts) else self.frame_count
+        return int(self._starts[span]), end
+
+    # Access
+
+    def get(self, frame_number: int, direction: int = -1) -> Optional[np.ndarray]:
+        """
+        Buffered frame, or None; either way the spans around it are queued.
+
+        Args:
+            frame_number: Frame to show
+            direction: -1 when moving backwards, 1 forwards; picks the span decoded ahead
+
+        Returns:
+            RGB frame (don't modify it), or None if it isn't decoded yet
+        """
+        with self._lock:
+            frame = self._frames.get(frame_number)
+            if frame is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+            self._want(frame_number, direction)
+        self._memory.touch(self)
+        return frame
+
+    def read(self, frame_number: int, direction: int = -1, timeout: float = 5.0) -> Optional[np.ndarray]:
+        """
+        Buffered frame, waiting for its span to be decoded if needed.
+
+        Returns:
+            RGB frame, or None if it couldn't be decoded in time
+        """
+        frame = self.get(frame_number, direction)
+        if frame is not None:
+            return frame
+        with self._lock:
+            self._changed.wait_for(lambda: frame_number in self._frames or self._closed
+                                   or (self._decoding is None and not self._wanted), timeout)
+            return self._frames.get(frame_number)
+
+    def _want(self, frame_number: int, direction: int):
+        """Queue the span holding a frame and the next one in the direction of travel."""
+        if self._closed or self._failed or not 0 <= frame_number < self.frame_count:
+            return
+        self._focus = frame_number
+        self._ensure_worker()
+        if self._starts is None:
+            self._wanted = [frame_number]  # Spans are laid out once the frame size is known
+            self._changed.notify_all()
+            return
+        span = self._span_of(frame_number)
+        wanted = []
+        for candidate in (span, span + (1 if direction > 0 else -1)):
+            if 0 <= candidate < len(self._starts) and candidate not in self._spans and candidate != self._decoding:
+                wanted.append(candidate)
+        if wanted != self._wanted:
+            self._wanted = wanted
+            self._changed.notify_all()
+
+    def _release(self, nbytes: int, keep: int) -> int:
+        """Drop the decoded spans farthest from the focus until nbytes are freed."""
+        freed = 0
+        while freed < nbytes and self._spans:
+            focus = self._focus
+            span = max((s for s in self._spans if s != keep),
+                       key=lambda s: min(abs(self._spans[s][0] - focus), abs(self._spans[s][1] - focus)),
+                       default=None)
+            if span is None:
+                break
+            first, end = self._spans.pop(span)
+            for frame_number in range(first, end):
+                frame = self._frames.pop(frame_number, None)
+                if frame is not None:
+                    self._nbytes -= frame.nbytes
+                    freed += frame.nbytes
+            self.evicted += 1
+        return freed
+
+    def memory_usage(self) -> int:
+        return self._nbytes
+
+    def release_memory(self, nbytes: int) -> int:
+        """Drop spans for the memory governor, keeping the one being shown."""
+        with self._lock:
+            if self._starts is None:
+                return 0
+            return self._release(nbytes, keep=self._span_of(self._focus))
+
+    def close(self):
+        """Stop decoding and drop the buffer."""
+        with self._lock:
+            self._closed = True
+            self._wanted = []
+            self._frames.clear()
+            self._spans.clear()
+            self._nbytes = 0
+            self._changed.notify_all()
+        self._memory.unregister(self)
+
+    def metrics(self) -> Dict:
+        """Return buffer and decoder counters."""
+        with self._lock:
+            return {
+                'frames': len(self._frames),
+                'bytes': self._nbytes,
+                'memory_limit': self.memory_limit,
+                'spans': len(self._spans),
+                'hits': self.hits,
+                'misses': self.misses,
+                'spans_decoded': self.spans_decoded,
+                'evicted': self.evicted,
+            }
+
+    # Decoding
+
+    def _ensure_worker(self):
+        if self._worker is not None and self._worker.is_alive():
+            return
+        self._worker = threading.Thread(target=self._work, daemon=True, name="trimmothy-gop")
+        self._worker.start()
+
+    def _work(self):
+        try:
+            self._capture = cv2.VideoCapture(self.video_path)
+            if not self._capture.isOpened():
+                self._failed = True
+                return
+            width = int(self._capture.get(cv2.CAP_PROP_FRAME_WIDTH))
+            height = int(self._capture.get(cv2.CAP_PROP_FRAME_HEIGHT))
+            size = _fit(width, height, self.max_width, self.max_height)
+            with self._lock:
+                self._frame_bytes = size[0] * size[1] * 3
+                self._build_spans()
+                self._want(self._focus, -1)
+
+            while True:
+                with self._lock:
+                    while not self._wanted and not self._closed:
+                        self._changed.wait()
+                    if self._closed:
+                        return
+                    span = self._wanted.pop(0)
+                    if span in self._spans:
+                        continue
+                    self._decoding = span
+                    first, end = self._span_bounds(span)
+                    generation = self._generation
+                self._decode_span(span, first, end, size, generation)
+        finally:
+            with self._lock:
+                self._decoding = None
+                self._changed.notify_all()
+            if self._capture is not None:
+                self._capture.release()
+                self._capture = None
+
+    def _decode_span(self, span: int, first: int, end: int, size: Tuple[int, int], generation: int):
+        """Decode frames [first, end) in order, publishing each one as it's ready."""
+        self._capture.set(cv2.CAP_PROP_POS_FRAMES, first)
+        for frame_number in range(first, end):
+            ok, frame = self._capture.read()
+            if not ok:
+                break
+            if (frame.shape[1], frame.shape[0]) != size:
+                frame = cv2.resize(frame, size, interpolation=cv2.INTER_AREA)
+            frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+            with self._lock:
+                if self._closed or self._generation != generation:
+                    self._decoding = None
+                    return
+                if frame_number not in self._frames:
+                    self._frames[frame_number] = frame
+                    self._nbytes += frame.nbytes
+                self._changed.notify_all()
+        with self._lock:
+            self._decoding = None
+            if self._generation == generation:
+                self._spans[span] = (first, end)
+                self.spans_decoded += 1
+                self._release(self._nbytes - self.memory_limit, keep=self._span_of(self._focus))
+            self._changed.notify_all()
+        self._memory.touch(self)
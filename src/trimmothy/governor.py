@@ -0,0 +1,293 @@
+"""
+Foreground-first resource governor for Trimmothy.
+
+Every FFmpeg/FFprobe process spawned by VideoProcessor goes through the
+governor, which launches it with the configured CPU and I/O priority and a
+bounded FFmpeg thread count. Background processes (indexing, pre-caching,
+background exports) are additionally paused while the user is scrubbing or
+playing video and resumed once the UI has been idle for a moment, so the
+preview decoder never has to compete with them. Processes are stopped
+through `terminate`, which resumes a paused process so it can act on the
+signal instead of waiting for the UI to go idle.
+"""
+
+import os
+import platform
+import shutil
+import signal
+import subprocess
+import threading
+import time
+from typing import Dict, List
+
+
+class ResourceGovernor:
+    """Launches subprocesses with priorities and throttles background ones during interaction."""
+
+    IDLE_DELAY = 0.75      # Seconds without interaction before background work resumes
+    POLL_INTERVAL = 0.1    # Seconds between throttle checks
+
+    def __init__(self):
+        cpu_count = os.cpu_count() or 2
+
+        # Adjustable limits; None means "leave FFmpeg's default"
+        self.foreground_niceness = 0
+        self.background_niceness = 15
+        self.foreground_threads = None
+        self.background_threads = max(1, cpu_count // 2)
+        self.background_idle_io = True
+
+        self._lock = threading.Lock()
+        self._background = set()
+        self._last_interaction = 0.0
+        self._playing = False
+        self._paused_since = None
+        self._paused_with_work = False
+        self._idle = threading.Event()
+        self._idle.set()
+        self._monitor = None
+
+        # Metrics
+        self.pause_count = 0
+        self.deferred_seconds = 0.0
+        self.deferred_launches = 0
+        self.launch_wait_seconds = 0.0
+        self.background_launches = 0
+        self.foreground_launches = 0
+
+    # Interaction signals from the UI
+
+    def notify_interaction(self):
+        """Record user interaction (slider drag, seek); background work pauses briefly."""
+        with self._lock:
+            self._last_interaction = time.monotonic()
+        self._update_throttle()
+        self._ensure_monitor()
+
+    def set_playing(self, playing: bool):
+        """Hold background work paused for as long as video is playing."""
+        with self._lock:
+            self._playing = playing
+        self._update_throttle()
+        self._ensure_monitor()
+
+    def is_interactive(self) -> bool:
+        """Check whether the UI currently needs the machine's full attention."""
+        with self._lock:
+            return self._playing or time.monotonic() - self._last_interaction < self.IDLE_DELAY
+
+    # Process launching
+
+    def command_for(self, cmd: List[str], background: bool = False) -> List[str]:
+        """
+        Apply priority and thread limits to a command line.
+
+        Args:
+            cmd: Command starting with the executable path
+            background: Use the background limits
+
+        Returns:
+            New command list
+        """
+        cmd = list(cmd)
+        threads = self.background_threads if background else self.foreground_threads
+        is_ffmpeg = os.path.basename(cmd[0]).lower().startswith('ffmpeg')
+        if threads and is_ffmpeg and '-threads' not in cmd and len(cmd) > 1:
+            # Placed right before the output so it applies to the encoder
+            cmd[-1:-1] = ['-threads', str(threads)]
+
+        prefix = []
+        niceness = self.background_niceness if background else self.foreground_niceness
+        if niceness and shutil.which('nice'):
+            prefix += ['nice', '-n', str(niceness)]
+        if background and self.background_idle_io:
+            if platform.system() == "Darwin" and shutil.which('taskpolicy'):
+                prefix += ['taskpolicy', '-b']
+            elif shutil.which('ionice'):
+                prefix += ['ionice', '-c', '3']
+        return prefix + cmd
+
+    def popen(self, cmd: List[str], background: bool = False, **kwargs) -> subprocess.Popen:
+        """
+        Start a process under the governor's limits.
+
+        Background processes wait to start while the UI is interactive and are
+        paused whenever it becomes interactive later.
+
+        Args:
+            cmd: Command starting with the executable path
+            background: Treat as deferrable background work
+            **kwargs: Passed to subprocess.Popen
+
+        Returns:
+            The started process
+        """
+        if background:
+            waited = self._wait_until_idle()
+            with self._lock:
+                self.background_launches += 1
+                if waited > 0:
+                    self.deferred_launches += 1
+                    self.launch_wait_seconds += waited
+        else:
+            with self._lock:
+                self.foreground_launches += 1
+
+        process = subprocess.Popen(self.command_for(cmd, background), **kwargs)
+
+        if background:
+            with self._lock:
+                self._background.add(process)
+            self._ensure_monitor()
+            self._update_throttle()
+        return process
+
+    def run(self, cmd: List[str], background: bool = False, **kwargs) -> subprocess.CompletedProcess:
+        """
+        Run a process to completion, like subprocess.run, under the governor's limits.
+
+        Args:
+            cmd: Command starting with the executable path
+            background: Treat as deferrable background work
+            **kwargs: capture_output, text and check as for subprocess.run, or Popen options
+
+        Returns:
+            CompletedProcess with the captured output
+        """
+        check = kwargs.pop('check', False)
+        if kwargs.pop('capture_output', False):
+            kwargs['stdout'] = subprocess.PIPE
+            kwargs['stderr'] = subprocess.PIPE
+
+        process = self.popen(cmd, background, **kwargs)
+        try:
+            stdout, stderr = process.communicate()
+        finally:
+            self._forget(process)
+
+        if check and process.returncode != 0:
+            raise subprocess.CalledProcessError(process.returncode, process.args, stdout, stderr)
+        return subprocess.CompletedProcess(process.args, process.returncode, stdout, stderr)
+
+    def terminate(self, process: subprocess.Popen, kill: bool = False):
+        """
+        Stop a process started by popen(), even while it is paused.
+
+        A stopped process doesn't act on SIGTERM until it is continued, so it
+        is taken out of throttling and sent SIGCONT after the signal.
+
+        Args:
+            process: Process from popen()
+            kill: Send SIGKILL instead of SIGTERM
+        """
+        self._forget(process)
+        if process.poll() is not None:
+            return
+        try:
+            if kill:
+                process.kill()
+            else:
+                process.terminate()
+            if hasattr(signal, 'SIGCONT'):
+                os.kill(process.pid, signal.SIGCONT)
+        except OSError:
+            pass  # Exited meanwhile
+
+    def metrics(self) -> Dict:
+        """Return counters describing how much background work was deferred."""
+        with self._lock:
+            deferred = self.deferred_seconds
+            if self._paused_since is not None and self._paused_with_work:
+                deferred += time.monotonic() - self._paused_since
+            return {
+                'background_running': sum(1 for p in self._background if p.poll() is None),
+                'background_paused': self._paused_since is not None,
+                'pause_count': self.pause_count,
+                'deferred_seconds': round(deferred, 3),
+                'deferred_launches': self.deferred_launches,
+                'launch_wait_seconds': round(self.launch_wait_seconds, 3),
+                'background_launches': self.background_launches,
+                'foreground_launches': self.foreground_launches,
+            }
+
+    # Throttling
+
+    def _wait_until_idle(self) -> float:
+        if not self.is_interactive():
+            return 0.0
+        self._update_throttle()
+        self._ensure_monitor()
+        started = time.monotonic()
+        self._idle.wait()
+        return time.monotonic() - started
+
+    def _forget(self, process: subprocess.Popen):
+        with self._lock:
+            self._background.discard(process)
+
+    def _signal_background(self, sig):
+        for process in list(self._background):
+            if process.poll() is None:
+                try:
+                    os.kill(process.pid, sig)
+                except OSError:
+                    pass
+
+    def _update_throttle(self):
+        """Pause or resume background processes to match the UI state."""
+        interactive = self.is_interactive()
+        with self._lock:
+            # Drop processes that have exited on their own
+            self._background = {p for p in self._background if p.poll() is None}
+
+            if interactive and self._paused_since is None:
+                self._idle.clear()
+                self._paused_since = time.monotonic()
+                self._paused_with_work = bool(self._background)
+                if self._paused_with_work:
+                    self.pause_count += 1
+                if hasattr(signal, 'SIGSTOP'):
+                    self._signal_background(signal.SIGSTOP)
+            elif not interactive and self._paused_since is not None:
+                if hasattr(signal, 'SIGCONT'):
+                    self._signal_background(signal.SIGCONT)
+                if self._paused_with_work:
+                    self.deferred_seconds += time.monotonic() - self._paused_since
+                self._paused_since = None
+                self._idle.set()
+            elif interactive and self._background:
+                # A process that slipped in just as the pause began must be stopped too
+                if not self._paused_with_work:
+                    self._paused_with_work = True
+                    self.pause_count += 1
+                if hasattr(signal, 'SIGSTOP'):
+                    self._signal_background(signal.SIGSTOP)
+
+    def _ensure_monitor(self):
+        with self._lock:
+            if self._monitor is not None and self._monitor.is_alive():
+                return
+            self._monitor = threading.Thread(target=self._monitor_loop, daemon=True, name="trimmothy-governor")
+            self._monitor.start()
+
+    def _monitor_loop(self):
+        while True:
+            time.sleep(self.POLL_INTERVAL)
+            self._update_throttle()
+            with self._lock:
+                if self._paused_since is None and not self._background:
+                    self._monitor = None
+                    return
+
+
+_governor = None
+_governor_lock = threading.Lock()
+
+
+def get_governor() -> ResourceGovernor:
+    """Get the process-wide resource governor."""
+    global _governor
+    with _governor_lock:
+        if _governor is None:
+            _governor = ResourceGovernor()
+        return _governor
@@ -0,0 +1,351 @@
+"""
+Asyncio API for driving Trimmothy without the editor.
+
+`import trimmothy.headless` loads only the standard library and
+`VideoProcessor`, never Tk or OpenCV, so services can import it in
+milliseconds. `AsyncVideoProcessor` runs the same FFprobe/FFmpeg command
+lines as `VideoProcessor`, but as asyncio subprocesses, so a single event loop
+can drive hundreds of trims at once:
+
+- A semaphore bounds how many FFmpeg/FFprobe processes run at the same time;
+  work beyond the limit waits on the loop without holding a thread.
+- Cancelling the task that awaits a call kills its process and removes a
+  partial output file.
+- `run_jobs` runs a batch of jobs described like trim service requests.
+
+Probe results share the processor's in-memory cache, and exports share the
+export cache and telemetry of the synchronous API.
+"""
+
+import asyncio
+import os
+import time
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from trimmothy.video_processor import COPY_STRATEGIES, VideoProcessor
+
+
+# Strategies trim_video tries after the copy strategies, in order
+REENCODE_STRATEGIES = ('_try_fast_reencode', '_try_compatible_reencode')
+
+
+class AsyncVideoProcessor:
+    """Probe, trim and thumbnail jobs as coroutines, with a limit on concurrent processes."""
+
+    JOB_TYPES = ('trim', 'probe', 'thumbnails')
+
+    def __init__(self, processor: Optional[VideoProcessor] = None, max_processes: Optional[int] = None):
+        """
+        Args:
+            processor: Synchronous processor whose FFmpeg paths, caches and priority
+                settings are used; a new one is created if omitted
+            max_processes: Maximum number of FFmpeg/FFprobe processes running at
+                once; defaults to the CPU count
+        """
+        self.processor = processor or VideoProcessor()
+        self.max_processes = max(max_processes or os.cpu_count() or 4, 1)
+        self._slots = asyncio.Semaphore(self.max_processes)
+        self.running = 0
+
+    # Processes
+
+    async def _run(self, cmd: List[str], media_duration: Optional[float] = None,
+                   progress_callback: Optional[Callable[[float], None]] = None) -> Tuple[int, str, str]:
+        """
+        Run a command once a process slot is free.
+
+        Args:
+            cmd: Command starting with the executable path
+            media_duration: Length of the media FFmpeg produces, for progress fractions
+            progress_callback: Called with the fraction done while FFmpeg runs
+
+        Returns:
+            Tuple of (exit code, stdout, stderr)
+        """
+        if progress_callback is not None:
+            cmd = [cmd[0], '-progress', 'pipe:1', '-nostats'] + list(cmd[1:])
+        cmd = self.processor.governor.command_for(cmd, self.processor.background)
+
+        async with self._slots:
+            process = await asyncio.create_subprocess_exec(
+                *cmd, stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.PIPE
+            )
+            self.running += 1
+            try:
+                if progress_callback is None:
+                    stdout, stderr = await process.communicate()
+                else:
+                    # Drain stderr alongside, so FFmpeg never blocks on a full pipe
+                    stderr_task = asyncio.ensure_future(process.stderr.read())
+                    lines = []
+                    async for raw_line in process.stdout:
+                        line = raw_line.decode("utf-8", "replace")
+                        lines.append(line)
+                        key, _, value = line.strip().partition('=')
+                        if key == 'out_time_us' and value.isdigit() and media_duration:
+                            progress_callback(min(1.0, int(value) / 1_000_000 / media_duration))
+                    stderr = await stderr_task
+                    await process.wait()
+                    stdout = "".join(lines).encode("utf-8")
+            except asyncio.CancelledError:
+                if process.returncode is None:
+                    process.kill()
+                await process.wait()
+                raise
+            finally:
+                self.running -= 1
+
+        return process.returncode, stdout.decode("utf-8", "replace"), stderr.decode("utf-8", "replace")
+
+    async def _in_thread(self, func: Callable, *args):
+        """
+        Run blocking file work in a thread under the same slot limit.
+
+        A cancelled call still lets the thread finish, so callers can clean up
+        what it wrote.
+        """
+        async with self._slots:
+            job = asyncio.ensure_future(asyncio.to_thread(func, *args))
+            try:
+                return await asyncio.shield(job)
+            except asyncio.CancelledError:
+                await asyncio.wait([job])
+                raise
+
+    # Probing
+
+    async def get_video_info(self, video_path: str, persist: bool = False) -> Dict:
+        """
+        Get video information, like VideoProcessor.get_video_info.
+
+        Args:
+            video_path: Path to the video file
+            persist: Also save the result in the on-disk cache
+
+        Returns:
+            Dictionary containing video information
+
+        Raises:
+            RuntimeError: If FFprobe fails
+        """
+        processor = self.processor
+        cache_key, cached = processor._cached_info(video_path)
+        if cached is not None:
+            return cached
+
+        info = await asyncio.to_thread(processor._load_persisted_info, video_path)
+        if info is None:
+            returncode, stdout, stderr = await self._run(processor._probe_command(video_path))
+            if returncode != 0:
+                raise RuntimeError(f"FFprobe failed: {stderr}")
+            info = processor._parse_probe_output(stdout)
+            if persist:
+                await asyncio.to_thread(processor._persist_info, video_path, info)
+
+        processor._remember_info(cache_key, info)
+        return dict(info)
+
+    # Trimming
+
+    async def trim_video(self, input_path: str, output_path: str, start_time: float, end_time: float,
+                         progress_callback: Optional[Callable[[float], None]] = None,
+                         exact: bool = False, use_export_cache: bool = True) -> bool:
+        """
+        Trim a video, trying the same strategies as VideoProcessor.trim_video.
+
+        Deadline-driven and resumable re-encodes aren't available here; long
+        re-encodes use the fast preset directly.
+
+        Args:
+            input_path: Input video file path
+            output_path: Output video file path
+            start_time: Start time in seconds
+            end_time: End time in seconds
+            progress_callback: Optional callback for progress updates (0.0 to 1.0)
+            exact: Skip the copy strategies and re-encode from the exact frame
+            use_export_cache: Reuse and store identical re-encodes in the export cache
+
+        Returns:
+            True if successful, False otherwise
+
+        Raises:
+            asyncio.CancelledError: If the task was cancelled; the partial output is removed
+        """
+        from trimmothy.telemetry import ExportRecord, telemetry_enabled
+
+        processor = self.processor
+        record = ExportRecord(input_path, output_path, start_time, end_time)
+        status, error = 'failed', None
+        try:
+            frame_index = await asyncio.to_thread(processor.get_frame_index, input_path, False)
+            if frame_index is not None:
+                start_time = frame_index.snap_time(start_time)
+                end_time = frame_index.snap_time(end_time) if end_time < frame_index.duration else end_time
+
+            duration = end_time - start_time
+            record.set_range(start_time, duration)
+
+            video_info = await self.get_video_info(input_path)
+            record.set_source(video_info)
+
+            names = ([] if exact else list(COPY_STRATEGIES)) + list(REENCODE_STRATEGIES)
+            cache_key = None
+            if use_export_cache:
+                cache_key = await asyncio.to_thread(processor._export_cache_key, input_path, output_path, start_time,
+                                                    duration, names, {'exact': exact, 'time_budget': None})
+            if cache_key and await asyncio.to_thread(processor._reuse_cached_export, cache_key, output_path, record):
+                if progress_callback:
+                    progress_callback(1.0)
+                status = 'ok'
+                return True
+
+            # A hardlinked output shares its data with the export cache; don't overwrite it in place
+            if os.path.exists(output_path) and os.stat(output_path).st_nlink > 1:
+                os.unlink(output_path)
+
+            def on_progress(fraction):
+                progress_callback(0.1 + 0.85 * fraction)
+
+            for name in names:
+                attempt_started = time.monotonic()
+                try:
+                    if progress_callback:
+                        progress_callback(0.1)
+
+                    if name == '_try_box_trim':
+                        success = await self._in_thread(processor._try_box_trim, input_path, output_path,
+                                                        start_time, duration, video_info)
+                    else:
+                        build = getattr(processor, name.replace('_try_', '_', 1) + '_command')
+                        returncode, _, _ = await self._run(build(input_path, output_path, start_time, duration),
+                                                           duration, on_progress if progress_callback else None)
+                        success = returncode == 0
+                    record.attempt(name, time.monotonic() - attempt_started, 'ok' if success else 'declined')
+                    if success:
+                        if cache_key and name not in COPY_STRATEGIES:
+                            await asyncio.to_thread(processor._store_cached_export, cache_key, output_path, name)
+                        if progress_callback:
+                            progress_callback(1.0)
+                        status = 'ok'
+                        return True
+                except asyncio.CancelledError:
+                    status = 'cancelled'
+                    record.attempt(name, time.monotonic() - attempt_started, 'cancelled')
+                    if Path(output_path).exists():
+                        Path(output_path).unlink()
+                    raise
+                except Exception as e:
+                    record.attempt(name, time.monotonic() - attempt_started, 'error', str(e))
+                    print(f"Strategy {name} failed: {e}")
+                    # Clean up partial file
+                    if Path(output_path).exists():
+                        Path(output_path).unlink()
+                    continue
+
+            return False
+
+        except Exception as e:
+            error = str(e)
+            print(f"Trim video failed: {e}")
+            return False
+        finally:
+            if telemetry_enabled():
+                await asyncio.to_thread(processor._record_export, record, status, error)
+
+    # Thumbnails
+
+    async def extract_thumbnails(self, video_path: str, output_dir: str, count: int = 8,
+                                 width: int = 120, height: int = 80) -> List[str]:
+        """
+        Extract thumbnails at regular intervals, all frames in parallel.
+
+        Args:
+            video_path: Input video path
+            output_dir: Directory for thumbnail images
+            count: Number of thumbnails to extract
+            width: Thumbnail width
+            height: Thumbnail height
+
+        Returns:
+            List of thumbnail file paths
+        """
+        processor = self.processor
+        try:
+            video_info = await self.get_video_info(video_path)
+            times = await asyncio.to_thread(processor._thumbnail_times, video_path, video_info['duration'], count)
+            output_path = Path(output_dir)
+            output_path.mkdir(exist_ok=True)
+
+            paths = [str(output_path / f"thumb_{i:03d}.jpg") for i in range(len(times))]
+            results = await asyncio.gather(*(
+                self._run(processor._frame_command(video_path, time_pos, thumb_path, width, height))
+                for time_pos, thumb_path in zip(times, paths)
+            ))
+            return [thumb_path for thumb_path, (returncode, _, _) in zip(paths, results) if returncode == 0]
+
+        except Exception as e:
+            print(f"Thumbnail extraction failed: {e}")
+            return []
+
+    # Jobs
+
+    async def run_job(self, job_type: str, params: Dict,
+                      progress_callback: Optional[Callable[[float], None]] = None):
+        """
+        Run one job with the parameters of a trim service request.
+
+        Args:
+            job_type: One of JOB_TYPES
+            params: Keyword arguments for the job
+            progress_callback: Progress of trim jobs (0.0 to 1.0)
+
+        Returns:
+            The job's result
+        """
+        if job_type == 'trim':
+            return await self.trim_video(
+                params['input_path'],
+                params['output_path'],
+                float(params['start_time']),
+                float(params['end_time']),
+                progress_callback=progress_callback,
+                exact=bool(params.get('exact', False)),
+                use_export_cache=bool(params.get('use_export_cache', True))
+            )
+        if job_type == 'probe':
+            return await self.get_video_info(params['video_path'])
+        if job_type == 'thumbnails':
+            return await self.extract_thumbnails(
+                params['video_path'],
+                params['output_dir'],
+                count=int(params.get('count', 8)),
+                width=int(params.get('width', 120)),
+                height=int(params.get('height', 80))
+            )
+        raise ValueError(f"Unknown job type: {job_type}")
+
+    async def run_jobs(self, jobs: Iterable[Dict], max_jobs: Optional[int] = None) -> List:
+        """
+        Run many jobs concurrently.
+
+        Processes are limited by max_processes either way; max_jobs also limits
+        how many jobs are in progress, e.g. to bound open files. Cancelling the
+        task awaiting run_jobs cancels every job.
+
+        Args:
+            jobs: Dictionaries with 'type' and 'params', like trim service requests
+            max_jobs: Maximum number of jobs in progress at once
+
+        Returns:
+            Results in job order; a job that raised has its exception instead
+        """
+        limit = asyncio.Semaphore(max_jobs) if max_jobs else None
+
+        async def run(job):
+            if limit is None:
+                return await self.run_job(job['type'], job.get('params', {}))
+            async with limit:
+                return await self.run_job(job['type'], job.get('params', {}))
+
+        return await asyncio.gather(*(run(job) for job in jobs), return_exceptions=True)
@@ -0,0 +1,316 @@
+"""
+SQLite media library for Trimmothy.
+
+Scans directory trees for video files, probes new and changed files in
+parallel on a bounded thread pool and keeps their key metadata (duration,
+codecs, resolution, frame rate, size, mtime) in an SQLite database. Rescans
+only probe files whose size or mtime changed, and files that disappeared are
+dropped. Queries by duration, codec, resolution and path are served from
+indexes, so finding a file among tens of thousands takes milliseconds.
+"""
+
+import os
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from trimmothy.cache import get_cache_dir
+from trimmothy.utils import is_video_file
+from trimmothy.video_processor import VideoProcessor
+
+
+SCHEMA_VERSION = 1
+LIBRARY_FILE = "library.sqlite3"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS media (
+    path TEXT PRIMARY KEY,
+    name TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    duration REAL,
+    video_codec TEXT,
+    audio_codec TEXT,
+    width INTEGER,
+    height INTEGER,
+    fps REAL,
+    scanned REAL NOT NULL,
+    error TEXT
+);
+CREATE INDEX IF NOT EXISTS media_duration ON media (duration);
+CREATE INDEX IF NOT EXISTS media_video_codec ON media (video_codec, duration);
+CREATE INDEX IF NOT EXISTS media_audio_codec ON media (audio_codec);
+CREATE INDEX IF NOT EXISTS media_resolution ON media (height, width);
+CREATE INDEX IF NOT EXISTS media_name ON media (name COLLATE NOCASE);
+"""
+
+COLUMNS = ('path', 'name', 'size', 'mtime_ns', 'duration', 'video_codec', 'audio_codec',
+           'width', 'height', 'fps', 'scanned', 'error')
+
+
+def get_library_path() -> Path:
+    """Get the default library database location."""
+    return get_cache_dir() / LIBRARY_FILE
+
+
+def _prefix_bounds(prefix: str) -> Tuple[str, str]:
+    """Range of paths starting with a prefix, usable with the primary key index."""
+    return prefix, prefix + "\U0010ffff"
+
+
+class MediaLibrary:
+    """Index of video files and their metadata backed by SQLite."""
+
+    BATCH_SIZE = 200   # Rows written per transaction during a scan
+
+    def __init__(self, db_path: Optional[str] = None, processor: Optional[VideoProcessor] = None,
+                 max_workers: Optional[int] = None):
+        """
+        Args:
+            db_path: Database file; defaults to the library in the cache directory
+            processor: VideoProcessor used for probing
+            max_workers: Number of files probed at once
+        """
+        self.db_path = str(db_path or get_library_path())
+        self.processor = processor or VideoProcessor()
+        self.max_workers = max_workers or min(8, (os.cpu_count() or 2) * 2)
+        self._local = threading.local()
+
+        with self._connect() as db:
+            db.executescript(SCHEMA)
+            db.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+
+    def _connect(self) -> sqlite3.Connection:
+        """Get this thread's connection (SQLite connections can't be shared across threads)."""
+        db = getattr(self._local, "db", None)
+        if db is None:
+            db = sqlite3.connect(self.db_path, timeout=30)
+            db.row_factory = sqlite3.Row
+            # WAL lets the GUI query while a scan is writing
+            db.execute("PRAGMA journal_mode = WAL")
+            db.execute("PRAGMA synchronous = NORMAL")
+            self._local.db = db
+        return db
+
+    def close(self):
+        """Close this thread's connection."""
+        db = getattr(self._local, "db", None)
+        if db is not None:
+            db.close()
+            self._local.db = None
+
+    @staticmethod
+    def walk(root: str, recursive: bool = True) -> Iterable[Tuple[str, int, int]]:
+        """
+        Yield (path, size, mtime_ns) of every video file under a directory.
+
+        Uses os.scandir so file sizes come from the directory listing where the
+        platform provides them.
+        """
+        stack = [root]
+        while stack:
+            directory = stack.pop()
+            try:
+                entries = os.scandir(directory)
+            except OSError:
+                continue
+            with entries:
+                for entry in entries:
+                    if entry.name.startswith('.'):
+                        continue
+                    try:
+                        if entry.is_dir(follow_symlinks=False):
+                            if recursive:
+                                stack.append(entry.path)
+                        elif is_video_file(entry.name):
+                            stat = entry.stat()
+                            if stat.st_size > 0:
+                                yield entry.path, stat.st_size, stat.st_mtime_ns
+                    except OSError:
+                        continue
+
+    def _probe(self, path: str, size: int, mtime_ns: int) -> Tuple:
+        """Probe one file into a database row; failures are stored so they aren't retried."""
+        try:
+            info = self.processor.get_video_info(path)
+            return (path, os.path.basename(path), size, mtime_ns, info['duration'], info['video_codec'],
+                    info['audio_codec'], info['width'], info['height'], round(info['fps'], 3),
+                    time.time(), None)
+        except Exception as e:
+            return (path, os.path.basename(path), size, mtime_ns, None, None, None, None, None, None,
+                    time.time(), str(e))
+
+    def scan(self, roots: List[str], recursive: bool = True, remove_missing: bool = True,
+             progress_callback: Optional[Callable[[int, int], None]] = None,
+             cancel_event: Optional[threading.Event] = None) -> Dict:
+        """
+        Add or refresh every video file under the given directories.
+
+        Args:
+            roots: Directories to scan
+            recursive: Include subdirectories
+            remove_missing: Drop indexed files under the roots that no longer exist
+            progress_callback: Optional callback receiving (files probed, files to probe)
+            cancel_event: Optional event that stops the scan; finished rows are kept
+
+        Returns:
+            Dictionary with counts of found, probed, unchanged, removed and failed files
+        """
+        db = self._connect()
+        stats = {'found': 0, 'probed': 0, 'unchanged': 0, 'removed': 0, 'failed': 0}
+
+        for root in roots:
+            root = os.path.abspath(root)
+            low, high = _prefix_bounds(root.rstrip(os.sep) + os.sep)
+            known = {row['path']: (row['size'], row['mtime_ns'])
+                     for row in db.execute("SELECT path, size, mtime_ns FROM media WHERE path >= ? AND path < ?",
+                                           (low, high))}
+
+            changed = []
+            seen = set()
+            for path, size, mtime_ns in self.walk(root, recursive):
+                seen.add(path)
+                if known.get(path) == (size, mtime_ns):
+                    stats['unchanged'] += 1
+                else:
+                    changed.append((path, size, mtime_ns))
+            stats['found'] += len(seen)
+
+            if remove_missing:
+                gone = [(path,) for path in known if path not in seen]
+                if not recursive:
+                    gone = [(path,) for (path,) in gone if os.path.dirname(path) == root]
+                with db:
+                    db.executemany("DELETE FROM media WHERE path = ?", gone)
+                stats['removed'] += len(gone)
+
+            self._probe_all(db, changed, stats, progress_callback, cancel_event)
+            if cancel_event is not None and cancel_event.is_set():
+                break
+
+        return stats
+
+    def _probe_all(self, db: sqlite3.Connection, files: List[Tuple[str, int, int]], stats: Dict,
+                   progress_callback, cancel_event):
+        """Probe files on the thread pool and write the rows in batches."""
+        if not files:
+            return
+        insert = f"INSERT OR REPLACE INTO media ({', '.join(COLUMNS)}) VALUES ({', '.join('?' * len(COLUMNS))})"
+        batch = []
+        done = 0
+
+        with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="trimmothy-library") as executor:
+            futures = [executor.submit(self._probe, *file) for file in files]
+            try:
+                for future in as_completed(futures):
+                    row = future.result()
+                    batch.append(row)
+                    done += 1
+                    stats['probed'] += 1
+                    if row[-1] is not None:
+                        stats['failed'] += 1
+
+                    if len(batch) >= self.BATCH_SIZE:
+                        with db:
+                            db.executemany(insert, batch)
+                        batch = []
+                    if progress_callback:
+                        progress_callback(done, len(files))
+                    if cancel_event is not None and cancel_event.is_set():
+                        for pending in futures:
+                            pending.cancel()
+                        break
+            finally:
+                if batch:
+                    with db:
+                        db.executemany(insert, batch)
+
+    def query(self, min_duration: Optional[float] = None, max_duration: Optional[float] = None,
+              video_codec: Optional[str] = None, audio_codec: Optional[str] = None,
+              min_width: Optional[int] = None, min_height: Optional[int] = None,
+              path_prefix: Optional[str] = None, name_contains: Optional[str] = None,
+              include_failed: bool = False, order_by: str = "path", limit: Optional[int] = None) -> List[Dict]:
+        """
+        Find indexed files.
+
+        Args:
+            min_duration: Minimum duration in seconds
+            max_duration: Maximum duration in seconds
+            video_codec: Video codec name (e.g. "h264")
+            audio_codec: Audio codec name (e.g. "aac")
+            min_width: Minimum frame width
+            min_height: Minimum frame height
+            path_prefix: Only files under this directory
+            name_contains: Case-insensitive file name substring
+            include_failed: Also return files that could not be probed
+            order_by: "path", "name", "duration", "size" or "mtime"
+            limit: Maximum number of results
+
+        Returns:
+            List of row dictionaries
+        """
+        conditions, params = [], []
+        if min_duration is not None:
+            conditions.append("duration >= ?")
+            params.append(min_duration)
+        if max_duration is not None:
+            conditions.append("duration <= ?")
+            params.append(max_duration)
+        if video_codec:
+            conditions.append("video_codec = ?")
+            params.append(video_codec.lower())
+        if audio_codec:
+            conditions.append("audio_codec = ?")
+            params.append(audio_codec.lower())
+        if min_width is not None:
+            conditions.append("width >= ?")
+            params.append(min_width)
+        if min_height is not None:
+            conditions.append("height >= ?")
+            params.append(min_height)
+        if path_prefix:
+            low, high = _prefix_bounds(os.path.abspath(path_prefix).rstrip(os.sep) + os.sep)
+            conditions.append("path >= ? AND path < ?")
+            params += [low, high]
+        if name_contains:
+            conditions.append("name LIKE ? ESCAPE '\\'")
+            escaped = name_contains.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+            params.append(f"%{escaped}%")
+        if not include_failed:
+            conditions.append("error IS NULL")
+
+        order_columns = {'path': 'path', 'name': 'name COLLATE NOCASE', 'duration': 'duration',
+                         'size': 'size', 'mtime': 'mtime_ns DESC'}
+        sql = "SELECT * FROM media"
+        if conditions:
+            sql += " WHERE " + " AND ".join(conditions)
+        sql += f" ORDER BY {order_columns.get(order_by, 'path')}"
+        if limit:
+            sql += " LIMIT ?"
+            params.append(limit)
+
+        return [dict(row) for row in self._connect().execute(sql, params)]
+
+    def get(self, path: str) -> Optional[Dict]:
+        """Get the row of one file, or None if it isn't indexed."""
+        row = self._connect().execute("SELECT * FROM media WHERE path = ?", (os.path.abspath(path),)).fetchone()
+        return dict(row) if row else None
+
+    def stats(self) -> Dict:
+        """Return totals for the whole library."""
+        db = self._connect()
+        total, failed, duration, size = db.execute(
+            "SELECT COUNT(*), COUNT(error), COALESCE(SUM(duration), 0), COALESCE(SUM(size), 0) FROM media"
+        ).fetchone()
+        codecs = {row[0]: row[1] for row in db.execute(
+            "SELECT video_codec, COUNT(*) FROM media WHERE error IS NULL GROUP BY video_codec ORDER BY 2 DESC")}
+        return {
+            'files': total,
+            'failed': failed,
+            'total_duration': duration,
+            'total_size': size,
+            'video_codecs': codecs,
+        }
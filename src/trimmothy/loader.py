@@ -0,0 +1,228 @@
+"""
+Progressive file opening for Trimmothy.
+
+Opening a file runs as a staged pipeline on a worker thread instead of
+blocking the UI: the first frame is delivered as soon as the container header
+has been parsed, then the probe metadata, then the timeline thumbnails one by
+one. Opening another file cancels whatever is left of the
+previous load, and the time from the open request until the first frame is on
+screen is recorded.
+"""
+
+import threading
+import time
+from collections import deque
+from typing import Callable, Dict, Optional
+
+import cv2
+
+from trimmothy.video_processor import VideoProcessor
+
+
+class LoadRequest:
+    """One file being opened; cancelled when superseded."""
+
+    def __init__(self, file_path: str):
+        self.file_path = file_path
+        self.started = time.monotonic()
+        self.cancel_event = threading.Event()
+        self.time_to_first_frame = None
+        self.time_to_metadata = None
+        self.time_to_thumbnails = None
+
+    def cancel(self):
+        self.cancel_event.set()
+
+    @property
+    def cancelled(self) -> bool:
+        return self.cancel_event.is_set()
+
+    def elapsed(self) -> float:
+        return time.monotonic() - self.started
+
+
+class ProgressiveLoader:
+    """Opens video files in stages and streams the results to the UI."""
+
+    THUMBNAIL_WIDTH = 120
+    MAX_THUMBNAIL_HEIGHT = 80
+    HISTORY_SIZE = 50   # Loads kept for the time-to-first-frame statistics
+
+    def __init__(self, processor: Optional[VideoProcessor] = None,
+                 dispatch: Optional[Callable[[Callable[[], None]], None]] = None):
+        """
+        Args:
+            processor: VideoProcessor used for probing and cached thumbnails
+            dispatch: Runs a callable on the UI thread (e.g. `lambda f: root.after(0, f)`);
+                callbacks run on the worker thread if omitted
+        """
+        self.processor = processor or VideoProcessor()
+        self.dispatch = dispatch or (lambda func: func())
+        self.current = None
+
+        self._lock = threading.Lock()
+        self._history = deque(maxlen=self.HISTORY_SIZE)
+        self.loads_started = 0
+        self.loads_cancelled = 0
+
+    def open(self, file_path: str,
+             on_first_frame: Callable[[cv2.VideoCapture, object, Dict], None],
+             on_metadata: Optional[Callable[[Dict, object], None]] = None,
+             on_thumbnail: Optional[Callable[[int, int, object], None]] = None,
+             on_error: Optional[Callable[[str], None]] = None,
+             thumbnail_count: int = 8) -> LoadRequest:
+        """
+        Start opening a file, cancelling any load still in progress.
+
+        All callbacks run through `dispatch` and are skipped once the request
+        has been cancelled.
+
+        Args:
+            file_path: Video file to open
+            on_first_frame: Receives the opened capture (now owned by the caller),
+                the first frame as an RGB array and the basic stream properties
+                (fps, frame_count, duration, width, height)
+            on_metadata: Receives the probe result and the cached FrameIndex (or None)
+            on_thumbnail: Receives the thumbnail index, its frame number and an RGB array
+                (None if the frame could not be decoded)
+            on_error: Receives an error message if the file can't be opened
+            thumbnail_count: Number of timeline thumbnails
+
+        Returns:
+            The LoadRequest, which can be cancelled
+        """
+        request = LoadRequest(file_path)
+        with self._lock:
+            if self.current is not None and not self.current.cancelled:
+                self.current.cancel()
+                self.loads_cancelled += 1
+            self.current = request
+            self.loads_started += 1
+
+        callbacks = (on_first_frame, on_metadata, on_thumbnail, on_error)
+        threading.Thread(target=self._run, args=(request, callbacks, thumbnail_count),
+                         daemon=True, name="trimmothy-load").start()
+        return request
+
+    def cancel(self):
+        """Cancel the load in progress, if any."""
+        with self._lock:
+            if self.current is not None and not self.current.cancelled:
+                self.current.cancel()
+                self.loads_cancelled += 1
+
+    def metrics(self) -> Dict:
+        """Return time-to-first-frame statistics in seconds."""
+        with self._lock:
+            times = [t for t in self._history if t is not None]
+            return {
+                'loads_started': self.loads_started,
+                'loads_cancelled': self.loads_cancelled,
+                'last_time_to_first_frame': round(times[-1], 4) if times else None,
+                'average_time_to_first_frame': round(sum(times) / len(times), 4) if times else None,
+                'worst_time_to_first_frame': round(max(times), 4) if times else None,
+            }
+
+    def _deliver(self, request: LoadRequest, callback, *args, on_skip=None):
+        """Run a callback on the UI thread unless the request was cancelled by then."""
+        def deliver():
+            if request.cancelled:
+                if on_skip:
+                    on_skip()
+                return
+            callback(*args)
+        self.dispatch(deliver)
+
+    def _run(self, request: LoadRequest, callbacks, thumbnail_count: int):
+        on_first_frame, on_metadata, on_thumbnail, on_error = callbacks
+        path = request.file_path
+
+        # Stage 1: container header and first frame
+        capture = cv2.VideoCapture(path)
+        ret, frame = capture.read() if capture.isOpened() else (False, None)
+        if not ret:
+            capture.release()
+            if on_error and not request.cancelled:
+                self._deliver(request, on_error, "Could not open video file")
+            return
+        if request.cancelled:
+            capture.release()
+            return
+
+        fps = capture.get(cv2.CAP_PROP_FPS) or 30
+        frame_count = int(capture.get(cv2.CAP_PROP_FRAME_COUNT))
+        properties = {
+            'fps': fps,
+            'frame_count': frame_count,
+            'duration': frame_count / fps,
+            'width': frame.shape[1],
+            'height': frame.shape[0],
+        }
+        # Leave the capture where a fresh one would be
+        capture.set(cv2.CAP_PROP_POS_FRAMES, 0)
+
+        def first_frame_shown():
+            on_first_frame(capture, cv2.cvtColor(frame, cv2.COLOR_BGR2RGB), properties)
+            request.time_to_first_frame = request.elapsed()
+            with self._lock:
+                self._history.append(request.time_to_first_frame)
+
+        self._deliver(request, first_frame_shown, on_skip=capture.release)
+
+        # Stage 2: metadata
+        try:
+            video_info = self.processor.get_video_info(path, persist=True)
+            frame_index = self.processor.get_frame_index(path, build=False)
+        except Exception as e:
+            print(f"Loading metadata failed: {e}")
+            video_info, frame_index = None, None
+        if request.cancelled:
+            return
+        request.time_to_metadata = request.elapsed()
+        if on_metadata and video_info is not None:
+            self._deliver(request, on_metadata, video_info, frame_index)
+
+        # Stage 3: thumbnails, left to right
+        if on_thumbnail and thumbnail_count > 0 and frame_count > 0:
+            self._load_thumbnails(request, on_thumbnail, thumbnail_count, frame_count)
+        if not request.cancelled:
+            request.time_to_thumbnails = request.elapsed()
+
+    def _load_thumbnails(self, request: LoadRequest, on_thumbnail, count: int, frame_count: int):
+        # A newly opened file is shown zoomed to fit, so every overview thumbnail is on screen
+        order = range(count)
+        # Same spacing as level 0 of the timeline's thumbnail pyramid
+        frame_for = lambda i: min(i * frame_count // count, frame_count - 1)
+
+        cached_paths = self.processor.get_cached_thumbnails(request.file_path, count)
+        if cached_paths:
+            for i in order:
+                if request.cancelled:
+                    return
+                image = cv2.imread(cached_paths[i])
+                if image is not None:
+                    image = cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
+                self._deliver(request, on_thumbnail, i, frame_for(i), image)
+            return
+
+        # Own capture, so the UI can keep seeking its own one meanwhile
+        capture = cv2.VideoCapture(request.file_path)
+        try:
+            for i in order:
+                if request.cancelled:
+                    return
+                frame_number = frame_for(i)
+                capture.set(cv2.CAP_PROP_POS_FRAMES, frame_number)
+                ret, frame = capture.read()
+                image = self._make_thumbnail(frame) if ret else None
+                self._deliver(request, on_thumbnail, i, frame_number, image)
+        finally:
+            capture.release()
+
+    def _make_thumbnail(self, frame) -> object:
+        """Scale a decoded BGR frame to thumbnail size as an RGB array."""
+        height, width = frame.shape[:2]
+        thumb_width = self.THUMBNAIL_WIDTH
+        thumb_height = min(int((thumb_width * height) / width), self.MAX_THUMBNAIL_HEIGHT)
+        frame = cv2.resize(frame, (thumb_width, thumb_height))
+        return cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
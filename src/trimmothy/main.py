@@ -6,6 +6,7 @@ import numpy as np
 from PIL import Image, ImageTk
 import os
 import threading
+import multiprocessing
 import time
 import tempfile
 import subprocess
@@ -14,6 +15,21 @@ from pathlib import Path
 
 # Import our modular components
 from trimmothy.video_processor import VideoProcessor
+from trimmothy.governor import get_governor
+from trimmothy.memory import format_breakdown, get_memory_governor
+from trimmothy.library import MediaLibrary
+from trimmothy.fingerprint import FINGERPRINT_BITS, FingerprintIndex
+from trimmothy.loader import ProgressiveLoader
+from trimmothy.decoder import DecoderError
+from trimmothy.gop import GopBuffer
+from trimmothy.preroll import BoundaryPreroll
+from trimmothy.shuttle import SHUTTLE_SPEEDS, ShuttleDecoder
+from trimmothy.session import DecoderPool, Session, SourceState
+from trimmothy.pyramid import ThumbnailPyramid
+from trimmothy.timeline import TimelineCanvas
+from trimmothy.server import ServiceClient
+from trimmothy.resumable import ResumableExport
+from trimmothy.optimistic import OptimisticExport
 from trimmothy.utils import (
     seconds_to_time_string, 
     time_string_to_seconds, 
@@ -29,6 +45,9 @@ ctk.set_appearance_mode("System")  # Modes: "System" (standard), "Dark", "Light"
 ctk.set_default_color_theme("blue")  # Themes: "blue" (standard), "green", "dark-blue"
 
 class TrimmothyApp:
+    GOP_STEP_POLL_MS = 10       # How often a backward step checks whether its GOP is decoded
+    GOP_STEP_TIMEOUT_MS = 5000  # After this long it seeks instead
+    
     def __init__(self):
         self.root = ctk.CTk()
         self.root.title("Trimmothy - Video Trimmer")
@@ -38,12 +57,30 @@ class TrimmothyApp:
         # Video-related attributes
         self.video_path = None
         self.video_processor = VideoProcessor()
+        # Indexing and pre-caching yield to scrubbing and playback
+        self.background_processor = VideoProcessor(background=True)
+        self.governor = get_governor()
+        self.memory = get_memory_governor()
+        self.memory_window = None
+        # Opens files off the Tk thread; results are handed back through root.after
+        self.loader = ProgressiveLoader(self.video_processor, dispatch=lambda func: self.root.after(0, func))
+        self.load_request = None
         self.video_info = None
         self.video_duration = 0
         self.current_frame = 0
+        # Frames come from a decode worker process; the loader's capture is only
+        # used until the worker has started
+        self.decoder = None
         self.cap = None
+        
+        # Recently opened files stay open so switching between them is instant
+        self.session = Session()
+        self.decoder_pool = DecoderPool()
+        self.source = None
+        self.source_paths = {}
         self.total_frames = 0
         self.fps = 30
+        self.frame_index = None
         self.temp_dir = None
         
         # Trim settings
@@ -54,6 +91,8 @@ class TrimmothyApp:
         self.is_playing = False
         self.playback_timer = None
         self.playback_speed = 30  # FPS for playback
+        self.playback_direction = 1  # -1 while playing in reverse
+        self.shuttle = None  # ShuttleDecoder while shuttling at 2x or more
         self._preview_mode = False
         self._preview_end_frame = 0
         
@@ -66,13 +105,18 @@ class TrimmothyApp:
 
         self.start_time_display = None
         self.end_time_display = None
-        self.thumbnail_frame = None
-        self.thumbnail_images = []
-        self.thumbnail_labels = []
+        self.timeline = None
         self.thumbnail_count = 8
         
+        # Thumbnails for the zoomable timeline
+        self.pyramid = None
+        
         self.setup_ui()
         
+        # Offer to pick up exports that were interrupted last time
+        self.root.after(500, self.offer_resume_exports)
+        self.root.after(1000, self.update_background_status)
+        
     def setup_ui(self):
         """Setup the main user interface"""
         # Main container
@@ -100,6 +144,26 @@ class TrimmothyApp:
             command=self.open_video_file
         )
         open_button.pack(side="right", padx=20, pady=10)
+        self.root.bind("<Escape>", self.cancel_loading)
+        
+        library_button = ctk.CTkButton(
+            file_frame,
+            text="Library",
+            command=self.open_library_window,
+            width=90
+        )
+        library_button.pack(side="right", pady=10)
+        
+        # Files open in this session
+        self.source_menu = ctk.CTkOptionMenu(
+            file_frame,
+            values=["No open files"],
+            command=self.on_source_selected,
+            width=240
+        )
+        self.source_menu.pack(side="right", padx=10, pady=10)
+        self.root.bind("<Control-Tab>", self.switch_to_previous_source)
+        self.root.bind("<Control-m>", self.show_memory_breakdown)
         
         # Main content frame (horizontal split)
         content_frame = ctk.CTkFrame(main_frame)
@@ -133,16 +197,62 @@ class TrimmothyApp:
         )
         self.play_button.pack(side="left", padx=10, pady=10)
         
+        # Frame stepping and reverse playback, served from the GOP buffer going backwards
+        self.reverse_button = ctk.CTkButton(
+            video_controls_frame,
+            text="◀ Reverse",
+            command=self.toggle_reverse_playback,
+            width=100
+        )
+        self.reverse_button.pack(side="left", padx=(0, 10), pady=10)
+        ctk.CTkButton(video_controls_frame, text="|◀", command=lambda: self.step_frame(-1),
+                      width=40).pack(side="left", pady=10)
+        ctk.CTkButton(video_controls_frame, text="▶|", command=lambda: self.step_frame(1),
+                      width=40).pack(side="left", padx=(5, 10), pady=10)
+        self.root.bind("<Left>", lambda event: self.on_step_key(event, -1))
+        self.root.bind("<Right>", lambda event: self.on_step_key(event, 1))
+        
+        # J/K/L shuttle: reverse, stop, forward; pressing J or L again doubles the speed
+        self.shuttle_label = ctk.CTkLabel(video_controls_frame, text="", font=ctk.CTkFont(size=11))
+        self.shuttle_label.pack(side="left", padx=10)
+        for key, direction in (("j", -1), ("k", 0), ("l", 1)):
+            self.root.bind(f"<{key}>", lambda event, direction=direction: self.on_shuttle_key(event, direction))
+        
+        # [ and ] nudge the trim start by a frame, { and } the trim end
+        for key, which, delta in (("bracketleft", "start", -1), ("bracketright", "start", 1),
+                                  ("braceleft", "end", -1), ("braceright", "end", 1)):
+            self.root.bind(f"<{key}>", lambda event, which=which, delta=delta: self.on_nudge_key(event, which, delta))
+        
+        # Background work status (shown while background jobs exist)
+        self.background_status_label = ctk.CTkLabel(video_controls_frame, text="", font=ctk.CTkFont(size=11))
+        self.background_status_label.pack(side="right", padx=10)
+        self.background_status_label.bind("<Button-1>", self.show_memory_breakdown)
+        
         # Video progress slider with thumbnails
         progress_frame = ctk.CTkFrame(left_frame)
         progress_frame.pack(fill="x")
         
-        progress_label = ctk.CTkLabel(progress_frame, text="Video Timeline:")
-        progress_label.pack(pady=(10, 5))
+        timeline_header = ctk.CTkFrame(progress_frame, fg_color="transparent")
+        timeline_header.pack(fill="x", padx=10, pady=(10, 5))
         
-        # Thumbnail progress bar frame
-        self.thumbnail_frame = ctk.CTkFrame(progress_frame)
-        self.thumbnail_frame.pack(fill="x", padx=10, pady=(0, 5))
+        progress_label = ctk.CTkLabel(timeline_header, text="Video Timeline:")
+        progress_label.pack(side="left")
+        
+        # Zoom controls (mouse wheel over the thumbnails pans, Ctrl+wheel zooms)
+        for text, command in (("Fit", lambda: self.timeline.zoom_fit()), ("+", lambda: self.timeline.zoom(2.0)),
+                              ("−", lambda: self.timeline.zoom(0.5))):
+            ctk.CTkButton(timeline_header, text=text, width=36, command=command).pack(side="right", padx=2)
+        
+        # Thumbnail strip, trim range and playhead drawn on one canvas
+        self.timeline = TimelineCanvas(
+            progress_frame,
+            frame_to_time=self.frame_to_time,
+            time_to_frame=self.time_to_frame,
+            format_time=self.seconds_to_time_string,
+            on_seek=self.on_timeline_seek,
+            on_trim_change=self.on_timeline_trim_change
+        )
+        self.timeline.pack(fill="x", padx=10, pady=(0, 5))
         
         # Regular slider (still needed for functionality)
         self.progress_slider = ctk.CTkSlider(
@@ -165,10 +275,8 @@ class TrimmothyApp:
         self.end_time_display = ctk.CTkLabel(time_labels_frame, text="00:00:00")
         self.end_time_display.pack(side="right")
         
-        # Initialize thumbnail variables
-        self.thumbnail_images = []
-        self.thumbnail_labels = []
-        self.thumbnail_count = 8  # Number of thumbnails to show
+        # Number of overview thumbnails decoded when a file is opened
+        self.thumbnail_count = 8
         
         # Right side - Trim controls and actions
         right_frame = ctk.CTkFrame(content_frame)
@@ -255,6 +363,22 @@ class TrimmothyApp:
         )
         preview_button.pack(pady=10)
         
+        # Optional export time budget
+        budget_frame = ctk.CTkFrame(action_frame)
+        budget_frame.pack(pady=(10, 0))
+        
+        budget_label = ctk.CTkLabel(budget_frame, text="Finish within (minutes, optional):")
+        budget_label.pack(side="left", padx=(10, 5))
+        
+        self.time_budget_var = tk.StringVar(value="")
+        budget_entry = ctk.CTkEntry(budget_frame, textvariable=self.time_budget_var, width=60)
+        budget_entry.pack(side="left", padx=(0, 10))
+        
+        # Optimistic export: stream-copy draft now, exact cut in the background
+        self.draft_first_var = tk.BooleanVar(value=False)
+        draft_checkbox = ctk.CTkCheckBox(action_frame, text="Quick draft first", variable=self.draft_first_var)
+        draft_checkbox.pack(pady=(10, 0))
+        
         # Trim and save button
         trim_button = ctk.CTkButton(
             action_frame,
@@ -264,6 +388,9 @@ class TrimmothyApp:
         )
         trim_button.pack(pady=10)
         
+        self.export_status_label = ctk.CTkLabel(action_frame, text="", font=ctk.CTkFont(size=11))
+        self.export_status_label.pack(pady=(0, 5))
+        
     def open_video_file(self):
         """Open video file dialog and load the selected video"""
         file_types = [
@@ -280,29 +407,62 @@ class TrimmothyApp:
             self.load_video(file_path)
             
     def load_video(self, file_path):
-        """Load the selected video file"""
+        """Start loading the selected video file; stages arrive as they finish"""
+        if file_path in self.session:
+            self.switch_source(file_path)
+            return
+        self.file_label.configure(text=f"Loading: {os.path.basename(file_path)}...")
+        self.load_request = self.loader.open(
+            file_path,
+            on_first_frame=lambda cap, frame, props: self.on_first_frame(file_path, cap, frame, props),
+            on_metadata=lambda info, index: self.on_video_metadata(file_path, info, index),
+            on_thumbnail=lambda index, frame_number, image: self.on_thumbnail_loaded(file_path, index, frame_number, image),
+            on_error=lambda message: messagebox.showerror("Error", f"Failed to load video: {message}"),
+            thumbnail_count=self.thumbnail_count
+        )
+        
+    def cancel_loading(self, event=None):
+        """Cancel a file that is still loading"""
+        if self.load_request is not None and self.load_request.time_to_thumbnails is None:
+            self.loader.cancel()
+            if self.video_path is None:
+                self.file_label.configure(text="No video file selected")
+            else:
+                self.file_label.configure(text=f"Loaded: {os.path.basename(self.video_path)}")
+        
+    def on_first_frame(self, file_path, cap, frame, properties):
+        """Show a newly opened file as soon as its first frame is decoded"""
         try:
+            if self.is_playing:
+                self.pause_video()
+            if self.cap is not None:
+                self.cap.release()
+            # The previous file stays open in the session
+            self.save_source_state()
+                
             self.video_path = file_path
+            self.video_info = None
+            self.frame_index = None
+            self.cap = cap
+            self.decoder = self.decoder_pool.acquire(file_path)
+            if not self.decoder.ready:
+                threading.Thread(target=self.start_decoder, args=(self.decoder,), daemon=True).start()
+            self.current_frame = 0
             self.file_label.configure(text=f"Loaded: {os.path.basename(file_path)}")
-            
-            # Load video with OpenCV for preview
-            self.cap = cv2.VideoCapture(file_path)
-            if not self.cap.isOpened():
-                raise Exception("Could not open video file")
                 
-            # Get video properties
-            self.total_frames = int(self.cap.get(cv2.CAP_PROP_FRAME_COUNT))
-            self.fps = self.cap.get(cv2.CAP_PROP_FPS)
-            self.video_duration = self.total_frames / self.fps
-            
-            # Get comprehensive video info using VideoProcessor
-            self.video_info = self.video_processor.get_video_info(file_path)
+            # Video properties from the container header
+            self.total_frames = properties['frame_count']
+            self.fps = properties['fps']
+            self.video_duration = properties['duration']
             
             # Create temp directory for thumbnails
+            if self.temp_dir:
+                cleanup_temp_files(self.temp_dir)
             self.temp_dir = tempfile.mkdtemp(prefix="trimmothy_")
             
                         # Update UI elements
-            self.progress_slider.configure(to=self.total_frames-1)
+            self.progress_slider.configure(to=max(self.total_frames - 1, 1))
+            self.progress_slider.set(0)
             self.start_trim_slider.configure(to=self.video_duration)
             self.end_trim_slider.configure(to=self.video_duration)
             
@@ -333,55 +493,334 @@ class TrimmothyApp:
             # Update trim info label
             self.update_trim_info_label()
             
-            # Display first frame
-            self.display_frame(0)
+            # Display the already decoded first frame
+            self.show_frame_image(frame)
             
-            # Generate and display thumbnails
-            self.generate_thumbnails()
-            self.display_thumbnails()
+            # Thumbnails are filled in as they arrive
+            self.pyramid = ThumbnailPyramid(
+                file_path, self.total_frames, base_count=self.thumbnail_count,
+                on_thumbnail=lambda level, index: self.timeline.schedule_refresh(),
+                dispatch=lambda func: self.root.after(0, func)
+            )
+            self.timeline.set_source(self.pyramid, self.total_frames)
             
-
+            self.source = SourceState(file_path, properties)
+            self.source.pyramid = self.pyramid
+            self.source.frames.put(0, frame)
+            for dropped in self.session.add(self.source):
+                self.decoder_pool.discard(dropped.video_path)
+            self.save_source_state()
+            self.update_source_menu()
+            self.refresh_preroll()
+            
+            # The loader records the time to first frame once this returns
+            self.root.after_idle(self.show_load_time)
             
         except Exception as e:
             messagebox.showerror("Error", f"Failed to load video: {str(e)}")
             
-    def display_frame(self, frame_number):
-        """Display a specific frame in the video preview"""
+    def start_decoder(self, decoder):
+        """Start a decode worker (runs on a helper thread)"""
+        try:
+            decoder.start()
+        except DecoderError as e:
+            print(f"Decode worker failed to start, decoding in-process: {e}")
+            return
+        self.root.after(0, lambda: self.on_decoder_ready(decoder))
+        
+    def on_decoder_ready(self, decoder):
+        """Switch frame reads to the worker once it has opened the source"""
+        if decoder is not self.decoder:
+            return
+        if self.cap is not None:
+            self.cap.release()
+            self.cap = None
+        elif not self.is_playing:
+            # Switched to a file whose worker had to be restarted
+            self.display_frame(self.current_frame)
+            
+    def save_source_state(self):
+        """Remember the current file's trim points and position in the session"""
+        state = self.source
+        if state is None:
+            return
+        state.trim_start = self.trim_start
+        state.trim_end = self.trim_end
+        state.current_frame = self.current_frame
+        state.video_info = self.video_info
+        state.frame_index = self.frame_index
+        state.total_frames = self.total_frames
+        state.video_duration = self.video_duration
+        state.fps = self.fps
+        
+    def switch_source(self, file_path):
+        """Bring a file that is open in the session back without reloading it"""
+        state = self.session.get(file_path)
+        if state is None:
+            self.load_video(file_path)
+            return
+        if state is self.source:
+            return
+        started = time.monotonic()
+        
+        if self.is_playing:
+            self.pause_video()
+        self.loader.cancel()
+        self.save_source_state()
+        if self.cap is not None:
+            self.cap.release()
+            self.cap = None
+            
+        self.source = state
+        self.video_path = state.video_path
+        self.video_info = state.video_info
+        self.frame_index = state.frame_index
+        self.total_frames = state.total_frames
+        self.fps = state.fps
+        self.video_duration = state.video_duration
+        self.current_frame = state.current_frame
+        self.pyramid = state.pyramid
+        self.decoder = self.decoder_pool.acquire(state.video_path)
+        if not self.decoder.ready:
+            threading.Thread(target=self.start_decoder, args=(self.decoder,), daemon=True).start()
+            
+        self.progress_slider.configure(to=max(self.total_frames - 1, 1))
+        self.progress_slider.set(self.current_frame)
+        self.start_trim_slider.configure(to=self.video_duration)
+        self.end_trim_slider.configure(to=self.video_duration)
+        self.start_trim_slider.set(state.trim_start)
+        self.end_trim_slider.set(state.trim_end)
+        self.trim_start = state.trim_start
+        self.trim_end = state.trim_end
+        self.start_time_var.set(self.seconds_to_time_string(self.trim_start))
+        self.end_time_var.set(self.seconds_to_time_string(self.trim_end))
+        if self.start_time_display:
+            self.start_time_display.configure(text=self.seconds_to_time_string(self.frame_to_time(self.current_frame)))
+        if self.end_time_display:
+            self.end_time_display.configure(text=self.seconds_to_time_string(self.video_duration))
+        self.timeline.set_source(self.pyramid, self.total_frames)
+        self.update_trim_info_label()
+        
+        # The last picture comes from the frame cache even while the worker restarts
+        frame = state.frames.get(self.current_frame)
+        if frame is not None:
+            self.show_frame_image(frame)
+            self.timeline.set_playhead(self.current_frame)
+        else:
+            self.display_frame(self.current_frame)
+            
+        self.update_source_menu()
+        self.file_label.configure(
+            text=f"Loaded: {os.path.basename(self.video_path)} (switched in {(time.monotonic() - started) * 1000:.0f} ms)"
+        )
+        
+    def update_source_menu(self):
+        """List the session's files, most recently used first"""
+        self.source_paths = {}
+        for state in self.session.sources():
+            name = os.path.basename(state.video_path)
+            folder = os.path.basename(os.path.dirname(state.video_path))
+            label = f"{name} ({folder})" if folder else name
+            while label in self.source_paths:
+                label += " "
+            self.source_paths[label] = state.video_path
+        labels = list(self.source_paths) or ["No open files"]
+        self.source_menu.configure(values=labels)
+        self.source_menu.set(labels[0])
+        
+    def on_source_selected(self, label):
+        """Switch to a file picked from the session menu"""
+        file_path = self.source_paths.get(label)
+        if file_path:
+            self.switch_source(file_path)
+            
+    def switch_to_previous_source(self, event=None):
+        """Toggle between the two most recently used files"""
+        sources = self.session.sources()
+        if len(sources) > 1:
+            self.switch_source(sources[1].video_path)
+        return "break"
+            
+    def read_frame(self, frame_number):
+        """Decode a frame as RGB, from the worker when it's running"""
+        if self.decoder is not None and self.decoder.ready:
+            try:
+                return self.decoder.read(frame_number)
+            except DecoderError as e:
+                print(f"Decode worker gave up, decoding in-process: {e}")
+                self.decoder.close()
+                self.cap = cv2.VideoCapture(self.video_path)
         if self.cap is None:
+            return None
+        self.cap.set(cv2.CAP_PROP_POS_FRAMES, frame_number)
+        ret, frame = self.cap.read()
+        return cv2.cvtColor(frame, cv2.COLOR_BGR2RGB) if ret else None
+            
+    def show_load_time(self):
+        """Show how long the current file took to get its first frame on screen"""
+        request = self.load_request
+        if request is None or request.time_to_first_frame is None or request.file_path != self.video_path:
             return
+        self.file_label.configure(
+            text=f"Loaded: {os.path.basename(self.video_path)} (first frame in {request.time_to_first_frame * 1000:.0f} ms)"
+        )
+        
+    def on_video_metadata(self, file_path, video_info, cached_index):
+        """Apply probe results once they are available"""
+        if file_path != self.video_path:
+            return  # The loader cancels loads of files that were switched away from
+        self.video_info = video_info
+        
+        # Use exact frame timestamps if the source has been indexed before,
+        # otherwise index it in the background and assume constant frame rate until then
+        if cached_index is not None:
+            self.apply_frame_index(file_path, cached_index)
+        else:
+            threading.Thread(target=self.build_frame_index, args=(file_path,), daemon=True).start()
             
+    def build_frame_index(self, file_path):
+        """Build the frame timestamp index off the UI thread"""
         try:
-            self.cap.set(cv2.CAP_PROP_POS_FRAMES, frame_number)
-            ret, frame = self.cap.read()
+            index = self.background_processor.get_frame_index(file_path)
+        except Exception as e:
+            print(f"Frame indexing failed: {e}")
+            return
+        if index is not None:
+            self.root.after(0, lambda: self.apply_frame_index(file_path, index))
             
-            if ret:
-                # Convert BGR to RGB
-                frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-                
-                # Resize frame to fit in the preview area
-                height, width = frame.shape[:2]
-                max_width, max_height = 600, 400
-                
-                if width > max_width or height > max_height:
-                    scale = min(max_width/width, max_height/height)
-                    new_width = int(width * scale)
-                    new_height = int(height * scale)
-                    frame = cv2.resize(frame, (new_width, new_height))
-                
-                # Convert to PIL Image and then to PhotoImage
-                image = Image.fromarray(frame)
-                photo = ImageTk.PhotoImage(image)
-                
-                # Update the video label
-                self.video_label.configure(image=photo, text="")
-                self.video_label.image = photo  # Keep a reference
+    def apply_frame_index(self, file_path, index):
+        """Switch the timeline to exact frame timestamps"""
+        if len(index) == 0:
+            return
+        if file_path != self.video_path:
+            # A different file is showing; keep the index for when this one comes back
+            state = self.session.get(file_path, touch=False)
+            if state is not None:
+                state.frame_index = index
+                if state.gops is not None:
+                    state.gops.set_keyframes(index.keyframes, index.frame_count)
+                if state.preroll is not None:
+                    state.preroll.frame_count = index.frame_count
+                state.total_frames = index.frame_count
+                state.video_duration = index.duration
+                state.trim_end = min(state.trim_end, index.duration)
+            return
+            
+        self.frame_index = index
+        self.total_frames = index.frame_count
+        self.video_duration = index.duration
+        if self.source is not None and self.source.gops is not None:
+            self.source.gops.set_keyframes(index.keyframes, index.frame_count)
+        if self.source is not None and self.source.preroll is not None:
+            self.source.preroll.frame_count = index.frame_count
+        self.progress_slider.configure(to=max(self.total_frames - 1, 1))
+        self.start_trim_slider.configure(to=self.video_duration)
+        self.end_trim_slider.configure(to=self.video_duration)
+        self.trim_end = min(self.trim_end, self.video_duration)
+        if self.end_time_display:
+            self.end_time_display.configure(text=self.seconds_to_time_string(self.video_duration))
+        self.update_trim_info_label()
+        self.timeline.set_total_frames(self.total_frames)
+        
+    def update_background_status(self):
+        """Show how much background work the governor is holding back, and cache memory once it runs high"""
+        metrics = self.governor.metrics()
+        parts = []
+        if metrics['background_running'] or metrics['deferred_seconds']:
+            state = "paused" if metrics['background_paused'] else "running"
+            parts.append(f"Background: {metrics['background_running']} {state}, "
+                         f"deferred {metrics['deferred_seconds']:.1f}s")
+        used = self.memory.total()
+        if used > self.memory.budget // 2:
+            parts.append(f"Cache: {used / 1024 ** 2:.0f}/{self.memory.budget / 1024 ** 2:.0f} MB")
+        self.background_status_label.configure(text=" · ".join(parts))
+        self.root.after(1000, self.update_background_status)
+        
+    def show_memory_breakdown(self, event=None):
+        """Open a window listing how much memory each cache holds, refreshed every second"""
+        if self.memory_window is not None and self.memory_window.winfo_exists():
+            self.memory_window.lift()
+            return "break"
+            
+        window = ctk.CTkToplevel(self.root)
+        window.title("Cache Memory")
+        window.geometry("760x280")
+        window.transient(self.root)
+        breakdown_label = ctk.CTkLabel(window, text="", justify="left", anchor="nw",
+                                       font=ctk.CTkFont(family="Menlo", size=11))
+        breakdown_label.pack(fill="both", expand=True, padx=10, pady=10)
+        
+        def refresh():
+            if not window.winfo_exists():
+                return
+            breakdown_label.configure(text=format_breakdown(self.memory.breakdown()))
+            window.after(1000, refresh)
+            
+        refresh()
+        self.memory_window = window
+        return "break"
+        
+    def frame_to_time(self, frame_number):
+        """Convert a frame number to its presentation time in seconds"""
+        if self.frame_index is not None:
+            return self.frame_index.frame_to_time(frame_number)
+        return frame_number / self.fps if self.fps > 0 else 0
+        
+    def time_to_frame(self, seconds):
+        """Convert a time in seconds to the frame shown at that time"""
+        if self.frame_index is not None:
+            return self.frame_index.time_to_frame(seconds)
+        # frame / fps * fps can land just below the frame number; don't drop a frame on the way back
+        return int(seconds * self.fps + 1e-6)
+            
+    def display_frame(self, frame_number):
+        """Display a specific frame in the video preview"""
+        if self.decoder is None:
+            return
+            
+        try:
+            frame = None
+            if self.source is not None:
+                # Frames around the trim points are kept decoded for previews and nudges
+                if self.source.preroll is not None:
+                    frame = self.source.preroll.get(frame_number)
+                if frame is None:
+                    frame = self.source.frames.get(frame_number)
+            if frame is None:
+                frame = self.read_frame(frame_number)
+                if frame is not None and self.source is not None:
+                    self.source.frames.put(frame_number, frame)
+            if frame is not None:
+                self.show_frame_image(frame)
+                self.timeline.set_playhead(frame_number)
                 
         except Exception as e:
             print(f"Error displaying frame: {e}")
             
+    def show_frame_image(self, frame):
+        """Show an RGB frame in the video preview"""
+        # Resize frame to fit in the preview area
+        height, width = frame.shape[:2]
+        max_width, max_height = 600, 400
+        
+        if width > max_width or height > max_height:
+            scale = min(max_width/width, max_height/height)
+            new_width = int(width * scale)
+            new_height = int(height * scale)
+            frame = cv2.resize(frame, (new_width, new_height))
+        
+        # Convert to PIL Image and then to PhotoImage
+        image = Image.fromarray(frame)
+        photo = ImageTk.PhotoImage(image)
+        
+        # Update the video label
+        self.video_label.configure(image=photo, text="")
+        self.video_label.image = photo  # Keep a reference
+            
     def on_progress_change(self, value):
         """Handle progress slider change"""
-        if self.cap is not None:
+        self.governor.notify_interaction()
+        if self.decoder is not None:
             # Stop playback when user manually moves slider
             if self.is_playing:
                 self.pause_video()
@@ -391,41 +830,129 @@ class TrimmothyApp:
             self.display_frame(frame_number)
             
             # Update current time display (using start time display on timeline)
-            current_time = frame_number / self.fps if self.fps > 0 else 0
+            current_time = self.frame_to_time(frame_number)
             if self.start_time_display:
                 self.start_time_display.configure(text=self.seconds_to_time_string(current_time))
             
     def toggle_playback(self):
         """Toggle video playback"""
-        if self.cap is None:
+        if self.decoder is None:
             messagebox.showwarning("Warning", "Please load a video file first")
             return
             
-        if self.is_playing:
+        if self.is_playing and self.playback_direction > 0:
             self.pause_video()
         else:
+            if self.is_playing:
+                self.pause_video()
             self.play_video()
             
-    def play_video(self):
-        """Start video playback"""
-        if self.cap is None:
+    def toggle_reverse_playback(self):
+        """Toggle playing backwards"""
+        if self.decoder is None:
+            messagebox.showwarning("Warning", "Please load a video file first")
+            return
+            
+        if self.is_playing and self.playback_direction < 0:
+            self.pause_video()
+        else:
+            if self.is_playing:
+                self.pause_video()
+            self.play_video(direction=-1)
+            
+    def play_video(self, direction=1):
+        """Start video playback, backwards when direction is -1"""
+        if self.decoder is None:
             return
             
         self.is_playing = True
-        self.play_button.configure(text="⏸ Pause")
+        self.playback_direction = direction
+        self.governor.set_playing(True)
+        if direction < 0:
+            self._preview_mode = False
+            self.reverse_button.configure(text="⏸ Pause")
+        else:
+            self.play_button.configure(text="⏸ Pause")
         self.playback_frame()
         
     def pause_video(self):
         """Pause video playback"""
+        if self.shuttle is not None:
+            self.stop_shuttle()
         self.is_playing = False
+        self.playback_direction = 1
+        self.governor.set_playing(False)
         self.play_button.configure(text="▶ Play")
+        self.reverse_button.configure(text="◀ Reverse")
         if self.playback_timer:
             self.root.after_cancel(self.playback_timer)
             self.playback_timer = None
             
+    def get_gop_buffer(self):
+        """The current source's GOP buffer, created on first use"""
+        if self.source is None:
+            return None
+        if self.source.gops is None:
+            keyframes = self.frame_index.keyframes if self.frame_index is not None else None
+            self.source.gops = GopBuffer(self.video_path, self.total_frames, keyframes)
+        return self.source.gops
+        
+    def show_position(self, frame_number):
+        """Move the slider and time display to a frame"""
+        self.progress_slider.set(frame_number)
+        if self.start_time_display:
+            self.start_time_display.configure(text=self.seconds_to_time_string(self.frame_to_time(frame_number)))
+            
+    def step_frame(self, delta):
+        """Step one frame forwards or backwards; backward steps come from the GOP buffer"""
+        if self.decoder is None:
+            return
+        self.governor.notify_interaction()
+        if self.is_playing:
+            self.pause_video()
+            
+        frame_number = min(max(self.current_frame + delta, 0), max(self.total_frames - 1, 0))
+        if frame_number == self.current_frame:
+            return
+        self.current_frame = frame_number
+        if delta < 0:
+            self.show_gop_frame(self.get_gop_buffer(), frame_number)
+        else:
+            self.display_frame(frame_number)
+        self.show_position(frame_number)
+        
+    def show_gop_frame(self, gops, frame_number, waited=0):
+        """Show a backward step from the GOP buffer, checking back until its span is decoded"""
+        if self.source is None or self.source.gops is not gops or self.is_playing \
+                or frame_number != self.current_frame:
+            return  # Stepped again, started playing or switched files meanwhile
+        frame = gops.get(frame_number, direction=-1)
+        if frame is not None:
+            self.show_frame_image(frame)
+            self.timeline.set_playhead(frame_number)
+        elif waited >= self.GOP_STEP_TIMEOUT_MS:
+            self.display_frame(frame_number)  # The span isn't coming; seek instead
+        else:
+            self.root.after(self.GOP_STEP_POLL_MS,
+                            lambda: self.show_gop_frame(gops, frame_number, waited + self.GOP_STEP_POLL_MS))
+        
+    def on_step_key(self, event, delta):
+        """Arrow keys step frames, except while typing in a field"""
+        if isinstance(event.widget, (tk.Entry, tk.Text)):
+            return None
+        self.step_frame(delta)
+        return "break"
+            
     def playback_frame(self):
         """Play next frame"""
-        if not self.is_playing or self.cap is None:
+        if not self.is_playing or self.decoder is None:
+            return
+            
+        if self.shuttle is not None:
+            self.shuttle_frame()
+            return
+        if self.playback_direction < 0:
+            self.reverse_playback_frame()
             return
             
         # Advance to next frame
@@ -448,21 +975,136 @@ class TrimmothyApp:
                 self.progress_slider.set(0)
             return
             
-        # Display the frame
+        # Display the frame and let the worker decode the next one while we wait;
+        # while the trim pre-roll supplies the frames, it seeks to where the pre-roll ends
         self.display_frame(self.current_frame)
         self.progress_slider.set(self.current_frame)
+        if self.decoder.ready:
+            next_frame = self.current_frame + 1
+            if self.source is not None and self.source.preroll is not None:
+                next_frame = self.source.preroll.run_end(next_frame)
+            self.decoder.prefetch(next_frame)
         
         # Update current time display (using start time display on timeline)
-        current_time = self.current_frame / self.fps if self.fps > 0 else 0
+        current_time = self.frame_to_time(self.current_frame)
         if self.start_time_display:
             self.start_time_display.configure(text=self.seconds_to_time_string(current_time))
         
-        # Schedule next frame
-        delay = int(1000 / self.playback_speed)  # Convert to milliseconds
+        # Schedule next frame, honoring the real frame spacing of VFR sources
+        if self.frame_index is not None:
+            interval = self.frame_to_time(self.current_frame + 1) - current_time
+            delay = max(1, int(interval * 1000)) if interval > 0 else int(1000 / self.playback_speed)
+        else:
+            delay = int(1000 / self.playback_speed)  # Convert to milliseconds
+        self.playback_timer = self.root.after(delay, self.playback_frame)
+        
+    def on_shuttle_key(self, event, direction):
+        """J/K/L: shuttle backwards, stop, or forwards; repeated presses double the speed up to 32x"""
+        if isinstance(event.widget, (tk.Entry, tk.Text)):
+            return None
+        if self.decoder is None:
+            return "break"
+        self.governor.notify_interaction()
+        if direction == 0:
+            if self.is_playing:
+                self.pause_video()
+            return "break"
+            
+        if not self.is_playing:
+            speed = 0
+        elif self.shuttle is not None:
+            speed = self.shuttle.speed
+        else:
+            speed = self.playback_direction
+        if speed * direction > 0:
+            speed = direction * min(abs(speed) * 2, SHUTTLE_SPEEDS[-1])
+        else:
+            speed = direction
+        self.set_shuttle_speed(speed)
+        return "break"
+        
+    def set_shuttle_speed(self, speed):
+        """Play at a signed speed: 1x in either direction decodes every frame, faster speeds shuttle"""
+        if abs(speed) == 1:
+            if self.is_playing:
+                self.pause_video()
+            self.play_video(direction=speed)
+            return
+            
+        if self.shuttle is None:
+            if self.is_playing:
+                self.pause_video()
+            keyframes = self.frame_index.keyframes if self.frame_index is not None else None
+            self.shuttle = ShuttleDecoder(self.video_path, self.total_frames, self.fps, keyframes)
+            self.shuttle.set_speed(speed, self.current_frame)
+            self._preview_mode = False
+            self.is_playing = True
+            self.governor.set_playing(True)
+            self.playback_frame()
+        else:
+            self.shuttle.set_speed(speed)
+        self.playback_direction = 1 if speed > 0 else -1
+        self.play_button.configure(text="⏸ Pause" if speed > 0 else "▶ Play")
+        self.reverse_button.configure(text="⏸ Pause" if speed < 0 else "◀ Reverse")
+        
+    def shuttle_frame(self):
+        """Show the newest shuttle frame and the display rate achieved at this speed"""
+        delivered = self.shuttle.next_frame()
+        if delivered is not None:
+            frame_number, frame = delivered
+            self.current_frame = frame_number
+            self.show_frame_image(frame)
+            self.timeline.set_playhead(frame_number)
+            self.show_position(frame_number)
+            
+        speed = self.shuttle.speed
+        rate = self.shuttle.display_rates().get(speed)
+        if rate is not None and rate['seconds'] > 0.5:
+            arrows = "▶▶" if speed > 0 else "◀◀"
+            self.shuttle_label.configure(text=f"{arrows} {abs(speed)}x · {rate['fps']:.0f} fps ({self.shuttle.mode})")
+            
+        if self.shuttle.at_end() and delivered is None:
+            self.pause_video()
+            return
+        # Poll at twice the shuttle's display rate so frames are shown soon after they're decoded
+        self.playback_timer = self.root.after(int(500 / ShuttleDecoder.DISPLAY_FPS), self.playback_frame)
+        
+    def stop_shuttle(self):
+        """Stop shuttling and report the display rate achieved at each speed"""
+        shuttle, self.shuttle = self.shuttle, None
+        shuttle.close()
+        rates = shuttle.display_rates()
+        if rates:
+            print("Shuttle display rates: " + ", ".join(
+                f"{speed:+d}x {rate['fps']:.1f} fps ({rate['mode']})" for speed, rate in sorted(rates.items())))
+        self.shuttle_label.configure(text="")
+        
+    def reverse_playback_frame(self):
+        """Play the previous frame from the GOP buffer, waiting a tick if it isn't decoded yet"""
+        if self.current_frame <= 0:
+            self.pause_video()
+            return
+            
+        frame_number = self.current_frame - 1
+        frame = self.get_gop_buffer().get(frame_number, direction=-1)
+        if frame is None:
+            # The span is still being decoded; try again shortly instead of seeking
+            self.playback_timer = self.root.after(5, self.playback_frame)
+            return
+            
+        self.current_frame = frame_number
+        self.show_frame_image(frame)
+        self.timeline.set_playhead(frame_number)
+        self.show_position(frame_number)
+        
+        current_time = self.frame_to_time(frame_number)
+        interval = current_time - self.frame_to_time(frame_number - 1) if frame_number > 0 else 0
+        delay = max(1, int(interval * 1000)) if interval > 0 else int(1000 / self.playback_speed)
         self.playback_timer = self.root.after(delay, self.playback_frame)
             
     def on_start_trim_change(self, value):
         """Handle start trim slider change"""
+        self.governor.notify_interaction()
         if self.video_duration > 0:
             self.trim_start = float(value)
             # Ensure start doesn't exceed end
@@ -476,6 +1118,7 @@ class TrimmothyApp:
             
     def on_end_trim_change(self, value):
         """Handle end trim slider change"""
+        self.governor.notify_interaction()
         if self.video_duration > 0:
             self.trim_end = float(value)
             # Ensure end doesn't go below start
@@ -497,6 +1140,56 @@ class TrimmothyApp:
             
             info_text = f"Trim: {start_str} - {end_str} (Duration: {duration_str})"
             self.trim_info_label.configure(text=info_text)
+            self.timeline.set_trim(self.trim_start, self.trim_end)
+            self.refresh_preroll()
+            
+    def get_preroll(self):
+        """The current source's trim pre-roll, created on first use"""
+        if self.source is None:
+            return None
+        if self.source.preroll is None:
+            self.source.preroll = BoundaryPreroll(self.video_path, self.total_frames, self.fps)
+        return self.source.preroll
+        
+    def refresh_preroll(self):
+        """Move the decoded frames kept around the trim points to where they are now"""
+        if self.source is None or self.video_duration <= 0 or self.source.video_path != self.video_path:
+            return
+        self.get_preroll().set_boundaries(self.time_to_frame(self.trim_start), self.time_to_frame(self.trim_end))
+        
+    def nudge_trim(self, which, delta):
+        """Move a trim point by whole frames and show the frame it now starts or ends on"""
+        if self.decoder is None or self.video_duration <= 0:
+            return
+        self.governor.notify_interaction()
+        if self.is_playing:
+            self.pause_video()
+            
+        current = self.trim_start if which == "start" else self.trim_end
+        frame_number = min(max(self.time_to_frame(current) + delta, 0), max(self.total_frames - 1, 0))
+        seconds = min(max(self.frame_to_time(frame_number), 0), self.video_duration)
+        if which == "start":
+            if seconds >= self.trim_end:
+                return
+            self.start_trim_slider.set(seconds)
+            self.on_start_trim_change(seconds)
+        else:
+            if seconds <= self.trim_start:
+                return
+            self.end_trim_slider.set(seconds)
+            self.on_end_trim_change(seconds)
+            
+        # The new edge frame comes from the pre-roll, decoded before the nudge
+        self.current_frame = frame_number
+        self.display_frame(frame_number)
+        self.show_position(frame_number)
+        
+    def on_nudge_key(self, event, which, delta):
+        """[ ] nudge the trim start, { } the trim end, except while typing in a field"""
+        if isinstance(event.widget, (tk.Entry, tk.Text)):
+            return None
+        self.nudge_trim(which, delta)
+        return "break"
         
     def on_start_time_change(self, event):
         """Handle start time input change"""
@@ -542,109 +1235,31 @@ class TrimmothyApp:
         secs = int(seconds % 60)
         return f"{hours:02d}:{minutes:02d}:{secs:02d}"
     
-    def generate_thumbnails(self):
-        """Generate thumbnail images for the video timeline"""
-        if self.cap is None or self.total_frames == 0:
+    def on_thumbnail_loaded(self, file_path, index, frame_number, image):
+        """Store an overview thumbnail from the file loader in its file's pyramid"""
+        state = self.session.get(file_path, touch=False)
+        if state is None or state.pyramid is None or image is None:
             return
-            
-        self.thumbnail_images = []
-        
-        # Calculate frame intervals for thumbnails
-        interval = max(1, self.total_frames // self.thumbnail_count)
+        state.pyramid.put(0, index, image)
+        if state is self.source:
+            self.timeline.schedule_refresh()
         
-        for i in range(self.thumbnail_count):
-            frame_number = min(i * interval, self.total_frames - 1)
-            
-            # Set frame position
-            self.cap.set(cv2.CAP_PROP_POS_FRAMES, frame_number)
-            ret, frame = self.cap.read()
-            
-            if ret:
-                # Convert from BGR to RGB
-                frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-                
-                # Resize to thumbnail size (maintaining aspect ratio)
-                height, width = frame.shape[:2]
-                thumb_width = 120
-                thumb_height = int((thumb_width * height) / width)
-                thumb_height = min(thumb_height, 80)  # Max height limit
-                
-                frame = cv2.resize(frame, (thumb_width, thumb_height))
-                
-                # Convert to PIL Image and then to PhotoImage
-                image = Image.fromarray(frame)
-                photo = ImageTk.PhotoImage(image)
-                
-                self.thumbnail_images.append(photo)
-            else:
-                # Add placeholder if frame can't be read
-                self.thumbnail_images.append(None)
-    
-    def display_thumbnails(self):
-        """Display thumbnails in the thumbnail frame"""
-        if not self.thumbnail_images or self.thumbnail_frame is None:
-            return
-            
-        # Clear existing thumbnails
-        for label in self.thumbnail_labels:
-            label.destroy()
-        self.thumbnail_labels = []
-        
-        # Create thumbnail labels
-        for i, thumb_image in enumerate(self.thumbnail_images):
-            if thumb_image:
-                # Calculate timestamp for this thumbnail
-                interval = max(1, self.total_frames // self.thumbnail_count)
-                frame_number = min(i * interval, self.total_frames - 1)
-                timestamp = self.seconds_to_time_string(frame_number / self.fps)
-                
-                # Create container for thumbnail and timestamp
-                thumb_container = ctk.CTkFrame(self.thumbnail_frame)
-                thumb_container.pack(side="left", padx=2, pady=5)
-                
-                # Thumbnail image
-                label = ctk.CTkLabel(
-                    thumb_container,
-                    image=thumb_image,
-                    text="",
-                    width=120,
-                    height=80,
-                    cursor="hand2"
-                )
-                label.pack()
-                
-                # Timestamp below thumbnail
-                time_label = ctk.CTkLabel(
-                    thumb_container,
-                    text=timestamp,
-                    font=ctk.CTkFont(size=10)
-                )
-                time_label.pack()
-                
-                self.thumbnail_labels.append(thumb_container)
-                
-                # Add click binding for seeking (bind to both thumbnail and container)
-                label.bind("<Button-1>", lambda e, idx=i: self.seek_to_thumbnail(idx))
-                thumb_container.bind("<Button-1>", lambda e, idx=i: self.seek_to_thumbnail(idx))
-    
-    def seek_to_thumbnail(self, thumbnail_index):
-        """Seek to the position represented by a thumbnail"""
+    def on_timeline_seek(self, frame_number):
+        """Seek to a frame clicked or dragged to on the timeline"""
         if self.total_frames == 0:
             return
-            
-        # Calculate frame position
-        interval = max(1, self.total_frames // self.thumbnail_count)
-        target_frame = min(thumbnail_index * interval, self.total_frames - 1)
-        
-        # Update current frame and display
-        self.current_frame = target_frame
-        self.progress_slider.set(target_frame)
-        self.display_frame(target_frame)
-        
-        # Update time displays (using start time display on timeline)
-        current_time = target_frame / self.fps
-        if self.start_time_display:
-            self.start_time_display.configure(text=self.seconds_to_time_string(current_time))
+        self.progress_slider.set(frame_number)
+        self.on_progress_change(frame_number)
+        
+    def on_timeline_trim_change(self, which, seconds):
+        """Move a trim point dragged on the timeline"""
+        seconds = min(max(seconds, 0), self.video_duration)
+        if which == "start":
+            self.start_trim_slider.set(seconds)
+            self.on_start_trim_change(seconds)
+        else:
+            self.end_trim_slider.set(seconds)
+            self.on_end_trim_change(seconds)
         
     def preview_trim(self):
         """Preview the selected trim by playing the trimmed section"""
@@ -662,7 +1277,7 @@ class TrimmothyApp:
                 self.pause_video()
             
             # Jump to start of trim
-            start_frame = int(self.trim_start * self.fps)
+            start_frame = self.time_to_frame(self.trim_start)
             self.current_frame = start_frame
             self.progress_slider.set(start_frame)
             self.display_frame(start_frame)
@@ -676,7 +1291,7 @@ class TrimmothyApp:
             
             # Set a flag to stop at trim end
             self._preview_mode = True
-            self._preview_end_frame = int(self.trim_end * self.fps)
+            self._preview_end_frame = self.time_to_frame(self.trim_end)
             
         except Exception as e:
             messagebox.showerror("Error", f"Preview failed: {str(e)}")
@@ -715,10 +1330,78 @@ class TrimmothyApp:
         )
         
         if save_path:
-            self.perform_trim(save_path)
+            if self.draft_first_var.get():
+                self.perform_optimistic_trim(save_path)
+            else:
+                self.perform_trim(save_path)
             
-    def perform_trim(self, output_path):
-        """Perform the actual video trimming"""
+    def perform_optimistic_trim(self, output_path):
+        """Save a keyframe-aligned draft right away and replace it with the exact cut in the background"""
+        name = Path(output_path).name
+        
+        def set_status(text):
+            self.root.after(0, lambda: self.export_status_label.configure(text=text))
+        
+        def on_error(message):
+            set_status(f"{name}: exact export failed, draft kept")
+            self.root.after(0, lambda: messagebox.showerror(
+                "Export Error", f"The frame-accurate export of {name} failed; the draft was kept.\n\n{message}"))
+        
+        export = OptimisticExport(
+            self.video_processor, self.video_path, output_path, self.trim_start, self.trim_end,
+            final_processor=self.background_processor,
+            on_draft=lambda path: set_status(f"Draft saved: {name}"),
+            on_final=lambda path: set_status(f"{name} is frame-accurate"),
+            on_error=on_error,
+            time_budget=self.get_time_budget()
+        )
+        
+        def progress_callback(progress):
+            prefix = "draft saved, " if export.state == 'draft' else ""
+            set_status(f"{name}: {prefix}exact export {progress * 100:.0f}%")
+        
+        def run():
+            if not ensure_directory_exists(output_path):
+                on_error("Cannot create output directory")
+                return
+            set_status(f"Writing draft of {name}...")
+            export.start(progress_callback)
+        
+        threading.Thread(target=run, daemon=True).start()
+            
+    def get_time_budget(self):
+        """Return the export time budget in seconds, or None if not set"""
+        try:
+            minutes = float(self.time_budget_var.get().strip())
+            return minutes * 60 if minutes > 0 else None
+        except ValueError:
+            return None
+            
+    def offer_resume_exports(self):
+        """Ask whether to resume exports that were interrupted by a crash or cancel"""
+        try:
+            manifests = ResumableExport.find_interrupted()
+        except Exception as e:
+            print(f"Could not check for interrupted exports: {e}")
+            return
+            
+        for manifest in manifests:
+            done = sum(1 for segment in manifest['segments'] if segment['done'])
+            total = len(manifest['segments'])
+            message = (
+                f"An export was interrupted before it finished:\n\n"
+                f"{manifest['output_path']}\n"
+                f"{self.seconds_to_time_string(manifest['start_time'])} - "
+                f"{self.seconds_to_time_string(manifest['end_time'])} ({done}/{total} segments done)\n\n"
+                f"Resume it now? Choose No to discard it."
+            )
+            if messagebox.askyesno("Resume Export", message):
+                self.perform_trim(manifest['output_path'], resume_manifest=manifest)
+                return  # Any others are offered again on the next start
+            ResumableExport.from_manifest(self.video_processor, manifest).discard()
+            
+    def perform_trim(self, output_path, resume_manifest=None):
+        """Perform the actual video trimming, or resume an interrupted export"""
         try:
             # Show progress dialog
             progress_window = ctk.CTkToplevel(self.root)
@@ -736,9 +1419,11 @@ class TrimmothyApp:
             
             # Add cancel functionality
             cancel_requested = {"value": False}
+            cancel_event = threading.Event()
             
             def cancel_encoding():
                 cancel_requested["value"] = True
+                cancel_event.set()
                 progress_label.configure(text="Cancelling... Please wait")
                 cancel_button.configure(state="disabled")
             
@@ -751,6 +1436,12 @@ class TrimmothyApp:
             )
             cancel_button.pack(pady=10)
             
+            time_budget = self.get_time_budget()
+            if resume_manifest:
+                trim_duration = resume_manifest['end_time'] - resume_manifest['start_time']
+            else:
+                trim_duration = self.trim_end - self.trim_start
+            
             def trim_video():
                 try:
                     if cancel_requested["value"]:
@@ -766,17 +1457,25 @@ class TrimmothyApp:
                     if not ensure_directory_exists(output_path):
                         raise Exception(f"Cannot create output directory")
                     
-                    # Use VideoProcessor for fast and reliable trimming
                     progress_label.configure(text="Processing video with FFmpeg...")
                     progress_window.update()
                     
-                    success = self.video_processor.trim_video(
-                        self.video_path,
-                        output_path,
-                        self.trim_start,
-                        self.trim_end,
-                        progress_callback=progress_callback
-                    )
+                    if resume_manifest:
+                        export = ResumableExport.from_manifest(self.video_processor, resume_manifest)
+                        success = export.run(progress_callback, cancel_event)
+                    else:
+                        # Hand the job to the local trim service if one is running,
+                        # otherwise use our own VideoProcessor
+                        processor = ServiceClient.connect_default() or self.video_processor
+                        success = processor.trim_video(
+                            self.video_path,
+                            output_path,
+                            self.trim_start,
+                            self.trim_end,
+                            progress_callback=progress_callback,
+                            time_budget=time_budget,
+                            cancel_event=cancel_event
+                        )
                     
                     if cancel_requested["value"]:
                         return
@@ -791,7 +1490,7 @@ class TrimmothyApp:
                         progress_window.after(500, progress_window.destroy)
                         
                         # Show success message with option to open location
-                        duration = seconds_to_time_string(self.trim_end - self.trim_start)
+                        duration = seconds_to_time_string(trim_duration)
                         self.root.after(600, lambda: self.show_success_dialog(output_path, duration))
                     else:
                         raise Exception("Video processing failed")
@@ -835,6 +1534,137 @@ class TrimmothyApp:
         except Exception as e:
             messagebox.showerror("Error", f"Failed to start trimming: {str(e)}")
     
+    def open_library_window(self):
+        """Search indexed videos and scan folders into the library"""
+        library = MediaLibrary(processor=self.background_processor)
+        fingerprints = FingerprintIndex(processor=self.background_processor)
+        
+        window = ctk.CTkToplevel(self.root)
+        window.title("Media Library")
+        window.geometry("820x520")
+        window.transient(self.root)
+        
+        # Search filters
+        filters_frame = ctk.CTkFrame(window)
+        filters_frame.pack(fill="x", padx=10, pady=10)
+        
+        name_var = tk.StringVar()
+        codec_var = tk.StringVar()
+        min_duration_var = tk.StringVar()
+        for label, variable, width in (("Name:", name_var, 200), ("Codec:", codec_var, 70),
+                                       ("Min length:", min_duration_var, 80)):
+            ctk.CTkLabel(filters_frame, text=label).pack(side="left", padx=(10, 2))
+            entry = ctk.CTkEntry(filters_frame, textvariable=variable, width=width)
+            entry.pack(side="left", padx=(0, 5))
+            entry.bind("<Return>", lambda e: search())
+            
+        # Results list
+        list_frame = ctk.CTkFrame(window)
+        list_frame.pack(fill="both", expand=True, padx=10)
+        scrollbar = tk.Scrollbar(list_frame)
+        scrollbar.pack(side="right", fill="y")
+        results = tk.Listbox(list_frame, yscrollcommand=scrollbar.set, font=("Menlo", 11), activestyle="none")
+        results.pack(side="left", fill="both", expand=True)
+        scrollbar.configure(command=results.yview)
+        
+        status_label = ctk.CTkLabel(window, text="")
+        status_label.pack(fill="x", padx=10, pady=(5, 0))
+        
+        rows = []
+        result_limit = 500
+        
+        def search():
+            min_duration = min_duration_var.get().strip()
+            try:
+                min_seconds = (self.time_string_to_seconds(min_duration) if ":" in min_duration
+                               else float(min_duration) if min_duration else None)
+            except ValueError:
+                min_seconds = None
+            rows[:] = library.query(min_duration=min_seconds, video_codec=codec_var.get().strip() or None,
+                                    name_contains=name_var.get().strip() or None, limit=result_limit)
+            results.delete(0, "end")
+            for row in rows:
+                results.insert("end", f"{self.seconds_to_time_string(row['duration'])}  {row['video_codec']:<6} "
+                                      f"{row['width']}x{row['height']:<5}  {row['path']}")
+            stats = library.stats()
+            shown = f"{len(rows)}+" if len(rows) == result_limit else str(len(rows))
+            status_label.configure(text=f"{shown} matches in {stats['files']} indexed files")
+            
+        def open_selected(event=None):
+            selection = results.curselection()
+            if selection:
+                self.load_video(rows[selection[0]]['path'])
+                
+        def scan_folder():
+            folder = filedialog.askdirectory(title="Add a folder to the library", parent=window)
+            if not folder:
+                return
+            
+            def progress(done, total):
+                self.root.after(0, lambda: status_label.configure(text=f"Scanning: probed {done}/{total}"))
+                
+            def fingerprint_progress(done, total):
+                self.root.after(0, lambda: status_label.configure(text=f"Fingerprinting {done}/{total}"))
+                
+            def run_scan():
+                try:
+                    stats = library.scan([folder], progress_callback=progress)
+                    fingerprints.scan([folder], progress_callback=fingerprint_progress)
+                except Exception as e:
+                    message = f"Library scan failed: {e}"
+                    self.root.after(0, lambda: messagebox.showerror("Error", message))
+                    return
+                finally:
+                    library.close()  # This thread's connections
+                    fingerprints.close()
+                self.root.after(0, search)
+                self.root.after(0, lambda: status_label.configure(
+                    text=f"Scanned {stats['found']} files: {stats['probed']} probed, "
+                         f"{stats['unchanged']} unchanged, {stats['removed']} removed"))
+                    
+            status_label.configure(text="Scanning...")
+            threading.Thread(target=run_scan, daemon=True).start()
+            
+        def find_similar():
+            selection = results.curselection()
+            path = rows[selection[0]]['path'] if selection else self.video_path
+            if not path:
+                return
+            
+            def run_lookup():
+                try:
+                    matches = fingerprints.matches(path)
+                except Exception as e:
+                    message = f"Duplicate search failed: {e}"
+                    self.root.after(0, lambda: messagebox.showerror("Error", message))
+                    return
+                finally:
+                    fingerprints.close()
+                self.root.after(0, lambda: show_matches(path, matches))
+                
+            status_label.configure(text=f"Looking for copies of {os.path.basename(path)}...")
+            threading.Thread(target=run_lookup, daemon=True).start()
+            
+        def show_matches(path, matches):
+            rows[:] = [library.get(match) or {'path': match} for match, _ in matches]
+            results.delete(0, "end")
+            for row, (match, distance) in zip(rows, matches):
+                similarity = 100 * (1 - distance / FINGERPRINT_BITS)
+                results.insert("end", f"{similarity:5.1f}%  {match}")
+            status_label.configure(text=f"{len(matches)} likely duplicates of {os.path.basename(path)}")
+            
+        results.bind("<Double-Button-1>", open_selected)
+        results.bind("<Return>", open_selected)
+        
+        buttons_frame = ctk.CTkFrame(window)
+        buttons_frame.pack(fill="x", padx=10, pady=10)
+        ctk.CTkButton(buttons_frame, text="Search", command=search, width=90).pack(side="left", padx=5)
+        ctk.CTkButton(buttons_frame, text="Scan Folder...", command=scan_folder, width=120).pack(side="left", padx=5)
+        ctk.CTkButton(buttons_frame, text="Find Duplicates", command=find_similar, width=130).pack(side="left", padx=5)
+        ctk.CTkButton(buttons_frame, text="Open", command=open_selected, width=90).pack(side="right", padx=5)
+        
+        search()
+        
     def show_success_dialog(self, output_path, duration):
         """Show success dialog with option to open file location"""
         dialog = ctk.CTkToplevel(self.root)
@@ -902,6 +1732,8 @@ class TrimmothyApp:
             self.is_playing = False  # Stop any ongoing playback
             if self.cap:
                 self.cap.release()
+            self.decoder_pool.close()
+            self.session.close()
             if self.temp_dir:
                 cleanup_temp_files(self.temp_dir)
 
@@ -911,4 +1743,6 @@ def main():
     app.run()
 
 if __name__ == "__main__":
+    # Decode workers are spawned processes; needed when running as a frozen app
+    multiprocessing.freeze_support()
     main() 
\ No newline at end of file
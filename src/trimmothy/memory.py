@@ -0,0 +1,324 @@
+"""
+Process-wide memory governor for Trimmothy's in-memory caches.
+
+Every cache that holds decoded pixels or probe results (per-source frame
+caches, GOP buffers, thumbnail pyramids, the decoder rings, the probe cache)
+registers with the governor under a name and a cost: how expensive a byte of
+it is to recreate. Caches keep enforcing their own limits; the governor adds
+a shared budget on top. A cache exposes two methods:
+
+- `memory_usage()`: bytes currently held (read without locking)
+- `release_memory(nbytes)`: drop about that many bytes of its least valuable
+  entries and return how many were freed
+
+and calls `touch()` on the governor whenever it is used or grows. When the
+total passes the budget, or the system runs low on available memory, a
+background thread evicts from the caches whose bytes are cheapest to rebuild
+and least recently used first, so a busy cache never has to wait on another
+cache's lock. `breakdown()` lists the current usage per cache for diagnostics.
+"""
+
+import functools
+import os
+import re
+import subprocess
+import sys
+import threading
+import time
+import weakref
+from typing import Dict, List, Optional, Tuple
+
+
+def physical_memory() -> Optional[int]:
+    """Total RAM in bytes, if the platform reports it."""
+    try:
+        return os.sysconf('SC_PAGE_SIZE') * os.sysconf('SC_PHYS_PAGES')
+    except (AttributeError, ValueError, OSError):
+        return None
+
+
+@functools.lru_cache(maxsize=None)
+def _libc():
+    import ctypes
+    import ctypes.util
+
+    return ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+
+
+def _darwin_sysctl(name: str) -> Optional[int]:
+    """Read an integer sysctl on macOS without starting a process."""
+    import ctypes
+
+    value = ctypes.c_uint64(0)
+    size = ctypes.c_size_t(ctypes.sizeof(value))
+    try:
+        result = _libc().sysctlbyname(name.encode("ascii"), ctypes.byref(value), ctypes.byref(size), None, 0)
+    except (OSError, AttributeError):
+        return None
+    return value.value if result == 0 else None
+
+
+def _darwin_vm_stat() -> Optional[int]:
+    """Free, inactive and speculative pages from vm_stat, which macOS reclaims without swapping."""
+    try:
+        output = subprocess.run(["vm_stat"], capture_output=True, text=True, timeout=2.0).stdout
+    except (OSError, subprocess.SubprocessError):
+        return None
+    page_size = re.search(r"page size of (\d+) bytes", output)
+    pages = dict(re.findall(r"^Pages (free|inactive|speculative):\s+(\d+)\.", output, re.MULTILINE))
+    if page_size is None or 'free' not in pages:
+        return None
+    return int(page_size.group(1)) * sum(int(count) for count in pages.values())
+
+
+VM_STAT_INTERVAL = 60.0   # Seconds a vm_stat reading is reused, since it costs a process launch
+_vm_stat_reading: Tuple[float, Optional[int]] = (float('-inf'), None)
+
+
+def _darwin_available_memory() -> Optional[int]:
+    """
+    Available RAM on macOS.
+
+    The kernel's memory status level is the percentage of RAM it can hand out
+    without swapping. Where it can't be read, vm_stat is run instead, at most
+    once per VM_STAT_INTERVAL.
+    """
+    global _vm_stat_reading
+    level = _darwin_sysctl("kern.memorystatus_level")
+    total = _darwin_sysctl("hw.memsize")
+    if level is not None and total and 0 < level <= 100:
+        return total * level // 100
+
+    read_at, available = _vm_stat_reading
+    if time.monotonic() - read_at >= VM_STAT_INTERVAL:
+        available = _darwin_vm_stat()
+        _vm_stat_reading = (time.monotonic(), available)
+    return available
+
+
+def available_memory() -> Optional[int]:
+    """RAM available to new allocations in bytes, if the platform reports it."""
+    if sys.platform == "darwin":
+        return _darwin_available_memory()
+    try:
+        with open("/proc/meminfo", "r") as f:
+            for line in f:
+                if line.startswith("MemAvailable:"):
+                    return int(line.split()[1]) * 1024
+    except (OSError, ValueError):
+        pass
+    try:
+        return os.sysconf('SC_PAGE_SIZE') * os.sysconf('SC_AVPHYS_PAGES')
+    except (AttributeError, ValueError, OSError):
+        return None
+
+
+class MemoryGovernor:
+    """Shared memory budget that evicts across registered caches by cost and recency."""
+
+    MIN_BUDGET = 512 * 1024 ** 2
+    MAX_BUDGET = 4 * 1024 ** 3
+    BUDGET_FRACTION = 0.25       # Share of physical RAM used when no budget is configured
+    UNMEASURED_BUDGET_FRACTION = 0.125  # Used instead where available memory can't be read
+    LOW_MEMORY_FRACTION = 0.1    # Available RAM below this share of physical RAM counts as pressure
+    CHECK_INTERVAL = 2.0         # Seconds between system memory checks
+
+    def __init__(self, budget: Optional[int] = None):
+        """
+        Args:
+            budget: Bytes all registered caches may hold together; TRIMMOTHY_MEMORY_MB
+                overrides the default of a quarter of RAM (0.5-4 GB), or an eighth
+                where the system's available memory can't be measured
+        """
+        total = physical_memory()
+        measurable = available_memory() is not None
+        if budget is None and os.environ.get("TRIMMOTHY_MEMORY_MB"):
+            budget = int(float(os.environ["TRIMMOTHY_MEMORY_MB"]) * 1024 ** 2)
+        if budget is None:
+            fraction = self.BUDGET_FRACTION if measurable else self.UNMEASURED_BUDGET_FRACTION
+            budget = int(total * fraction) if total else self.MAX_BUDGET
+            budget = min(max(budget, self.MIN_BUDGET), self.MAX_BUDGET)
+        self.budget = budget
+
+        # Without a reading of available memory, only the budget limits the caches
+        self.low_memory = max(int(total * self.LOW_MEMORY_FRACTION), self.MIN_BUDGET) if total and measurable else None
+
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._caches: Dict[int, Dict] = {}
+        self._thread = None
+
+        # Metrics
+        self.rebalances = 0
+        self.pressure_events = 0
+        self.evicted_bytes = 0
+
+    # Registration
+
+    def register(self, cache, name: str, cost: float = 1.0):
+        """
+        Track a cache.
+
+        Args:
+            cache: Object with memory_usage() and release_memory(nbytes); held weakly
+            name: Label shown in breakdown()
+            cost: Relative cost of recreating one byte of this cache; cheaper
+                caches are evicted first
+        """
+        key = id(cache)
+        with self._lock:
+            self._caches[key] = {
+                'ref': weakref.ref(cache, lambda ref, key=key: self._forget(key, ref)),
+                'name': name,
+                'cost': max(cost, 1e-6),
+                'last_used': time.monotonic(),
+                'evicted_bytes': 0,
+            }
+        self._ensure_thread()
+
+    def unregister(self, cache):
+        """Stop tracking a cache, e.g. when it is closed."""
+        with self._lock:
+            self._caches.pop(id(cache), None)
+
+    def _forget(self, key: int, ref):
+        with self._lock:
+            entry = self._caches.get(key)
+            if entry is not None and entry['ref'] is ref:
+                del self._caches[key]
+
+    def touch(self, cache):
+        """Mark a cache as just used; wakes the evictor if the budget is exceeded."""
+        entry = self._caches.get(id(cache))
+        if entry is not None:
+            entry['last_used'] = time.monotonic()
+        if self.total() > self.budget:
+            self._wakeup.set()
+
+    # Accounting
+
+    def _live(self) -> List[Tuple[Dict, object]]:
+        with self._lock:
+            entries = list(self._caches.values())
+        live = []
+        for entry in entries:
+            cache = entry['ref']()
+            if cache is not None:
+                live.append((entry, cache))
+        return live
+
+    def total(self) -> int:
+        """Bytes held by all registered caches."""
+        return sum(cache.memory_usage() for _, cache in self._live())
+
+    def breakdown(self) -> Dict:
+        """
+        Current memory use for diagnostics.
+
+        Returns:
+            Dictionary with the budget, total, system available memory, counters
+            and a 'caches' list (name, bytes, cost, idle seconds, evicted bytes),
+            largest first
+        """
+        now = time.monotonic()
+        caches = [{
+            'name': entry['name'],
+            'bytes': cache.memory_usage(),
+            'cost': entry['cost'],
+            'idle_seconds': round(now - entry['last_used'], 1),
+            'evicted_bytes': entry['evicted_bytes'],
+        } for entry, cache in self._live()]
+        caches.sort(key=lambda item: -item['bytes'])
+        return {
+            'budget': self.budget,
+            'total': sum(item['bytes'] for item in caches),
+            'available': available_memory(),
+            'rebalances': self.rebalances,
+            'pressure_events': self.pressure_events,
+            'evicted_bytes': self.evicted_bytes,
+            'caches': caches,
+        }
+
+    # Eviction
+
+    def rebalance(self) -> int:
+        """
+        Evict until the caches fit the budget and the system isn't short of memory.
+
+        Returns:
+            Bytes freed
+        """
+        live = self._live()
+        total = sum(cache.memory_usage() for _, cache in live)
+        target = self.budget
+        available = available_memory() if self.low_memory else None
+        if available is not None and available < self.low_memory:
+            # Give back what the system is missing, and at least a quarter of what we hold
+            self.pressure_events += 1
+            target = min(target, total - max(self.low_memory - available, total // 4))
+        if total <= target:
+            return 0
+
+        self.rebalances += 1
+        freed_total = 0
+        now = time.monotonic()
+        # Cheapest to rebuild and longest idle first
+        order = sorted(live, key=lambda item: item[0]['cost'] / (1.0 + now - item[0]['last_used']))
+        for entry, cache in order:
+            excess = total - target
+            if excess <= 0:
+                break
+            usage = cache.memory_usage()
+            if usage <= 0:
+                continue
+            try:
+                freed = cache.release_memory(min(excess, usage))
+            except Exception as e:
+                print(f"Releasing memory from {entry['name']} failed: {e}")
+                continue
+            entry['evicted_bytes'] += freed
+            total -= freed
+            freed_total += freed
+        self.evicted_bytes += freed_total
+        return freed_total
+
+    def _ensure_thread(self):
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._thread = threading.Thread(target=self._run, daemon=True, name="trimmothy-memory")
+            self._thread.start()
+
+    def _run(self):
+        while True:
+            self._wakeup.wait(self.CHECK_INTERVAL)
+            self._wakeup.clear()
+            try:
+                self.rebalance()
+            except Exception as e:
+                print(f"Memory rebalance failed: {e}")
+
+
+def format_breakdown(breakdown: Dict) -> str:
+    """Render breakdown() as a small table for logs and diagnostics."""
+    mb = 1024 ** 2
+    lines = [f"Cache memory: {breakdown['total'] / mb:.1f} MB of {breakdown['budget'] / mb:.0f} MB budget"]
+    if breakdown['available'] is not None:
+        lines[0] += f", {breakdown['available'] / mb:.0f} MB available"
+    for cache in breakdown['caches']:
+        lines.append(f"  {cache['name']:<40} {cache['bytes'] / mb:8.1f} MB  cost {cache['cost']:g}  "
+                     f"idle {cache['idle_seconds']:.0f}s  evicted {cache['evicted_bytes'] / mb:.1f} MB")
+    return "\n".join(lines)
+
+
+_memory_governor = None
+_memory_governor_lock = threading.Lock()
+
+
+def get_memory_governor() -> MemoryGovernor:
+    """Get the process-wide memory governor."""
+    global _memory_governor
+    with _memory_governor_lock:
+        if _memory_governor is None:
+            _memory_governor = MemoryGovernor()
+        return _memory_governor
@@ -0,0 +1,630 @@
+"""
+Box-level MP4/MOV trimming for Trimmothy.
+
+Trims an ISO-BMFF file without FFmpeg: the `moov` box is parsed, every
+track's sample tables (`stts`, `ctts`, `stss`, `stsz`, `stsc`, `stco`/`co64`)
+are cut down to the samples the range needs, and a new edit list hides the
+pre-roll before the requested start, the same way an FFmpeg stream copy does.
+The sample data is copied as a few large byte ranges with
+`os.copy_file_range` (or `os.sendfile`) so it never passes through Python.
+The output is written `ftyp`, `moov`, `mdat`, so it streams without a
+separate faststart pass.
+
+Fragmented, encrypted and multi-segment-edit files raise UnsupportedMp4 and
+are left to FFmpeg.
+"""
+
+import os
+import struct
+from typing import BinaryIO, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+
+CONTAINER_BOXES = {b'moov', b'trak', b'mdia', b'minf', b'stbl', b'edts'}
+# Per-sample side tables that are dropped rather than trimmed
+DROPPED_STBL_BOXES = {b'sdtp', b'sgpd', b'sbgp', b'stps', b'stsh', b'padb', b'subs', b'cslg', b'saiz', b'saio'}
+ENCRYPTED_ENTRIES = {b'encv', b'enca', b'enct', b'encs'}
+COPY_CHUNK_SIZE = 64 * 1024 * 1024       # Bytes per kernel copy call
+PROGRESS_INTERVAL = 16 * 1024 * 1024     # Bytes copied between progress reports
+MAX_STCO_OFFSET = 0xFFFFFFFF             # Largest chunk offset a 32-bit stco entry holds
+
+
+class UnsupportedMp4(RuntimeError):
+    """The file can't be trimmed at box level; use FFmpeg instead."""
+
+
+class Box:
+    """An MP4 box; containers hold children, everything else raw payload bytes."""
+
+    def __init__(self, box_type: bytes, payload: bytes = b"", children: Optional[List["Box"]] = None):
+        self.type = box_type
+        self.payload = payload
+        self.children = children
+
+    def find(self, box_type: bytes) -> Optional["Box"]:
+        for child in self.children or ():
+            if child.type == box_type:
+                return child
+        return None
+
+    def find_all(self, box_type: bytes) -> List["Box"]:
+        return [child for child in self.children or () if child.type == box_type]
+
+    def serialize(self) -> bytes:
+        if self.children is not None:
+            body = b"".join(child.serialize() for child in self.children)
+        else:
+            body = bytes(self.payload)
+        if len(body) + 8 > 0xFFFFFFFF:
+            return struct.pack('>I4sQ', 1, self.type, len(body) + 16) + body
+        return struct.pack('>I4s', len(body) + 8, self.type) + body
+
+
+def parse_boxes(data: memoryview) -> List[Box]:
+    """Parse a sequence of boxes, descending into the containers this module edits."""
+    boxes = []
+    offset = 0
+    while offset + 8 <= len(data):
+        size, box_type = struct.unpack_from('>I4s', data, offset)
+        header = 8
+        if size == 1:
+            size = struct.unpack_from('>Q', data, offset + 8)[0]
+            header = 16
+        elif size == 0:
+            size = len(data) - offset
+        if size < header or offset + size > len(data):
+            raise UnsupportedMp4(f"corrupt {box_type!r} box")
+
+        payload = data[offset + header:offset + size]
+        if box_type in CONTAINER_BOXES:
+            boxes.append(Box(box_type, children=parse_boxes(payload)))
+        else:
+            boxes.append(Box(box_type, bytes(payload)))
+        offset += size
+    return boxes
+
+
+def scan_top_level(f: BinaryIO) -> List[Tuple[bytes, int, int, int]]:
+    """List top-level boxes as (type, offset, header size, total size) without reading payloads."""
+    f.seek(0, os.SEEK_END)
+    file_size = f.tell()
+    boxes = []
+    offset = 0
+    while offset + 8 <= file_size:
+        f.seek(offset)
+        header = f.read(16)
+        size, box_type = struct.unpack_from('>I4s', header)
+        header_size = 8
+        if size == 1:
+            size = struct.unpack_from('>Q', header, 8)[0]
+            header_size = 16
+        elif size == 0:
+            size = file_size - offset
+        if size < header_size:
+            raise UnsupportedMp4(f"corrupt top-level {box_type!r} box")
+        boxes.append((box_type, offset, header_size, size))
+        offset += size
+    return boxes
+
+
+def _rle(values: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Run-length encode an array into (counts, values)."""
+    if not len(values):
+        return np.zeros(0, np.int64), np.zeros(0, np.int64)
+    starts = np.concatenate(([0], np.flatnonzero(np.diff(values)) + 1))
+    counts = np.diff(np.concatenate((starts, [len(values)])))
+    return counts, values[starts]
+
+
+def _read_duration(payload: bytes, time_offset_v0: int, time_offset_v1: int) -> Tuple[int, int]:
+    """Read (timescale, duration) from an mvhd/mdhd payload."""
+    if payload[0] == 1:
+        return struct.unpack_from('>IQ', payload, time_offset_v1)
+    return struct.unpack_from('>II', payload, time_offset_v0)
+
+
+class _Track:
+    """Sample tables of one track, expanded to per-sample NumPy arrays."""
+
+    def __init__(self, trak: Box, movie_timescale: int):
+        self.trak = trak
+        self.movie_timescale = movie_timescale
+
+        mdia = trak.find(b'mdia')
+        minf = mdia.find(b'minf') if mdia else None
+        self.stbl = minf.find(b'stbl') if minf else None
+        hdlr = mdia.find(b'hdlr') if mdia else None
+        mdhd = mdia.find(b'mdhd') if mdia else None
+        if self.stbl is None or hdlr is None or mdhd is None:
+            raise UnsupportedMp4("track without sample table")
+
+        self.handler = hdlr.payload[8:12]
+        self.timescale, _ = _read_duration(mdhd.payload, 12, 20)
+        self._check_sample_entries()
+        self._parse_tables()
+        self._parse_edits()
+
+    def _table(self, box_type: bytes) -> Optional[bytes]:
+        box = self.stbl.find(box_type)
+        return box.payload if box is not None else None
+
+    def _check_sample_entries(self):
+        stsd = self._table(b'stsd')
+        if stsd is None:
+            raise UnsupportedMp4("track without sample description")
+        entries = parse_boxes(memoryview(stsd)[8:])
+        if any(entry.type in ENCRYPTED_ENTRIES for entry in entries):
+            raise UnsupportedMp4("encrypted track")
+
+    def _parse_tables(self):
+        if self._table(b'stz2') is not None:
+            raise UnsupportedMp4("compact sample sizes (stz2)")
+
+        stsz = self._table(b'stsz')
+        sample_size, count = struct.unpack_from('>II', stsz, 4)
+        self.constant_size = sample_size
+        if sample_size:
+            self.sizes = np.full(count, sample_size, np.int64)
+        else:
+            self.sizes = np.frombuffer(stsz, '>u4', count, 12).astype(np.int64)
+
+        stts = self._table(b'stts')
+        entries = struct.unpack_from('>I', stts, 4)[0]
+        table = np.frombuffer(stts, '>u4', entries * 2, 8).reshape(-1, 2).astype(np.int64)
+        self.deltas = np.repeat(table[:, 1], table[:, 0])[:count]
+        if len(self.deltas) < count:
+            raise UnsupportedMp4("time-to-sample table shorter than sample count")
+        self.dts = np.concatenate(([0], np.cumsum(self.deltas)[:-1])) if count else np.zeros(0, np.int64)
+
+        ctts = self._table(b'ctts')
+        self.ctts_version = ctts[0] if ctts is not None else 0
+        if ctts is not None:
+            entries = struct.unpack_from('>I', ctts, 4)[0]
+            # Version 0 offsets are nominally unsigned, but writers store negative ones there too
+            table = np.frombuffer(ctts, '>i4', entries * 2, 8).reshape(-1, 2).astype(np.int64)
+            self.cto = np.repeat(table[:, 1], table[:, 0])[:count]
+            if len(self.cto) < count:
+                self.cto = np.concatenate((self.cto, np.zeros(count - len(self.cto), np.int64)))
+        else:
+            self.cto = None
+
+        stss = self._table(b'stss')
+        if stss is not None:
+            entries = struct.unpack_from('>I', stss, 4)[0]
+            self.sync = np.frombuffer(stss, '>u4', entries, 8).astype(np.int64) - 1
+        else:
+            self.sync = None
+
+        stco = self._table(b'stco')
+        co64 = self._table(b'co64')
+        if stco is not None:
+            entries = struct.unpack_from('>I', stco, 4)[0]
+            chunk_offsets = np.frombuffer(stco, '>u4', entries, 8).astype(np.int64)
+        elif co64 is not None:
+            entries = struct.unpack_from('>I', co64, 4)[0]
+            chunk_offsets = np.frombuffer(co64, '>u8', entries, 8).astype(np.int64)
+        else:
+            raise UnsupportedMp4("track without chunk offsets")
+
+        stsc = self._table(b'stsc')
+        entries = struct.unpack_from('>I', stsc, 4)[0]
+        table = np.frombuffer(stsc, '>u4', entries * 3, 8).reshape(-1, 3).astype(np.int64)
+        chunk_count = len(chunk_offsets)
+        # Expand the run table to samples-per-chunk and description index for every chunk
+        entry_of_chunk = np.searchsorted(table[:, 0], np.arange(1, chunk_count + 1), side="right") - 1
+        per_chunk = table[entry_of_chunk, 1]
+        self.chunk_description = table[entry_of_chunk, 2]
+
+        per_chunk_total = int(per_chunk.sum())
+        if per_chunk_total < count:
+            raise UnsupportedMp4("chunk table shorter than sample count")
+        self.chunk_of_sample = np.repeat(np.arange(chunk_count), per_chunk)[:count]
+
+        # Offset of each sample = its chunk's offset + sizes of the samples before it in the chunk
+        before = np.cumsum(self.sizes) - self.sizes
+        chunk_first = np.cumsum(per_chunk) - per_chunk
+        first_of_sample_chunk = np.minimum(chunk_first[self.chunk_of_sample], count - 1) if count else chunk_first
+        self.offsets = chunk_offsets[self.chunk_of_sample] + before - before[first_of_sample_chunk]
+
+    def _parse_edits(self):
+        """Reduce the edit list to an initial delay plus one media segment."""
+        self.delay = 0.0          # Seconds of empty edit before the media starts
+        self.media_time = 0       # Media time (track timescale) shown at the start of the segment
+        self.segment_end = None   # Presentation end in seconds, if the edit list cuts the media short
+
+        edts = self.trak.find(b'edts')
+        elst = edts.find(b'elst') if edts else None
+        if elst is None:
+            return
+
+        payload = elst.payload
+        version = payload[0]
+        entries = struct.unpack_from('>I', payload, 4)[0]
+        fmt, size = ('>QqhH', 20) if version == 1 else ('>IihH', 12)
+        segments = 0
+        for i in range(entries):
+            segment_duration, media_time, rate, _ = struct.unpack_from(fmt, payload, 8 + i * size)
+            if media_time == -1:
+                if segments:
+                    raise UnsupportedMp4("empty edit after media")
+                self.delay += segment_duration / self.movie_timescale
+                continue
+            segments += 1
+            if segments > 1 or rate != 1:
+                raise UnsupportedMp4("edit list with several segments")
+            self.media_time = media_time
+            if segment_duration:
+                self.segment_end = self.delay + segment_duration / self.movie_timescale
+
+    def presentation_times(self) -> np.ndarray:
+        """Presentation time of every sample in seconds on the movie timeline."""
+        pts = self.dts + self.cto if self.cto is not None else self.dts
+        return self.delay + (pts - self.media_time) / self.timescale
+
+    def media_end(self) -> float:
+        """Presentation time at which the track ends."""
+        if not len(self.dts):
+            return self.delay
+        end = self.delay + (int(self.dts[-1] + self.deltas[-1]) - self.media_time) / self.timescale
+        return min(end, self.segment_end) if self.segment_end is not None else end
+
+
+class _TrackCut:
+    """The part of a track that the trimmed file keeps."""
+
+    def __init__(self, track: _Track, first: int, last: int, start: float, end: float):
+        self.track = track
+        self.first = first
+        self.last = last
+        self.start = start
+        self.end = end
+        self.new_offsets = None
+
+
+def _select_samples(track: _Track, start: float, end: float, is_video: bool) -> Optional[_TrackCut]:
+    """Pick the decodable run of samples that covers [start, end) for one track."""
+    count = len(track.sizes)
+    if not count:
+        return None
+    pts = track.presentation_times()
+    tolerance = 0.5 / track.timescale
+
+    segment_start = max(start, track.delay)
+    segment_end = min(end, track.media_end())
+    if segment_end - segment_start <= tolerance:
+        return None
+
+    # Start at the sync sample at or before the cut; later samples depend on it
+    candidates = track.sync if track.sync is not None else np.arange(count)
+    shown_before = candidates[pts[candidates] <= segment_start + tolerance]
+    first = int(shown_before[-1]) if len(shown_before) else int(candidates[0]) if len(candidates) else 0
+
+    visible = np.flatnonzero(pts < segment_end - tolerance)
+    if not len(visible):
+        return None
+    last = int(visible[-1]) + 1
+    if is_video and last <= first:
+        return None
+    last = max(last, first + 1)
+    return _TrackCut(track, first, last, segment_start, segment_end)
+
+
+def _full_box(box_type: bytes, version: int, flags: int, body: bytes) -> Box:
+    return Box(box_type, struct.pack('>I', (version << 24) | flags) + body)
+
+
+def _patch_duration(box: Box, duration: int, offset_v0: int, offset_v1: int) -> Box:
+    """Copy of an mvhd/tkhd/mdhd box with a new duration."""
+    payload = bytearray(box.payload)
+    if payload[0] == 1:
+        struct.pack_into('>Q', payload, offset_v1, duration)
+    else:
+        struct.pack_into('>I', payload, offset_v0, min(duration, 0xFFFFFFFF))
+    return Box(box.type, bytes(payload))
+
+
+def _build_stbl(cut: _TrackCut, chunk_base: int, use_co64: bool) -> Box:
+    """Sample table box holding only the kept samples."""
+    track = cut.track
+    keep = slice(cut.first, cut.last)
+    sample_count = cut.last - cut.first
+    replaced = {}
+
+    counts, values = _rle(track.deltas[keep])
+    replaced[b'stts'] = _full_box(b'stts', 0, 0, struct.pack('>I', len(counts)) +
+                                  np.column_stack((counts, values)).astype('>u4').tobytes())
+
+    if track.cto is not None:
+        counts, values = _rle(track.cto[keep])
+        version = 1 if (values < 0).any() else track.ctts_version
+        replaced[b'ctts'] = _full_box(b'ctts', version, 0, struct.pack('>I', len(counts)) +
+                                      np.column_stack((counts, values)).astype('>i4').tobytes())
+
+    if track.sync is not None:
+        sync = track.sync[(track.sync >= cut.first) & (track.sync < cut.last)] - cut.first + 1
+        replaced[b'stss'] = _full_box(b'stss', 0, 0, struct.pack('>I', len(sync)) + sync.astype('>u4').tobytes())
+
+    if track.constant_size:
+        replaced[b'stsz'] = _full_box(b'stsz', 0, 0, struct.pack('>II', track.constant_size, sample_count))
+    else:
+        replaced[b'stsz'] = _full_box(b'stsz', 0, 0, struct.pack('>II', 0, sample_count) +
+                                      track.sizes[keep].astype('>u4').tobytes())
+
+    # Kept samples of one source chunk stay contiguous, so each becomes one chunk
+    chunks = track.chunk_of_sample[keep]
+    chunk_starts = np.concatenate(([0], np.flatnonzero(np.diff(chunks)) + 1))
+    per_chunk = np.diff(np.concatenate((chunk_starts, [sample_count])))
+    descriptions = track.chunk_description[chunks[chunk_starts]]
+    run_starts = np.concatenate(([0], np.flatnonzero((np.diff(per_chunk) != 0) | (np.diff(descriptions) != 0)) + 1))
+    stsc = np.column_stack((run_starts + 1, per_chunk[run_starts], descriptions[run_starts]))
+    replaced[b'stsc'] = _full_box(b'stsc', 0, 0, struct.pack('>I', len(stsc)) + stsc.astype('>u4').tobytes())
+
+    chunk_offsets = cut.new_offsets[chunk_starts] + chunk_base
+    if use_co64:
+        offsets_box = _full_box(b'co64', 0, 0, struct.pack('>I', len(chunk_offsets)) + chunk_offsets.astype('>u8').tobytes())
+    else:
+        offsets_box = _full_box(b'stco', 0, 0, struct.pack('>I', len(chunk_offsets)) + chunk_offsets.astype('>u4').tobytes())
+
+    children = []
+    for child in track.stbl.children:
+        if child.type in (b'stco', b'co64'):
+            children.append(offsets_box)
+        elif child.type in replaced:
+            children.append(replaced.pop(child.type))
+        elif child.type not in DROPPED_STBL_BOXES:
+            children.append(child)
+    # Tables the source didn't have in this order (e.g. a ctts that is now needed)
+    children.extend(replaced.values())
+    return Box(b'stbl', children=children)
+
+
+def _rebuild_trak(cut: _TrackCut, movie_start: float, chunk_base: int, use_co64: bool) -> Tuple[Box, int]:
+    """Trimmed copy of a trak box and its duration in movie timescale units."""
+    track = cut.track
+    movie_timescale = track.movie_timescale
+
+    # Edit list: optional empty edit, then the kept range starting at the requested time
+    edits = []
+    delay = cut.start - movie_start
+    if delay * movie_timescale >= 1:
+        edits.append((int(round(delay * movie_timescale)), -1))
+    media_start = (cut.start - track.delay) * track.timescale + track.media_time
+    media_time = max(int(round(media_start)) - int(track.dts[cut.first]), 0)
+    segment_duration = max(int(round((cut.end - cut.start) * movie_timescale)), 1)
+    edits.append((segment_duration, media_time))
+    track_duration = sum(duration for duration, _ in edits)
+
+    version = 1 if any(d > 0xFFFFFFFF or abs(m) > 0x7FFFFFFF for d, m in edits) else 0
+    fmt = '>QqhH' if version == 1 else '>IihH'
+    elst = _full_box(b'elst', version, 0, struct.pack('>I', len(edits)) +
+                     b"".join(struct.pack(fmt, d, m, 1, 0) for d, m in edits))
+    edts = Box(b'edts', children=[elst])
+
+    media_duration = int(track.deltas[cut.first:cut.last].sum())
+    stbl = _build_stbl(cut, chunk_base, use_co64)
+
+    children = []
+    for child in track.trak.children:
+        if child.type == b'tkhd':
+            children.append(_patch_duration(child, track_duration, 20, 28))
+            children.append(edts)
+        elif child.type == b'edts':
+            continue
+        elif child.type == b'mdia':
+            mdia_children = []
+            for box in child.children:
+                if box.type == b'mdhd':
+                    mdia_children.append(_patch_duration(box, media_duration, 16, 24))
+                elif box.type == b'minf':
+                    mdia_children.append(Box(b'minf', children=[
+                        stbl if sub.type == b'stbl' else sub for sub in box.children
+                    ]))
+                else:
+                    mdia_children.append(box)
+            children.append(Box(b'mdia', children=mdia_children))
+        else:
+            children.append(child)
+    return Box(b'trak', children=children), track_duration
+
+
+def _plan_copy(cuts: List[_TrackCut]) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Merge the kept samples of all tracks into contiguous source byte ranges.
+
+    Sets each cut's `new_offsets` (relative to the start of the new mdat data)
+    and returns the (source offset, length) of every range to copy, in order.
+    """
+    offsets = np.concatenate([cut.track.offsets[cut.first:cut.last] for cut in cuts])
+    sizes = np.concatenate([cut.track.sizes[cut.first:cut.last] for cut in cuts])
+    order = np.argsort(offsets, kind="stable")
+    offsets, sizes = offsets[order], sizes[order]
+
+    ends = np.maximum.accumulate(offsets + sizes)
+    starts_range = np.concatenate(([True], offsets[1:] > ends[:-1]))
+    range_id = np.cumsum(starts_range) - 1
+    range_src = offsets[starts_range]
+    range_end = np.concatenate((ends[np.flatnonzero(starts_range)[1:] - 1], [ends[-1]]))
+    range_len = range_end - range_src
+    range_dest = np.cumsum(range_len) - range_len
+
+    new_offsets = np.empty_like(offsets)
+    new_offsets[order] = range_dest[range_id] + (offsets - range_src[range_id])
+    position = 0
+    for cut in cuts:
+        count = cut.last - cut.first
+        cut.new_offsets = new_offsets[position:position + count]
+        position += count
+    return range_src, range_len
+
+
+def _copy_ranges(src: BinaryIO, dst: BinaryIO, ranges: Tuple[np.ndarray, np.ndarray],
+                 progress: Optional[Callable[[int], None]] = None) -> str:
+    """
+    Append byte ranges of one file to another, in the kernel when possible.
+
+    Returns:
+        Name of the copy mechanism that was used
+    """
+    src_fd, dst_fd = src.fileno(), dst.fileno()
+    dst.flush()
+    position = dst.tell()
+    method = "copy_file_range" if hasattr(os, "copy_file_range") else "sendfile" if hasattr(os, "sendfile") else "read"
+    buffer = None
+    copied = 0
+    reported = 0
+
+    for offset, length in zip(*ranges):
+        offset, remaining = int(offset), int(length)
+        while remaining > 0:
+            count = min(remaining, COPY_CHUNK_SIZE)
+            written = 0
+            if method == "copy_file_range":
+                try:
+                    written = os.copy_file_range(src_fd, dst_fd, count, offset, position)
+                except OSError:
+                    method = "sendfile" if hasattr(os, "sendfile") else "read"
+                    continue
+            elif method == "sendfile":
+                try:
+                    os.lseek(dst_fd, position, os.SEEK_SET)
+                    written = os.sendfile(dst_fd, src_fd, offset, count)
+                except OSError:
+                    method = "read"  # e.g. macOS, where sendfile only writes to sockets
+                    continue
+            else:
+                if buffer is None:
+                    buffer = bytearray(min(COPY_CHUNK_SIZE, 8 * 1024 * 1024))
+                view = memoryview(buffer)[:min(count, len(buffer))]
+                src.seek(offset)
+                read = src.readinto(view)
+                os.lseek(dst_fd, position, os.SEEK_SET)
+                written = os.write(dst_fd, view[:read]) if read else 0
+
+            if written <= 0:
+                raise UnsupportedMp4("sample data ends early")
+            offset += written
+            position += written
+            remaining -= written
+            copied += written
+            if progress and copied - reported >= PROGRESS_INTERVAL:
+                progress(copied)
+                reported = copied
+
+    if progress and copied != reported:
+        progress(copied)
+
+    os.lseek(dst_fd, position, os.SEEK_SET)
+    dst.seek(position)
+    return method
+
+
+def trim_mp4(input_path: str, output_path: str, start_time: float, end_time: float,
+             progress_callback: Optional[Callable[[float], None]] = None) -> Dict:
+    """
+    Trim an MP4/MOV file by rewriting its sample tables.
+
+    Every track starts at the sync sample at or before `start_time`; the edit
+    list makes playback begin exactly at `start_time`.
+
+    Args:
+        input_path: Source MP4/MOV path
+        output_path: Destination path
+        start_time: Start time in seconds
+        end_time: End time in seconds
+        progress_callback: Optional callback for copy progress (0.0 to 1.0)
+
+    Returns:
+        Dictionary with bytes copied, copy ranges and copy method
+
+    Raises:
+        UnsupportedMp4: The file needs FFmpeg
+    """
+    with open(input_path, "rb") as src:
+        top_level = scan_top_level(src)
+        types = [box_type for box_type, _, _, _ in top_level]
+        if b'moov' not in types or b'mdat' not in types:
+            raise UnsupportedMp4("no moov or mdat box")
+        if b'moof' in types:
+            raise UnsupportedMp4("fragmented MP4")
+
+        def read_box(box_type):
+            _, offset, header, size = top_level[types.index(box_type)]
+            src.seek(offset + header)
+            return src.read(size - header)
+
+        ftyp = Box(b'ftyp', read_box(b'ftyp')) if b'ftyp' in types else None
+        moov = Box(b'moov', children=parse_boxes(memoryview(read_box(b'moov'))))
+        if moov.find(b'mvex') is not None:
+            raise UnsupportedMp4("fragmented MP4")
+
+        mvhd = moov.find(b'mvhd')
+        movie_timescale, _ = _read_duration(mvhd.payload, 12, 20)
+
+        tracks = [_Track(trak, movie_timescale) for trak in moov.find_all(b'trak')]
+        video = [track for track in tracks if track.handler == b'vide']
+        if not video:
+            raise UnsupportedMp4("no video track")
+
+        # The video track decides where the file can start
+        cuts = {}
+        for track in tracks:
+            cut = _select_samples(track, start_time, end_time, track is video[0])
+            if cut is None and track is video[0]:
+                raise UnsupportedMp4("range contains no video")
+            if cut is not None:
+                cuts[id(track)] = cut
+        ordered_cuts = [cuts[id(track)] for track in tracks if id(track) in cuts]
+        movie_start = min(cut.start for cut in ordered_cuts)
+
+        ranges = _plan_copy(ordered_cuts)
+        data_size = int(ranges[1].sum())
+        ftyp_bytes = ftyp.serialize() if ftyp else b""
+        mdat_header_size = 16 if data_size + 8 > 0xFFFFFFFF else 8
+
+        def build_moov(chunk_base, use_co64):
+            children = []
+            movie_duration = 0
+            for child in moov.children:
+                if child.type == b'trak':
+                    match = [cut for cut in ordered_cuts if cut.track.trak is child]
+                    if not match:
+                        continue  # Track has nothing in the range
+                    trak, duration = _rebuild_trak(match[0], movie_start, chunk_base, use_co64)
+                    movie_duration = max(movie_duration, duration)
+                    children.append(trak)
+                elif child.type != b'mvhd':
+                    children.append(child)
+            header = _patch_duration(mvhd, movie_duration, 16, 24)
+            return Box(b'moov', children=[header] + children).serialize()
+
+        # Offsets only fit stco if the whole file stays under 4 GiB
+        use_co64 = False
+        moov_size = len(build_moov(0, use_co64))
+        if len(ftyp_bytes) + moov_size + mdat_header_size + data_size > MAX_STCO_OFFSET:
+            use_co64 = True
+            moov_size = len(build_moov(0, use_co64))
+        chunk_base = len(ftyp_bytes) + moov_size + mdat_header_size
+        moov_bytes = build_moov(chunk_base, use_co64)
+
+        with open(output_path, "wb") as dst:
+            dst.write(ftyp_bytes)
+            dst.write(moov_bytes)
+            if mdat_header_size == 16:
+                dst.write(struct.pack('>I4sQ', 1, b'mdat', data_size + 16))
+            else:
+                dst.write(struct.pack('>I4s', data_size + 8, b'mdat'))
+
+            report = None
+            if progress_callback and data_size:
+                report = lambda copied: progress_callback(copied / data_size)
+            method = _copy_ranges(src, dst, ranges, report)
+            dst.truncate()
+
+    return {
+        'bytes_copied': data_size,
+        'copy_ranges': len(ranges[0]),
+        'copy_method': method,
+        'tracks': len(ordered_cuts),
+        'start_time': movie_start,
+    }
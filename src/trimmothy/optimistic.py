@@ -0,0 +1,237 @@
+"""
+Optimistic exports for Trimmothy.
+
+An optimistic export writes a usable file within seconds and fixes it up
+later. First a draft is cut with the copy strategies (box-level trim or an
+FFmpeg stream copy), starting on the keyframe at or before the requested
+start, and a `<output>.draft.json` marker is written next to it. The
+frame-accurate re-encode then runs on a background thread into a hidden file
+in the same folder, which is moved over the draft with a single rename once
+it is complete, so readers only ever see the whole draft or the whole final
+file. The marker is removed after the swap.
+
+Callers get callbacks when the draft and the final file are in place, and a
+desktop notification is shown when the final file is ready.
+"""
+
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Callable, Dict, Optional
+
+from trimmothy.cache import load_json, store_json
+from trimmothy.utils import cleanup_temp_files, send_notification
+
+
+DRAFT_MARKER_SUFFIX = ".draft.json"
+
+
+def draft_marker_path(output_path: str) -> Path:
+    """Get the marker file that flags an output as a draft."""
+    return Path(str(output_path) + DRAFT_MARKER_SUFFIX)
+
+
+def is_draft(output_path: str) -> bool:
+    """Whether an output is a draft still waiting for its final version."""
+    return draft_marker_path(output_path).exists()
+
+
+def read_draft_marker(output_path: str) -> Optional[Dict]:
+    """
+    Read the marker of a draft output.
+
+    Returns:
+        The marker (source, requested range, draft start), or None if the
+        output is not a draft
+    """
+    return load_json(draft_marker_path(output_path))
+
+
+def _work_path(output_path: str, tag: str) -> str:
+    """Hidden file next to the output, keeping its extension so FFmpeg picks the same muxer."""
+    path = Path(output_path)
+    return str(path.with_name(f".{path.stem}.{tag}{path.suffix}"))
+
+
+class OptimisticExport:
+    """A stream-copy draft now, replaced by the frame-accurate export when it's done."""
+
+    def __init__(self, processor, input_path: str, output_path: str, start_time: float, end_time: float,
+                 final_processor=None,
+                 on_draft: Optional[Callable[[str], None]] = None,
+                 on_final: Optional[Callable[[str], None]] = None,
+                 on_error: Optional[Callable[[str], None]] = None,
+                 notify: bool = True, time_budget: Optional[float] = None,
+                 use_export_cache: bool = True):
+        """
+        Args:
+            processor: VideoProcessor that cuts the draft
+            input_path: Source video
+            output_path: Where the draft and then the final file are written
+            start_time: Start time in seconds
+            end_time: End time in seconds
+            final_processor: VideoProcessor for the final re-encode, typically a
+                background one; defaults to processor
+            on_draft: Called with the output path once the draft is in place
+            on_final: Called with the output path once the final file replaced the draft
+            on_error: Called with a message if the final export fails; the draft is kept
+            notify: Show a desktop notification when the final file is ready
+            time_budget: Optional wall-clock budget for the final re-encode
+            use_export_cache: Let the final re-encode use the export cache
+        """
+        self.processor = processor
+        self.final_processor = final_processor or processor
+        self.input_path = input_path
+        self.output_path = output_path
+        self.start_time = start_time
+        self.end_time = end_time
+        self.on_draft = on_draft
+        self.on_final = on_final
+        self.on_error = on_error
+        self.notify = notify
+        self.time_budget = time_budget
+        self.use_export_cache = use_export_cache
+
+        self.state = 'pending'
+        self.error: Optional[str] = None
+        self.draft_start: Optional[float] = None
+        self.draft_seconds: Optional[float] = None
+        self.final_seconds: Optional[float] = None
+        self.cancel_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._done = threading.Event()
+
+    def start(self, progress_callback: Optional[Callable[[float], None]] = None) -> bool:
+        """
+        Write the draft, then start the final export in the background.
+
+        Args:
+            progress_callback: Optional callback for the final export's progress (0.0 to 1.0)
+
+        Returns:
+            True if the draft was written. Without a draft the final export
+            still runs; wait() reports its outcome.
+        """
+        drafted = self.write_draft()
+        self._thread = threading.Thread(target=self._run_final, args=(progress_callback,),
+                                        name="trimmothy-final-export")
+        self._thread.start()
+        return drafted
+
+    def write_draft(self) -> bool:
+        """Cut the keyframe-aligned draft and move it into place. Returns True on success."""
+        started = time.monotonic()
+        work_path = _work_path(self.output_path, "draft")
+        try:
+            draft_start = self._keyframe_start()
+            video_info = self.processor.get_video_info(self.input_path)
+            duration = self.end_time - draft_start
+            for strategy in (self.processor._try_box_trim, self.processor._try_stream_copy,
+                             self.processor._try_video_copy_audio_reencode):
+                try:
+                    if strategy(self.input_path, work_path, draft_start, duration, video_info):
+                        break
+                except Exception as e:
+                    print(f"Draft strategy {strategy.__name__} failed: {e}")
+                cleanup_temp_files(work_path)
+            else:
+                return False
+
+            # Flag the output before it appears, so nobody takes the draft for the final file
+            store_json(draft_marker_path(self.output_path), {
+                'input_path': os.path.abspath(self.input_path),
+                'start_time': self.start_time,
+                'end_time': self.end_time,
+                'draft_start': draft_start,
+                'created': time.time(),
+            })
+            os.replace(work_path, self.output_path)
+        except Exception as e:
+            print(f"Draft export failed: {e}")
+            cleanup_temp_files(work_path)
+            return False
+
+        self.draft_start = draft_start
+        self.draft_seconds = time.monotonic() - started
+        self.state = 'draft'
+        if self.on_draft:
+            self.on_draft(self.output_path)
+        return True
+
+    def _keyframe_start(self) -> float:
+        """Time of the keyframe at or before the requested start."""
+        frame_index = self.processor.get_frame_index(self.input_path, build=False)
+        if frame_index is not None:
+            keyframe = frame_index.keyframe_at_or_before(frame_index.time_to_frame(self.start_time))
+            return frame_index.frame_to_time(keyframe)
+        keyframes = self.processor.get_keyframe_times(self.input_path)
+        return max((time_pos for time_pos in keyframes if time_pos <= self.start_time + 0.001), default=0.0)
+
+    def _run_final(self, progress_callback: Optional[Callable[[float], None]]):
+        """Produce the frame-accurate export and swap it in over the draft."""
+        started = time.monotonic()
+        work_path = _work_path(self.output_path, "final")
+        try:
+            success = self.final_processor.trim_video(
+                self.input_path, work_path, self.start_time, self.end_time,
+                progress_callback=progress_callback, time_budget=self.time_budget,
+                cancel_event=self.cancel_event, exact=True, use_export_cache=self.use_export_cache
+            )
+            if self.cancel_event.is_set():
+                self.state = 'cancelled'
+                cleanup_temp_files(work_path)
+                return
+            if not success:
+                raise RuntimeError("Frame-accurate export failed")
+
+            os.replace(work_path, self.output_path)
+            cleanup_temp_files(str(draft_marker_path(self.output_path)))
+            self.final_seconds = time.monotonic() - started
+            self.state = 'final'
+        except Exception as e:
+            cleanup_temp_files(work_path)
+            self.error = str(e)
+            self.state = 'failed'
+            print(f"Optimistic export failed: {e}")
+            if self.on_error:
+                self.on_error(self.error)
+            return
+        finally:
+            self._done.set()
+
+        if self.notify:
+            send_notification("Export ready", f"{Path(self.output_path).name} is now frame-accurate")
+        if self.on_final:
+            self.on_final(self.output_path)
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """
+        Wait for the final export.
+
+        Returns:
+            True if the final file replaced the draft
+        """
+        self._done.wait(timeout)
+        return self.state == 'final'
+
+    def cancel(self):
+        """
+        Abandon the final export; the draft (and its marker) stays in place.
+
+        Every re-encode strategy stops its FFmpeg process right away: a
+        resumable one keeps its finished segments, the others remove their
+        partial output.
+        """
+        self.cancel_event.set()
+
+    def status(self) -> Dict:
+        """Return the state, timings and draft start for display or automation."""
+        return {
+            'state': self.state,
+            'output_path': self.output_path,
+            'draft_start': self.draft_start,
+            'draft_seconds': self.draft_seconds,
+            'final_seconds': self.final_seconds,
+            'error': self.error,
+        }
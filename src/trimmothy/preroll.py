@@ -0,0 +1,295 @@
+"""
+Decoded frames around the trim points, for previewing and fine-tuning a trim.
+
+"Preview Trim" and nudging a trim point by a frame both jump to a boundary,
+and a jump costs the decoder a seek and a decode from the previous keyframe.
+`BoundaryPreroll` keeps a few seconds of preview-sized RGB frames on both
+sides of the start and end of the trim, decoded on a background thread with
+its own capture. Whenever a trim point moves, the windows follow it once the
+edit settles: frames still inside a window are kept and only the missing
+ones are decoded, so a one-frame nudge costs one short background decode
+while the frames around it are already on hand.
+
+The start window reaches further forward than the others, so preview
+playback runs from memory while the decoder seeks to where the window ends.
+
+The pre-roll decodes in-process instead of asking the source's
+`DecodeWorker`. Its refreshes would queue behind the preview reads that worker
+exists to answer quickly, in exactly the moments (a trim point being nudged)
+when the on-screen frame must keep up. Its capture runs on its own thread in
+OpenCV calls that release the GIL, and it is only created for a source the
+worker already decodes.
+"""
+
+import math
+import os
+import threading
+from typing import Dict, List, Optional, Tuple
+
+import cv2
+import numpy as np
+
+from trimmothy.decoder import _fit
+from trimmothy.memory import get_memory_governor
+
+
+class BoundaryPreroll:
+    """Frames around trim_start and trim_end of one video, kept decoded as the trim points move."""
+
+    MEMORY_LIMIT = 128 * 1024 * 1024   # Bytes of decoded frames kept
+    PREROLL_SECONDS = 2.0              # After the start: what preview playback plays from memory
+    NUDGE_SECONDS = 1.0                # On each side of both trim points
+    SETTLE_SECONDS = 0.15              # Quiet time after a trim point moves before decoding
+    MEMORY_COST = 3.0                  # Relative cost of a byte for the memory governor: a seek per boundary
+
+    def __init__(self, video_path: str, frame_count: int, fps: float,
+                 max_width: int = 600, max_height: int = 400, memory_limit: Optional[int] = None):
+        """
+        Args:
+            video_path: Source video path
+            frame_count: Number of frames in the video
+            fps: Frame rate, for sizing the windows
+            max_width: Maximum width of buffered frames
+            max_height: Maximum height of buffered frames
+            memory_limit: Byte budget for buffered frames
+        """
+        self.video_path = video_path
+        self.frame_count = max(1, frame_count)
+        self.fps = fps if fps > 0 else 30.0
+        self.max_width = max_width
+        self.max_height = max_height
+        self.memory_limit = memory_limit or self.MEMORY_LIMIT
+
+        self._lock = threading.Lock()
+        self._changed = threading.Condition(self._lock)
+        self._boundaries: Optional[Tuple[int, int]] = None
+        self._windows: List[Tuple[int, int]] = []   # [first, end) around the start, then the end
+        self._generation = 0
+        self._frame_bytes: Optional[int] = None
+        self._frames: Dict[int, np.ndarray] = {}
+        self._nbytes = 0
+        self._dirty = False
+        self._busy = False
+        self._closed = False
+        self._failed = False
+        self._worker = None
+        self._capture = None
+        self._position = -1   # Frame the next capture read returns without seeking
+
+        # Metrics
+        self.hits = 0
+        self.misses = 0
+        self.frames_decoded = 0
+        self.seeks = 0
+        self.refreshes = 0
+
+        self._memory = get_memory_governor()
+        self._memory.register(self, f"trim pre-roll: {os.path.basename(video_path)}", self.MEMORY_COST)
+
+    # Windows
+
+    def set_boundaries(self, start_frame: int, end_frame: int):
+        """
+        Move the windows to new trim points; frames outside them are dropped.
+
+        Args:
+            start_frame: Frame shown at trim_start
+            end_frame: Frame shown at trim_end
+        """
+        with self._lock:
+            if self._closed or self._failed or self._boundaries == (start_frame, end_frame):
+                return
+            self._boundaries = (start_frame, end_frame)
+            self._generation += 1
+            if self._frame_bytes is not None:
+                self._build_windows()
+            self._dirty = True
+            self._ensure_worker()
+            self._changed.notify_all()
+
+    def _build_windows(self):
+        """Lay out the windows around the boundaries, shrunk to fit the memory budget."""
+        start_frame, end_frame = self._boundaries
+        nudge = self.NUDGE_SECONDS * self.fps
+        preroll = self.PREROLL_SECONDS * self.fps
+        scale = min(1.0, self.memory_limit / (self._frame_bytes * (3 * nudge + preroll)))
+        nudge = max(1, math.ceil(nudge * scale))
+        preroll = max(1, math.ceil(preroll * scale))
+
+        windows = [(start_frame - nudge, start_frame + preroll), (end_frame - nudge, end_frame + nudge + 1)]
+        self._windows = [(max(0, first), min(end, self.frame_count)) for first, end in windows]
+        for frame_number in [n for n in self._frames if not self._in_windows(n)]:
+            self._nbytes -= self._frames.pop(frame_number).nbytes
+
+    def _in_windows(self, frame_number: int) -> bool:
+        return any(first <= frame_number < end for first, end in self._windows)
+
+    # Access
+
+    def get(self, frame_number: int) -> Optional[np.ndarray]:
+        """
+        Buffered frame, or None if it isn't around a trim point or isn't decoded yet.
+
+        Returns:
+            RGB frame (don't modify it)
+        """
+        with self._lock:
+            frame = self._frames.get(frame_number)
+            if frame is None:
+                if self._in_windows(frame_number):
+                    self.misses += 1
+                return None
+            self.hits += 1
+        self._memory.touch(self)
+        return frame
+
+    def run_end(self, frame_number: int) -> int:
+        """
+        First frame after the buffered frames that follow frame_number.
+
+        Playback hands over to the decoder there, so it can start seeking to
+        that frame while the buffered ones are shown.
+        """
+        with self._lock:
+            while frame_number in self._frames:
+                frame_number += 1
+            return frame_number
+
+    def wait(self, timeout: float = 5.0) -> bool:
+        """Wait until the windows for the latest trim points are decoded; returns False on timeout."""
+        with self._lock:
+            return self._changed.wait_for(
+                lambda: self._closed or self._failed or not (self._dirty or self._busy), timeout)
+
+    def memory_usage(self) -> int:
+        return self._nbytes
+
+    def release_memory(self, nbytes: int) -> int:
+        """Drop the frames farthest from the trim points; called by the memory governor."""
+        with self._lock:
+            if not self._boundaries:
+                return 0
+            start_frame, end_frame = self._boundaries
+            order = sorted(self._frames, key=lambda n: min(abs(n - start_frame), abs(n - end_frame)), reverse=True)
+            freed = 0
+            for frame_number in order:
+                if freed >= nbytes:
+                    break
+                freed += self._frames.pop(frame_number).nbytes
+            self._nbytes -= freed
+            return freed
+
+    def close(self):
+        """Stop decoding and drop the frames."""
+        with self._lock:
+            self._closed = True
+            self._frames.clear()
+            self._nbytes = 0
+            self._changed.notify_all()
+        self._memory.unregister(self)
+
+    def metrics(self) -> Dict:
+        """Return buffer and decoder counters."""
+        with self._lock:
+            return {
+                'frames': len(self._frames),
+                'bytes': self._nbytes,
+                'memory_limit': self.memory_limit,
+                'windows': list(self._windows),
+                'hits': self.hits,
+                'misses': self.misses,
+                'frames_decoded': self.frames_decoded,
+                'seeks': self.seeks,
+                'refreshes': self.refreshes,
+            }
+
+    # Decoding
+
+    def _ensure_worker(self):
+        if self._worker is not None and self._worker.is_alive():
+            return
+        self._worker = threading.Thread(target=self._work, daemon=True, name="trimmothy-preroll")
+        self._worker.start()
+
+    def _work(self):
+        try:
+            self._capture = cv2.VideoCapture(self.video_path)
+            if not self._capture.isOpened():
+                self._failed = True
+                return
+            width = int(self._capture.get(cv2.CAP_PROP_FRAME_WIDTH))
+            height = int(self._capture.get(cv2.CAP_PROP_FRAME_HEIGHT))
+            size = _fit(width, height, self.max_width, self.max_height)
+            with self._lock:
+                self._frame_bytes = size[0] * size[1] * 3
+                if self._boundaries is not None:
+                    self._build_windows()
+
+            while True:
+                with self._lock:
+                    while not self._dirty and not self._closed:
+                        self._changed.wait()
+                    # Let a dragged trim point come to rest before seeking
+                    while not self._closed:
+                        generation = self._generation
+                        self._changed.wait(self.SETTLE_SECONDS)
+                        if generation == self._generation:
+                            break
+                    if self._closed:
+                        return
+                    self._dirty = False
+                    self._busy = True
+                    windows = list(self._windows)
+                self.refreshes += 1
+                try:
+                    for first, end in windows:
+                        if not self._fill(first, end, size, generation):
+                            break
+                finally:
+                    with self._lock:
+                        self._busy = False
+                        self._changed.notify_all()
+                self._memory.touch(self)
+        finally:
+            with self._lock:
+                self._changed.notify_all()
+            if self._capture is not None:
+                self._capture.release()
+                self._capture = None
+
+    def _fill(self, first: int, end: int, size: Tuple[int, int], generation: int) -> bool:
+        """
+        Decode the missing frames of [first, end) in one sequential run.
+
+        Returns:
+            False if the trim points moved meanwhile, so the windows are stale
+        """
+        with self._lock:
+            missing = [n for n in range(first, end) if n not in self._frames]
+        if not missing:
+            return True
+        if self._position != missing[0]:
+            self._capture.set(cv2.CAP_PROP_POS_FRAMES, missing[0])
+            self.seeks += 1
+        for frame_number in range(missing[0], missing[-1] + 1):
+            ok, frame = self._capture.read()
+            if not ok:
+                self._position = -1
+                return True
+            self._position = frame_number + 1
+            with self._lock:
+                if self._closed or self._generation != generation:
+                    return False
+                if frame_number in self._frames:
+                    continue
+            if (frame.shape[1], frame.shape[0]) != size:
+                frame = cv2.resize(frame, size, interpolation=cv2.INTER_AREA)
+            frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+            with self._lock:
+                if self._closed or self._generation != generation:
+                    return False
+                self._frames[frame_number] = frame
+                self._nbytes += frame.nbytes
+                self.frames_decoded += 1
+                self._changed.notify_all()
+        return True
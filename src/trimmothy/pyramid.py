@@ -0,0 +1,292 @@
+"""
+Multi-resolution thumbnail pyramid for the zoomable timeline.
+
+Level 0 holds the handful of thumbnails shown for the whole video; every
+further level has twice as many, so level L+1 thumbnail 2i is the same frame
+as level L thumbnail i. Only level 0 is decoded up front. Finer levels are
+decoded lazily for the time window currently on screen, and pending requests
+that scroll out of view are dropped. Hover previews are answered from the
+nearest cached level without touching the decoder. Decoded thumbnails live in
+an LRU cache with a byte budget, shared with the other caches through the
+memory governor; level 0 is never evicted.
+
+Thumbnails are decoded by a capture on the pyramid's thread, not by a decode
+worker process. The source's `DecodeWorker` writes preview-sized frames and
+must stay free for the frame on screen, and a second process per open source
+would cost more to start than the few dozen small seeks a timeline needs.
+The seek, decode and resize happen inside OpenCV with the GIL released. The
+pyramid is created after the worker has shown the first frame.
+"""
+
+import os
+import threading
+from collections import OrderedDict
+from typing import Callable, Dict, List, Optional, Tuple
+
+import cv2
+import numpy as np
+
+from trimmothy.memory import get_memory_governor
+
+
+class ThumbnailPyramid:
+    """Lazily decoded thumbnails of one video at doubling densities."""
+
+    THUMBNAIL_WIDTH = 120
+    MAX_THUMBNAIL_HEIGHT = 80
+    MAX_LEVELS = 16
+    MEMORY_LIMIT = 48 * 1024 * 1024   # Bytes of decoded thumbnails kept in memory
+    SEQUENTIAL_LIMIT = 120            # Read forward instead of seeking for gaps up to this many frames
+    MEMORY_COST = 4.0                 # Relative cost of a byte for the memory governor: one seek per small image
+
+    def __init__(self, video_path: str, frame_count: int, base_count: int = 8,
+                 on_thumbnail: Optional[Callable[[int, int], None]] = None,
+                 dispatch: Optional[Callable[[Callable[[], None]], None]] = None,
+                 memory_limit: Optional[int] = None):
+        """
+        Args:
+            video_path: Source video path
+            frame_count: Number of frames in the video
+            base_count: Number of thumbnails in level 0
+            on_thumbnail: Called with (level, index) when a thumbnail has been decoded
+            dispatch: Runs a callable on the UI thread; callbacks run on the worker thread if omitted
+            memory_limit: Byte budget for cached thumbnails
+        """
+        self.video_path = video_path
+        self.frame_count = max(1, frame_count)
+        self.base_count = max(1, base_count)
+        self.on_thumbnail = on_thumbnail
+        self.dispatch = dispatch or (lambda func: func())
+        self.memory_limit = memory_limit or self.MEMORY_LIMIT
+
+        # Finest level still has at most one thumbnail per frame
+        levels = 1
+        while levels < self.MAX_LEVELS and self.base_count * 2 ** levels <= self.frame_count:
+            levels += 1
+        self.level_count = levels
+
+        self._lock = threading.Lock()
+        self._wakeup = threading.Condition(self._lock)
+        self._cache: "OrderedDict[Tuple[int, int], np.ndarray]" = OrderedDict()
+        self._cache_bytes = 0
+        self._wanted: List[Tuple[int, int]] = []
+        self._closed = False
+        self._worker = None
+        self._capture = None
+        self._next_frame = 0
+
+        # Metrics
+        self.decoded = 0
+        self.cancelled = 0
+        self.evicted = 0
+        self.hover_hits = 0
+        self.hover_misses = 0
+
+        self._memory = get_memory_governor()
+        self._memory.register(self, f"thumbnails: {os.path.basename(video_path)}", self.MEMORY_COST)
+
+    # Geometry
+
+    def count(self, level: int) -> int:
+        """Number of thumbnails in a level."""
+        return self.base_count * 2 ** level
+
+    def frame_for(self, level: int, index: int) -> int:
+        """Frame number a thumbnail shows."""
+        return min(index * self.frame_count // self.count(level), self.frame_count - 1)
+
+    def level_for_spacing(self, frames_per_thumbnail: float) -> int:
+        """Coarsest level whose thumbnails are at most the given number of frames apart."""
+        for level in range(self.level_count):
+            if self.frame_count / self.count(level) <= frames_per_thumbnail:
+                return level
+        return self.level_count - 1
+
+    def index_near(self, level: int, frame_number: float) -> int:
+        """Index of the thumbnail of a level closest to a frame."""
+        index = int(round(frame_number * self.count(level) / self.frame_count))
+        return min(max(index, 0), self.count(level) - 1)
+
+    # Cache access
+
+    def put(self, level: int, index: int, image: np.ndarray):
+        """Store a decoded RGB thumbnail."""
+        key = (level, index)
+        with self._lock:
+            if key in self._cache:
+                self._cache_bytes -= self._cache.pop(key).nbytes
+            self._cache[key] = image
+            self._cache_bytes += image.nbytes
+            self._release(self._cache_bytes - self.memory_limit)
+        self._memory.touch(self)
+
+    def get(self, level: int, index: int) -> Optional[np.ndarray]:
+        """Cached thumbnail, or None."""
+        with self._lock:
+            image = self._cache.get((level, index))
+            if image is not None:
+                self._cache.move_to_end((level, index))
+            return image
+
+    def nearest(self, frame_number: float, max_level: Optional[int] = None) -> Optional[Tuple[np.ndarray, int, int]]:
+        """
+        Find the cached thumbnail closest to a frame without decoding.
+
+        Levels are tried from `max_level` (default: finest) down to 0.
+
+        Args:
+            frame_number: Frame to preview
+            max_level: Finest level to consider
+
+        Returns:
+            Tuple of (RGB image, frame number it shows, level), or None if nothing is cached
+        """
+        if max_level is None:
+            max_level = self.level_count - 1
+        with self._lock:
+            for level in range(min(max_level, self.level_count - 1), -1, -1):
+                key = (level, self.index_near(level, frame_number))
+                image = self._cache.get(key)
+                if image is not None:
+                    self._cache.move_to_end(key)
+                    self.hover_hits += 1
+                    break
+            else:
+                self.hover_misses += 1
+                return None
+        self._memory.touch(self)
+        return image, self.frame_for(*key), level
+
+    def _release(self, nbytes: int) -> int:
+        """Drop least recently used thumbnails of finer levels until nbytes are freed."""
+        freed = 0
+        for key in list(self._cache):
+            if freed >= nbytes:
+                break
+            if key[0] == 0:
+                continue  # The overview row is always kept
+            image = self._cache.pop(key)
+            self._cache_bytes -= image.nbytes
+            freed += image.nbytes
+            self.evicted += 1
+        return freed
+
+    def memory_usage(self) -> int:
+        return self._cache_bytes
+
+    def release_memory(self, nbytes: int) -> int:
+        """Drop thumbnails for the memory governor; the overview row stays."""
+        with self._lock:
+            return self._release(nbytes)
+
+    # Lazy decoding
+
+    def request_range(self, level: int, first_frame: float, last_frame: float):
+        """
+        Decode the thumbnails of a level that cover a frame range.
+
+        Replaces any earlier request: thumbnails that were still pending but
+        are outside the new range are cancelled.
+
+        Args:
+            level: Pyramid level
+            first_frame: First frame on screen
+            last_frame: Last frame on screen
+        """
+        level = min(max(level, 0), self.level_count - 1)
+        first = self.index_near(level, first_frame)
+        last = self.index_near(level, last_frame)
+
+        with self._lock:
+            wanted = [(level, index) for index in range(first, last + 1) if (level, index) not in self._cache]
+            self.cancelled += len(set(self._wanted) - set(wanted))
+            # Time order, so the decoder mostly reads forward
+            self._wanted = wanted
+            self._wakeup.notify()
+        if wanted:
+            self._ensure_worker()
+
+    def close(self):
+        """Stop decoding and drop everything cached."""
+        with self._lock:
+            self._closed = True
+            self._wanted = []
+            self._cache.clear()
+            self._cache_bytes = 0
+            self._wakeup.notify()
+        self._memory.unregister(self)
+
+    def metrics(self) -> Dict:
+        """Return cache and decoder counters."""
+        with self._lock:
+            return {
+                'cached': len(self._cache),
+                'cached_bytes': self._cache_bytes,
+                'memory_limit': self.memory_limit,
+                'pending': len(self._wanted),
+                'decoded': self.decoded,
+                'cancelled': self.cancelled,
+                'evicted': self.evicted,
+                'hover_hits': self.hover_hits,
+                'hover_misses': self.hover_misses,
+            }
+
+    def _ensure_worker(self):
+        with self._lock:
+            if self._worker is not None and self._worker.is_alive():
+                return
+            self._worker = threading.Thread(target=self._work, daemon=True, name="trimmothy-pyramid")
+            self._worker.start()
+
+    def _work(self):
+        try:
+            while True:
+                with self._lock:
+                    while not self._wanted and not self._closed:
+                        self._wakeup.wait()
+                    if self._closed:
+                        return
+                    key = self._wanted.pop(0)
+                    if key in self._cache:
+                        continue
+
+                image = self._decode(self.frame_for(*key))
+                if image is None:
+                    continue
+                with self._lock:
+                    if self._closed:
+                        return
+                    self.decoded += 1
+                self.put(*key, image)
+                if self.on_thumbnail:
+                    self.dispatch(lambda key=key: self.on_thumbnail(*key))
+        finally:
+            if self._capture is not None:
+                self._capture.release()
+                self._capture = None
+
+    def _decode(self, frame_number: int) -> Optional[np.ndarray]:
+        """Decode one frame as a thumbnail, reading forward when that beats seeking."""
+        if self._capture is None:
+            self._capture = cv2.VideoCapture(self.video_path)
+            self._next_frame = 0
+            if not self._capture.isOpened():
+                return None
+
+        gap = frame_number - self._next_frame
+        if not 0 <= gap <= self.SEQUENTIAL_LIMIT:
+            self._capture.set(cv2.CAP_PROP_POS_FRAMES, frame_number)
+            gap = 0
+        for _ in range(gap):
+            if not self._capture.grab():
+                break
+        ret, frame = self._capture.read()
+        self._next_frame = frame_number + 1
+        if not ret:
+            self._next_frame = -1  # Position unknown, seek next time
+            return None
+
+        height, width = frame.shape[:2]
+        thumb_height = min(int((self.THUMBNAIL_WIDTH * height) / width), self.MAX_THUMBNAIL_HEIGHT)
+        frame = cv2.resize(frame, (self.THUMBNAIL_WIDTH, thumb_height), interpolation=cv2.INTER_AREA)
+        return cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
@@ -0,0 +1,242 @@
+"""
+Checkpointed, resumable exports for Trimmothy.
+
+Long re-encodes are split into independently playable MPEG-TS segments that
+are written into a work directory in the cache, next to a JSON manifest that
+records which segments are finished. If the app crashes or the user cancels,
+the work directory survives; running the same export again (or resuming it
+from the manifest) verifies the finished segments and only encodes what is
+missing before the final mux.
+"""
+
+import hashlib
+import os
+import shutil
+import threading
+import time
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+from trimmothy.cache import get_cache_dir, load_json, source_key, store_json
+
+
+MANIFEST_VERSION = 1
+MANIFEST_FILE = "manifest.json"
+
+
+def get_exports_dir() -> Path:
+    """Get the directory holding work directories of resumable exports."""
+    directory = get_cache_dir() / "exports"
+    directory.mkdir(parents=True, exist_ok=True)
+    return directory
+
+
+class ResumableExport:
+    """A re-encode export that checkpoints its progress segment by segment."""
+
+    SEGMENT_SECONDS = 60.0     # Media length of one checkpointed segment
+    DURATION_TOLERANCE = 0.5   # Allowed segment duration mismatch in seconds
+
+    def __init__(self, processor, input_path: str, output_path: str, start_time: float, end_time: float,
+                 preset: str = 'veryfast', crf: int = 23):
+        self.processor = processor
+        self.input_path = os.path.abspath(input_path)
+        self.output_path = os.path.abspath(output_path)
+        self.start_time = start_time
+        self.end_time = end_time
+        self.preset = preset
+        self.crf = crf
+
+        identity = f"{self.input_path}|{self.output_path}|{start_time:.6f}|{end_time:.6f}|{preset}|{crf}"
+        self.job_id = hashlib.sha1(identity.encode("utf-8")).hexdigest()[:16]
+        self.work_dir = get_exports_dir() / self.job_id
+        self.manifest = None
+
+    @classmethod
+    def from_manifest(cls, processor, manifest: Dict) -> "ResumableExport":
+        """Recreate an export from a saved manifest."""
+        return cls(processor, manifest['input_path'], manifest['output_path'],
+                   manifest['start_time'], manifest['end_time'],
+                   manifest.get('preset', 'veryfast'), manifest.get('crf', 23))
+
+    @staticmethod
+    def find_interrupted() -> List[Dict]:
+        """
+        List manifests of exports that were started but never finished.
+
+        Exports whose source file is gone or has changed are discarded.
+
+        Returns:
+            List of manifest dictionaries, oldest first
+        """
+        manifests = []
+        for work_dir in get_exports_dir().iterdir():
+            manifest = load_json(work_dir / MANIFEST_FILE)
+            if not manifest or manifest.get('version') != MANIFEST_VERSION:
+                continue
+            try:
+                unchanged = source_key(manifest['input_path']) == manifest['source_key']
+            except OSError:
+                unchanged = False
+            if not unchanged:
+                shutil.rmtree(work_dir, ignore_errors=True)
+                continue
+            manifests.append(manifest)
+        return sorted(manifests, key=lambda m: m.get('created', 0))
+
+    def _new_manifest(self) -> Dict:
+        duration = self.end_time - self.start_time
+        # The last segment absorbs the remainder so no segment is too short to encode
+        count = max(1, int(duration // self.SEGMENT_SECONDS))
+        segments = []
+        for index in range(count):
+            segment_start = self.start_time + index * self.SEGMENT_SECONDS
+            segment_end = self.end_time if index == count - 1 else segment_start + self.SEGMENT_SECONDS
+            segments.append({
+                'index': index,
+                'start': segment_start,
+                'duration': segment_end - segment_start,
+                'file': f"segment_{index:05d}.ts",
+                'done': False,
+            })
+
+        return {
+            'version': MANIFEST_VERSION,
+            'job_id': self.job_id,
+            'input_path': self.input_path,
+            'output_path': self.output_path,
+            'start_time': self.start_time,
+            'end_time': self.end_time,
+            'preset': self.preset,
+            'crf': self.crf,
+            'source_key': source_key(self.input_path),
+            'created': time.time(),
+            'segments': segments,
+            'audio': {'file': "audio.m4a", 'done': False},
+        }
+
+    def _load_or_create_manifest(self) -> Dict:
+        manifest = load_json(self.work_dir / MANIFEST_FILE)
+        if (manifest and manifest.get('version') == MANIFEST_VERSION
+                and manifest.get('source_key') == source_key(self.input_path)):
+            return manifest
+
+        # No usable checkpoint; start over in a clean work directory
+        shutil.rmtree(self.work_dir, ignore_errors=True)
+        self.work_dir.mkdir(parents=True, exist_ok=True)
+        manifest = self._new_manifest()
+        self._save_manifest(manifest)
+        return manifest
+
+    def _save_manifest(self, manifest: Dict):
+        manifest['updated'] = time.time()
+        store_json(self.work_dir / MANIFEST_FILE, manifest)
+
+    def _verify_segment(self, segment: Dict) -> bool:
+        """Check that a finished segment is still present and has the expected length."""
+        path = self.work_dir / segment['file']
+        if not path.exists() or path.stat().st_size == 0:
+            return False
+        try:
+            info = self.processor.get_video_info(str(path))
+        except RuntimeError:
+            return False
+        return abs(info['duration'] - segment['duration']) <= self.DURATION_TOLERANCE
+
+    def _encode_segment(self, segment: Dict, on_progress, cancel_event) -> bool:
+        path = self.work_dir / segment['file']
+        cmd = [
+            self.processor.ffmpeg_path,
+            '-y',
+            '-ss', str(segment['start']),
+            '-i', self.input_path,
+            '-t', str(segment['duration']),
+            '-map', '0:v:0',
+            '-an',
+            '-c:v', 'libx264',
+            '-preset', self.preset,
+            '-crf', str(self.crf),
+            '-pix_fmt', 'yuv420p',
+            str(path)
+        ]
+        success, _ = self.processor.run_ffmpeg(cmd, segment['duration'], on_progress, cancel_event)
+        return success and not (cancel_event is not None and cancel_event.is_set())
+
+    def _encode_audio(self, cancel_event) -> bool:
+        cmd = [
+            self.processor.ffmpeg_path,
+            '-y',
+            '-ss', str(self.start_time),
+            '-i', self.input_path,
+            '-t', str(self.end_time - self.start_time),
+            '-map', '0:a:0',
+            '-vn',
+            '-c:a', 'aac',
+            '-b:a', '128k',
+            str(self.work_dir / self.manifest['audio']['file'])
+        ]
+        success, _ = self.processor.run_ffmpeg(cmd, cancel_event=cancel_event)
+        return success
+
+    def run(self, progress_callback: Optional[Callable[[float], None]] = None,
+            cancel_event: Optional[threading.Event] = None) -> bool:
+        """
+        Encode all missing segments and mux the final output.
+
+        Args:
+            progress_callback: Optional callback for progress updates (0.0 to 1.0)
+            cancel_event: Optional event that stops the export after keeping finished segments
+
+        Returns:
+            True if the output was written
+        """
+        self.manifest = self._load_or_create_manifest()
+        segments = self.manifest['segments']
+        total = self.end_time - self.start_time
+
+        def report(done_media):
+            if progress_callback:
+                progress_callback(0.1 + 0.85 * min(done_media / total, 1.0))
+
+        done_media = 0.0
+        for segment in segments:
+            if cancel_event is not None and cancel_event.is_set():
+                return False
+
+            if segment['done'] and self._verify_segment(segment):
+                done_media += segment['duration']
+                report(done_media)
+                continue
+
+            def on_progress(fraction, speed, done=done_media, length=segment['duration']):
+                report(done + fraction * length)
+
+            segment['done'] = False
+            if not self._encode_segment(segment, on_progress, cancel_event):
+                return False
+
+            segment['done'] = True
+            self._save_manifest(self.manifest)
+            done_media += segment['duration']
+
+        video_info = self.processor.get_video_info(self.input_path)
+        audio_path = None
+        if video_info.get('audio_codec'):
+            audio = self.manifest['audio']
+            audio_path = str(self.work_dir / audio['file'])
+            if not (audio['done'] and os.path.exists(audio_path)):
+                if not self._encode_audio(cancel_event):
+                    return False
+                audio['done'] = True
+                self._save_manifest(self.manifest)
+
+        segment_paths = [str(self.work_dir / segment['file']) for segment in segments]
+        if not self.processor.concat_segments(segment_paths, self.output_path, audio_path):
+            return False
+
+        self.discard()
+        return True
+
+    def discard(self):
+        """Delete the work directory and its checkpoints."""
+        shutil.rmtree(self.work_dir, ignore_errors=True)
@@ -0,0 +1,497 @@
+"""
+Local trim service for Trimmothy.
+
+Runs a long-lived process that owns a single VideoProcessor, so FFmpeg
+discovery happens once and probe results stay cached between jobs. Clients
+talk to it over a Unix socket (or a localhost TCP port) using
+newline-delimited JSON messages.
+
+A request looks like:
+
+    {"id": "a1", "type": "trim", "params": {"input_path": ..., ...}}
+
+and the service answers with a stream of events for that job:
+
+    {"job": "a1", "event": "accepted"}
+    {"job": "a1", "event": "progress", "progress": 0.1}
+    {"job": "a1", "event": "result", "result": true}
+
+Failed jobs finish with an "error" event instead of "result". A request of
+type "cancel" with params {"job": "a1"} drops a queued job or stops a running
+trim, whose result is then false.
+
+Only the user who started the service may use it. The Unix socket lives in a
+private directory (XDG_RUNTIME_DIR, or the cache directory) and is itself
+user-only. A TCP port is reachable by every local user, so the service writes
+a random token to a user-only file next to where the socket would be, and
+every request must carry it as "token".
+"""
+
+import hmac
+import json
+import os
+import secrets
+import socket
+import socketserver
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Callable, Dict, Optional
+
+from trimmothy.cache import get_cache_dir
+from trimmothy.memory import get_memory_governor
+from trimmothy.video_processor import VideoProcessor
+
+
+SOCKET_FILE = "trimmothy.sock"
+DEFAULT_HOST = "127.0.0.1"
+
+
+def get_service_dir() -> Path:
+    """
+    Get the private directory holding the service socket and token files.
+
+    Uses XDG_RUNTIME_DIR when set, otherwise the cache directory. The
+    directory is created if needed and restricted to the current user.
+
+    Returns:
+        Path to the directory
+    """
+    runtime_dir = os.environ.get("XDG_RUNTIME_DIR")
+    directory = (Path(runtime_dir) / "trimmothy") if runtime_dir else get_cache_dir() / "service"
+    directory.mkdir(parents=True, exist_ok=True)
+    os.chmod(directory, 0o700)
+    return directory
+
+
+def default_socket_path() -> str:
+    """Get the Unix socket path the service listens on by default."""
+    return str(get_service_dir() / SOCKET_FILE)
+
+
+def token_path(port: int) -> Path:
+    """Get the file holding the access token of the service on a TCP port."""
+    return get_service_dir() / f"service-{port}.token"
+
+
+def _write_token(port: int) -> str:
+    """Create a fresh token for a TCP service and store it user-only."""
+    token = secrets.token_hex(16)
+    path = token_path(port)
+    fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+    with os.fdopen(fd, "w", encoding="utf-8") as f:
+        f.write(token)
+    os.chmod(path, 0o600)   # The file may have existed with other permissions
+    return token
+
+
+class TrimService:
+    """Schedules trim, probe, thumbnail and analysis jobs on a shared worker pool."""
+
+    JOB_TYPES = ('trim', 'probe', 'thumbnails', 'analyze')
+
+    def __init__(self, processor: Optional[VideoProcessor] = None, max_workers: Optional[int] = None):
+        self.processor = processor or VideoProcessor()
+        self.max_workers = max_workers or max(2, (os.cpu_count() or 2) // 2)
+        self.executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="trimmothy-job")
+
+        self._jobs = {}
+        self._cancel_events = {}
+        self._lock = threading.Lock()
+        self.jobs_completed = 0
+        self.jobs_failed = 0
+
+    def submit(self, job_type: str, params: Dict, on_event: Callable[[Dict], None], job_id: Optional[str] = None):
+        """
+        Queue a job on the worker pool.
+
+        Args:
+            job_type: One of JOB_TYPES
+            params: Keyword arguments for the job
+            on_event: Called with every event dictionary for this job
+            job_id: Optional client-chosen job identifier
+
+        Returns:
+            Future for the job
+        """
+        if job_type not in self.JOB_TYPES:
+            raise ValueError(f"Unknown job type: {job_type}")
+
+        job_id = job_id or uuid.uuid4().hex[:12]
+        cancel_event = threading.Event()
+        with self._lock:
+            # Reusing an id would let the new job take over cancels meant for the old one
+            if job_id in self._jobs:
+                raise ValueError(f"Job id already in use: {job_id}")
+            self._jobs[job_id] = None
+            self._cancel_events[job_id] = cancel_event
+        on_event({'job': job_id, 'event': 'accepted', 'type': job_type})
+
+        future = self.executor.submit(self._run_job, job_id, job_type, params, on_event, cancel_event)
+        with self._lock:
+            self._jobs[job_id] = future
+        future.add_done_callback(lambda f: self._forget(job_id))
+        return future
+
+    def cancel(self, job_id: str) -> bool:
+        """
+        Cancel a job.
+
+        A queued job is dropped. A running trim stops its FFmpeg process and
+        removes the partial output; other running jobs finish normally.
+
+        Returns:
+            True if the job was dropped or asked to stop
+        """
+        with self._lock:
+            future = self._jobs.get(job_id)
+            cancel_event = self._cancel_events.get(job_id)
+        if future is None:
+            return False
+        if future.cancel():
+            return True
+        if cancel_event is not None and not future.done():
+            cancel_event.set()
+            return True
+        return False
+
+    def stats(self) -> Dict:
+        """Return service counters for diagnostics."""
+        with self._lock:
+            active = len(self._jobs)
+        return {
+            'workers': self.max_workers,
+            'active_jobs': active,
+            'jobs_completed': self.jobs_completed,
+            'jobs_failed': self.jobs_failed,
+            'info_cache_hits': self.processor.info_cache_hits,
+            'info_cache_misses': self.processor.info_cache_misses,
+            'export_cache_hits': self.processor.export_cache_hits,
+            'export_cache_misses': self.processor.export_cache_misses,
+            'governor': self.processor.governor.metrics(),
+            'memory': get_memory_governor().breakdown(),
+        }
+
+    def shutdown(self):
+        """Stop accepting jobs and wait for running ones to finish."""
+        self.executor.shutdown(wait=True, cancel_futures=True)
+
+    def _forget(self, job_id: str):
+        with self._lock:
+            self._jobs.pop(job_id, None)
+            self._cancel_events.pop(job_id, None)
+
+    def _run_job(self, job_id: str, job_type: str, params: Dict, on_event: Callable[[Dict], None],
+                 cancel_event: Optional[threading.Event] = None):
+        """Execute a single job and report its outcome through on_event."""
+        def progress_callback(progress):
+            on_event({'job': job_id, 'event': 'progress', 'progress': progress})
+
+        try:
+            if job_type == 'trim':
+                result = self.processor.trim_video(
+                    params['input_path'],
+                    params['output_path'],
+                    float(params['start_time']),
+                    float(params['end_time']),
+                    progress_callback=progress_callback,
+                    time_budget=params.get('time_budget'),
+                    cancel_event=cancel_event,
+                    use_export_cache=bool(params.get('use_export_cache', True))
+                )
+            elif job_type == 'probe':
+                result = self.processor.get_video_info(params['video_path'])
+            elif job_type == 'thumbnails':
+                result = self.processor.extract_thumbnails(
+                    params['video_path'],
+                    params['output_dir'],
+                    count=int(params.get('count', 8)),
+                    width=int(params.get('width', 120)),
+                    height=int(params.get('height', 80))
+                )
+            else:
+                result = self.processor.analyze_video(params['video_path'])
+
+            with self._lock:
+                self.jobs_completed += 1
+            on_event({'job': job_id, 'event': 'result', 'result': result})
+            return result
+
+        except Exception as e:
+            with self._lock:
+                self.jobs_failed += 1
+            on_event({'job': job_id, 'event': 'error', 'error': str(e)})
+            return None
+
+
+class _ServiceRequestHandler(socketserver.StreamRequestHandler):
+    """Reads JSON requests from one client connection and streams events back."""
+
+    def handle(self):
+        service = self.server.service
+        write_lock = threading.Lock()
+        futures = []
+
+        def send(message):
+            data = (json.dumps(message) + "\n").encode("utf-8")
+            with write_lock:
+                try:
+                    self.wfile.write(data)
+                    self.wfile.flush()
+                except OSError:
+                    pass  # Client went away; the job still completes
+
+        for raw_line in self.rfile:
+            line = raw_line.strip()
+            if not line:
+                continue
+
+            request = None
+            try:
+                request = json.loads(line)
+                request_type = request.get('type')
+                job_id = request.get('id')
+
+                token = self.server.token
+                if token is not None and not hmac.compare_digest(str(request.get('token', '')), token):
+                    send({'job': job_id, 'event': 'error', 'error': "Invalid service token"})
+                    break
+
+                if request_type == 'ping':
+                    send({'job': job_id, 'event': 'result', 'result': 'pong'})
+                elif request_type == 'stats':
+                    send({'job': job_id, 'event': 'result', 'result': service.stats()})
+                elif request_type == 'cancel':
+                    cancelled = service.cancel(request.get('params', {}).get('job'))
+                    send({'job': job_id, 'event': 'result', 'result': cancelled})
+                else:
+                    futures.append(service.submit(request_type, request.get('params', {}), send, job_id))
+            except Exception as e:
+                send({'job': request.get('id') if isinstance(request, dict) else None,
+                      'event': 'error', 'error': str(e)})
+
+        # Client closed its side; let its jobs finish so their events are delivered
+        for future in futures:
+            if not future.cancelled():
+                future.result()
+
+
+class _UnixTrimServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+
+class _TCPTrimServer(socketserver.ThreadingMixIn, socketserver.TCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+
+def create_server(service: TrimService, socket_path: Optional[str] = None, port: Optional[int] = None):
+    """
+    Bind a socket server for the given service.
+
+    A TCP server requires the token it writes to token_path(port); a Unix
+    socket is made readable and writable by the current user only.
+
+    Args:
+        service: Service that will run submitted jobs
+        socket_path: Unix socket path (used when port is not given)
+        port: Localhost TCP port
+
+    Returns:
+        socketserver instance, not yet serving
+    """
+    if port is not None or not hasattr(socket, 'AF_UNIX'):
+        server = _TCPTrimServer((DEFAULT_HOST, port or 0), _ServiceRequestHandler)
+        server.token = _write_token(server.server_address[1])
+    else:
+        socket_path = socket_path or default_socket_path()
+        if os.path.exists(socket_path):
+            if ServiceClient(socket_path=socket_path).is_running():
+                raise RuntimeError(f"A Trimmothy service is already listening on {socket_path}")
+            os.unlink(socket_path)  # Stale socket from a crashed service
+        server = _UnixTrimServer(socket_path, _ServiceRequestHandler)
+        os.chmod(socket_path, 0o600)
+        server.token = None
+
+    server.service = service
+    return server
+
+
+def serve(socket_path: Optional[str] = None, port: Optional[int] = None, max_workers: Optional[int] = None):
+    """Run the trim service until interrupted."""
+    service = TrimService(max_workers=max_workers)
+    server = create_server(service, socket_path, port)
+
+    address = server.server_address
+    if isinstance(address, tuple):
+        print(f"Trimmothy service listening on {address[0]}:{address[1]} "
+              f"(token in {token_path(address[1])})")
+    else:
+        print(f"Trimmothy service listening on {address}")
+
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        service.shutdown()
+        if isinstance(address, tuple):
+            token_path(address[1]).unlink(missing_ok=True)
+        elif os.path.exists(address):
+            os.unlink(address)
+
+
+class ServiceClient:
+    """
+    Client for a running trim service.
+
+    Mirrors the VideoProcessor methods it supports, so callers can use either
+    one interchangeably.
+    """
+
+    CANCEL_POLL_INTERVAL = 0.2   # Seconds between checks of a trim's cancel_event
+
+    def __init__(self, socket_path: Optional[str] = None, port: Optional[int] = None, host: str = DEFAULT_HOST,
+                 token: Optional[str] = None):
+        """
+        Args:
+            socket_path: Unix socket path, default_socket_path() if not given
+            port: Connect over TCP to this port instead
+            host: TCP host
+            token: TCP access token, read from token_path(port) if not given
+        """
+        self.socket_path = socket_path or (default_socket_path() if port is None else None)
+        self.port = port
+        self.host = host
+        self.token = token
+
+    @classmethod
+    def connect_default(cls) -> Optional["ServiceClient"]:
+        """Return a client for the default service if one is running, else None."""
+        port = os.environ.get("TRIMMOTHY_SERVICE_PORT")
+        client = cls(port=int(port)) if port else cls()
+        return client if client.is_running() else None
+
+    def _token(self) -> Optional[str]:
+        if self.token is not None:
+            return self.token
+        # Read on every request: a restarted service writes a new token
+        try:
+            return token_path(self.port).read_text(encoding="utf-8").strip()
+        except OSError:
+            return None   # No service of ours on this port
+
+    def _connect(self, timeout: Optional[float] = None) -> socket.socket:
+        if self.port is not None:
+            return socket.create_connection((self.host, self.port), timeout=timeout)
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.settimeout(timeout)
+        sock.connect(self.socket_path)
+        return sock
+
+    def request(self, request_type: str, params: Optional[Dict] = None,
+                on_event: Optional[Callable[[Dict], None]] = None, timeout: Optional[float] = None,
+                job_id: Optional[str] = None):
+        """
+        Send one request and wait for its result.
+
+        Args:
+            request_type: Job or control request type
+            params: Request parameters
+            on_event: Optional callback receiving every event for the request
+            timeout: Socket timeout in seconds
+            job_id: Identifier for the request, e.g. to cancel it from another thread
+
+        Returns:
+            The job result
+        """
+        job_id = job_id or uuid.uuid4().hex[:12]
+        message = {'id': job_id, 'type': request_type, 'params': params or {}}
+        if self.port is not None:
+            message['token'] = self._token()
+
+        with self._connect(timeout) as sock:
+            sock.sendall((json.dumps(message) + "\n").encode("utf-8"))
+            with sock.makefile('r', encoding='utf-8') as stream:
+                for line in stream:
+                    event = json.loads(line)
+                    if event.get('job') != job_id:
+                        continue
+                    if on_event:
+                        on_event(event)
+                    if event['event'] == 'result':
+                        return event['result']
+                    if event['event'] == 'error':
+                        raise RuntimeError(f"Service job failed: {event['error']}")
+
+        raise RuntimeError("Service closed the connection before the job finished")
+
+    def is_running(self) -> bool:
+        """Check whether a service answers on the configured address."""
+        try:
+            return self.request('ping', timeout=1.0) == 'pong'
+        except (OSError, RuntimeError, ValueError):
+            return False
+
+    def stats(self) -> Dict:
+        return self.request('stats')
+
+    def cancel(self, job_id: str) -> bool:
+        return bool(self.request('cancel', {'job': job_id}, timeout=5.0))
+
+    def get_video_info(self, video_path: str) -> Dict:
+        return self.request('probe', {'video_path': video_path})
+
+    def analyze_video(self, video_path: str) -> Dict:
+        return self.request('analyze', {'video_path': video_path})
+
+    def extract_thumbnails(self, video_path: str, output_dir: str, count: int = 8,
+                           width: int = 120, height: int = 80) -> list:
+        return self.request('thumbnails', {
+            'video_path': video_path,
+            'output_dir': output_dir,
+            'count': count,
+            'width': width,
+            'height': height,
+        })
+
+    def trim_video(self, input_path: str, output_path: str, start_time: float, end_time: float,
+                   progress_callback: Optional[Callable[[float], None]] = None,
+                   time_budget: Optional[float] = None,
+                   cancel_event: Optional[threading.Event] = None,
+                   use_export_cache: bool = True) -> bool:
+        def on_event(event):
+            if progress_callback and event['event'] == 'progress':
+                progress_callback(event['progress'])
+
+        job_id = uuid.uuid4().hex[:12]
+        finished = threading.Event()
+
+        def forward_cancel():
+            # The request blocks reading events, so the cancel goes over its own connection
+            while not finished.wait(self.CANCEL_POLL_INTERVAL):
+                if cancel_event.is_set():
+                    try:
+                        self.cancel(job_id)
+                    except (OSError, RuntimeError, ValueError) as e:
+                        print(f"Service cancel failed: {e}")
+                    return
+
+        if cancel_event is not None:
+            threading.Thread(target=forward_cancel, daemon=True, name="trimmothy-service-cancel").start()
+        try:
+            return bool(self.request('trim', {
+                'input_path': os.path.abspath(input_path),
+                'output_path': os.path.abspath(output_path),
+                'start_time': start_time,
+                'end_time': end_time,
+                'time_budget': time_budget,
+                'use_export_cache': use_export_cache,
+            }, on_event=on_event, job_id=job_id))
+        except RuntimeError as e:
+            print(f"Service trim failed: {e}")
+            return False
+        finally:
+            finished.set()
@@ -0,0 +1,283 @@
+"""
+Multi-file editing sessions for Trimmothy.
+
+A session keeps several sources open at once so switching between them (for
+example camera A and camera B of the same event) doesn't reload anything:
+
+- `DecoderPool` holds decode workers for recently used files, closing the
+  least recently used one when more than `max_open` are running.
+- `SourceState` carries everything the UI shows for one file: its properties,
+  probe result, frame index, thumbnail pyramid, trim points, playhead, a
+  small cache of decoded frames (so the previous picture is back on screen
+  the moment a file is selected again), the GOP buffer used for stepping
+  backwards and the frames kept decoded around its trim points.
+- `Session` is the most-recently-used list of those states.
+"""
+
+import os
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from trimmothy.decoder import DecodeWorker
+from trimmothy.memory import get_memory_governor
+
+
+def _key(video_path: str) -> str:
+    return os.path.abspath(video_path)
+
+
+class FrameCache:
+    """Recently shown RGB frames of one source, bounded by size."""
+
+    MAX_BYTES = 24 * 1024 * 1024
+    MEMORY_COST = 2.0   # Relative cost of a byte for the memory governor: one seek and decode per frame
+
+    def __init__(self, max_bytes: Optional[int] = None, name: str = "frames"):
+        self.max_bytes = max_bytes or self.MAX_BYTES
+        self.nbytes = 0
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._frames: "OrderedDict[int, np.ndarray]" = OrderedDict()
+        self._memory = get_memory_governor()
+        self._memory.register(self, name, self.MEMORY_COST)
+
+    def get(self, frame_number: int) -> Optional[np.ndarray]:
+        with self._lock:
+            frame = self._frames.get(frame_number)
+            if frame is None:
+                self.misses += 1
+                return None
+            self._frames.move_to_end(frame_number)
+            self.hits += 1
+        self._memory.touch(self)
+        return frame
+
+    def put(self, frame_number: int, frame: np.ndarray):
+        """Store a copy of a frame (decoder frames are views that get overwritten)."""
+        if frame.nbytes > self.max_bytes:
+            return
+        with self._lock:
+            if frame_number in self._frames:
+                return
+            self._frames[frame_number] = frame.copy()
+            self.nbytes += frame.nbytes
+            self._release(self.nbytes - self.max_bytes)
+        self._memory.touch(self)
+
+    def _release(self, nbytes: int) -> int:
+        freed = 0
+        while freed < nbytes and self._frames:
+            _, evicted = self._frames.popitem(last=False)
+            self.nbytes -= evicted.nbytes
+            freed += evicted.nbytes
+        return freed
+
+    def memory_usage(self) -> int:
+        return self.nbytes
+
+    def release_memory(self, nbytes: int) -> int:
+        """Drop least recently shown frames; called by the memory governor."""
+        with self._lock:
+            return self._release(nbytes)
+
+    def clear(self):
+        with self._lock:
+            self._frames.clear()
+            self.nbytes = 0
+
+    def close(self):
+        self.clear()
+        self._memory.unregister(self)
+
+
+class SourceState:
+    """Everything the editor remembers about one open file."""
+
+    def __init__(self, video_path: str, properties: Dict):
+        """
+        Args:
+            video_path: Source file
+            properties: Container properties (frame_count, fps, duration) from the loader
+        """
+        self.video_path = video_path
+        self.total_frames = properties['frame_count']
+        self.fps = properties['fps']
+        self.video_duration = properties['duration']
+        self.video_info: Optional[Dict] = None
+        self.frame_index = None
+        self.pyramid = None
+        self.trim_start = 0.0
+        self.trim_end = 0.0
+        self.current_frame = 0
+        self.frames = FrameCache(name=f"frames: {os.path.basename(video_path)}")
+        self.gops = None  # GopBuffer, created on the first backward step
+        self.preroll = None  # BoundaryPreroll, created once trim points are set
+
+    def close(self):
+        """Release the thumbnails and cached frames."""
+        if self.pyramid is not None:
+            self.pyramid.close()
+            self.pyramid = None
+        if self.gops is not None:
+            self.gops.close()
+            self.gops = None
+        if self.preroll is not None:
+            self.preroll.close()
+            self.preroll = None
+        self.frames.close()
+
+
+class Session:
+    """Open sources, most recently used last."""
+
+    MAX_SOURCES = 8
+
+    def __init__(self, max_sources: Optional[int] = None):
+        self.max_sources = max_sources or self.MAX_SOURCES
+        self._sources: "OrderedDict[str, SourceState]" = OrderedDict()
+
+    def __contains__(self, video_path: str) -> bool:
+        return _key(video_path) in self._sources
+
+    def get(self, video_path: str, touch: bool = True) -> Optional[SourceState]:
+        """
+        Look up a source.
+
+        Args:
+            video_path: Source file
+            touch: Mark it as most recently used
+        """
+        key = _key(video_path)
+        state = self._sources.get(key)
+        if state is not None and touch:
+            self._sources.move_to_end(key)
+        return state
+
+    def add(self, state: SourceState) -> List[SourceState]:
+        """
+        Add (or replace) a source, dropping the least recently used ones over the limit.
+
+        Returns:
+            The states that were dropped; they have already been closed
+        """
+        key = _key(state.video_path)
+        previous = self._sources.pop(key, None)
+        if previous is not None and previous is not state:
+            previous.close()
+        self._sources[key] = state
+
+        dropped = []
+        while len(self._sources) > self.max_sources:
+            _, oldest = self._sources.popitem(last=False)
+            oldest.close()
+            dropped.append(oldest)
+        return dropped
+
+    def remove(self, video_path: str):
+        state = self._sources.pop(_key(video_path), None)
+        if state is not None:
+            state.close()
+
+    def sources(self) -> List[SourceState]:
+        """Open sources, most recently used first."""
+        return list(reversed(self._sources.values()))
+
+    def close(self):
+        for state in self._sources.values():
+            state.close()
+        self._sources.clear()
+
+
+class DecoderPool:
+    """Decode workers of recently used sources, with a limit on how many stay open."""
+
+    MAX_OPEN = 3
+    MEMORY_COST = 8.0   # Relative cost of a byte for the memory governor: closing a ring means respawning a worker
+
+    def __init__(self, max_open: Optional[int] = None, max_width: int = 600, max_height: int = 400):
+        """
+        Args:
+            max_open: Maximum number of worker processes kept running
+            max_width: Maximum width of delivered frames
+            max_height: Maximum height of delivered frames
+        """
+        self.max_open = max(max_open or self.MAX_OPEN, 1)
+        self.max_width = max_width
+        self.max_height = max_height
+        self._lock = threading.Lock()
+        self._decoders: "OrderedDict[str, DecodeWorker]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._memory = get_memory_governor()
+        self._memory.register(self, "decoder rings", self.MEMORY_COST)
+
+    def acquire(self, video_path: str) -> DecodeWorker:
+        """
+        Get the decoder of a source, creating it if needed.
+
+        New decoders are returned unstarted; call start() off the UI thread
+        (or let the first read() start them). Decoders pushed out of the pool
+        are closed in the background.
+        """
+        key = _key(video_path)
+        with self._lock:
+            decoder = self._decoders.get(key)
+            if decoder is not None and not decoder.closed:
+                self._decoders.move_to_end(key)
+                self.hits += 1
+            else:
+                self.misses += 1
+                decoder = DecodeWorker(video_path, self.max_width, self.max_height)
+                self._decoders[key] = decoder
+                while len(self._decoders) > self.max_open:
+                    _, evicted = self._decoders.popitem(last=False)
+                    self.evictions += 1
+                    threading.Thread(target=evicted.close, daemon=True).start()
+        self._memory.touch(self)
+        return decoder
+
+    def discard(self, video_path: str):
+        """Close and forget a source's decoder."""
+        with self._lock:
+            decoder = self._decoders.pop(_key(video_path), None)
+        if decoder is not None:
+            threading.Thread(target=decoder.close, daemon=True).start()
+
+    def memory_usage(self) -> int:
+        with self._lock:
+            return sum(decoder.nbytes for decoder in self._decoders.values())
+
+    def release_memory(self, nbytes: int) -> int:
+        """Close least recently used decoders, never the current one; called by the memory governor."""
+        freed = 0
+        with self._lock:
+            while freed < nbytes and len(self._decoders) > 1:
+                _, evicted = self._decoders.popitem(last=False)
+                self.evictions += 1
+                freed += evicted.nbytes
+                threading.Thread(target=evicted.close, daemon=True).start()
+        return freed
+
+    def close(self):
+        """Close every decoder."""
+        with self._lock:
+            decoders = list(self._decoders.values())
+            self._decoders.clear()
+        for decoder in decoders:
+            decoder.close()
+        self._memory.unregister(self)
+
+    def metrics(self) -> Dict:
+        with self._lock:
+            open_count = sum(1 for decoder in self._decoders.values() if decoder.ready)
+        return {
+            'open': open_count,
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+        }
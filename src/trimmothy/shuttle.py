@@ -0,0 +1,267 @@
+"""
+Variable-speed shuttle playback for Trimmothy.
+
+At 2x and above, decoding every frame can't keep up with the clock, and
+seeking per frame is worse. `ShuttleDecoder` runs its own capture on a
+background thread that follows a playback clock (position = start + speed *
+elapsed) and delivers only the frames that are worth showing:
+
+- "sampled": forward shuttle reads sequentially, skipping the frames between
+  two shown ones with grab() (no colour conversion or scaling), so the
+  display gets close to DISPLAY_FPS while the decoder can keep up.
+- "keyframes": reverse shuttle, and any forward shuttle whose sampled frames
+  take too long, decode only the keyframe at or before the clock position.
+  That costs one keyframe decode per displayed frame, whatever the GOP length.
+
+The UI polls `next_frame()` on its own timer; frames that arrive late are
+simply replaced by newer ones. Displayed frames are counted per speed so the
+achieved display rate can be reported.
+
+The capture lives on this module's thread, not in a `DecodeWorker` process.
+Mode switching times each grab() and read() against the clock, and the
+worker answers one read per pipe round trip, so it could neither skip frames
+with grab() nor time them without the round trip in the measurement. Those
+OpenCV calls release the GIL while they decode, and a decoder only exists
+while the user is shuttling a source the worker has already opened.
+"""
+
+import threading
+import time
+from typing import Dict, Optional, Tuple
+
+import cv2
+import numpy as np
+
+from trimmothy.decoder import _fit
+
+
+SHUTTLE_SPEEDS = (1, 2, 4, 8, 16, 32)
+
+
+class ShuttleDecoder:
+    """Decodes a subset of frames that keeps up with fast forward or reverse playback."""
+
+    DISPLAY_FPS = 30.0          # Frames per second the shuttle tries to show
+    SLOW_FRAME = 2.0            # Display intervals a sampled frame may take before keyframes take over
+
+    def __init__(self, video_path: str, frame_count: int, fps: float, keyframes: Optional[np.ndarray] = None,
+                 max_width: int = 600, max_height: int = 400):
+        """
+        Args:
+            video_path: Source video path
+            frame_count: Number of frames in the video
+            fps: Average frame rate, for the playback clock
+            keyframes: Sorted keyframe frame numbers, from the frame index; without
+                them keyframe mode seeks to the clock position instead
+            max_width: Maximum width of delivered frames
+            max_height: Maximum height of delivered frames
+        """
+        self.video_path = video_path
+        self.frame_count = max(1, frame_count)
+        self.fps = fps if fps and fps > 0 else 30.0
+        self.keyframes = np.asarray(keyframes, dtype=np.int64) if keyframes is not None and len(keyframes) else None
+        self.max_width = max_width
+        self.max_height = max_height
+
+        self._lock = threading.Lock()
+        self._changed = threading.Condition(self._lock)
+        self._speed = 0
+        self._origin_frame = 0.0
+        self._origin_time = 0.0
+        self._generation = 0
+        self._latest: Optional[Tuple[int, np.ndarray]] = None
+        self._closed = False
+        self._worker = None
+        self.mode: Optional[str] = None
+
+        # Displayed frames and shuttle seconds per speed
+        self._stats: Dict[int, Dict] = {}
+        self._stats_speed = 0
+        self._stats_started = 0.0
+
+    # Clock
+
+    @property
+    def speed(self) -> int:
+        return self._speed
+
+    def position(self) -> float:
+        """Frame the playback clock is at, clamped to the video."""
+        with self._lock:
+            return self._position()
+
+    def _position(self) -> float:
+        position = self._origin_frame + self._speed * self.fps * (time.monotonic() - self._origin_time)
+        return min(max(position, 0.0), self.frame_count - 1.0)
+
+    def at_end(self) -> bool:
+        """Whether the clock has run into the start or end of the video."""
+        position = self.position()
+        return (self._speed > 0 and position >= self.frame_count - 1) or (self._speed < 0 and position <= 0)
+
+    def set_speed(self, speed: int, frame_number: Optional[int] = None):
+        """
+        Change speed (negative for reverse), continuing from the clock position
+        or from frame_number if given.
+        """
+        with self._lock:
+            now = time.monotonic()
+            self._origin_frame = float(frame_number) if frame_number is not None else self._position()
+            self._origin_time = now
+            self._speed = speed
+            self._generation += 1
+            self._latest = None
+            self.mode = self._mode_for(speed)
+            self._account(now)
+            self._changed.notify_all()
+        self._ensure_worker()
+
+    def _mode_for(self, speed: int) -> str:
+        return "sampled" if speed > 0 else "keyframes"
+
+    # Delivery
+
+    def next_frame(self) -> Optional[Tuple[int, np.ndarray]]:
+        """
+        Take the newest decoded frame, if one arrived since the last call.
+
+        Returns:
+            Tuple of (frame number, RGB frame), or None
+        """
+        with self._lock:
+            latest, self._latest = self._latest, None
+            if latest is not None and self._speed in self._stats:
+                self._stats[self._speed]['frames'] += 1
+            return latest
+
+    def _account(self, now: float):
+        """Close the timing of the previous speed and start timing the current one."""
+        if self._stats_speed:
+            self._stats[self._stats_speed]['seconds'] += now - self._stats_started
+        self._stats_speed = self._speed
+        self._stats_started = now
+        if self._speed:
+            self._stats.setdefault(self._speed, {'frames': 0, 'seconds': 0.0, 'mode': self.mode})
+            self._stats[self._speed]['mode'] = self.mode
+
+    def display_rates(self) -> Dict[int, Dict]:
+        """
+        Achieved display rate per speed.
+
+        Returns:
+            Speed -> {'frames', 'seconds', 'fps', 'mode'}
+        """
+        with self._lock:
+            now = time.monotonic()
+            rates = {}
+            for speed, entry in self._stats.items():
+                seconds = entry['seconds'] + (now - self._stats_started if speed == self._stats_speed else 0.0)
+                rates[speed] = {
+                    'frames': entry['frames'],
+                    'seconds': seconds,
+                    'fps': entry['frames'] / seconds if seconds > 0 else 0.0,
+                    'mode': entry['mode'],
+                }
+            return rates
+
+    def close(self):
+        """Stop decoding."""
+        with self._lock:
+            self._account(time.monotonic())
+            self._speed = 0
+            self._stats_speed = 0
+            self._closed = True
+            self._changed.notify_all()
+
+    # Decoding
+
+    def _ensure_worker(self):
+        if self._worker is not None and self._worker.is_alive():
+            return
+        self._worker = threading.Thread(target=self._work, daemon=True, name="trimmothy-shuttle")
+        self._worker.start()
+
+    def _work(self):
+        capture = cv2.VideoCapture(self.video_path)
+        try:
+            if not capture.isOpened():
+                return
+            width = int(capture.get(cv2.CAP_PROP_FRAME_WIDTH))
+            height = int(capture.get(cv2.CAP_PROP_FRAME_HEIGHT))
+            size = _fit(width, height, self.max_width, self.max_height)
+            interval = 1.0 / self.DISPLAY_FPS
+            next_position = -1   # Frame the capture returns next without seeking
+            shown = -1           # Frame delivered last at this speed
+            slow = 0             # Consecutive sampled frames that took too long
+            current = None
+
+            while True:
+                with self._lock:
+                    while self._speed == 0 and not self._closed:
+                        self._changed.wait()
+                    if self._closed:
+                        return
+                    speed, mode, generation = self._speed, self.mode, self._generation
+                    target = int(self._position())
+                if generation != current:
+                    current, shown, slow = generation, -1, 0
+
+                started = time.monotonic()
+                if mode == "sampled":
+                    # Show every step-th frame, reading through the ones in between
+                    step = max(1, round(speed * self.fps / self.DISPLAY_FPS))
+                    wanted = target if shown < 0 else max(shown + step, target)
+                    if wanted > target:
+                        time.sleep(min((wanted - target) / (speed * self.fps), interval))
+                        continue
+                    reachable = 0 <= wanted - next_position <= 2 * self.fps
+                else:
+                    wanted = self._keyframe_at_or_before(target)
+                    if wanted == shown:
+                        time.sleep(interval)
+                        continue
+                    reachable = wanted == next_position
+
+                if not reachable:
+                    capture.set(cv2.CAP_PROP_POS_FRAMES, wanted)
+                    next_position = wanted
+                while next_position < wanted:
+                    if not capture.grab():
+                        break
+                    next_position += 1
+                ok, frame = capture.read()
+                if not ok:
+                    next_position = -1
+                    time.sleep(interval)
+                    continue
+                next_position = wanted + 1
+                shown = wanted
+
+                if (frame.shape[1], frame.shape[0]) != size:
+                    frame = cv2.resize(frame, size, interpolation=cv2.INTER_AREA)
+                frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+                with self._lock:
+                    if generation == self._generation:
+                        self._latest = (wanted, frame)
+
+                elapsed = time.monotonic() - started
+                if mode == "sampled":
+                    # Reading every frame can't keep up with this speed; show keyframes instead
+                    slow = slow + 1 if elapsed > self.SLOW_FRAME * interval else 0
+                    if slow >= 3:
+                        with self._lock:
+                            if generation == self._generation:
+                                self.mode = "keyframes"
+                                self._stats[speed]['mode'] = "keyframes"
+
+                # Don't deliver faster than the display can use
+                if elapsed < interval:
+                    time.sleep(interval - elapsed)
+        finally:
+            capture.release()
+
+    def _keyframe_at_or_before(self, frame_number: int) -> int:
+        if self.keyframes is None:
+            return frame_number
+        index = int(np.searchsorted(self.keyframes, frame_number, side="right")) - 1
+        return int(self.keyframes[max(index, 0)])
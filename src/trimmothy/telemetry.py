@@ -0,0 +1,242 @@
+"""
+Export telemetry for Trimmothy.
+
+Every call to `VideoProcessor.trim_video` appends one JSON line to a local
+store describing the source (codecs, container, resolution), the requested
+range, each strategy that was attempted with its wall time and outcome, and
+the result: output size and speed relative to realtime. The FFmpeg version
+is recorded too, so slowdowns after an upgrade show up in the report.
+
+Nothing leaves the machine; the store is a plain JSON Lines file in the cache
+directory that can be deleted at any time.
+"""
+
+import json
+import os
+import statistics
+import threading
+import time
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional
+
+from trimmothy.cache import get_cache_dir
+
+
+TELEMETRY_FILE = "exports.jsonl"
+
+_write_lock = threading.Lock()
+
+
+def get_telemetry_path() -> Path:
+    """Get the default export telemetry location."""
+    return get_cache_dir() / TELEMETRY_FILE
+
+
+def telemetry_enabled() -> bool:
+    """Telemetry is on unless TRIMMOTHY_TELEMETRY is set to 0."""
+    return os.environ.get("TRIMMOTHY_TELEMETRY", "1") != "0"
+
+
+class ExportRecord:
+    """Collects the details of one export while it runs."""
+
+    def __init__(self, input_path: str, output_path: str, start_time: float, end_time: float):
+        self.started = time.monotonic()
+        self.data = {
+            'timestamp': time.time(),
+            'input': os.path.abspath(input_path),
+            'output': os.path.abspath(output_path),
+            'container': Path(input_path).suffix.lower().lstrip('.'),
+            'output_container': Path(output_path).suffix.lower().lstrip('.'),
+            'start_time': start_time,
+            'range_duration': end_time - start_time,
+            'attempts': [],
+            'strategy': None,
+            'status': 'failed',
+        }
+
+    def set_source(self, video_info: Dict):
+        """Record the probed properties of the source."""
+        self.data.update({
+            'video_codec': video_info.get('video_codec'),
+            'audio_codec': video_info.get('audio_codec'),
+            'format': video_info.get('format'),
+            'width': video_info.get('width'),
+            'height': video_info.get('height'),
+            'fps': round(video_info.get('fps') or 0, 3),
+            'source_duration': video_info.get('duration'),
+        })
+
+    def set_range(self, start_time: float, duration: float):
+        """Record the range after it was snapped to frame times."""
+        self.data['start_time'] = start_time
+        self.data['range_duration'] = duration
+
+    def attempt(self, strategy: str, seconds: float, status: str, error: Optional[str] = None):
+        """
+        Record one strategy attempt.
+
+        Args:
+            strategy: Strategy method name; the "_try_" prefix is dropped
+            seconds: Wall time spent in it
+            status: "ok", "declined" (strategy returned False) or "error"
+            error: Error message for failed attempts
+        """
+        strategy = strategy.removeprefix('_try_')
+        attempt = {'strategy': strategy, 'seconds': round(seconds, 3), 'status': status}
+        if error:
+            attempt['error'] = error[:500]
+        self.data['attempts'].append(attempt)
+        if status == 'ok':
+            self.data['strategy'] = strategy
+
+    def finish(self, status: str, error: Optional[str] = None) -> Dict:
+        """
+        Complete the record.
+
+        Args:
+            status: "ok", "failed" or "cancelled"
+            error: Error that aborted the export, if any
+
+        Returns:
+            The finished record
+        """
+        wall = time.monotonic() - self.started
+        self.data['status'] = status
+        self.data['wall_seconds'] = round(wall, 3)
+        if error:
+            self.data['error'] = error[:500]
+        if status == 'ok':
+            try:
+                self.data['output_size'] = os.path.getsize(self.data['output'])
+            except OSError:
+                self.data['output_size'] = None
+            duration = self.data['range_duration']
+            self.data['realtime_factor'] = round(duration / wall, 3) if wall > 0 else None
+        return self.data
+
+
+def append_record(record: Dict, path: Optional[Path] = None) -> None:
+    """
+    Append a record to the telemetry store.
+
+    Each record is written with a single O_APPEND write, so concurrent exports
+    from several processes don't interleave lines.
+    """
+    line = (json.dumps(record, separators=(',', ':')) + "\n").encode("utf-8")
+    path = path or get_telemetry_path()
+    with _write_lock:
+        fd = os.open(path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+        try:
+            os.write(fd, line)
+        finally:
+            os.close(fd)
+
+
+def load_records(path: Optional[Path] = None, since: Optional[float] = None) -> List[Dict]:
+    """
+    Read the telemetry store.
+
+    Args:
+        path: Store location; defaults to the cache directory
+        since: Only records with a timestamp at or after this Unix time
+
+    Returns:
+        List of records, oldest first; unreadable lines are skipped
+    """
+    records = []
+    try:
+        with open(path or get_telemetry_path(), "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue
+                if since is None or record.get('timestamp', 0) >= since:
+                    records.append(record)
+    except OSError:
+        pass
+    return records
+
+
+def _resolution(record: Dict) -> str:
+    height = record.get('height')
+    return f"{height}p" if height else "unknown"
+
+
+# Report groupings: name -> function giving a record's group
+GROUP_KEYS: Dict[str, Callable[[Dict], str]] = {
+    'codec': lambda record: record.get('video_codec') or "unknown",
+    'container': lambda record: record.get('container') or "unknown",
+    'strategy': lambda record: record.get('strategy') or "(none succeeded)",
+    'resolution': _resolution,
+    'ffmpeg': lambda record: record.get('ffmpeg_version') or "unknown",
+    'source': lambda record: record.get('input') or "unknown",
+}
+
+
+def _percentile(values: List[float], fraction: float) -> Optional[float]:
+    if not values:
+        return None
+    values = sorted(values)
+    return values[min(int(fraction * len(values)), len(values) - 1)]
+
+
+def _fell_through(record: Dict) -> bool:
+    """Whether any strategy declined or failed before the one that worked."""
+    statuses = [attempt['status'] for attempt in record.get('attempts', [])]
+    return 'ok' in statuses and statuses.index('ok') > 0
+
+
+def summarize(records: Iterable[Dict], group_by: str = 'codec') -> List[Dict]:
+    """
+    Aggregate export records.
+
+    Args:
+        records: Records from load_records()
+        group_by: One of GROUP_KEYS
+
+    Returns:
+        One summary per group, most exports first, with counts, success and
+        fall-through rates, realtime factors, wall times and per-strategy
+        attempt counts
+    """
+    key = GROUP_KEYS[group_by]
+    groups: Dict[str, List[Dict]] = {}
+    for record in records:
+        groups.setdefault(key(record), []).append(record)
+
+    summaries = []
+    for name, members in groups.items():
+        succeeded = [record for record in members if record.get('status') == 'ok']
+        # Export cache hits finish in milliseconds and would hide encoder regressions
+        factors = [record['realtime_factor'] for record in succeeded
+                   if record.get('realtime_factor') and record.get('strategy') != 'export_cache']
+        walls = [record['wall_seconds'] for record in succeeded if 'wall_seconds' in record]
+
+        strategies: Dict[str, Dict] = {}
+        for record in members:
+            for attempt in record.get('attempts', []):
+                entry = strategies.setdefault(attempt['strategy'], {'attempts': 0, 'ok': 0, 'declined': 0,
+                                                                    'error': 0, 'seconds': 0.0})
+                entry['attempts'] += 1
+                entry[attempt['status']] = entry.get(attempt['status'], 0) + 1
+                entry['seconds'] += attempt.get('seconds', 0)
+
+        summaries.append({
+            'group': name,
+            'exports': len(members),
+            'succeeded': len(succeeded),
+            'cancelled': sum(1 for record in members if record.get('status') == 'cancelled'),
+            # Exports where at least one strategy declined or failed before one worked
+            'fell_through': sum(1 for record in succeeded if _fell_through(record)),
+            'median_realtime': statistics.median(factors) if factors else None,
+            'p10_realtime': _percentile(factors, 0.1),
+            'median_wall': statistics.median(walls) if walls else None,
+            'total_media': sum(record.get('range_duration', 0) for record in succeeded),
+            'output_bytes': sum(record.get('output_size') or 0 for record in succeeded),
+            'strategies': strategies,
+        })
+
+    summaries.sort(key=lambda summary: (-summary['exports'], summary['group']))
+    return summaries
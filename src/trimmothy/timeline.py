@@ -0,0 +1,397 @@
+"""
+Canvas-based timeline for Trimmothy.
+
+The whole timeline is one `tk.Canvas`: the thumbnail strip is composited
+into a single off-screen image that is shown through a fixed row of image
+tiles, and the trim range, its handles, the time labels and the playhead are
+plain canvas items that are moved rather than recreated. When a thumbnail
+arrives or the view changes, only the slots whose picture changed are
+recomposited and only the tiles they touch are re-uploaded, so the cost of an
+update depends on the pixels that changed, not on how many thumbnails the
+strip holds.
+"""
+
+import tkinter as tk
+from typing import Callable, List, Optional
+
+from PIL import Image, ImageTk
+
+from trimmothy.pyramid import ThumbnailPyramid
+
+
+class TimelineCanvas:
+    """Zoomable thumbnail timeline with trim overlay and playhead."""
+
+    STRIP_HEIGHT = 80
+    LABEL_HEIGHT = 16
+    BAR_HEIGHT = 10
+    THUMBNAIL_WIDTH = 120
+    TILE_WIDTH = 256       # Width of the image tiles the strip is uploaded in
+    LABEL_SPACING = 140    # Pixels between time labels
+    HANDLE_GRAB = 6        # Pixels around a trim edge that start a handle drag
+    RESIZE_DELAY = 60      # Milliseconds of quiet before a resize recomposites the strip
+
+    def __init__(self, parent, frame_to_time: Callable[[int], float], time_to_frame: Callable[[float], int],
+                 format_time: Callable[[float], str], on_seek: Callable[[int], None],
+                 on_trim_change: Optional[Callable[[str, float], None]] = None,
+                 background: str = "#2b2b2b", accent: str = "#1f6aa5"):
+        """
+        Args:
+            parent: Parent widget
+            frame_to_time: Converts a frame number to seconds
+            time_to_frame: Converts seconds to a frame number
+            format_time: Formats seconds for the time labels
+            on_seek: Called with a frame number when the user clicks or drags on the strip
+            on_trim_change: Called with ("start" | "end", seconds) when a trim handle is dragged
+            background: Canvas and empty-slot color
+            accent: Trim range color
+        """
+        self.frame_to_time = frame_to_time
+        self.time_to_frame = time_to_frame
+        self.format_time = format_time
+        self.on_seek = on_seek
+        self.on_trim_change = on_trim_change
+        self.background = background
+        self.accent = accent
+
+        height = self.STRIP_HEIGHT + self.LABEL_HEIGHT + self.BAR_HEIGHT
+        self.canvas = tk.Canvas(parent, height=height, bg=background, highlightthickness=0, cursor="hand2")
+
+        self.pyramid: Optional[ThumbnailPyramid] = None
+        self.total_frames = 0
+        self.view_start = 0
+        self.view_end = 0
+        self.playhead_frame = 0
+        self.trim_start = 0.0
+        self.trim_end = 0.0
+
+        # Composited strip and the tiles it is shown through
+        self.width = 0
+        self.slot_count = 0
+        self.slot_keys: List = []
+        self._strip = None
+        self._tiles = []          # [canvas item, PhotoImage]
+        self._dirty_tiles = set()
+        self._flush_pending = False
+        self._refresh_pending = False
+        self._resize_timer = None
+        self._drag = None
+
+        self._label_items = []
+        self._hover_window = None
+
+        # Overlay items, created once and moved with coords()
+        strip_bottom = self.STRIP_HEIGHT
+        bar_top = strip_bottom + self.LABEL_HEIGHT
+        stipple = "" if self.canvas.tk.call("tk", "windowingsystem") == "aqua" else "gray50"
+        self._dim_left = self.canvas.create_rectangle(0, 0, 0, strip_bottom, fill="black", outline="",
+                                                      stipple=stipple, state="hidden" if not stipple else "normal")
+        self._dim_right = self.canvas.create_rectangle(0, 0, 0, strip_bottom, fill="black", outline="",
+                                                       stipple=stipple, state="hidden" if not stipple else "normal")
+        self._trim_outline = self.canvas.create_rectangle(0, 1, 0, strip_bottom - 1, outline=accent, width=2)
+        self._trim_bar = self.canvas.create_rectangle(0, bar_top + 2, 0, bar_top + self.BAR_HEIGHT - 1,
+                                                      fill=accent, outline="")
+        self._playhead = self.canvas.create_line(0, 0, 0, bar_top + self.BAR_HEIGHT, fill="#ff4040", width=2)
+
+        self.canvas.bind("<Configure>", self._on_configure)
+        self.canvas.bind("<Button-1>", self._on_press)
+        self.canvas.bind("<B1-Motion>", self._on_drag)
+        self.canvas.bind("<ButtonRelease-1>", self._on_release)
+        self.canvas.bind("<MouseWheel>", self._on_wheel)
+        self.canvas.bind("<Button-4>", self._on_wheel)
+        self.canvas.bind("<Button-5>", self._on_wheel)
+        self.canvas.bind("<Motion>", self._on_hover)
+        self.canvas.bind("<Leave>", self.hide_hover_preview)
+
+    def pack(self, **kwargs):
+        self.canvas.pack(**kwargs)
+
+    # Model updates
+
+    def set_source(self, pyramid: ThumbnailPyramid, total_frames: int):
+        """Show a new video; the view resets to the whole file."""
+        self.pyramid = pyramid
+        self.total_frames = total_frames
+        self.view_start, self.view_end = 0, total_frames
+        self.playhead_frame = 0
+        self.slot_keys = [None] * self.slot_count
+        if self._strip is not None:
+            self._strip.paste(self.background, (0, 0) + self._strip.size)
+            self._mark_dirty(0, self.width)
+        self.refresh()
+
+    def set_total_frames(self, total_frames: int):
+        """Update the frame count (e.g. once exact frame timestamps are known)."""
+        full_view = self.view_start == 0 and self.view_end >= self.total_frames
+        self.total_frames = total_frames
+        if full_view:
+            self.view_end = total_frames
+        self.refresh()
+
+    def set_playhead(self, frame_number: int):
+        """Move the playhead; only the line item moves."""
+        self.playhead_frame = frame_number
+        x = self.x_for_frame(frame_number)
+        self.canvas.coords(self._playhead, x, 0, x, self.STRIP_HEIGHT + self.LABEL_HEIGHT + self.BAR_HEIGHT)
+
+    def set_trim(self, start_seconds: float, end_seconds: float):
+        """Move the trim overlay to a new range."""
+        self.trim_start, self.trim_end = start_seconds, end_seconds
+        self._place_trim()
+
+    # Geometry
+
+    def slot_frame(self, slot: int) -> int:
+        """Frame shown by a thumbnail slot in the current view."""
+        span = self.view_end - self.view_start
+        count = max(self.slot_count, 1)
+        return min(self.view_start + slot * span // count, max(self.total_frames - 1, 0))
+
+    def frame_at_x(self, x: float) -> float:
+        """Frame under a canvas x coordinate."""
+        width = max(self.width, 1)
+        x = min(max(x, 0), width)
+        return self.view_start + (self.view_end - self.view_start) * x / width
+
+    def x_for_frame(self, frame_number: float) -> float:
+        """Canvas x coordinate of a frame (may lie outside the visible view)."""
+        span = max(self.view_end - self.view_start, 1)
+        return (frame_number - self.view_start) * self.width / span
+
+    # View changes
+
+    def zoom(self, factor: float, center_frame: Optional[float] = None):
+        """Zoom in (factor > 1) or out, keeping a frame at the same position."""
+        if self.total_frames == 0:
+            return
+        span = self.view_end - self.view_start
+        if center_frame is None:
+            center_frame = self.view_start + span / 2
+        new_span = min(max(int(span / factor), max(self.slot_count, 1)), self.total_frames)
+
+        ratio = (center_frame - self.view_start) / span if span else 0.5
+        start = int(center_frame - ratio * new_span)
+        self.view_start = min(max(start, 0), self.total_frames - new_span)
+        self.view_end = self.view_start + new_span
+        self.refresh()
+
+    def zoom_fit(self):
+        """Show the whole video."""
+        self.view_start, self.view_end = 0, self.total_frames
+        self.refresh()
+
+    def pan(self, slots: float):
+        """Scroll the view by a number of thumbnail slots."""
+        span = self.view_end - self.view_start
+        shift = int(slots * span / max(self.slot_count, 1))
+        self.view_start = min(max(self.view_start + shift, 0), self.total_frames - span)
+        self.view_end = self.view_start + span
+        self.refresh()
+
+    def schedule_refresh(self):
+        """Coalesce thumbnail arrivals into one refresh."""
+        if not self._refresh_pending:
+            self._refresh_pending = True
+            self.canvas.after(30, self.refresh)
+
+    def refresh(self):
+        """Recomposite slots whose best cached thumbnail changed and move the overlays."""
+        self._refresh_pending = False
+        if self.width <= 1:
+            return
+
+        self._update_labels()
+        self._place_trim()
+        self.set_playhead(self.playhead_frame)
+        if self.pyramid is None or self.total_frames == 0:
+            return
+
+        if self._resize_timer is not None:
+            return  # The strip is recomposited once resizing pauses
+        self.view_end = min(self.view_end, self.total_frames)
+        span = max(self.view_end - self.view_start, 1)
+        level = self.pyramid.level_for_spacing(span / self.slot_count)
+        self.pyramid.request_range(level, self.view_start, self.view_end - 1)
+
+        for slot in range(self.slot_count):
+            frame_number = self.slot_frame(slot)
+            found = self.pyramid.nearest(frame_number, level)
+            key = None
+            if found is not None:
+                key = (found[2], self.pyramid.index_near(found[2], frame_number))
+            if key != self.slot_keys[slot]:
+                self.slot_keys[slot] = key
+                self._composite_slot(slot, found[0] if found is not None else None)
+
+    # Drawing
+
+    def _slot_bounds(self, slot: int):
+        return int(slot * self.width / self.slot_count), int((slot + 1) * self.width / self.slot_count)
+
+    def _composite_slot(self, slot: int, image):
+        """Draw one slot into the strip image and mark its tiles dirty."""
+        left, right = self._slot_bounds(slot)
+        self._strip.paste(self.background, (left, 0, right, self.STRIP_HEIGHT))
+        if image is not None:
+            thumbnail = Image.fromarray(image)
+            slot_width = right - left - 2
+            # Centered, cropped to the slot if it is narrower than the thumbnail
+            crop_left = max(0, (thumbnail.width - slot_width) // 2)
+            thumbnail = thumbnail.crop((crop_left, 0, crop_left + min(slot_width, thumbnail.width), thumbnail.height))
+            x = left + 1 + max(0, (slot_width - thumbnail.width) // 2)
+            y = max(0, (self.STRIP_HEIGHT - thumbnail.height) // 2)
+            self._strip.paste(thumbnail, (x, y))
+        self._mark_dirty(left, right)
+
+    def _mark_dirty(self, left: int, right: int):
+        first = max(left // self.TILE_WIDTH, 0)
+        last = min((right - 1) // self.TILE_WIDTH, len(self._tiles) - 1)
+        self._dirty_tiles.update(range(first, last + 1))
+        if not self._flush_pending:
+            self._flush_pending = True
+            self.canvas.after_idle(self._flush)
+
+    def _flush(self):
+        """Upload dirty tiles of the strip to their canvas image items."""
+        self._flush_pending = False
+        for index in sorted(self._dirty_tiles):
+            if index >= len(self._tiles):
+                continue
+            left = index * self.TILE_WIDTH
+            right = min(left + self.TILE_WIDTH, self.width)
+            photo = ImageTk.PhotoImage(self._strip.crop((left, 0, right, self.STRIP_HEIGHT)))
+            item = self._tiles[index][0]
+            self.canvas.itemconfigure(item, image=photo)
+            self._tiles[index][1] = photo  # Keep a reference
+        self._dirty_tiles.clear()
+
+    def _rebuild_layout(self):
+        """Resize the strip and tile row to the canvas width."""
+        self._resize_timer = None
+        width = max(self.canvas.winfo_width(), 1)
+        if width == self.width and self._strip is not None:
+            return
+        self.width = width
+        self.slot_count = max(1, round(width / self.THUMBNAIL_WIDTH))
+        self.slot_keys = [None] * self.slot_count
+        self._strip = Image.new("RGB", (width, self.STRIP_HEIGHT), self.background)
+
+        tile_count = (width + self.TILE_WIDTH - 1) // self.TILE_WIDTH
+        while len(self._tiles) > tile_count:
+            self.canvas.delete(self._tiles.pop()[0])
+        while len(self._tiles) < tile_count:
+            item = self.canvas.create_image(len(self._tiles) * self.TILE_WIDTH, 0, anchor="nw")
+            self.canvas.tag_lower(item)
+            self._tiles.append([item, None])
+
+        label_count = max(1, width // self.LABEL_SPACING)
+        while len(self._label_items) > label_count:
+            self.canvas.delete(self._label_items.pop())
+        while len(self._label_items) < label_count:
+            self._label_items.append(self.canvas.create_text(
+                0, self.STRIP_HEIGHT + 2, anchor="n", fill="#c8c8c8", font=("TkDefaultFont", 9)))
+
+        self._mark_dirty(0, width)
+        self.refresh()
+
+    def _update_labels(self):
+        count = len(self._label_items)
+        for i, item in enumerate(self._label_items):
+            x = (i + 0.5) * self.width / count
+            self.canvas.coords(item, x, self.STRIP_HEIGHT + 2)
+            text = self.format_time(self.frame_to_time(int(self.frame_at_x(x)))) if self.total_frames else ""
+            self.canvas.itemconfigure(item, text=text)
+
+    def _place_trim(self):
+        if self.total_frames == 0:
+            for item in (self._dim_left, self._dim_right, self._trim_outline, self._trim_bar):
+                self.canvas.coords(item, 0, 0, 0, 0)
+            return
+        left = self.x_for_frame(self.time_to_frame(self.trim_start))
+        right = self.x_for_frame(self.time_to_frame(self.trim_end))
+        bar_top = self.STRIP_HEIGHT + self.LABEL_HEIGHT
+        self.canvas.coords(self._dim_left, 0, 0, max(left, 0), self.STRIP_HEIGHT)
+        self.canvas.coords(self._dim_right, min(right, self.width), 0, self.width, self.STRIP_HEIGHT)
+        self.canvas.coords(self._trim_outline, left, 1, right, self.STRIP_HEIGHT - 1)
+        self.canvas.coords(self._trim_bar, left, bar_top + 2, right, bar_top + self.BAR_HEIGHT - 1)
+
+    # Events
+
+    def _on_configure(self, event):
+        # Overlays follow the new width at once; the strip is recomposited when resizing pauses
+        if self._strip is None:
+            self._rebuild_layout()
+            return
+        self.width = max(event.width, 1)
+        self._place_trim()
+        self.set_playhead(self.playhead_frame)
+        if self._resize_timer is not None:
+            self.canvas.after_cancel(self._resize_timer)
+        self._resize_timer = self.canvas.after(self.RESIZE_DELAY, self._force_rebuild)
+
+    def _force_rebuild(self):
+        self._strip = None
+        self._rebuild_layout()
+
+    def _on_press(self, event):
+        if self.total_frames == 0:
+            return
+        trim_left = self.x_for_frame(self.time_to_frame(self.trim_start))
+        trim_right = self.x_for_frame(self.time_to_frame(self.trim_end))
+        if self.on_trim_change and abs(event.x - trim_left) <= self.HANDLE_GRAB:
+            self._drag = "start"
+        elif self.on_trim_change and abs(event.x - trim_right) <= self.HANDLE_GRAB:
+            self._drag = "end"
+        else:
+            self._drag = "seek"
+        self._on_drag(event)
+
+    def _on_drag(self, event):
+        if self._drag is None:
+            return
+        frame_number = int(self.frame_at_x(event.x))
+        if self._drag == "seek":
+            self.on_seek(min(frame_number, self.total_frames - 1))
+        else:
+            self.on_trim_change(self._drag, self.frame_to_time(frame_number))
+
+    def _on_release(self, event):
+        self._drag = None
+
+    def _on_wheel(self, event):
+        """Ctrl+wheel zooms around the cursor, the plain wheel pans."""
+        up = event.num == 4 or getattr(event, "delta", 0) > 0
+        if event.state & 0x4:  # Control held
+            self.zoom(2.0 if up else 0.5, self.frame_at_x(event.x))
+        else:
+            self.pan(-1 if up else 1)
+
+    def _on_hover(self, event):
+        """Preview the frame under the cursor from the nearest cached thumbnail."""
+        if self.pyramid is None or self._drag is not None or event.y > self.STRIP_HEIGHT:
+            self.hide_hover_preview()
+            return
+        found = self.pyramid.nearest(self.frame_at_x(event.x))
+        if found is None:
+            self.hide_hover_preview()
+            return
+        image, shown_frame, _ = found
+
+        if self._hover_window is None:
+            self._hover_window = tk.Toplevel(self.canvas)
+            self._hover_window.overrideredirect(True)
+            self._hover_window.image_label = tk.Label(self._hover_window, borderwidth=0)
+            self._hover_window.image_label.pack()
+            self._hover_window.time_label = tk.Label(self._hover_window, font=("TkDefaultFont", 9))
+            self._hover_window.time_label.pack(fill="x")
+
+        photo = ImageTk.PhotoImage(Image.fromarray(image))
+        self._hover_window.image_label.configure(image=photo)
+        self._hover_window.image_label.image = photo  # Keep a reference
+        self._hover_window.time_label.configure(text=self.format_time(self.frame_to_time(shown_frame)))
+        self._hover_window.geometry(f"+{event.x_root - image.shape[1] // 2}+{event.y_root - image.shape[0] - 40}")
+        self._hover_window.deiconify()
+
+    def hide_hover_preview(self, event=None):
+        if self._hover_window is not None:
+            self._hover_window.withdraw()
@@ -5,8 +5,11 @@ Contains shared functions for time conversion, file handling, and other common o
 """
 
 import os
+import platform
+import shutil
+import subprocess
 from pathlib import Path
-from typing import Tuple
+from typing import List, Tuple
 
 
 def seconds_to_time_string(seconds: float) -> str:
@@ -142,6 +145,22 @@ def is_video_file(file_path: str) -> bool:
     return extension in video_extensions
 
 
+def thumbnail_positions(duration: float, count: int) -> List[float]:
+    """
+    Get the times at which timeline thumbnails are taken.
+    
+    Args:
+        duration: Video duration in seconds
+        count: Number of thumbnails
+        
+    Returns:
+        List of times in seconds, one per evenly sized timeline slot
+    """
+    if count <= 0 or duration <= 0:
+        return []
+    return [i * duration / count for i in range(count)]
+
+
 def cleanup_temp_files(*file_paths: str) -> None:
     """
     Clean up temporary files.
@@ -157,6 +176,39 @@ def cleanup_temp_files(*file_paths: str) -> None:
             print(f"Failed to cleanup {file_path}: {e}")
 
 
+def _applescript_string(text: str) -> str:
+    """Quote text as an AppleScript string literal."""
+    return '"' + text.replace('\\', '\\\\').replace('"', '\\"') + '"'
+
+
+def send_notification(title: str, message: str) -> bool:
+    """
+    Show a desktop notification, if the platform offers a way to.
+    
+    Uses osascript on macOS and notify-send on Linux; elsewhere nothing is shown.
+    
+    Args:
+        title: Notification title
+        message: Notification text
+        
+    Returns:
+        True if the notification was handed to the system
+    """
+    system = platform.system()
+    if system == "Darwin":
+        script = f"display notification {_applescript_string(message)} with title {_applescript_string(title)}"
+        cmd = ["osascript", "-e", script]
+    elif system == "Linux" and shutil.which("notify-send"):
+        cmd = ["notify-send", "--app-name=Trimmothy", title, message]
+    else:
+        return False
+    
+    try:
+        return subprocess.run(cmd, capture_output=True, timeout=5).returncode == 0
+    except (OSError, subprocess.SubprocessError):
+        return False
+
+
 def format_duration(seconds: float) -> str:
     """
     Format duration in a human-readable way.
@@ -6,22 +6,91 @@ providing better reliability and performance than MoviePy.
 """
 
 import subprocess
+import functools
 import json
+import re
 import shutil
 import sys
+import threading
+import time
+from collections import OrderedDict, deque
 from pathlib import Path
-from typing import Dict, Tuple, Optional, Callable
+from typing import Dict, List, Tuple, Optional, Callable
 import tempfile
 import os
 
+from trimmothy.governor import get_governor
+from trimmothy.memory import get_memory_governor
+from trimmothy.utils import cleanup_temp_files, thumbnail_positions
+
+
+PROBE_CACHE_FILE = "probe.json"
+# Containers that _try_box_trim can cut without FFmpeg
+BOX_TRIM_EXTENSIONS = ('.mp4', '.mov', '.m4v')
+# Encoders used to bring mismatched clips in line with a concat target
+CONCAT_VIDEO_ENCODERS = {'h264': 'libx264', 'hevc': 'libx265', 'mpeg4': 'mpeg4', 'vp9': 'libvpx-vp9',
+                         'prores': 'prores_ks'}
+CONCAT_AUDIO_ENCODERS = {'aac': 'aac', 'mp3': 'libmp3lame', 'opus': 'libopus', 'ac3': 'ac3',
+                         'pcm_s16le': 'pcm_s16le', 'pcm_s24le': 'pcm_s24le'}
+# FFprobe profile names -> encoder profile names
+X264_PROFILES = {'Constrained Baseline': 'baseline', 'Baseline': 'baseline', 'Main': 'main', 'High': 'high',
+                 'High 10': 'high10', 'High 4:2:2': 'high422', 'High 4:4:4 Predictive': 'high444'}
+X265_PROFILES = {'Main': 'main', 'Main 10': 'main10', 'Main 4:2:2 10': 'main422-10', 'Main 4:4:4': 'main444-8'}
+# Default rendition ladder for export_renditions: name, output height, x264 preset/CRF and peak bitrate
+DEFAULT_RENDITIONS = [
+    {'name': '1080p', 'height': 1080, 'preset': 'veryfast', 'crf': 23, 'maxrate': '6M'},
+    {'name': '720p', 'height': 720, 'preset': 'veryfast', 'crf': 23, 'maxrate': '3M'},
+    {'name': '480p', 'height': 480, 'preset': 'faster', 'crf': 24, 'maxrate': '1200k'},
+]
+# Strategies that only copy streams; their results are cheap to redo and aren't cached
+COPY_STRATEGIES = ('_try_box_trim', '_try_stream_copy', '_try_video_copy_audio_reencode')
+# Strategies that encode with another one's settings, named after it in export cache keys
+EQUIVALENT_STRATEGIES = {'_try_resumable_reencode': '_try_fast_reencode'}
+# FFmpeg version per binary path, looked up once for export telemetry
+_ffmpeg_versions: Dict[str, Optional[str]] = {}
+
+
+def _tee_escape(path: str) -> str:
+    """Escape a path for the output list of FFmpeg's tee muxer."""
+    return re.sub(r"([\\'|\[\]])", r"\\\1", path)
+
 
 class VideoProcessor:
     """Handles video processing operations using FFmpeg."""
     
-    def __init__(self):
+    # Maximum number of probe results kept in memory
+    INFO_CACHE_SIZE = 256
+    # Rough size of one probe result, and its relative cost per byte for the memory governor
+    INFO_ENTRY_BYTES = 8 * 1024
+    INFO_MEMORY_COST = 50.0
+    
+    # Re-encodes at least this long (seconds) are checkpointed so they can be resumed
+    RESUMABLE_MIN_DURATION = 600
+    
+    def __init__(self, background: bool = False):
+        """
+        Args:
+            background: Run spawned tools as deferrable background work, at low
+                priority and paused while the user interacts with the UI
+        """
         self.ffmpeg_path = self._find_ffmpeg()
         self.ffprobe_path = self._find_ffprobe()
         
+        # Probe results keyed by (path, size, mtime) so edited files are re-probed
+        self._info_cache = OrderedDict()
+        self._info_cache_lock = threading.Lock()
+        self.info_cache_hits = 0
+        self.info_cache_misses = 0
+        self.export_cache_hits = 0
+        self.export_cache_misses = 0
+        self._memory = get_memory_governor()
+        self._memory.register(self, "probe results (background)" if background else "probe results",
+                              self.INFO_MEMORY_COST)
+        
+        # All FFmpeg/FFprobe processes are launched through the resource governor
+        self.background = background
+        self.governor = get_governor()
+        
     def _find_ffmpeg(self) -> str:
         """Find FFmpeg executable path, preferring bundled version."""
         # First try to find bundled FFmpeg (for packaged app)
@@ -74,28 +143,140 @@ class VideoProcessor:
             project_root = Path(__file__).parent.parent.parent
             return str(project_root / "resources" / "bin" / "ffprobe")
     
-    def get_video_info(self, video_path: str) -> Dict:
+    def get_frame_index(self, video_path: str, build: bool = True):
+        """
+        Get the exact frame timestamp index for a video.
+        
+        Args:
+            video_path: Input video path
+            build: Scan the file if the index isn't cached yet
+            
+        Returns:
+            FrameIndex, or None if not cached and build is False
+        """
+        from trimmothy.frame_index import FrameIndex
+        
+        try:
+            return FrameIndex.for_video(self.ffprobe_path, video_path, build=build,
+                                        popen=functools.partial(self.governor.popen, background=self.background))
+        except OSError:
+            return None
+    
+    def _info_cache_key(self, video_path: str) -> Optional[Tuple]:
+        """Build the probe cache key for a file, or None if it can't be stat'ed."""
+        try:
+            stat = os.stat(video_path)
+        except OSError:
+            return None
+        return (os.path.abspath(video_path), stat.st_size, stat.st_mtime_ns)
+    
+    def get_video_info(self, video_path: str, persist: bool = False) -> Dict:
         """
         Get comprehensive video information using FFprobe.
         
+        Results are cached in memory and reused until the file changes. Results
+        saved in the on-disk cache (by a watch folder or an earlier session) are
+        used without running FFprobe.
+        
         Args:
             video_path: Path to the video file
+            persist: Also save the result in the on-disk cache
             
         Returns:
             Dictionary containing video information
         """
+        cache_key, cached = self._cached_info(video_path)
+        if cached is not None:
+            return cached
+        
+        info = self._load_persisted_info(video_path)
+        if info is None:
+            info = self._probe_video_info(video_path)
+            if persist:
+                self._persist_info(video_path, info)
+        
+        self._remember_info(cache_key, info)
+        return dict(info)
+    
+    def _cached_info(self, video_path: str) -> Tuple[Optional[Tuple], Optional[Dict]]:
+        """Look up a probe result in memory; returns (cache key, copy of the result or None)."""
+        cache_key = self._info_cache_key(video_path)
+        if cache_key is None:
+            return None, None
+        with self._info_cache_lock:
+            cached = self._info_cache.get(cache_key)
+            if cached is not None:
+                self._info_cache.move_to_end(cache_key)
+                self.info_cache_hits += 1
+                return cache_key, dict(cached)
+            self.info_cache_misses += 1
+        return cache_key, None
+    
+    def _remember_info(self, cache_key: Optional[Tuple], info: Dict) -> None:
+        """Keep a probe result in memory under a key from _cached_info."""
+        if cache_key is None:
+            return
+        with self._info_cache_lock:
+            self._info_cache[cache_key] = info
+            while len(self._info_cache) > self.INFO_CACHE_SIZE:
+                self._info_cache.popitem(last=False)
+        self._memory.touch(self)
+    
+    def memory_usage(self) -> int:
+        """Estimated bytes held by the in-memory probe cache."""
+        return len(self._info_cache) * self.INFO_ENTRY_BYTES
+    
+    def release_memory(self, nbytes: int) -> int:
+        """Drop the oldest probe results; called by the memory governor."""
+        with self._info_cache_lock:
+            count = min(len(self._info_cache), -(-nbytes // self.INFO_ENTRY_BYTES))
+            for _ in range(count):
+                self._info_cache.popitem(last=False)
+        return count * self.INFO_ENTRY_BYTES
+    
+    def _load_persisted_info(self, video_path: str) -> Optional[Dict]:
+        """Read a probe result from the on-disk cache, if present."""
+        from trimmothy.cache import load_json, source_cache_dir
+        
         try:
-            cmd = [
-                self.ffprobe_path,
-                '-v', 'quiet',
-                '-print_format', 'json',
-                '-show_format',
-                '-show_streams',
-                video_path
-            ]
-            
-            result = subprocess.run(cmd, capture_output=True, text=True, check=True)
-            data = json.loads(result.stdout)
+            directory = source_cache_dir(video_path, create=False)
+        except OSError:
+            return None
+        return load_json(directory / PROBE_CACHE_FILE) if directory.exists() else None
+    
+    def _persist_info(self, video_path: str, info: Dict) -> None:
+        """Save a probe result in the on-disk cache."""
+        from trimmothy.cache import source_cache_dir, store_json
+        
+        try:
+            store_json(source_cache_dir(video_path) / PROBE_CACHE_FILE, info)
+        except OSError as e:
+            print(f"Could not cache video info: {e}")
+    
+    def _probe_command(self, video_path: str) -> List[str]:
+        return [
+            self.ffprobe_path,
+            '-v', 'quiet',
+            '-print_format', 'json',
+            '-show_format',
+            '-show_streams',
+            video_path
+        ]
+    
+    def _probe_video_info(self, video_path: str) -> Dict:
+        """Run FFprobe and extract the video information dictionary."""
+        try:
+            result = self.governor.run(self._probe_command(video_path), self.background,
+                                       capture_output=True, text=True, check=True)
+            return self._parse_probe_output(result.stdout)
+        except subprocess.CalledProcessError as e:
+            raise RuntimeError(f"FFprobe failed: {e.stderr}")
+    
+    @staticmethod
+    def _parse_probe_output(output: str) -> Dict:
+        """Build the video information dictionary from FFprobe's JSON output."""
+        try:
+            data = json.loads(output)
             
             # Extract video stream info
             video_stream = None
@@ -130,8 +311,6 @@ class VideoProcessor:
                 'audio_stream': audio_stream
             }
             
-        except subprocess.CalledProcessError as e:
-            raise RuntimeError(f"FFprobe failed: {e.stderr}")
         except Exception as e:
             raise RuntimeError(f"Failed to get video info: {e}")
     
@@ -140,7 +319,11 @@ class VideoProcessor:
                    output_path: str, 
                    start_time: float, 
                    end_time: float,
-                   progress_callback: Optional[Callable[[float], None]] = None) -> bool:
+                   progress_callback: Optional[Callable[[float], None]] = None,
+                   time_budget: Optional[float] = None,
+                   cancel_event: Optional[threading.Event] = None,
+                   exact: bool = False,
+                   use_export_cache: bool = True) -> bool:
         """
         Trim video using FFmpeg with smart codec handling.
         
@@ -150,51 +333,216 @@ class VideoProcessor:
             start_time: Start time in seconds
             end_time: End time in seconds
             progress_callback: Optional callback for progress updates (0.0 to 1.0)
+            time_budget: Optional wall-clock budget in seconds. When a re-encode is
+                needed, x264 settings are chosen to finish within it.
+            cancel_event: Optional event that stops the export when set; a
+                resumable export keeps its finished segments so it can be resumed
+            exact: Skip the copy strategies, which start on the keyframe at or
+                before start_time, and re-encode from the exact frame
+            use_export_cache: Reuse and store identical re-encodes in the export
+                cache; turn off for sources that may have been rewritten in place
             
         Returns:
             True if successful, False otherwise
         """
+        from trimmothy.telemetry import ExportRecord, telemetry_enabled
+        
+        record = ExportRecord(input_path, output_path, start_time, end_time)
+        status, error = 'failed', None
         try:
+            started = time.monotonic()
+            
+            # Align the range to exact frame times when the source has been indexed,
+            # so variable-frame-rate exports start on the frame the preview showed
+            frame_index = self.get_frame_index(input_path, build=False)
+            if frame_index is not None:
+                start_time = frame_index.snap_time(start_time)
+                end_time = frame_index.snap_time(end_time) if end_time < frame_index.duration else end_time
+            
             duration = end_time - start_time
+            record.set_range(start_time, duration)
             
             # Get video info to determine best approach
             video_info = self.get_video_info(input_path)
+            record.set_source(video_info)
             
             # Try different encoding strategies in order of speed
-            strategies = [
+            strategies = [] if exact else [
+                self._try_box_trim,
                 self._try_stream_copy,
                 self._try_video_copy_audio_reencode,
-                self._try_fast_reencode,
-                self._try_compatible_reencode
             ]
+            if time_budget:
+                deadline = started + time_budget
+                strategies.append(functools.partial(self._try_deadline_reencode, deadline=deadline,
+                                                    cancel_event=cancel_event))
+            else:
+                if duration >= self.RESUMABLE_MIN_DURATION:
+                    strategies.append(functools.partial(self._try_resumable_reencode, cancel_event=cancel_event))
+                strategies += [
+                    functools.partial(self._try_fast_reencode, cancel_event=cancel_event),
+                    functools.partial(self._try_compatible_reencode, cancel_event=cancel_event)
+                ]
             
-            for strategy in strategies:
+            names = [getattr(strategy, 'func', strategy).__name__ for strategy in strategies]
+            cache_key = self._export_cache_key(input_path, output_path, start_time, duration,
+                                               names, {'exact': exact, 'time_budget': time_budget}) \
+                if use_export_cache else None
+            if cache_key and self._reuse_cached_export(cache_key, output_path, record):
+                if progress_callback:
+                    progress_callback(1.0)
+                status = 'ok'
+                return True
+            
+            # A hardlinked output shares its data with the export cache; don't overwrite it in place
+            if os.path.exists(output_path) and os.stat(output_path).st_nlink > 1:
+                os.unlink(output_path)
+            
+            for attempt, (strategy, name) in enumerate(zip(strategies, names)):
+                if cancel_event is not None and cancel_event.is_set():
+                    status = 'cancelled'
+                    # Remove what a stopped strategy left behind
+                    if attempt and Path(output_path).exists():
+                        Path(output_path).unlink()
+                    return False
+                attempt_started = time.monotonic()
                 try:
                     if progress_callback:
                         progress_callback(0.1)
                     
                     success = strategy(input_path, output_path, start_time, duration, video_info, progress_callback)
+                    record.attempt(name, time.monotonic() - attempt_started, 'ok' if success else 'declined')
                     if success:
+                        if cache_key and name not in COPY_STRATEGIES:
+                            self._store_cached_export(cache_key, output_path, name)
                         if progress_callback:
                             progress_callback(1.0)
+                        status = 'ok'
                         return True
                 except Exception as e:
-                    print(f"Strategy {strategy.__name__} failed: {e}")
+                    record.attempt(name, time.monotonic() - attempt_started, 'error', str(e))
+                    print(f"Strategy {name} failed: {e}")
                     # Clean up partial file
                     if Path(output_path).exists():
                         Path(output_path).unlink()
                     continue
             
+            if cancel_event is not None and cancel_event.is_set():
+                status = 'cancelled'
+                if Path(output_path).exists():
+                    Path(output_path).unlink()
             return False
             
         except Exception as e:
+            error = str(e)
             print(f"Trim video failed: {e}")
             return False
+        finally:
+            if telemetry_enabled():
+                self._record_export(record, status, error)
     
-    def _try_stream_copy(self, input_path: str, output_path: str, start_time: float, 
-                        duration: float, video_info: Dict, progress_callback: Optional[Callable] = None) -> bool:
-        """Try full stream copy (fastest)."""
-        cmd = [
+    def _export_cache_key(self, input_path: str, output_path: str, start_time: float, duration: float,
+                          strategies: List[str], settings: Dict) -> Optional[str]:
+        """Key of an export in the export cache, or None if the cache is disabled or unusable."""
+        from trimmothy.export_cache import ExportCache, export_cache_enabled
+        
+        if not export_cache_enabled():
+            return None
+        # Resumable exports only exist in trim_video, so both APIs must reduce to the same names
+        strategies = list(dict.fromkeys(EQUIVALENT_STRATEGIES.get(name, name) for name in strategies))
+        settings = dict(settings, ffmpeg=self.get_ffmpeg_version())
+        try:
+            return ExportCache.make_key(input_path, start_time, duration, Path(output_path).suffix,
+                                        strategies, settings)
+        except OSError as e:
+            print(f"Export cache lookup failed: {e}")
+            return None
+    
+    def _reuse_cached_export(self, key: str, output_path: str, record) -> bool:
+        """Materialize a previously encoded identical export. Returns True on a cache hit."""
+        from trimmothy.export_cache import ExportCache
+        
+        started = time.monotonic()
+        try:
+            method = ExportCache().materialize(key, output_path)
+        except OSError as e:
+            print(f"Export cache lookup failed: {e}")
+            return False
+        if method is None:
+            self.export_cache_misses += 1
+            return False
+        
+        self.export_cache_hits += 1
+        print(f"Reused cached export ({method}): {output_path}")
+        record.attempt('export_cache', time.monotonic() - started, 'ok')
+        return True
+    
+    def _store_cached_export(self, key: str, output_path: str, strategy: str) -> None:
+        """Keep a finished re-encode in the export cache; cache problems never fail the export."""
+        from trimmothy.export_cache import ExportCache
+        
+        try:
+            ExportCache().store(key, output_path, {'strategy': strategy.removeprefix('_try_')})
+        except OSError as e:
+            print(f"Export cache store failed: {e}")
+    
+    def _record_export(self, record, status: str, error: Optional[str]) -> None:
+        """Append an export's telemetry record; telemetry problems never fail the export."""
+        from trimmothy.telemetry import append_record
+        
+        try:
+            data = record.finish(status, error)
+            data['ffmpeg_version'] = self.get_ffmpeg_version()
+            data['background'] = self.background
+            append_record(data)
+        except Exception as e:
+            print(f"Export telemetry failed: {e}")
+    
+    def get_ffmpeg_version(self) -> Optional[str]:
+        """
+        Get the version string of the FFmpeg binary in use.
+        
+        Returns:
+            Version such as "6.1.1", or None if it can't be determined
+        """
+        if self.ffmpeg_path not in _ffmpeg_versions:
+            version = None
+            try:
+                result = self.governor.run([self.ffmpeg_path, '-version'], self.background,
+                                           capture_output=True, text=True)
+                words = result.stdout.split()
+                if len(words) >= 3 and words[1] == 'version':
+                    version = words[2]
+            except (OSError, subprocess.SubprocessError):
+                pass
+            _ffmpeg_versions[self.ffmpeg_path] = version
+        return _ffmpeg_versions[self.ffmpeg_path]
+    
+    def _try_box_trim(self, input_path: str, output_path: str, start_time: float,
+                      duration: float, video_info: Dict, progress_callback: Optional[Callable] = None) -> bool:
+        """Try rewriting MP4/MOV sample tables directly, without FFmpeg (fastest)."""
+        in_ext, out_ext = Path(input_path).suffix.lower(), Path(output_path).suffix.lower()
+        if in_ext not in BOX_TRIM_EXTENSIONS or out_ext not in BOX_TRIM_EXTENSIONS:
+            return False
+        if (in_ext == '.mov') != (out_ext == '.mov'):
+            return False  # Keep FFmpeg for MP4 <-> QuickTime brand changes
+        
+        from trimmothy.mp4trim import UnsupportedMp4, trim_mp4
+        
+        def on_copy_progress(fraction):
+            if progress_callback:
+                progress_callback(0.1 + 0.85 * fraction)
+        
+        try:
+            trim_mp4(input_path, output_path, start_time, start_time + duration, on_copy_progress)
+        except UnsupportedMp4 as e:
+            print(f"Box-level trim not possible: {e}")
+            return False
+        return True
+    
+    def _stream_copy_command(self, input_path: str, output_path: str, start_time: float,
+                             duration: float) -> List[str]:
+        return [
             self.ffmpeg_path,
             '-y',  # Overwrite output
             '-ss', str(start_time),
@@ -204,14 +552,17 @@ class VideoProcessor:
             '-avoid_negative_ts', 'make_zero',
             output_path
         ]
-        
-        result = subprocess.run(cmd, capture_output=True, text=True)
+    
+    def _try_stream_copy(self, input_path: str, output_path: str, start_time: float,
+                         duration: float, video_info: Dict, progress_callback: Optional[Callable] = None) -> bool:
+        """Try full stream copy (fastest)."""
+        cmd = self._stream_copy_command(input_path, output_path, start_time, duration)
+        result = self.governor.run(cmd, self.background, capture_output=True, text=True)
         return result.returncode == 0
     
-    def _try_video_copy_audio_reencode(self, input_path: str, output_path: str, start_time: float,
-                                     duration: float, video_info: Dict, progress_callback: Optional[Callable] = None) -> bool:
-        """Try video copy with audio re-encode."""
-        cmd = [
+    def _video_copy_audio_reencode_command(self, input_path: str, output_path: str, start_time: float,
+                                           duration: float) -> List[str]:
+        return [
             self.ffmpeg_path,
             '-y',
             '-ss', str(start_time),
@@ -223,14 +574,17 @@ class VideoProcessor:
             '-avoid_negative_ts', 'make_zero',
             output_path
         ]
-        
-        result = subprocess.run(cmd, capture_output=True, text=True)
+    
+    def _try_video_copy_audio_reencode(self, input_path: str, output_path: str, start_time: float,
+                                       duration: float, video_info: Dict, progress_callback: Optional[Callable] = None) -> bool:
+        """Try video copy with audio re-encode."""
+        cmd = self._video_copy_audio_reencode_command(input_path, output_path, start_time, duration)
+        result = self.governor.run(cmd, self.background, capture_output=True, text=True)
         return result.returncode == 0
     
-    def _try_fast_reencode(self, input_path: str, output_path: str, start_time: float,
-                          duration: float, video_info: Dict, progress_callback: Optional[Callable] = None) -> bool:
-        """Try fast re-encoding."""
-        cmd = [
+    def _fast_reencode_command(self, input_path: str, output_path: str, start_time: float,
+                               duration: float) -> List[str]:
+        return [
             self.ffmpeg_path,
             '-y',
             '-ss', str(start_time),
@@ -243,14 +597,18 @@ class VideoProcessor:
             '-b:a', '128k',
             output_path
         ]
-        
-        result = subprocess.run(cmd, capture_output=True, text=True)
-        return result.returncode == 0
     
-    def _try_compatible_reencode(self, input_path: str, output_path: str, start_time: float,
-                                duration: float, video_info: Dict, progress_callback: Optional[Callable] = None) -> bool:
-        """Try maximum compatibility re-encoding."""
-        cmd = [
+    def _try_fast_reencode(self, input_path: str, output_path: str, start_time: float,
+                           duration: float, video_info: Dict, progress_callback: Optional[Callable] = None,
+                           cancel_event: Optional[threading.Event] = None) -> bool:
+        """Try fast re-encoding; stops FFmpeg when cancel_event is set."""
+        cmd = self._fast_reencode_command(input_path, output_path, start_time, duration)
+        success, _ = self.run_ffmpeg(cmd, duration, cancel_event=cancel_event)
+        return success
+    
+    def _compatible_reencode_command(self, input_path: str, output_path: str, start_time: float,
+                                     duration: float) -> List[str]:
+        return [
             self.ffmpeg_path,
             '-y',
             '-ss', str(start_time),
@@ -264,9 +622,545 @@ class VideoProcessor:
             '-movflags', '+faststart',
             output_path
         ]
+    
+    def _try_compatible_reencode(self, input_path: str, output_path: str, start_time: float,
+                                 duration: float, video_info: Dict, progress_callback: Optional[Callable] = None,
+                                 cancel_event: Optional[threading.Event] = None) -> bool:
+        """Try maximum compatibility re-encoding; stops FFmpeg when cancel_event is set."""
+        cmd = self._compatible_reencode_command(input_path, output_path, start_time, duration)
+        success, _ = self.run_ffmpeg(cmd, duration, cancel_event=cancel_event)
+        return success
+    
+    def _try_deadline_reencode(self, input_path: str, output_path: str, start_time: float,
+                               duration: float, video_info: Dict, progress_callback: Optional[Callable] = None,
+                               deadline: Optional[float] = None,
+                               cancel_event: Optional[threading.Event] = None) -> bool:
+        """Try re-encoding with x264 settings picked to finish before the deadline."""
+        from trimmothy.deadline import DeadlineEncoder
         
-        result = subprocess.run(cmd, capture_output=True, text=True)
-        return result.returncode == 0
+        encoder = DeadlineEncoder(self)
+        return encoder.encode(input_path, output_path, start_time, duration, video_info,
+                              deadline, progress_callback, cancel_event)
+    
+    def _try_resumable_reencode(self, input_path: str, output_path: str, start_time: float,
+                                duration: float, video_info: Dict, progress_callback: Optional[Callable] = None,
+                                cancel_event: Optional[threading.Event] = None) -> bool:
+        """Try fast re-encoding in checkpointed segments that survive crashes and cancels."""
+        from trimmothy.resumable import ResumableExport
+        
+        export = ResumableExport(self, input_path, output_path, start_time, start_time + duration)
+        success = False
+        try:
+            success = export.run(progress_callback, cancel_event)
+            return success
+        finally:
+            # Only a cancelled export is worth resuming; after a failure the next
+            # strategy writes the output, and its checkpoints would be offered again
+            if not success and not (cancel_event is not None and cancel_event.is_set()):
+                export.discard()
+    
+    def run_ffmpeg(self, cmd: List[str], media_duration: Optional[float] = None,
+                   progress_callback: Optional[Callable[[float, float], None]] = None,
+                   cancel_event: Optional[threading.Event] = None) -> Tuple[bool, float]:
+        """
+        Run an FFmpeg command while following its progress output.
+        
+        Args:
+            cmd: Full FFmpeg command, starting with the executable path
+            media_duration: Length of the media being produced, for progress fractions
+            progress_callback: Optional callback receiving (fraction done, media seconds
+                produced per wall-clock second)
+            cancel_event: Optional event that stops FFmpeg when set
+            
+        Returns:
+            Tuple of (success, elapsed wall-clock seconds)
+        """
+        cmd = [cmd[0], '-progress', 'pipe:1', '-nostats'] + list(cmd[1:])
+        started = time.monotonic()
+        
+        process = self.governor.popen(cmd, self.background, stdout=subprocess.PIPE,
+                                      stderr=subprocess.PIPE, text=True)
+        
+        # Drain stderr so FFmpeg never blocks on a full pipe; keep the tail for errors
+        stderr_tail = deque(maxlen=20)
+        drain = threading.Thread(target=lambda: stderr_tail.extend(process.stderr), daemon=True)
+        drain.start()
+        
+        # Watch for cancel on its own thread: a paused background FFmpeg prints nothing
+        cancelled = threading.Event()
+        if cancel_event is not None:
+            def watch_cancel():
+                while process.poll() is None:
+                    if cancel_event.wait(0.1):
+                        cancelled.set()
+                        self.governor.terminate(process)
+                        return
+            threading.Thread(target=watch_cancel, daemon=True, name="trimmothy-ffmpeg-cancel").start()
+        
+        for line in process.stdout:
+            key, _, value = line.strip().partition('=')
+            if key == 'out_time_us' and value.isdigit() and progress_callback:
+                produced = int(value) / 1_000_000
+                elapsed = time.monotonic() - started
+                fraction = min(1.0, produced / media_duration) if media_duration else 0.0
+                progress_callback(fraction, produced / elapsed if elapsed > 0 else 0.0)
+        
+        process.wait()
+        drain.join(timeout=1.0)
+        elapsed = time.monotonic() - started
+        
+        if process.returncode != 0 and not cancelled.is_set():
+            print(f"FFmpeg exited with {process.returncode}: {''.join(stderr_tail).strip()[-500:]}")
+        return process.returncode == 0, elapsed
+    
+    def concat_segments(self, segment_paths: List[str], output_path: str,
+                        audio_path: Optional[str] = None) -> bool:
+        """
+        Join segments that share codec parameters into one file without re-encoding.
+        
+        Args:
+            segment_paths: Segment files in playback order
+            output_path: Output video file path
+            audio_path: Optional separate audio track to mux in
+            
+        Returns:
+            True if successful
+        """
+        list_fd, list_path = tempfile.mkstemp(prefix="trimmothy_concat_", suffix=".txt")
+        try:
+            with os.fdopen(list_fd, 'w') as list_file:
+                for segment_path in segment_paths:
+                    escaped = os.path.abspath(segment_path).replace("'", "'\\''")
+                    list_file.write(f"file '{escaped}'\n")
+            
+            cmd = [
+                self.ffmpeg_path,
+                '-y',
+                '-f', 'concat',
+                '-safe', '0',
+                '-i', list_path
+            ]
+            if audio_path:
+                cmd += ['-i', audio_path, '-map', '0:v', '-map', '1:a']
+            cmd += ['-c', 'copy']
+            if Path(output_path).suffix.lower() in ('.mp4', '.mov', '.m4v'):
+                cmd += ['-movflags', '+faststart']
+            cmd.append(output_path)
+            
+            result = self.governor.run(cmd, self.background, capture_output=True, text=True)
+            return result.returncode == 0
+            
+        finally:
+            cleanup_temp_files(list_path)
+    
+    @staticmethod
+    def concat_signature(video_info: Dict) -> Dict:
+        """
+        Codec parameters that must be identical for clips to be joined by stream copy.
+        
+        Args:
+            video_info: Result of get_video_info()
+            
+        Returns:
+            Dictionary of video codec, profile, level, resolution, frame rate,
+            pixel format, sample aspect ratio, time base and audio codec/rate/layout
+        """
+        video = video_info['video_stream']
+        audio = video_info.get('audio_stream')
+        return {
+            'video_codec': video.get('codec_name'),
+            'profile': video.get('profile'),
+            # Level differences are harmless for HEVC decoders but not for H.264 in MP4
+            'level': video.get('level') if video.get('codec_name') == 'h264' else None,
+            'width': int(video['width']),
+            'height': int(video['height']),
+            'fps': video.get('r_frame_rate'),
+            'pix_fmt': video.get('pix_fmt'),
+            'sar': video.get('sample_aspect_ratio') or '1:1',
+            'time_base': video.get('time_base'),
+            'audio_codec': audio.get('codec_name') if audio else None,
+            'sample_rate': int(audio['sample_rate']) if audio and audio.get('sample_rate') else None,
+            'channels': audio.get('channels') if audio else None,
+            'channel_layout': audio.get('channel_layout') if audio else None,
+        }
+    
+    @staticmethod
+    def _concat_mismatches(signature: Dict, target: Dict) -> Tuple[List[str], List[str]]:
+        """List why a clip can't be stream-copied into the target, split into video and audio reasons."""
+        video, audio = [], []
+        for key, label in (('video_codec', 'codec'), ('profile', 'profile'), ('level', 'level'),
+                           ('pix_fmt', 'pixel format'), ('fps', 'frame rate'), ('sar', 'sample aspect ratio')):
+            if signature[key] != target[key]:
+                video.append(f"{label} {signature[key]} != {target[key]}")
+        if (signature['width'], signature['height']) != (target['width'], target['height']):
+            video.append(f"resolution {signature['width']}x{signature['height']} != {target['width']}x{target['height']}")
+        
+        if target['audio_codec'] is None:
+            if signature['audio_codec'] is not None:
+                audio.append("audio track not in target")
+        elif signature['audio_codec'] is None:
+            audio.append("no audio track")
+        else:
+            for key, label in (('audio_codec', 'audio codec'), ('sample_rate', 'sample rate'),
+                               ('channel_layout', 'channel layout'), ('channels', 'channels')):
+                if signature[key] != target[key]:
+                    audio.append(f"{label} {signature[key]} != {target[key]}")
+        return video, audio
+    
+    def concat_clips(self, clips: List[Tuple[str, float, float]], output_path: str,
+                     target: Optional[Dict] = None,
+                     progress_callback: Optional[Callable[[float], None]] = None,
+                     max_workers: Optional[int] = None,
+                     cancel_event: Optional[threading.Event] = None,
+                     exact: bool = False) -> Dict:
+        """
+        Join ranges of several sources into one file, re-encoding only the clips that need it.
+        
+        Every clip is probed and compared with the target's codec parameters
+        (codec, profile, resolution, frame rate, pixel format, audio layout).
+        Matching clips are stream-copied; a clip whose audio differs keeps its
+        video stream and only has its audio converted; the rest are re-encoded
+        to the target. Clips are prepared in parallel and then joined with the
+        concat demuxer. Stream-copied clips start on the keyframe at or before
+        their start time, like _try_stream_copy; with `exact`, clips that don't
+        start on a keyframe are re-encoded instead.
+        
+        Args:
+            clips: (input path, start seconds, end seconds) in playback order
+            output_path: Output video file path
+            target: Signature to normalize to (see concat_signature); defaults to
+                that of the clips making up most of the total duration
+            progress_callback: Optional callback for progress updates (0.0 to 1.0)
+            max_workers: Number of clips prepared at once
+            cancel_event: Optional event that stops the export when set
+            exact: Re-encode matching clips whose start isn't on a keyframe
+            
+        Returns:
+            Report dictionary: success, target, elapsed seconds, counts of copied
+            and re-encoded clips, and per clip its action ("copy", "audio" or
+            "reencode"), the reasons, the time it took and, for clips that keep
+            their video stream, the keyframe time they actually start at
+        """
+        from concurrent.futures import ThreadPoolExecutor
+        
+        started = time.monotonic()
+        report = {'success': False, 'output_path': output_path, 'target': None, 'clips': [],
+                  'copied': 0, 'reencoded': 0, 'elapsed': 0.0}
+        if not clips:
+            report['error'] = "No clips to join"
+            return report
+        
+        workers = max_workers or min(4, os.cpu_count() or 2)
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="trimmothy-concat") as executor:
+            infos = list(executor.map(lambda clip: self.get_video_info(clip[0]), clips))
+        signatures = [self.concat_signature(info) for info in infos]
+        
+        if target is None:
+            # The parameters covering the most footage win, so the least gets re-encoded
+            weights = {}
+            for signature, (_, start, end) in zip(signatures, clips):
+                key = json.dumps(signature, sort_keys=True)
+                weights[key] = weights.get(key, 0) + (end - start)
+            target = json.loads(max(weights, key=weights.get))
+            if target['video_codec'] not in CONCAT_VIDEO_ENCODERS:
+                target.update(video_codec='h264', profile='High', level=None, pix_fmt='yuv420p')
+            if target['audio_codec'] is not None and target['audio_codec'] not in CONCAT_AUDIO_ENCODERS:
+                target['audio_codec'] = 'aac'
+        report['target'] = target
+        
+        total = sum(end - start for _, start, end in clips) or 1.0
+        done = [0.0] * len(clips)
+        progress_lock = threading.Lock()
+        
+        def clip_progress(i, fraction):
+            with progress_lock:
+                done[i] = fraction * (clips[i][2] - clips[i][1])
+                if progress_callback:
+                    progress_callback(min(0.95, 0.95 * sum(done) / total))
+        
+        extension = Path(output_path).suffix or '.mp4'
+        work_dir = tempfile.mkdtemp(prefix="trimmothy_concat_")
+        try:
+            mismatches = [self._concat_mismatches(signature, target) for signature in signatures]
+            
+            # Where copied video really starts: the keyframe at or before the requested start
+            copy_starts = {}
+            copyable = [i for i, (video_reasons, _) in enumerate(mismatches) if not video_reasons]
+            with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="trimmothy-concat") as executor:
+                for i, keyframes in zip(copyable, executor.map(lambda i: self.get_keyframe_times(clips[i][0]), copyable)):
+                    start = clips[i][1]
+                    copy_starts[i] = max((time_pos for time_pos in keyframes if time_pos <= start + 0.001), default=0.0)
+            
+            plans = []
+            for i, ((path, start, end), (video_reasons, audio_reasons)) in enumerate(zip(clips, mismatches)):
+                if exact and not video_reasons and start - copy_starts.get(i, start) > 0.001:
+                    video_reasons = video_reasons + [f"start {start:.3f}s is not a keyframe (previous at {copy_starts[i]:.3f}s)"]
+                action = 'reencode' if video_reasons else 'audio' if audio_reasons else 'copy'
+                plans.append({'path': path, 'start': start, 'end': end, 'action': action,
+                              'reasons': video_reasons + audio_reasons,
+                              'copy_start': copy_starts.get(i) if action != 'reencode' else None,
+                              'segment': os.path.join(work_dir, f"clip_{i:04d}{extension}")})
+            
+            def prepare(i):
+                plan = plans[i]
+                clip_started = time.monotonic()
+                if cancel_event is not None and cancel_event.is_set():
+                    return False
+                cmd = self._concat_clip_command(plan, infos[i], target, extension)
+                success, _ = self.run_ffmpeg(cmd, plan['end'] - plan['start'],
+                                             lambda fraction, speed: clip_progress(i, fraction), cancel_event)
+                plan['seconds'] = round(time.monotonic() - clip_started, 3)
+                return success
+            
+            with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="trimmothy-concat") as executor:
+                results = list(executor.map(prepare, range(len(plans))))
+            
+            for plan, success in zip(plans, results):
+                report['clips'].append({key: plan.get(key) for key in ('path', 'start', 'end', 'action', 'reasons',
+                                                                       'copy_start', 'seconds')})
+                if plan['action'] == 'copy':
+                    report['copied'] += 1
+                else:
+                    report['reencoded'] += 1
+                if not success:
+                    report['error'] = f"Preparing {os.path.basename(plan['path'])} failed"
+            
+            if all(results) and not (cancel_event is not None and cancel_event.is_set()):
+                report['success'] = self.concat_segments([plan['segment'] for plan in plans], output_path)
+                if not report['success']:
+                    report['error'] = "Joining the clips failed"
+            if progress_callback and report['success']:
+                progress_callback(1.0)
+        except Exception as e:
+            report['error'] = str(e)
+            print(f"Concat export failed: {e}")
+        finally:
+            shutil.rmtree(work_dir, ignore_errors=True)
+        
+        report['elapsed'] = round(time.monotonic() - started, 3)
+        return report
+    
+    def _concat_clip_command(self, plan: Dict, video_info: Dict, target: Dict, extension: str) -> List[str]:
+        """Build the FFmpeg command that writes one clip as a concat segment."""
+        duration = plan['end'] - plan['start']
+        cmd = [self.ffmpeg_path, '-y', '-ss', str(plan['start']), '-i', plan['path']]
+        needs_silence = plan['action'] != 'copy' and target['audio_codec'] and video_info.get('audio_stream') is None
+        if needs_silence:
+            layout = target['channel_layout'] or ('stereo' if (target['channels'] or 2) > 1 else 'mono')
+            cmd += ['-f', 'lavfi', '-i', f"anullsrc=r={target['sample_rate'] or 48000}:cl={layout}"]
+        cmd += ['-t', str(duration), '-map', '0:v:0']
+        if target['audio_codec']:
+            cmd += ['-map', '1:a:0' if needs_silence else '0:a:0?']
+        
+        if plan['action'] == 'reencode':
+            encoder = CONCAT_VIDEO_ENCODERS[target['video_codec']]
+            num, _, den = (target['fps'] or '30/1').partition('/')
+            filters = [
+                f"scale={target['width']}:{target['height']}:force_original_aspect_ratio=decrease",
+                f"pad={target['width']}:{target['height']}:(ow-iw)/2:(oh-ih)/2",
+                f"setsar={target['sar'].replace(':', '/')}",
+                f"fps={num}/{den or 1}",
+            ]
+            if target['pix_fmt']:
+                filters.append(f"format={target['pix_fmt']}")
+            cmd += ['-vf', ','.join(filters), '-c:v', encoder]
+            if encoder == 'libx264':
+                cmd += ['-preset', 'veryfast', '-crf', '18']
+                if target['profile'] in X264_PROFILES:
+                    cmd += ['-profile:v', X264_PROFILES[target['profile']]]
+                if target['level']:
+                    cmd += ['-level:v', str(target['level'] / 10)]
+            elif encoder == 'libx265':
+                cmd += ['-preset', 'fast', '-crf', '20']
+                if target['profile'] in X265_PROFILES:
+                    cmd += ['-profile:v', X265_PROFILES[target['profile']]]
+                if extension.lower() in ('.mp4', '.mov', '.m4v'):
+                    cmd += ['-tag:v', 'hvc1']
+        else:
+            cmd += ['-c:v', 'copy', '-avoid_negative_ts', 'make_zero']
+        
+        if target['audio_codec']:
+            if plan['action'] == 'copy':
+                cmd += ['-c:a', 'copy']
+            else:
+                cmd += ['-c:a', CONCAT_AUDIO_ENCODERS.get(target['audio_codec'], 'aac')]
+                if target['sample_rate']:
+                    cmd += ['-ar', str(target['sample_rate'])]
+                if target['channels']:
+                    cmd += ['-ac', str(target['channels'])]
+        else:
+            cmd += ['-an']
+        
+        # Matching timescales keep the joined timestamps exact
+        if extension.lower() in ('.mp4', '.mov', '.m4v') and plan['action'] == 'reencode' and target.get('time_base'):
+            cmd += ['-video_track_timescale', target['time_base'].partition('/')[2]]
+        cmd.append(plan['segment'])
+        return cmd
+    
+    def export_renditions(self, input_path: str, output_path: str, start_time: float, end_time: float,
+                          renditions: Optional[List[Dict]] = None,
+                          progress_callback: Optional[Callable[[float], None]] = None,
+                          cancel_event: Optional[threading.Event] = None,
+                          compare: bool = False) -> Dict:
+        """
+        Export a range at several resolutions from a single decode.
+        
+        One FFmpeg process decodes the range once, splits the frames in its
+        filter graph into one scaler and x264 encoder per rendition, encodes the
+        audio once and writes the shared audio into every output through the
+        tee muxer. Renditions are never scaled above the source height. Outputs
+        are named after output_path with the rendition name appended
+        (clip.mp4 -> clip_720p.mp4) and appear only once all of them are done.
+        
+        Args:
+            input_path: Input video file path
+            output_path: Base output path; its extension picks the container
+            start_time: Start time in seconds
+            end_time: End time in seconds
+            renditions: Dictionaries with name, height and optionally preset, crf and
+                maxrate (peak video bitrate); defaults to DEFAULT_RENDITIONS
+            progress_callback: Optional callback for progress updates (0.0 to 1.0)
+            cancel_event: Optional event that stops the export when set
+            compare: Afterwards, also encode every rendition on its own (decoding the
+                range again each time) and report how long that took
+            
+        Returns:
+            Report dictionary: success, elapsed seconds of the shared encode and per
+            rendition its path, width, height, size in bytes and average bitrate;
+            with `compare`, also each rendition's separate_seconds and
+            separate_bytes and the total separate_elapsed
+        """
+        started = time.monotonic()
+        renditions = [dict(rendition) for rendition in (renditions or DEFAULT_RENDITIONS)]
+        report = {'success': False, 'input_path': input_path, 'renditions': [], 'decode_passes': 1,
+                  'elapsed': 0.0, 'separate_elapsed': None}
+        if not renditions:
+            report['error'] = "No renditions requested"
+            return report
+        
+        frame_index = self.get_frame_index(input_path, build=False)
+        if frame_index is not None:
+            start_time = frame_index.snap_time(start_time)
+            end_time = frame_index.snap_time(end_time) if end_time < frame_index.duration else end_time
+        duration = end_time - start_time
+        
+        base, extension = os.path.splitext(output_path)
+        extension = extension or '.mp4'
+        output_dir = os.path.dirname(os.path.abspath(output_path))
+        work_dir = tempfile.mkdtemp(prefix=".trimmothy_renditions_", dir=output_dir)
+        try:
+            video_info = self.get_video_info(input_path)
+            for i, rendition in enumerate(renditions):
+                rendition['height'] = min(int(rendition['height']), video_info['height'])
+                rendition['path'] = f"{base}_{rendition['name']}{extension}"
+                rendition['work_path'] = os.path.join(work_dir, f"rendition_{i}{extension}")
+            
+            cmd = self._rendition_command(input_path, renditions, start_time, duration,
+                                          video_info['audio_codec'] is not None)
+            success, _ = self.run_ffmpeg(
+                cmd, duration,
+                lambda fraction, speed: progress_callback(0.95 * fraction) if progress_callback else None,
+                cancel_event
+            )
+            report['elapsed'] = round(time.monotonic() - started, 3)
+            if not success:
+                report['error'] = "Cancelled" if cancel_event is not None and cancel_event.is_set() \
+                    else "FFmpeg rendition encode failed"
+                return report
+            
+            for rendition in renditions:
+                os.replace(rendition['work_path'], rendition['path'])
+                info = self._probe_video_info(rendition['path'])
+                size = os.path.getsize(rendition['path'])
+                report['renditions'].append({
+                    'name': rendition['name'],
+                    'path': rendition['path'],
+                    'width': info['width'],
+                    'height': info['height'],
+                    'bytes': size,
+                    'kbps': round(size * 8 / 1000 / duration, 1) if duration > 0 else None,
+                })
+            report['success'] = True
+            
+            if compare:
+                separate_started = time.monotonic()
+                for rendition, entry in zip(renditions, report['renditions']):
+                    if cancel_event is not None and cancel_event.is_set():
+                        break
+                    rendition_started = time.monotonic()
+                    cmd = self._rendition_command(input_path, [rendition], start_time, duration,
+                                                  video_info['audio_codec'] is not None)
+                    separate_ok, _ = self.run_ffmpeg(cmd, duration, cancel_event=cancel_event)
+                    entry['separate_seconds'] = round(time.monotonic() - rendition_started, 3)
+                    entry['separate_bytes'] = os.path.getsize(rendition['work_path']) if separate_ok else None
+                report['separate_elapsed'] = round(time.monotonic() - separate_started, 3)
+            
+            if progress_callback:
+                progress_callback(1.0)
+        except Exception as e:
+            report['error'] = str(e)
+            print(f"Rendition export failed: {e}")
+        finally:
+            shutil.rmtree(work_dir, ignore_errors=True)
+        
+        return report
+    
+    def _rendition_command(self, input_path: str, renditions: List[Dict], start_time: float,
+                           duration: float, has_audio: bool) -> List[str]:
+        """Build the FFmpeg command that writes every rendition's work_path from one decode."""
+        count = len(renditions)
+        graph = f"[0:v:0]split={count}" + "".join(f"[s{i}]" for i in range(count))
+        for i, rendition in enumerate(renditions):
+            graph += f";[s{i}]scale=-2:{rendition['height']}[v{i}]"
+        
+        cmd = [
+            self.ffmpeg_path,
+            '-y',
+            '-ss', str(start_time),
+            '-i', input_path,
+            '-t', str(duration),
+            '-filter_complex', graph,
+        ]
+        for i in range(count):
+            cmd += ['-map', f'[v{i}]']
+        if has_audio:
+            cmd += ['-map', '0:a:0']
+        for i, rendition in enumerate(renditions):
+            cmd += [
+                f'-c:v:{i}', 'libx264',
+                f'-preset:v:{i}', rendition.get('preset', 'veryfast'),
+                f'-crf:v:{i}', str(rendition.get('crf', 23)),
+                f'-pix_fmt:v:{i}', 'yuv420p',
+            ]
+            if rendition.get('maxrate'):
+                maxrate = str(rendition['maxrate'])
+                bufsize = f"{float(maxrate[:-1]) * 2:g}{maxrate[-1]}" if maxrate[-1] in 'kKmM' else str(int(maxrate) * 2)
+                cmd += [f'-maxrate:v:{i}', maxrate, f'-bufsize:v:{i}', bufsize]
+        if has_audio:
+            cmd += ['-c:a', 'aac', '-b:a', '128k']
+        
+        # The tee muxer writes the one audio encode into every output; global
+        # headers because each output's muxer can't ask the encoders itself
+        slaves = []
+        for i, rendition in enumerate(renditions):
+            options = f"select='v\\:{i}{',a' if has_audio else ''}'"
+            if Path(rendition['work_path']).suffix.lower() in BOX_TRIM_EXTENSIONS:
+                options += ":movflags=+faststart"
+            slaves.append(f"[{options}]{_tee_escape(rendition['work_path'])}")
+        cmd += ['-flags', '+global_header', '-f', 'tee', '|'.join(slaves)]
+        return cmd
+    
+    def _frame_command(self, video_path: str, time_seconds: float, output_path: str,
+                       width: int, height: int) -> List[str]:
+        return [
+            self.ffmpeg_path,
+            '-y',
+            '-ss', str(time_seconds),
+            '-i', video_path,
+            '-vframes', '1',
+            '-vf', f'scale={width}:{height}',
+            output_path
+        ]
     
     def extract_frame(self, video_path: str, time_seconds: float, output_path: str, width: int = 400, height: int = 300) -> bool:
         """
@@ -283,17 +1177,8 @@ class VideoProcessor:
             True if successful
         """
         try:
-            cmd = [
-                self.ffmpeg_path,
-                '-y',
-                '-ss', str(time_seconds),
-                '-i', video_path,
-                '-vframes', '1',
-                '-vf', f'scale={width}:{height}',
-                output_path
-            ]
-            
-            result = subprocess.run(cmd, capture_output=True, text=True)
+            cmd = self._frame_command(video_path, time_seconds, output_path, width, height)
+            result = self.governor.run(cmd, self.background, capture_output=True, text=True)
             return result.returncode == 0
             
         except Exception as e:
@@ -316,17 +1201,11 @@ class VideoProcessor:
         """
         try:
             video_info = self.get_video_info(video_path)
-            duration = video_info['duration']
-            
-            thumbnails = []
             output_path = Path(output_dir)
             output_path.mkdir(exist_ok=True)
             
-            for i in range(count):
-                time_pos = (i * duration) / (count - 1) if count > 1 else 0
-                if i == count - 1:  # Last thumbnail should be at end
-                    time_pos = duration - 1
-                
+            thumbnails = []
+            for i, time_pos in enumerate(self._thumbnail_times(video_path, video_info['duration'], count)):
                 thumb_path = output_path / f"thumb_{i:03d}.jpg"
                 
                 if self.extract_frame(video_path, time_pos, str(thumb_path), width, height):
@@ -336,4 +1215,138 @@ class VideoProcessor:
             
         except Exception as e:
             print(f"Thumbnail extraction failed: {e}")
-            return [] 
\ No newline at end of file
+            return []
+    
+    def _thumbnail_times(self, video_path: str, duration: float, count: int) -> List[float]:
+        """Evenly spaced thumbnail times, snapped to frame times when the source is indexed."""
+        frame_index = self.get_frame_index(video_path, build=False)
+        times = []
+        for i in range(count):
+            time_pos = (i * duration) / (count - 1) if count > 1 else 0
+            if i == count - 1:  # Last thumbnail should be at end
+                time_pos = duration - 1
+            if frame_index is not None:
+                time_pos = frame_index.snap_time(time_pos)
+            times.append(time_pos)
+        return times
+    
+    def get_keyframe_times(self, video_path: str) -> List[float]:
+        """
+        List keyframe timestamps of the first video stream.
+        
+        Only packet headers are read, so this is fast even for long files.
+        
+        Args:
+            video_path: Input video path
+            
+        Returns:
+            Sorted list of keyframe times in seconds
+        """
+        try:
+            cmd = [
+                self.ffprobe_path,
+                '-v', 'error',
+                '-select_streams', 'v:0',
+                '-show_entries', 'packet=pts_time,flags',
+                '-of', 'csv=p=0',
+                video_path
+            ]
+            
+            result = self.governor.run(cmd, self.background, capture_output=True, text=True, check=True)
+            
+            keyframes = []
+            for line in result.stdout.splitlines():
+                parts = line.strip().split(',')
+                if len(parts) >= 2 and 'K' in parts[1] and parts[0] not in ('', 'N/A'):
+                    keyframes.append(float(parts[0]))
+            return sorted(keyframes)
+            
+        except subprocess.CalledProcessError as e:
+            raise RuntimeError(f"FFprobe failed: {e.stderr}")
+    
+    def analyze_video(self, video_path: str) -> Dict:
+        """
+        Summarize a video's structure for planning trims.
+        
+        Args:
+            video_path: Input video path
+            
+        Returns:
+            Dictionary with duration, keyframe times and GOP statistics
+        """
+        video_info = self.get_video_info(video_path)
+        keyframes = self.get_keyframe_times(video_path)
+        
+        gaps = [b - a for a, b in zip(keyframes, keyframes[1:])]
+        return {
+            'duration': video_info['duration'],
+            'fps': video_info['fps'],
+            'video_codec': video_info['video_codec'],
+            'audio_codec': video_info['audio_codec'],
+            'keyframe_times': keyframes,
+            'keyframe_count': len(keyframes),
+            'max_keyframe_interval': max(gaps) if gaps else video_info['duration'],
+            'avg_keyframe_interval': sum(gaps) / len(gaps) if gaps else video_info['duration'],
+        }
+    
+    def _thumbnail_cache_dir(self, video_path: str, count: int, width: int, create: bool = True) -> Path:
+        from trimmothy.cache import source_cache_dir
+        
+        return source_cache_dir(video_path, create=create) / f"thumbs_{count}_{width}"
+    
+    def get_cached_thumbnails(self, video_path: str, count: int = 8, width: int = 120) -> Optional[List[str]]:
+        """
+        Get timeline thumbnails previously saved in the on-disk cache.
+        
+        Args:
+            video_path: Input video path
+            count: Number of thumbnails in the timeline
+            width: Thumbnail width
+            
+        Returns:
+            List of image paths in timeline order, or None if they aren't all cached
+        """
+        try:
+            directory = self._thumbnail_cache_dir(video_path, count, width, create=False)
+        except OSError:
+            return None
+        paths = [str(directory / f"thumb_{i:03d}.jpg") for i in range(count)]
+        return paths if all(os.path.exists(path) for path in paths) else None
+    
+    def cache_thumbnails(self, video_path: str, count: int = 8, width: int = 120, max_height: int = 80) -> List[str]:
+        """
+        Extract timeline thumbnails into the on-disk cache.
+        
+        Thumbnails are taken at the positions the GUI timeline uses and keep the
+        video's aspect ratio, up to max_height.
+        
+        Args:
+            video_path: Input video path
+            count: Number of thumbnails in the timeline
+            width: Thumbnail width
+            max_height: Maximum thumbnail height
+            
+        Returns:
+            List of image paths in timeline order
+        """
+        cached = self.get_cached_thumbnails(video_path, count, width)
+        if cached:
+            return cached
+        
+        video_info = self.get_video_info(video_path)
+        height = min(int(width * video_info['height'] / video_info['width']), max_height)
+        height -= height % 2  # FFmpeg's scaler wants even dimensions
+        frame_index = self.get_frame_index(video_path, build=False)
+        
+        directory = self._thumbnail_cache_dir(video_path, count, width)
+        directory.mkdir(parents=True, exist_ok=True)
+        
+        paths = []
+        for i, time_pos in enumerate(thumbnail_positions(video_info['duration'], count)):
+            if frame_index is not None:
+                time_pos = frame_index.snap_time(time_pos)
+            thumb_path = directory / f"thumb_{i:03d}.jpg"
+            if not self.extract_frame(video_path, time_pos, str(thumb_path), width, height):
+                return []
+            paths.append(str(thumb_path))
+        return paths
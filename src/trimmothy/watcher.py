@@ -0,0 +1,155 @@
+"""
+Watch-folder ingest for Trimmothy.
+
+Polls a drop folder for new or changed video files and, once a file has
+stopped growing, fills the on-disk cache with everything `load_video` needs:
+the probe result, the timeline thumbnails and the frame timestamp index. The
+work runs as background work under the resource governor, so it doesn't
+compete with interactive use.
+"""
+
+import os
+import threading
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+from trimmothy.utils import is_video_file
+from trimmothy.video_processor import VideoProcessor
+
+
+class WatchFolder:
+    """Detects settled video files in a folder and pre-computes their cache entries."""
+
+    POLL_INTERVAL = 2.0   # Seconds between folder scans
+    STABLE_POLLS = 2      # Scans a file's size and mtime must stay unchanged before ingest
+
+    def __init__(self, folder: str, processor: Optional[VideoProcessor] = None, recursive: bool = True,
+                 thumbnail_count: int = 8, on_ingested: Optional[Callable[[str], None]] = None):
+        self.folder = Path(folder)
+        self.recursive = recursive
+        self.thumbnail_count = thumbnail_count
+        self.on_ingested = on_ingested
+
+        self.processor = processor or VideoProcessor(background=True)
+        self.processor.background = True
+
+        # path -> (size, mtime, number of scans it has been unchanged)
+        self._pending: Dict[str, Tuple[int, int, int]] = {}
+        # path -> (size, mtime) of the version already ingested (or that failed to ingest)
+        self._ingested: Dict[str, Tuple[int, int]] = {}
+        self._stop_event = threading.Event()
+        self._thread = None
+
+    def scan(self) -> Dict[str, Tuple[int, int]]:
+        """List video files in the folder with their size and mtime."""
+        pattern = "**/*" if self.recursive else "*"
+        files = {}
+        for path in self.folder.glob(pattern):
+            if not is_video_file(str(path)) or path.name.startswith('.'):
+                continue
+            try:
+                stat = path.stat()
+            except OSError:
+                continue  # Removed between listing and stat
+            if stat.st_size > 0:
+                files[str(path)] = (stat.st_size, stat.st_mtime_ns)
+        return files
+
+    def poll_once(self) -> List[str]:
+        """
+        Scan the folder and return files that have settled since the last scan.
+
+        Returns:
+            Paths that are ready to ingest
+        """
+        ready = []
+        current = self.scan()
+
+        for path, (size, mtime) in current.items():
+            if self._ingested.get(path) == (size, mtime):
+                continue
+
+            previous = self._pending.get(path)
+            if previous and previous[:2] == (size, mtime):
+                stable = previous[2] + 1
+            else:
+                stable = 0
+
+            if stable >= self.STABLE_POLLS:
+                self._pending.pop(path, None)
+                ready.append(path)
+            else:
+                self._pending[path] = (size, mtime, stable)
+
+        # Forget files that disappeared
+        for path in list(self._pending):
+            if path not in current:
+                del self._pending[path]
+        for path in list(self._ingested):
+            if path not in current:
+                del self._ingested[path]
+
+        return ready
+
+    def ingest(self, path: str) -> bool:
+        """
+        Pre-compute probe data, thumbnails and the frame index for one file.
+
+        Args:
+            path: Video file path
+
+        Returns:
+            True if everything was cached
+        """
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return False
+        # Don't retry the same version of a file that fails; a changed file is tried again
+        self._ingested[path] = (stat.st_size, stat.st_mtime_ns)
+
+        try:
+            self.processor.get_video_info(path, persist=True)
+            # Index first so thumbnails land on exact frame times
+            self.processor.get_frame_index(path)
+            if not self.processor.cache_thumbnails(path, count=self.thumbnail_count):
+                raise RuntimeError("thumbnail extraction failed")
+        except Exception as e:
+            print(f"Ingest of {path} failed: {e}")
+            return False
+
+        if self.on_ingested:
+            self.on_ingested(path)
+        return True
+
+    def run(self, once: bool = False):
+        """
+        Watch the folder until stopped.
+
+        Args:
+            once: Ingest what is currently in the folder and return, waiting only
+                for files that are still being written
+        """
+        while not self._stop_event.is_set():
+            for path in self.poll_once():
+                if self._stop_event.is_set():
+                    break
+                self.ingest(path)
+
+            if once and not self._pending:
+                break
+            self._stop_event.wait(self.POLL_INTERVAL)
+
+    def start(self) -> threading.Thread:
+        """Watch the folder on a background thread."""
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self.run, daemon=True, name="trimmothy-watch")
+        self._thread.start()
+        return self._thread
+
+    def stop(self):
+        """Stop watching; an ingest in progress finishes first."""
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
@@ -0,0 +1,10 @@
+import pytest
+
+
+@pytest.fixture(autouse=True)
+def cache_dir(tmp_path, monkeypatch):
+    """Give every test its own cache directory and keep telemetry out of it."""
+    directory = tmp_path / "cache"
+    monkeypatch.setenv("TRIMMOTHY_CACHE_DIR", str(directory))
+    monkeypatch.setenv("TRIMMOTHY_TELEMETRY", "0")
+    return directory
@@ -0,0 +1,88 @@
+import pytest
+
+from trimmothy.video_processor import VideoProcessor
+
+
+class FakeProcessor:
+    ffmpeg_path = "ffmpeg"
+
+
+def video_info(width=1920, height=1080, codec="h264", audio=True, sample_rate="48000"):
+    info = {'video_stream': {'codec_name': codec, 'profile': "High", 'level': 40, 'width': width,
+                             'height': height, 'r_frame_rate': "30/1", 'pix_fmt': "yuv420p",
+                             'sample_aspect_ratio': "1:1", 'time_base': "1/15360"}}
+    if audio:
+        info['audio_stream'] = {'codec_name': "aac", 'sample_rate': sample_rate, 'channels': 2,
+                                'channel_layout': "stereo"}
+    return info
+
+
+@pytest.fixture
+def target():
+    return VideoProcessor.concat_signature(video_info())
+
+
+def plan(action, path="clip.mov", start=2.0, end=5.0):
+    return {'path': path, 'start': start, 'end': end, 'action': action, 'segment': "/work/clip_0000.mp4"}
+
+
+def command(plan, info, target, extension=".mp4"):
+    return VideoProcessor._concat_clip_command(FakeProcessor(), plan, info, target, extension)
+
+
+def option(cmd, name):
+    return cmd[cmd.index(name) + 1]
+
+
+def test_mismatches_split_video_and_audio(target):
+    assert VideoProcessor._concat_mismatches(target, target) == ([], [])
+    video, audio = VideoProcessor._concat_mismatches(
+        VideoProcessor.concat_signature(video_info(width=1280, height=720, sample_rate="44100")), target)
+    assert video == ["resolution 1280x720 != 1920x1080"]
+    assert audio == ["sample rate 44100 != 48000"]
+    assert VideoProcessor._concat_mismatches(VideoProcessor.concat_signature(video_info(audio=False)),
+                                             target) == ([], ["no audio track"])
+
+
+def test_copy_command(target):
+    cmd = command(plan('copy'), video_info(), target)
+    assert cmd[:6] == ["ffmpeg", "-y", "-ss", "2.0", "-i", "clip.mov"]
+    assert option(cmd, '-t') == "3.0"
+    assert option(cmd, '-c:v') == "copy" and option(cmd, '-c:a') == "copy"
+    assert '-vf' not in cmd and '-video_track_timescale' not in cmd
+    assert cmd[-1] == "/work/clip_0000.mp4"
+
+
+def test_audio_only_conversion(target):
+    cmd = command(plan('audio'), video_info(sample_rate="44100"), target)
+    assert option(cmd, '-c:v') == "copy"
+    assert option(cmd, '-c:a') == "aac" and option(cmd, '-ar') == "48000" and option(cmd, '-ac') == "2"
+
+
+def test_reencode_normalizes_to_target(target):
+    cmd = command(plan('reencode'), video_info(width=1280, height=720), target)
+    assert option(cmd, '-vf') == ("scale=1920:1080:force_original_aspect_ratio=decrease,"
+                                  "pad=1920:1080:(ow-iw)/2:(oh-ih)/2,setsar=1/1,fps=30/1,format=yuv420p")
+    assert option(cmd, '-c:v') == "libx264"
+    assert option(cmd, '-profile:v') == "high" and option(cmd, '-level:v') == "4.0"
+    assert option(cmd, '-video_track_timescale') == "15360"
+
+
+def test_silence_added_for_clip_without_audio(target):
+    cmd = command(plan('reencode'), video_info(audio=False), target)
+    assert option(cmd, '-f') == "lavfi" and option(cmd, '-i') == "clip.mov"
+    assert "anullsrc=r=48000:cl=stereo" in cmd
+    assert cmd[cmd.index('-map') + 3] == "1:a:0"
+
+
+def test_target_without_audio_drops_it(target):
+    target = dict(target, audio_codec=None, sample_rate=None, channels=None, channel_layout=None)
+    cmd = command(plan('copy'), video_info(), target, ".mkv")
+    assert '-an' in cmd and cmd.count('-map') == 1
+
+
+def test_hevc_tagged_for_mp4(target):
+    target = dict(target, video_codec='hevc', profile='Main', level=None)
+    cmd = command(plan('reencode'), video_info(), target)
+    assert option(cmd, '-c:v') == "libx265" and option(cmd, '-profile:v') == "main"
+    assert option(cmd, '-tag:v') == "hvc1"
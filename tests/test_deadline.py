@@ -0,0 +1,86 @@
+import threading
+import time
+
+import pytest
+
+from trimmothy.deadline import PRESETS, DeadlineEncoder
+
+
+class FakeProcessor:
+    """Encodes at a fixed speed without running FFmpeg."""
+
+    ffmpeg_path = "ffmpeg"
+
+    def __init__(self, speed=10.0, cancel_after=None):
+        self.speed = speed
+        self.cancel_after = cancel_after
+        self.commands = []
+        self.cancel_events = []
+
+    def run_ffmpeg(self, cmd, media_duration=None, progress_callback=None, cancel_event=None):
+        self.commands.append(cmd)
+        self.cancel_events.append(cancel_event)
+        if self.cancel_after is not None and len(self.commands) >= self.cancel_after:
+            cancel_event.set()
+            return False, 0.0
+        duration = float(cmd[cmd.index('-t') + 1])
+        if progress_callback:
+            progress_callback(1.0, self.speed)
+        return True, duration / self.speed
+
+    def concat_segments(self, segment_paths, output_path, audio_path=None):
+        self.concatenated = segment_paths
+        return True
+
+
+@pytest.fixture
+def encoder():
+    encoder = DeadlineEncoder(FakeProcessor())
+    encoder.max_threads = 8
+    encoder.base_speed = 1.0
+    return encoder
+
+
+def test_choose_settings_prefers_slowest_preset_that_fits(encoder):
+    assert encoder.choose_settings(10.0, 1000.0) == ('veryslow', 2)   # Fewest of 8, 6, 4, 2 threads
+    assert encoder.choose_settings(10.0, 12.0) == ('medium', 8)
+
+
+def test_choose_settings_falls_back_to_fastest(encoder):
+    assert encoder.choose_settings(1000.0, 1.0) == (PRESETS[0], 8)
+
+
+def test_split_segments(encoder):
+    assert encoder.split_segments(10.0, 20.0) == [(10.0, 20.0)]
+    segments = encoder.split_segments(0.0, 600.0)
+    assert len(segments) == DeadlineEncoder.SEGMENT_COUNT
+    assert sum(duration for _, duration in segments) == pytest.approx(600.0)
+
+
+def test_encode_plans_every_segment():
+    processor = FakeProcessor()
+    encoder = DeadlineEncoder(processor)
+    progress = []
+    assert encoder.encode("in.mp4", "out.mp4", 0.0, 60.0, {}, time.monotonic() + 600, progress.append)
+    # Throughput sample, then four 15-second segments
+    assert len(processor.commands) == 5
+    assert len(encoder.segment_settings) == 4
+    assert progress[-1] == pytest.approx(0.95)
+
+
+def test_cancel_stops_between_segments():
+    processor = FakeProcessor(cancel_after=3)
+    encoder = DeadlineEncoder(processor)
+    cancel_event = threading.Event()
+    assert not encoder.encode("in.mp4", "out.mp4", 0.0, 60.0, {'audio_codec': 'aac'},
+                              time.monotonic() + 600, cancel_event=cancel_event)
+    # The sample and one segment ran; the second segment was cancelled and nothing followed
+    assert len(processor.commands) == 3
+    assert all(event is cancel_event for event in processor.cancel_events)
+
+
+def test_cancel_during_throughput_sample():
+    processor = FakeProcessor(cancel_after=1)
+    encoder = DeadlineEncoder(processor)
+    assert not encoder.encode("in.mp4", "out.mp4", 0.0, 60.0, {}, cancel_event=threading.Event())
+    assert len(processor.commands) == 1
@@ -0,0 +1,144 @@
+import os
+import struct
+
+import pytest
+
+from trimmothy import export_cache
+from trimmothy.export_cache import ExportCache, source_fingerprint
+
+
+def box(box_type, payload):
+    return struct.pack(">I4s", len(payload) + 8, box_type) + payload
+
+
+@pytest.fixture
+def source(tmp_path):
+    """A file laid out like an MP4, large enough to be sampled rather than read whole."""
+    path = tmp_path / "source.mp4"
+    mdat = box(b"mdat", bytes(range(256)) * (4 * 1024))   # 1 MB
+    # The moov box sits between the sampled blocks
+    path.write_bytes(box(b"ftyp", b"isom") + mdat + box(b"moov", b"\x00" * 64) + mdat)
+    return path
+
+
+def flip_byte(path, offset):
+    data = bytearray(path.read_bytes())
+    data[offset] ^= 1
+    path.write_bytes(bytes(data))
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return ExportCache(tmp_path / "renders", max_bytes=1024 * 1024)
+
+
+def make_render(path, size):
+    path.write_bytes(os.urandom(size))
+    return str(path)
+
+
+def test_key_depends_on_range_and_settings(source):
+    key = ExportCache.make_key(str(source), 1.0, 2.0, ".mp4", ["_try_fast_reencode"], {'exact': False})
+    assert key == ExportCache.make_key(str(source), 1.0, 2.0, ".MP4", ["_try_fast_reencode"], {'exact': False})
+    assert key != ExportCache.make_key(str(source), 1.5, 2.0, ".mp4", ["_try_fast_reencode"], {'exact': False})
+    assert key != ExportCache.make_key(str(source), 1.0, 2.0, ".mkv", ["_try_fast_reencode"], {'exact': False})
+    assert key != ExportCache.make_key(str(source), 1.0, 2.0, ".mp4", ["_try_fast_reencode"], {'exact': True})
+
+
+def test_fingerprint_ignores_path_and_mtime(source, tmp_path):
+    copy = tmp_path / "copy.mp4"
+    copy.write_bytes(source.read_bytes())
+    os.utime(copy, (0, 0))
+    assert source_fingerprint(str(copy)) == source_fingerprint(str(source))
+
+
+def test_fingerprint_covers_mp4_index(source):
+    before = source_fingerprint(str(source))
+    moov_offset = source.read_bytes().index(b"moov") - 4
+    flip_byte(source, moov_offset + 40)
+    assert source_fingerprint(str(source)) != before
+
+
+def test_fingerprint_misses_unsampled_media_bytes(source):
+    # The documented limit: an in-place patch of media data between the samples
+    before = source_fingerprint(str(source))
+    moov_offset = source.read_bytes().index(b"moov") - 4
+    flip_byte(source, moov_offset - 100)
+    assert source_fingerprint(str(source)) == before
+
+
+def test_fingerprint_of_small_file_reads_everything(tmp_path):
+    path = tmp_path / "small.bin"
+    path.write_bytes(b"a" * 1000)
+    before = source_fingerprint(str(path))
+    path.write_bytes(b"a" * 500 + b"b" + b"a" * 499)
+    assert source_fingerprint(str(path)) != before
+
+
+def test_store_and_materialize(cache, tmp_path):
+    render = make_render(tmp_path / "render.mp4", 1000)
+    assert cache.lookup("k1") is None
+    assert cache.store("k1", render, {'strategy': 'fast_reencode'})
+
+    meta = cache.lookup("k1")
+    assert meta['size'] == 1000 and meta['strategy'] == 'fast_reencode'
+
+    output = tmp_path / "out.mp4"
+    assert cache.materialize("k1", str(output)) in ("reflink", "hardlink", "copy")
+    assert output.read_bytes() == (tmp_path / "render.mp4").read_bytes()
+    assert cache.lookup("k1")['hits'] == 1
+    assert (cache.hits, cache.misses) == (3, 1)
+
+
+def test_miss_materializes_nothing(cache, tmp_path):
+    output = tmp_path / "out.mp4"
+    assert cache.materialize("missing", str(output)) is None
+    assert not output.exists()
+
+
+def test_changed_entry_is_stale(cache, tmp_path):
+    render = make_render(tmp_path / "render.mp4", 1000)
+    cache.store("k1", render)
+    data_path, meta_path = cache._paths("k1")
+    with open(data_path, "ab") as f:
+        f.write(b"edited")
+
+    assert cache.lookup("k1") is None
+    assert not data_path.exists() and not meta_path.exists()
+
+
+def test_touched_entry_is_stale(cache, tmp_path):
+    render = make_render(tmp_path / "render.mp4", 1000)
+    cache.store("k1", render)
+    data_path, _ = cache._paths("k1")
+    os.utime(data_path, ns=(0, 0))
+    assert cache.lookup("k1") is None
+
+
+def test_evicts_least_recently_used(cache, tmp_path):
+    last_used = {"a": 2000, "b": 1000, "c": 3000}   # b was used longest ago
+    for name, when in last_used.items():
+        cache.store(name, make_render(tmp_path / f"{name}.mp4", 300 * 1024))
+        _, meta_path = cache._paths(name)
+        os.utime(meta_path, (when, when))
+    # A fourth entry pushes the cache past its 1 MB budget
+    cache.store("d", make_render(tmp_path / "d.mp4", 300 * 1024))
+
+    assert [meta['key'] for meta in cache.entries()] == ["a", "c", "d"]
+
+
+def test_oversized_render_is_not_stored(cache, tmp_path):
+    assert not cache.store("big", make_render(tmp_path / "big.mp4", 2 * 1024 * 1024))
+    assert cache.entries() == []
+
+
+def test_clear(cache, tmp_path):
+    cache.store("k1", make_render(tmp_path / "render.mp4", 1000))
+    cache.clear()
+    assert cache.stats()['entries'] == 0
+
+
+def test_disabled_by_env(monkeypatch):
+    assert export_cache.export_cache_enabled()
+    monkeypatch.setenv("TRIMMOTHY_EXPORT_CACHE", "0")
+    assert not export_cache.export_cache_enabled()
@@ -0,0 +1,73 @@
+import time
+
+import numpy as np
+import pytest
+
+from trimmothy.fingerprint import FINGERPRINT_BYTES, FingerprintIndex, hamming_distances
+
+
+def flip_bits(fingerprint, bits):
+    """Copy of a packed fingerprint with the given bit positions inverted."""
+    unpacked = np.unpackbits(fingerprint)
+    unpacked[list(bits)] ^= 1
+    return np.packbits(unpacked)
+
+
+@pytest.fixture
+def index(tmp_path):
+    # No processor calls happen when fingerprints are already stored
+    index = FingerprintIndex(tmp_path / "library.db", processor=object(), max_workers=1)
+    yield index
+    index.close()
+
+
+def store(index, path, fingerprint):
+    with index._connect() as db:
+        db.execute("INSERT INTO fingerprints (path, size, mtime_ns, hash, computed, error) VALUES (?, ?, ?, ?, ?, ?)",
+                   (path, 1, 1, np.asarray(fingerprint, dtype=np.uint8).tobytes(), time.time(), None))
+    index.invalidate()
+
+
+def test_hamming_distances():
+    base = np.zeros(FINGERPRINT_BYTES, dtype=np.uint8)
+    hashes = np.stack([base, flip_bits(base, [0]), flip_bits(base, range(0, 512, 2)), ~base])
+    assert list(hamming_distances(hashes, base)) == [0, 1, 256, 512]
+    assert list(hamming_distances(hashes, ~base)) == [512, 511, 256, 0]
+
+
+def test_groups_near_duplicates(index):
+    rng = np.random.default_rng(1)
+    original = rng.integers(0, 256, FINGERPRINT_BYTES, dtype=np.uint8)
+    other = rng.integers(0, 256, FINGERPRINT_BYTES, dtype=np.uint8)
+    # Re-encodes differ in a few bits spread over the frames
+    store(index, "/videos/original.mp4", original)
+    store(index, "/videos/reencode.mp4", flip_bits(original, [3, 70, 140, 300, 450]))
+    store(index, "/videos/rescaled.mp4", flip_bits(original, [10, 200]))
+    store(index, "/videos/other.mp4", other)
+
+    groups = index.groups(max_distance=16)
+    assert groups == [[("/videos/original.mp4", 0), ("/videos/reencode.mp4", 5), ("/videos/rescaled.mp4", 2)]]
+
+
+def test_groups_respect_max_distance(index):
+    base = np.random.default_rng(2).integers(0, 256, FINGERPRINT_BYTES, dtype=np.uint8)
+    store(index, "/a.mp4", base)
+    store(index, "/b.mp4", flip_bits(base, range(40)))   # 40 bits, all in the first three bands
+    assert index.groups(max_distance=64) == [[("/a.mp4", 0), ("/b.mp4", 40)]]
+    assert index.groups(max_distance=39) == []
+
+
+def test_groups_need_two_files(index):
+    store(index, "/a.mp4", np.zeros(FINGERPRINT_BYTES, dtype=np.uint8))
+    assert index.groups() == []
+
+
+def test_lookup_closest_first(index):
+    base = np.random.default_rng(3).integers(0, 256, FINGERPRINT_BYTES, dtype=np.uint8)
+    store(index, "/far.mp4", flip_bits(base, range(30)))
+    store(index, "/near.mp4", flip_bits(base, [5]))
+    store(index, "/unrelated.mp4", ~base)
+
+    assert index.lookup(base, max_distance=64) == [("/near.mp4", 1), ("/far.mp4", 30)]
+    assert index.lookup(base, max_distance=64, limit=1) == [("/near.mp4", 1)]
+    assert len(index) == 3
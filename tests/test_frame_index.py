@@ -0,0 +1,64 @@
+import numpy as np
+import pytest
+
+from trimmothy.frame_index import FrameIndex
+
+
+@pytest.fixture
+def vfr_index():
+    """Six frames with uneven spacing, keyframes at 0 and 3."""
+    timestamps = np.array([0.0, 0.033, 0.066, 0.150, 0.183, 0.300])
+    return FrameIndex(timestamps, np.array([0, 3]), frame_duration=0.033)
+
+
+def test_snap_time_to_frame_start(vfr_index):
+    assert vfr_index.snap_time(0.0) == 0.0
+    assert vfr_index.snap_time(0.05) == pytest.approx(0.033)
+    assert vfr_index.snap_time(0.149) == pytest.approx(0.066)
+    assert vfr_index.snap_time(0.150) == pytest.approx(0.150)
+
+
+def test_snap_time_clamps_to_range(vfr_index):
+    assert vfr_index.snap_time(-1.0) == 0.0
+    assert vfr_index.snap_time(10.0) == pytest.approx(0.300)
+
+
+def test_time_to_frame_round_trip(vfr_index):
+    for frame_number in range(len(vfr_index)):
+        assert vfr_index.time_to_frame(vfr_index.frame_to_time(frame_number)) == frame_number
+
+
+def test_keyframe_at_or_before(vfr_index):
+    assert [vfr_index.keyframe_at_or_before(n) for n in range(6)] == [0, 0, 0, 3, 3, 3]
+
+
+def test_keyframe_after(vfr_index):
+    assert vfr_index.keyframe_after(0) == 3
+    assert vfr_index.keyframe_after(2) == 3
+    assert vfr_index.keyframe_after(3) is None
+
+
+def test_empty_index():
+    index = FrameIndex(np.array([]), np.array([], dtype=np.int64), 0.0)
+    assert index.snap_time(1.0) == 0.0
+    assert index.keyframe_at_or_before(5) == 0
+    assert index.duration == 0.0
+
+
+def test_duration_and_vfr_detection(vfr_index):
+    assert vfr_index.duration == pytest.approx(0.333)
+    assert vfr_index.is_variable_frame_rate()
+    cfr = FrameIndex(np.arange(30) / 30, np.array([0]), 1 / 30)
+    assert not cfr.is_variable_frame_rate()
+
+
+def test_save_and_load(vfr_index, tmp_path):
+    vfr_index.save(tmp_path)
+    loaded = FrameIndex.load(tmp_path)
+    assert np.array_equal(loaded.timestamps, vfr_index.timestamps)
+    assert np.array_equal(loaded.keyframes, vfr_index.keyframes)
+    assert loaded.frame_duration == vfr_index.frame_duration
+
+
+def test_load_without_index(tmp_path):
+    assert FrameIndex.load(tmp_path) is None
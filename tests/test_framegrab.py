@@ -0,0 +1,50 @@
+import pytest
+
+from trimmothy.framegrab import FrameGrabExport
+
+
+class FakeFrameIndex:
+    """Variable frame rate: frames 0-9 last 0.1 s, later ones 0.05 s."""
+
+    def time_to_frame(self, time_pos):
+        if time_pos < 1.0:
+            return int(time_pos * 10 + 1e-6)
+        return 10 + int((time_pos - 1.0) * 20 + 1e-6)
+
+
+def export(**options):
+    return FrameGrabExport(None, "in.mp4", "out", 1.0, 4.0, **options)
+
+
+def test_step_expression():
+    assert export(step=5)._select_expression(None, 30.0) == "not(mod(n,5))"
+    assert export()._select_expression(None, 30.0) is None
+
+
+def test_scene_expression():
+    assert export(scene_threshold=0.3)._select_expression(None, 30.0) == "eq(n,0)+gt(scene,0.3)"
+
+
+def test_timestamps_by_frame_rate():
+    grab = export(timestamps=[3.999, 1.5, 0.5, 1.0, 4.0, 1.51])
+    # Frames 30, 45 and 119 of the source, counted from the first decoded frame (30)
+    assert grab._select_expression(None, 30.0) == "eq(n,0)+eq(n,15)+eq(n,89)"
+    assert grab._requested == {30: [1.0], 45: [1.5, 1.51], 119: [3.999]}
+
+
+def test_timestamps_by_frame_index():
+    grab = export(timestamps=[1.0, 1.26, 0.95])
+    # The index, not the average rate, places 1.26 s on frame 15
+    assert grab._select_expression(FakeFrameIndex(), 30.0) == "eq(n,0)+eq(n,5)"
+
+
+def test_no_timestamps_in_range():
+    assert export(timestamps=[0.2, 9.0])._select_expression(None, 30.0) == "0"
+
+
+def test_options_validated():
+    with pytest.raises(ValueError, match="only one"):
+        export(step=2, scene_threshold=0.4)
+    with pytest.raises(ValueError, match="Unsupported image format"):
+        export(image_format="gif")
+    assert export(image_format=".JPEG").image_format == "jpg"
@@ -0,0 +1,75 @@
+import numpy as np
+import pytest
+
+from trimmothy.gop import GopBuffer
+
+
+@pytest.fixture
+def make_buffer(monkeypatch):
+    """Buffers with 1000-byte frames whose spans are laid out without opening a capture."""
+    buffers = []
+
+    def make(keyframes=None, frame_count=150, memory_limit=None):
+        gops = GopBuffer("video.mp4", frame_count, keyframes, memory_limit=memory_limit)
+        monkeypatch.setattr(gops, "_ensure_worker", lambda: None)
+        gops._frame_bytes = 1000
+        gops._build_spans()
+        buffers.append(gops)
+        return gops
+
+    yield make
+    for gops in buffers:
+        gops.close()
+
+
+def decode(gops, span):
+    first, end = gops._span_bounds(span)
+    gops._spans[span] = (first, end)
+    for frame_number in range(first, end):
+        gops._frames[frame_number] = np.zeros(1000, dtype=np.uint8)
+        gops._nbytes += 1000
+
+
+def test_spans_follow_keyframes(make_buffer):
+    gops = make_buffer([0, 60, 120])
+    assert list(gops._starts) == [0, 60, 120]
+    assert gops._span_of(59) == 0 and gops._span_of(60) == 1
+    assert gops._span_bounds(2) == (120, 150)
+
+
+def test_frames_before_first_keyframe_get_a_span(make_buffer):
+    assert list(make_buffer([30, 90])._starts) == [0, 30, 90]
+
+
+def test_long_gops_cut_to_a_third_of_the_budget(make_buffer):
+    gops = make_buffer([0, 60, 120], memory_limit=3 * 25 * 1000)
+    assert list(gops._starts) == [0, 25, 50, 60, 85, 110, 120, 145]
+
+
+def test_fixed_blocks_without_keyframes(make_buffer):
+    assert list(make_buffer(None)._starts) == [0, 60, 120]
+
+
+def test_wanted_spans_follow_direction(make_buffer):
+    gops = make_buffer([0, 60, 120])
+    assert gops.get(70, direction=-1) is None
+    assert gops._wanted == [1, 0]
+    gops.get(70, direction=1)
+    assert gops._wanted == [1, 2]
+
+    # Decoded spans aren't queued again
+    decode(gops, 1)
+    assert gops.get(70, direction=1) is not None
+    assert gops._wanted == [2]
+    assert (gops.hits, gops.misses) == (1, 2)
+
+
+def test_release_keeps_span_on_screen(make_buffer):
+    gops = make_buffer([0, 60, 120])
+    for span in range(3):
+        decode(gops, span)
+    gops.get(10)
+    assert gops.release_memory(60 * 1000) == 30 * 1000 + 60 * 1000   # Whole spans, farthest first
+    assert list(gops._spans) == [0]
+    assert gops.memory_usage() == 60 * 1000
+    assert gops.release_memory(1000) == 0
@@ -0,0 +1,52 @@
+import subprocess
+import sys
+import time
+
+import pytest
+
+from trimmothy.governor import ResourceGovernor
+
+# Like FFmpeg, handles SIGTERM itself, so the signal waits while the process is stopped
+HANDLES_SIGTERM = ("import signal, sys, time\n"
+                   "signal.signal(signal.SIGTERM, lambda *_: sys.exit(3))\n"
+                   "print('ready', flush=True)\n"
+                   "time.sleep(30)\n")
+
+
+@pytest.fixture
+def governor():
+    governor = ResourceGovernor()
+    governor.background_niceness = 0
+    governor.background_idle_io = False
+    yield governor
+    governor.set_playing(False)
+
+
+def wait_until_stopped(process, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        with open(f"/proc/{process.pid}/stat") as f:
+            if f.read().rsplit(")", 1)[1].split()[0] == "T":
+                return True
+        time.sleep(0.05)
+    return False
+
+
+@pytest.mark.skipif(not sys.platform.startswith("linux"), reason="reads process state from /proc")
+def test_terminate_resumes_paused_process(governor):
+    process = governor.popen([sys.executable, "-c", HANDLES_SIGTERM], background=True,
+                             stdout=subprocess.PIPE, text=True)
+    assert process.stdout.readline().strip() == "ready"
+    governor.set_playing(True)
+    assert wait_until_stopped(process)
+
+    governor.terminate(process)
+    assert process.wait(timeout=5) == 3
+    assert governor.metrics()['background_running'] == 0
+
+
+def test_terminate_finished_process(governor):
+    process = governor.popen([sys.executable, "-c", "pass"], background=True)
+    process.wait()
+    governor.terminate(process, kill=True)
+    assert process.returncode == 0
@@ -0,0 +1,69 @@
+import asyncio
+import threading
+
+from trimmothy.headless import REENCODE_STRATEGIES, AsyncVideoProcessor
+from trimmothy.video_processor import COPY_STRATEGIES, VideoProcessor
+
+
+class FakeGovernor:
+    def command_for(self, cmd, background=False):
+        return cmd
+
+
+class FakeProcessor:
+    """Answers a trim from the export cache and records how telemetry was written."""
+
+    background = False
+
+    def __init__(self):
+        self.governor = FakeGovernor()
+        self.keys = []
+        self.recorded = []
+
+    def get_frame_index(self, video_path, build=True):
+        return None
+
+    def _cached_info(self, video_path):
+        return video_path, {'duration': 900.0}
+
+    def get_ffmpeg_version(self):
+        return "ffmpeg version 7.0"
+
+    def _export_cache_key(self, input_path, output_path, start_time, duration, strategies, settings):
+        self.keys.append(VideoProcessor._export_cache_key(self, input_path, output_path, start_time,
+                                                          duration, strategies, settings))
+        return self.keys[-1]
+
+    def _reuse_cached_export(self, key, output_path, record):
+        return True
+
+    def _record_export(self, record, status, error):
+        self.recorded.append((status, threading.current_thread()))
+
+
+def test_cache_key_matches_resumable_trim(tmp_path):
+    # trim_video adds the resumable strategy for long clips; the key must not depend on it
+    source = tmp_path / "long.mp4"
+    source.write_bytes(b"video" * 1000)
+    processor = FakeProcessor()
+    names = list(COPY_STRATEGIES) + list(REENCODE_STRATEGIES)
+    sync_names = list(COPY_STRATEGIES) + ['_try_resumable_reencode'] + list(REENCODE_STRATEGIES)
+    settings = {'exact': False, 'time_budget': None}
+    assert VideoProcessor._export_cache_key(processor, str(source), "out.mp4", 0.0, 700.0, sync_names, settings) \
+        == VideoProcessor._export_cache_key(processor, str(source), "out.mp4", 0.0, 700.0, names, settings)
+
+
+def test_telemetry_written_off_the_event_loop(tmp_path, monkeypatch):
+    monkeypatch.setenv("TRIMMOTHY_TELEMETRY", "1")
+    source = tmp_path / "long.mp4"
+    source.write_bytes(b"video" * 1000)
+    processor = FakeProcessor()
+
+    async def trim():
+        return await AsyncVideoProcessor(processor).trim_video(str(source), str(tmp_path / "out.mp4"), 0.0, 700.0)
+
+    assert asyncio.run(trim())
+    assert len(processor.keys) == 1
+    [(status, thread)] = processor.recorded
+    assert status == 'ok'
+    assert thread is not threading.main_thread()
@@ -0,0 +1,103 @@
+import time
+
+import pytest
+
+from trimmothy import memory
+from trimmothy.memory import MemoryGovernor
+
+
+class FakeCache:
+    """Holds a byte count and gives up whatever it is asked for."""
+
+    def __init__(self, nbytes):
+        self.nbytes = nbytes
+        self.released = []
+
+    def memory_usage(self):
+        return self.nbytes
+
+    def release_memory(self, nbytes):
+        freed = min(nbytes, self.nbytes)
+        self.nbytes -= freed
+        self.released.append(freed)
+        return freed
+
+
+@pytest.fixture
+def governor(monkeypatch):
+    # Plenty of system memory, so only the budget triggers eviction
+    monkeypatch.setattr(memory, "available_memory", lambda: 64 * 1024 ** 3)
+    governor = MemoryGovernor(budget=1000)
+    monkeypatch.setattr(governor, "_ensure_thread", lambda: None)
+    return governor
+
+
+def test_within_budget_evicts_nothing(governor):
+    cache = FakeCache(600)
+    governor.register(cache, "frames")
+    assert governor.rebalance() == 0
+    assert cache.released == []
+
+
+def test_cheapest_cache_evicted_first(governor):
+    thumbnails = FakeCache(500)
+    frames = FakeCache(800)
+    governor.register(thumbnails, "thumbnails", cost=4.0)
+    governor.register(frames, "frames", cost=1.0)
+
+    assert governor.rebalance() == 300
+    assert frames.released == [300] and thumbnails.released == []
+    caches = {cache['name']: cache for cache in governor.breakdown()['caches']}
+    assert caches['frames']['evicted_bytes'] == 300 and caches['frames']['bytes'] == 500
+
+
+def test_idle_cache_evicted_before_busy_one(governor):
+    idle = FakeCache(600)
+    busy = FakeCache(600)
+    governor.register(idle, "idle")
+    governor.register(busy, "busy")
+    governor._caches[id(idle)]['last_used'] = time.monotonic() - 60
+    governor.touch(busy)
+
+    governor.rebalance()
+    assert idle.released == [200] and busy.released == []
+
+
+def test_eviction_moves_on_when_a_cache_runs_dry(governor):
+    small = FakeCache(300)
+    large = FakeCache(1200)
+    governor.register(small, "small", cost=1.0)
+    governor.register(large, "large", cost=2.0)
+
+    assert governor.rebalance() == 500
+    assert small.released == [300] and large.released == [200]
+    assert governor.evicted_bytes == 500 and governor.rebalances == 1
+
+
+def test_low_system_memory_evicts_below_budget(governor, monkeypatch):
+    cache = FakeCache(800)
+    governor.register(cache, "frames")
+    governor.low_memory = 1000
+    monkeypatch.setattr(memory, "available_memory", lambda: 900)
+
+    # A quarter of what the caches hold goes back, more than the 100 bytes missing
+    assert governor.rebalance() == 200
+    assert governor.pressure_events == 1
+
+
+def test_vm_stat_reading_is_reused(monkeypatch):
+    runs = []
+    monkeypatch.setattr(memory, "_darwin_sysctl", lambda name: None)
+    monkeypatch.setattr(memory, "_darwin_vm_stat", lambda: runs.append(1) or 4096)
+    monkeypatch.setattr(memory, "_vm_stat_reading", (float('-inf'), None))
+
+    assert memory._darwin_available_memory() == 4096
+    assert memory._darwin_available_memory() == 4096
+    assert len(runs) == 1
+
+
+def test_memorystatus_level_preferred(monkeypatch):
+    values = {'kern.memorystatus_level': 25, 'hw.memsize': 16 * 1024 ** 3}
+    monkeypatch.setattr(memory, "_darwin_sysctl", values.get)
+    monkeypatch.setattr(memory, "_darwin_vm_stat", lambda: pytest.fail("vm_stat should not run"))
+    assert memory._darwin_available_memory() == 4 * 1024 ** 3
@@ -0,0 +1,153 @@
+import struct
+
+import cv2
+import numpy as np
+import pytest
+
+from trimmothy import mp4trim
+from trimmothy.mp4trim import Box, UnsupportedMp4, parse_boxes, scan_top_level, trim_mp4
+
+
+FPS = 30
+FRAMES = 90
+GOP = 12   # Keyframe interval of OpenCV's MPEG-4 writer
+
+
+@pytest.fixture
+def source(tmp_path):
+    """Three seconds of a moving square: 90 frames, a keyframe every 12, moov after mdat."""
+    path = tmp_path / "source.mp4"
+    writer = cv2.VideoWriter(str(path), cv2.VideoWriter_fourcc(*"mp4v"), FPS, (64, 48))
+    if not writer.isOpened():
+        pytest.skip("OpenCV can't write MPEG-4 here")
+    for i in range(FRAMES):
+        frame = np.full((48, 64, 3), 64, np.uint8)
+        frame[20:28, i % 56:i % 56 + 8] = 255
+        writer.write(frame)
+    writer.release()
+    return path
+
+
+def read_moov(path):
+    with open(path, "rb") as f:
+        top_level = scan_top_level(f)
+        _, offset, header, size = next(box for box in top_level if box[0] == b"moov")
+        f.seek(offset + header)
+        return Box(b"moov", children=parse_boxes(memoryview(f.read(size - header))))
+
+
+def read_track(path):
+    moov = read_moov(path)
+    timescale = struct.unpack_from(">I", moov.find(b"mvhd").payload, 12)[0]
+    return mp4trim._Track(moov.find(b"trak"), timescale)
+
+
+def stbl(path):
+    return read_moov(path).find(b"trak").find(b"mdia").find(b"minf").find(b"stbl")
+
+
+def samples(path):
+    """Bytes of every sample, read through the file's own sample tables."""
+    track = read_track(path)
+    with open(path, "rb") as f:
+        data = []
+        for offset, size in zip(track.offsets, track.sizes):
+            f.seek(int(offset))
+            data.append(f.read(int(size)))
+    return data
+
+
+def to_co64(source_path, output_path):
+    """Rewrite a file whose moov follows its mdat with co64 chunk offsets."""
+    moov = read_moov(source_path)
+    table = moov.find(b"trak").find(b"mdia").find(b"minf").find(b"stbl")
+    for i, child in enumerate(table.children):
+        if child.type == b"stco":
+            count = struct.unpack_from(">I", child.payload, 4)[0]
+            offsets = np.frombuffer(child.payload, ">u4", count, 8)
+            table.children[i] = Box(b"co64", child.payload[:8] + offsets.astype(">u8").tobytes())
+    with open(source_path, "rb") as f:
+        top_level = scan_top_level(f)
+        _, moov_offset, _, _ = next(box for box in top_level if box[0] == b"moov")
+        f.seek(0)
+        head = f.read(moov_offset)
+    with open(output_path, "wb") as f:
+        f.write(head)
+        f.write(moov.serialize())
+
+
+def test_trim_starts_on_keyframe_and_hides_preroll(source, tmp_path):
+    output = tmp_path / "trimmed.mp4"
+    result = trim_mp4(str(source), str(output), 1.0, 2.0)
+
+    assert result['tracks'] == 1
+    assert result['start_time'] == pytest.approx(1.0)
+    track = read_track(output)
+    # Keyframe 24 up to the last frame before 2.0s
+    assert len(track.sizes) == 2 * FPS - 2 * GOP
+    assert list(track.sync) == [0, GOP, 2 * GOP]
+    # The edit list skips the six frames between the keyframe and the cut
+    assert track.media_time == 6 * track.timescale // FPS
+    assert track.segment_end == pytest.approx(1.0)
+    assert samples(output) == samples(source)[2 * GOP:2 * FPS]
+
+
+def test_trimmed_file_decodes(source, tmp_path):
+    output = tmp_path / "trimmed.mp4"
+    trim_mp4(str(source), str(output), 0.5, 1.5)
+    capture = cv2.VideoCapture(str(output))
+    decoded = 0
+    while capture.read()[0]:
+        decoded += 1
+    capture.release()
+    assert decoded == FPS
+
+
+def test_progress_reaches_one(source, tmp_path):
+    progress = []
+    trim_mp4(str(source), str(tmp_path / "trimmed.mp4"), 0.0, 3.0, progress.append)
+    assert progress[-1] == pytest.approx(1.0)
+
+
+def test_small_output_uses_stco(source, tmp_path):
+    output = tmp_path / "trimmed.mp4"
+    trim_mp4(str(source), str(output), 1.0, 2.0)
+    types = [child.type for child in stbl(output).children]
+    assert b"stco" in types and b"co64" not in types
+
+
+def test_co64_source(source, tmp_path):
+    co64_source = tmp_path / "co64.mp4"
+    to_co64(source, co64_source)
+    assert stbl(co64_source).find(b"co64") is not None
+
+    from_stco, from_co64 = tmp_path / "from_stco.mp4", tmp_path / "from_co64.mp4"
+    trim_mp4(str(source), str(from_stco), 1.0, 2.0)
+    trim_mp4(str(co64_source), str(from_co64), 1.0, 2.0)
+    assert from_co64.read_bytes() == from_stco.read_bytes()
+
+
+def test_large_output_switches_to_co64(source, tmp_path, monkeypatch):
+    expected = tmp_path / "stco.mp4"
+    trim_mp4(str(source), str(expected), 1.0, 2.0)
+
+    # Pretend the output passes the 32-bit offset limit
+    monkeypatch.setattr(mp4trim, "MAX_STCO_OFFSET", 100)
+    output = tmp_path / "co64.mp4"
+    trim_mp4(str(source), str(output), 1.0, 2.0)
+
+    types = [child.type for child in stbl(output).children]
+    assert b"co64" in types and b"stco" not in types
+    assert samples(output) == samples(expected)
+
+
+def test_range_without_video_is_unsupported(source, tmp_path):
+    with pytest.raises(UnsupportedMp4):
+        trim_mp4(str(source), str(tmp_path / "trimmed.mp4"), 5.0, 6.0)
+
+
+def test_non_mp4_is_unsupported(tmp_path):
+    path = tmp_path / "notes.mp4"
+    path.write_bytes(b"not a video" * 10)
+    with pytest.raises(UnsupportedMp4):
+        trim_mp4(str(path), str(tmp_path / "trimmed.mp4"), 0.0, 1.0)
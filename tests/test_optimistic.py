@@ -0,0 +1,118 @@
+import threading
+
+import pytest
+
+from trimmothy.optimistic import OptimisticExport, is_draft, read_draft_marker
+
+
+class FakeProcessor:
+    """Writes "draft" from the copy strategies and "final" from trim_video, once released."""
+
+    def __init__(self, final_result=True, box_trim=True):
+        self.final_result = final_result
+        self.box_trim = box_trim
+        self.release = threading.Event()
+        self.draft_calls = []
+        self.trim_calls = []
+
+    def get_frame_index(self, video_path, build=True):
+        return None
+
+    def get_keyframe_times(self, video_path):
+        return [0.0, 2.0, 4.0]
+
+    def get_video_info(self, video_path):
+        return {'duration': 10.0}
+
+    def _write(self, name, output_path, start_time, duration, content):
+        self.draft_calls.append((name, start_time, duration))
+        with open(output_path, "w") as f:
+            f.write(content)
+        return True
+
+    def _try_box_trim(self, input_path, output_path, start_time, duration, video_info):
+        if not self.box_trim:
+            self.draft_calls.append(("box", start_time, duration))
+            return False
+        return self._write("box", output_path, start_time, duration, "draft")
+
+    def _try_stream_copy(self, input_path, output_path, start_time, duration, video_info):
+        return self._write("copy", output_path, start_time, duration, "draft")
+
+    def _try_video_copy_audio_reencode(self, input_path, output_path, start_time, duration, video_info):
+        return False
+
+    def trim_video(self, input_path, output_path, start_time, end_time, progress_callback=None,
+                   time_budget=None, cancel_event=None, exact=False, use_export_cache=True):
+        self.trim_calls.append({'start_time': start_time, 'end_time': end_time, 'exact': exact})
+        with open(output_path, "w") as f:
+            f.write("partial")
+        while not self.release.wait(0.01):
+            if cancel_event.is_set():
+                return False
+        with open(output_path, "w") as f:
+            f.write("final")
+        return self.final_result
+
+
+@pytest.fixture
+def output(tmp_path):
+    return tmp_path / "clip.mp4"
+
+
+def leftovers(output):
+    return sorted(path.name for path in output.parent.iterdir() if path.name.startswith("."))
+
+
+def test_final_file_replaces_draft(output):
+    processor = FakeProcessor()
+    events = []
+    export = OptimisticExport(processor, "in.mp4", str(output), 3.0, 7.0, notify=False,
+                              on_draft=lambda path: events.append("draft"),
+                              on_final=lambda path: events.append("final"))
+    assert export.start()
+
+    # The draft starts on the keyframe before 3.0 and is flagged as a draft
+    assert output.read_text() == "draft"
+    assert processor.draft_calls == [("box", 2.0, 5.0)]
+    assert is_draft(str(output)) and read_draft_marker(str(output))['draft_start'] == 2.0
+    assert export.status()['state'] == 'draft'
+
+    processor.release.set()
+    assert export.wait(5)
+    assert output.read_text() == "final"
+    assert processor.trim_calls == [{'start_time': 3.0, 'end_time': 7.0, 'exact': True}]
+    assert not is_draft(str(output))
+    assert leftovers(output) == []
+    assert events == ["draft", "final"]
+
+
+def test_draft_falls_back_to_stream_copy(output):
+    processor = FakeProcessor(box_trim=False)
+    export = OptimisticExport(processor, "in.mp4", str(output), 3.0, 7.0, notify=False)
+    assert export.write_draft()
+    assert [name for name, _, _ in processor.draft_calls] == ["box", "copy"]
+    assert output.read_text() == "draft"
+
+
+def test_failed_final_keeps_draft(output):
+    processor = FakeProcessor(final_result=False)
+    errors = []
+    export = OptimisticExport(processor, "in.mp4", str(output), 3.0, 7.0, notify=False, on_error=errors.append)
+    export.start()
+    processor.release.set()
+    assert not export.wait(5)
+    assert export.state == 'failed' and errors == ["Frame-accurate export failed"]
+    assert output.read_text() == "draft" and is_draft(str(output))
+    assert leftovers(output) == []
+
+
+def test_cancel_keeps_draft(output):
+    processor = FakeProcessor()
+    export = OptimisticExport(processor, "in.mp4", str(output), 3.0, 7.0, notify=False)
+    export.start()
+    export.cancel()
+    assert not export.wait(5)
+    assert export.state == 'cancelled'
+    assert output.read_text() == "draft" and is_draft(str(output))
+    assert leftovers(output) == []
@@ -0,0 +1,65 @@
+import numpy as np
+import pytest
+
+from trimmothy.preroll import BoundaryPreroll
+
+
+@pytest.fixture
+def preroll():
+    # 20 seconds at 30 fps; frames are laid out without opening a capture
+    preroll = BoundaryPreroll("video.mp4", 600, 30.0)
+    preroll._frame_bytes = 1000
+    yield preroll
+    preroll.close()
+
+
+def layout(preroll, start_frame, end_frame):
+    preroll._boundaries = (start_frame, end_frame)
+    preroll._build_windows()
+    return preroll._windows
+
+
+def add_frames(preroll, frame_numbers):
+    for frame_number in frame_numbers:
+        preroll._frames[frame_number] = np.zeros(1000, dtype=np.uint8)
+        preroll._nbytes += 1000
+
+
+def test_windows_around_boundaries(preroll):
+    # One second on each side of both points, two seconds of pre-roll after the start
+    assert layout(preroll, 300, 450) == [(270, 360), (420, 481)]
+
+
+def test_windows_clamped_to_video(preroll):
+    assert layout(preroll, 10, 595) == [(0, 70), (565, 600)]
+
+
+def test_windows_shrink_to_memory_limit(preroll):
+    # Room for half of the 150 frames the windows want
+    preroll.memory_limit = 75 * 1000
+    assert layout(preroll, 300, 450) == [(285, 330), (435, 466)]
+
+
+def test_moving_boundaries_keeps_overlapping_frames(preroll):
+    layout(preroll, 300, 450)
+    add_frames(preroll, range(270, 360))
+    layout(preroll, 301, 450)
+    assert min(preroll._frames) == 271 and max(preroll._frames) == 359
+    assert preroll.memory_usage() == 89 * 1000
+
+
+def test_get_counts_hits_and_misses(preroll):
+    layout(preroll, 300, 450)
+    add_frames(preroll, [300])
+    assert preroll.get(300) is not None
+    assert preroll.get(301) is None      # In a window, not decoded yet
+    assert preroll.get(100) is None      # Outside the windows
+    assert (preroll.hits, preroll.misses) == (1, 1)
+    assert preroll.run_end(300) == 301
+
+
+def test_release_memory_drops_farthest_frames_first(preroll):
+    layout(preroll, 300, 450)
+    add_frames(preroll, [271, 299, 300, 359, 449])
+    assert preroll.release_memory(2000) == 2000
+    assert sorted(preroll._frames) == [299, 300, 449]
@@ -0,0 +1,56 @@
+from trimmothy.video_processor import DEFAULT_RENDITIONS, VideoProcessor
+
+
+class FakeProcessor:
+    ffmpeg_path = "ffmpeg"
+
+
+def ladder(extension=".mp4"):
+    return [dict(rendition, work_path=f"/work/rendition_{i}{extension}")
+            for i, rendition in enumerate(DEFAULT_RENDITIONS)]
+
+
+def command(renditions, has_audio=True):
+    return VideoProcessor._rendition_command(FakeProcessor(), "in.mov", renditions, 1.5, 4.0, has_audio)
+
+
+def option(cmd, name):
+    return cmd[cmd.index(name) + 1]
+
+
+def test_one_decode_split_per_rendition():
+    cmd = command(ladder())
+    assert cmd.count('-i') == 1
+    assert option(cmd, '-filter_complex') == ("[0:v:0]split=3[s0][s1][s2];[s0]scale=-2:1080[v0];"
+                                              "[s1]scale=-2:720[v1];[s2]scale=-2:480[v2]")
+    maps = [cmd[i + 1] for i, arg in enumerate(cmd) if arg == '-map']
+    assert maps == ["[v0]", "[v1]", "[v2]", "0:a:0"]
+
+
+def test_encoder_settings_per_output_stream():
+    cmd = command(ladder())
+    assert option(cmd, '-preset:v:2') == "faster" and option(cmd, '-crf:v:2') == "24"
+    # Twice the peak rate as buffer, in the rate's own unit
+    assert option(cmd, '-maxrate:v:0') == "6M" and option(cmd, '-bufsize:v:0') == "12M"
+    assert option(cmd, '-bufsize:v:2') == "2400k"
+    assert cmd.count('-c:a') == 1
+
+
+def test_plain_bitrate_and_defaults():
+    cmd = command([{'name': "small", 'height': 240, 'maxrate': "500000", 'work_path': "/work/small.mkv"}])
+    assert option(cmd, '-bufsize:v:0') == "1000000"
+    assert option(cmd, '-preset:v:0') == "veryfast" and option(cmd, '-crf:v:0') == "23"
+
+
+def test_tee_outputs():
+    cmd = command(ladder())
+    assert option(cmd, '-f') == "tee" and '+global_header' in cmd
+    assert cmd[-1].split('|') == [f"[select='v\\:{i},a':movflags=+faststart]/work/rendition_{i}.mp4"
+                                  for i in range(3)]
+
+
+def test_tee_output_without_audio():
+    renditions = [{'name': "x", 'height': 720, 'work_path': "/work/it's [x].mkv"}]
+    cmd = command(renditions, has_audio=False)
+    assert '-c:a' not in cmd and "0:a:0" not in cmd
+    assert cmd[-1] == "[select='v\\:0']/work/it\\'s \\[x\\].mkv"
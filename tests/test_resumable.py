@@ -0,0 +1,138 @@
+import json
+import threading
+
+import pytest
+
+from trimmothy.resumable import MANIFEST_FILE, ResumableExport
+from trimmothy.video_processor import VideoProcessor
+
+
+class FakeProcessor:
+    """Stands in for FFmpeg: 'encodes' by writing the output file named last in the command."""
+
+    ffmpeg_path = "ffmpeg"
+
+    def __init__(self, fail_on_call=None):
+        self.fail_on_call = fail_on_call
+        self.encoded = []
+        self.durations = {}
+
+    def run_ffmpeg(self, cmd, media_duration=None, progress_callback=None, cancel_event=None):
+        if self.fail_on_call == len(self.encoded):
+            return False, 0.0
+        output = cmd[-1]
+        self.encoded.append(output.rsplit("/", 1)[-1])
+        self.durations[output] = float(cmd[cmd.index('-t') + 1])
+        with open(output, "wb") as f:
+            f.write(b"segment")
+        if progress_callback:
+            progress_callback(1.0, 1.0)
+        return True, 0.0
+
+    def get_video_info(self, path):
+        if path in self.durations:
+            return {'duration': self.durations[path]}
+        return {'duration': 300.0, 'audio_codec': None}
+
+    def concat_segments(self, segment_paths, output_path, audio_path=None):
+        with open(output_path, "wb") as f:
+            for path in segment_paths:
+                with open(path, "rb") as segment:
+                    f.write(segment.read())
+        return True
+
+
+@pytest.fixture
+def source(tmp_path):
+    path = tmp_path / "source.mp4"
+    path.write_bytes(b"video")
+    return path
+
+
+def test_segments_cover_range(source, tmp_path):
+    export = ResumableExport(FakeProcessor(), str(source), str(tmp_path / "out.mp4"), 10.0, 160.0)
+    manifest = export._load_or_create_manifest()
+    segments = manifest['segments']
+    # The last segment absorbs the remainder
+    assert [(segment['start'], segment['duration']) for segment in segments] == [(10.0, 60.0), (70.0, 90.0)]
+    assert (export.work_dir / MANIFEST_FILE).exists()
+
+
+def test_resume_from_manifest_encodes_only_missing_segments(source, tmp_path):
+    output = tmp_path / "out.mp4"
+    failing = FakeProcessor(fail_on_call=2)
+    export = ResumableExport(failing, str(source), str(output), 0.0, 200.0)
+    assert not export.run()
+    assert failing.encoded == ["segment_00000.ts", "segment_00001.ts"]
+
+    [manifest] = ResumableExport.find_interrupted()
+    assert [segment['done'] for segment in manifest['segments']] == [True, True, False]
+
+    processor = FakeProcessor()
+    processor.durations = failing.durations   # What probing the finished segments reports
+    progress = []
+    resumed = ResumableExport.from_manifest(processor, manifest)
+    assert resumed.job_id == export.job_id
+    assert resumed.run(progress.append)
+
+    assert processor.encoded == ["segment_00002.ts"]
+    assert output.read_bytes() == b"segment" * 3
+    assert progress[-1] == pytest.approx(0.95)
+    assert not resumed.work_dir.exists()
+    assert ResumableExport.find_interrupted() == []
+
+
+def test_missing_segment_file_is_encoded_again(source, tmp_path):
+    failing = FakeProcessor(fail_on_call=2)
+    export = ResumableExport(failing, str(source), str(tmp_path / "out.mp4"), 0.0, 200.0)
+    export.run()
+    (export.work_dir / "segment_00000.ts").unlink()
+
+    processor = FakeProcessor()
+    processor.durations = failing.durations
+    assert ResumableExport.from_manifest(processor, ResumableExport.find_interrupted()[0]).run()
+    assert processor.encoded == ["segment_00000.ts", "segment_00002.ts"]
+
+
+def test_changed_source_discards_checkpoints(source, tmp_path):
+    export = ResumableExport(FakeProcessor(fail_on_call=1), str(source), str(tmp_path / "out.mp4"), 0.0, 200.0)
+    export.run()
+    assert len(ResumableExport.find_interrupted()) == 1
+
+    source.write_bytes(b"a different video")
+    assert ResumableExport.find_interrupted() == []
+    assert not export.work_dir.exists()
+
+
+def test_stale_manifest_version_is_ignored(source, tmp_path):
+    export = ResumableExport(FakeProcessor(fail_on_call=1), str(source), str(tmp_path / "out.mp4"), 0.0, 200.0)
+    export.run()
+    manifest_path = export.work_dir / MANIFEST_FILE
+    manifest = json.loads(manifest_path.read_text())
+    manifest['version'] = 0
+    manifest_path.write_text(json.dumps(manifest))
+    assert ResumableExport.find_interrupted() == []
+
+
+def test_failed_strategy_leaves_nothing_to_resume(source, tmp_path):
+    # trim_video moves on to the next strategy, which writes the output itself
+    processor = FakeProcessor(fail_on_call=1)
+    assert not VideoProcessor._try_resumable_reencode(processor, str(source), str(tmp_path / "out.mp4"),
+                                                      0.0, 200.0, {})
+    assert ResumableExport.find_interrupted() == []
+
+
+def test_cancelled_strategy_keeps_checkpoints(source, tmp_path):
+    cancel_event = threading.Event()
+
+    class CancellingProcessor(FakeProcessor):
+        def run_ffmpeg(self, cmd, media_duration=None, progress_callback=None, cancel_event=None):
+            result = super().run_ffmpeg(cmd, media_duration, progress_callback, cancel_event)
+            if len(self.encoded) == 2:
+                cancel_event.set()
+            return result
+
+    assert not VideoProcessor._try_resumable_reencode(CancellingProcessor(), str(source), str(tmp_path / "out.mp4"),
+                                                      0.0, 200.0, {}, cancel_event=cancel_event)
+    [manifest] = ResumableExport.find_interrupted()
+    assert [segment['done'] for segment in manifest['segments']] == [True, False, False]
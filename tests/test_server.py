@@ -0,0 +1,189 @@
+import json
+import os
+import socket
+import stat
+import threading
+
+import pytest
+
+from trimmothy.server import ServiceClient, TrimService, create_server, get_service_dir, token_path
+
+
+class FakeGovernor:
+    def metrics(self):
+        return {}
+
+
+class FakeProcessor:
+    """Records trim calls; a trim of "block.mp4" runs until it is cancelled."""
+
+    info_cache_hits = info_cache_misses = 0
+    export_cache_hits = export_cache_misses = 0
+
+    def __init__(self):
+        self.governor = FakeGovernor()
+        self.trims = []
+        self.started = threading.Event()
+
+    def trim_video(self, input_path, output_path, start_time, end_time, progress_callback=None,
+                   time_budget=None, cancel_event=None, use_export_cache=True):
+        self.trims.append({'input_path': input_path, 'start_time': start_time, 'end_time': end_time,
+                           'time_budget': time_budget, 'use_export_cache': use_export_cache})
+        progress_callback(0.5)
+        self.started.set()
+        if input_path.endswith("block.mp4"):
+            return not cancel_event.wait(10)
+        return True
+
+    def get_video_info(self, video_path):
+        if not video_path.endswith(".mp4"):
+            raise RuntimeError("not a video")
+        return {'duration': 12.5, 'path': video_path}
+
+
+@pytest.fixture(autouse=True)
+def service_dir(monkeypatch):
+    """Keep sockets and tokens in the test's cache directory."""
+    monkeypatch.delenv("XDG_RUNTIME_DIR", raising=False)
+
+
+@pytest.fixture
+def service():
+    processor = FakeProcessor()
+    service = TrimService(processor, max_workers=2)
+    server = create_server(service, port=0)
+    thread = threading.Thread(target=server.serve_forever, args=(0.05,), daemon=True)
+    thread.start()
+    yield service, ServiceClient(port=server.server_address[1])
+    server.shutdown()
+    server.server_close()
+    service.shutdown()
+
+
+def with_token(client, request):
+    return json.dumps(dict(request, token=client._token())).encode("utf-8")
+
+
+def raw_request(client, *lines):
+    """Send raw lines and collect the events answered before the service closes the stream."""
+    with socket.create_connection((client.host, client.port), timeout=5) as sock:
+        sock.sendall(b"".join(line + b"\n" for line in lines))
+        sock.shutdown(socket.SHUT_WR)
+        with sock.makefile("r", encoding="utf-8") as stream:
+            return [json.loads(line) for line in stream]
+
+
+def test_ping(service):
+    _, client = service
+    assert client.is_running()
+    assert not ServiceClient(port=1).is_running()
+
+
+def test_probe_result(service):
+    _, client = service
+    assert client.get_video_info("/videos/a.mp4") == {'duration': 12.5, 'path': "/videos/a.mp4"}
+
+
+def test_job_error_raises(service):
+    _, client = service
+    with pytest.raises(RuntimeError, match="not a video"):
+        client.get_video_info("/videos/notes.txt")
+    assert client.stats()['jobs_failed'] == 1
+
+
+def test_trim_streams_events(service):
+    service, client = service
+    progress = []
+    assert client.trim_video("in.mp4", "out.mp4", 1.0, 4.0, progress.append, time_budget=30.0,
+                             use_export_cache=False)
+    assert progress == [0.5]
+    [trim] = service.processor.trims
+    assert trim['start_time'] == 1.0 and trim['end_time'] == 4.0
+    assert trim['time_budget'] == 30.0 and trim['use_export_cache'] is False
+
+
+def test_event_sequence(service):
+    _, client = service
+    request = {'id': "j1", 'type': "trim", 'params': {'input_path': "in.mp4", 'output_path': "out.mp4",
+                                                       'start_time': 0, 'end_time': 2}}
+    events = raw_request(client, with_token(client, request))
+    assert [event['event'] for event in events] == ["accepted", "progress", "result"]
+    assert all(event['job'] == "j1" for event in events)
+    assert events[-1]['result'] is True
+
+
+def test_malformed_requests(service):
+    _, client = service
+    events = raw_request(client, b"{not json", with_token(client, {'id': "x", 'type': "format_disk"}))
+    assert [(event['job'], event['event']) for event in events] == [(None, "error"), ("x", "error")]
+    assert "Unknown job type" in events[1]['error']
+
+
+def test_cancel_running_trim(service):
+    service, client = service
+    cancel_event = threading.Event()
+    result = []
+    thread = threading.Thread(target=lambda: result.append(
+        client.trim_video("block.mp4", "out.mp4", 0.0, 5.0, cancel_event=cancel_event)))
+    thread.start()
+    assert service.processor.started.wait(5)
+    cancel_event.set()
+    thread.join(5)
+    assert result == [False]
+
+
+def test_cancel_unknown_job(service):
+    _, client = service
+    assert client.cancel("nope") is False
+
+
+def test_stats(service):
+    _, client = service
+    client.get_video_info("/videos/a.mp4")
+    stats = client.stats()
+    assert stats['workers'] == 2
+    assert stats['jobs_completed'] == 1
+    assert 'memory' in stats
+
+
+def test_tcp_requires_token(service):
+    _, client = service
+    assert stat.S_IMODE(os.stat(token_path(client.port)).st_mode) == 0o600
+    assert not ServiceClient(port=client.port, token="guess").is_running()
+    events = raw_request(client, json.dumps({'id': "p", 'type': "ping"}).encode("utf-8"),
+                         with_token(client, {'id': "q", 'type': "ping"}))
+    # The connection is dropped after the first bad request
+    assert events == [{'job': "p", 'event': "error", 'error': "Invalid service token"}]
+
+
+def test_duplicate_job_id_rejected(service):
+    service, client = service
+    request = {'id': "dup", 'type': "trim", 'params': {'input_path': "block.mp4", 'output_path': "out.mp4",
+                                                        'start_time': 0, 'end_time': 5}}
+    # Keep the first job running on a connection of its own
+    sock = socket.create_connection((client.host, client.port), timeout=5)
+    sock.sendall(with_token(client, request) + b"\n")
+    sock.shutdown(socket.SHUT_WR)
+    assert service.processor.started.wait(5)
+
+    events = raw_request(client, with_token(client, dict(request, params={})))
+    assert events == [{'job': "dup", 'event': "error", 'error': "Job id already in use: dup"}]
+    assert client.cancel("dup")
+    with sock, sock.makefile("r", encoding="utf-8") as stream:
+        assert [json.loads(line)['event'] for line in stream][-1] == "result"
+
+
+@pytest.mark.skipif(not hasattr(socket, 'AF_UNIX'), reason="needs Unix sockets")
+def test_unix_socket_is_private():
+    service = TrimService(FakeProcessor(), max_workers=1)
+    server = create_server(service)
+    thread = threading.Thread(target=server.serve_forever, args=(0.05,), daemon=True)
+    thread.start()
+    try:
+        assert stat.S_IMODE(os.stat(get_service_dir()).st_mode) == 0o700
+        assert stat.S_IMODE(os.stat(server.server_address).st_mode) == 0o600
+        assert ServiceClient().get_video_info("/videos/a.mp4")['duration'] == 12.5
+    finally:
+        server.shutdown()
+        server.server_close()
+        service.shutdown()
@@ -0,0 +1,81 @@
+import numpy as np
+import pytest
+
+from trimmothy import shuttle
+from trimmothy.shuttle import ShuttleDecoder
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(shuttle.time, "monotonic", clock)
+    return clock
+
+
+@pytest.fixture
+def decoder(monkeypatch):
+    # 20 seconds at 30 fps, keyframe every 2 seconds; no capture is opened
+    decoder = ShuttleDecoder("video.mp4", 600, 30.0, keyframes=np.arange(0, 600, 60))
+    monkeypatch.setattr(decoder, "_ensure_worker", lambda: None)
+    return decoder
+
+
+def test_keyframe_at_or_before(decoder):
+    assert decoder._keyframe_at_or_before(0) == 0
+    assert decoder._keyframe_at_or_before(59) == 0
+    assert decoder._keyframe_at_or_before(60) == 60
+    assert decoder._keyframe_at_or_before(599) == 540
+
+
+def test_keyframe_lookup_without_index():
+    decoder = ShuttleDecoder("video.mp4", 600, 30.0)
+    assert decoder._keyframe_at_or_before(77) == 77
+
+
+def test_clock_follows_speed(decoder, clock):
+    decoder.set_speed(4, 100)
+    assert decoder.mode == "sampled"
+    clock.now += 1.0
+    assert decoder.position() == pytest.approx(220.0)
+
+    # Changing speed continues from where the clock is
+    decoder.set_speed(-2)
+    assert decoder.mode == "keyframes"
+    clock.now += 0.5
+    assert decoder.position() == pytest.approx(190.0)
+
+
+def test_clock_stops_at_the_ends(decoder, clock):
+    decoder.set_speed(32, 500)
+    clock.now += 1.0
+    assert decoder.position() == 599.0
+    assert decoder.at_end()
+
+    decoder.set_speed(-8, 10)
+    assert not decoder.at_end()
+    clock.now += 1.0
+    assert decoder.position() == 0.0
+    assert decoder.at_end()
+
+
+def test_display_rates_per_speed(decoder, clock):
+    decoder.set_speed(8, 0)
+    for frame_number in (0, 8, 16):
+        decoder._latest = (frame_number, None)
+        assert decoder.next_frame()[0] == frame_number
+    assert decoder.next_frame() is None
+    clock.now += 0.5
+    decoder.set_speed(-4)
+    clock.now += 2.0
+
+    rates = decoder.display_rates()
+    assert rates[8] == {'frames': 3, 'seconds': pytest.approx(0.5), 'fps': pytest.approx(6.0), 'mode': "sampled"}
+    assert rates[-4]['frames'] == 0 and rates[-4]['seconds'] == pytest.approx(2.0)
@@ -0,0 +1,78 @@
+import pytest
+
+from trimmothy.telemetry import ExportRecord, append_record, load_records, summarize
+
+
+def record(strategy, statuses, status='ok', codec='h264', realtime=None, wall=1.0):
+    return {
+        'video_codec': codec,
+        'strategy': strategy,
+        'status': status,
+        'attempts': [{'strategy': name, 'status': outcome, 'seconds': 0.5} for name, outcome in statuses],
+        'realtime_factor': realtime,
+        'wall_seconds': wall,
+        'range_duration': 10.0,
+        'output_size': 1000,
+    }
+
+
+def test_fell_through_counts_declined_and_failed_attempts():
+    records = [
+        record('box_trim', [('box_trim', 'ok')]),
+        record('stream_copy', [('box_trim', 'declined'), ('stream_copy', 'ok')]),
+        record('fast_reencode', [('stream_copy', 'error'), ('fast_reencode', 'ok')]),
+        record(None, [('fast_reencode', 'error')], status='failed'),
+    ]
+    [summary] = summarize(records)
+    assert summary['exports'] == 4
+    assert summary['succeeded'] == 3
+    assert summary['fell_through'] == 2
+
+
+def test_median_realtime_skips_export_cache_hits():
+    records = [
+        record('fast_reencode', [('fast_reencode', 'ok')], realtime=2.0),
+        record('fast_reencode', [('fast_reencode', 'ok')], realtime=4.0),
+        record('export_cache', [('export_cache', 'ok')], realtime=5000.0),
+    ]
+    [summary] = summarize(records)
+    assert summary['median_realtime'] == pytest.approx(3.0)
+    assert summary['median_wall'] == pytest.approx(1.0)
+
+
+def test_groups_sorted_by_export_count():
+    records = [record('box_trim', [('box_trim', 'ok')], codec='hevc')] + \
+              [record('box_trim', [('box_trim', 'ok')], codec='h264') for _ in range(2)]
+    summaries = summarize(records, group_by='codec')
+    assert [summary['group'] for summary in summaries] == ['h264', 'hevc']
+
+
+def test_strategy_breakdown():
+    records = [
+        record('stream_copy', [('box_trim', 'declined'), ('stream_copy', 'ok')]),
+        record('box_trim', [('box_trim', 'ok')]),
+    ]
+    [summary] = summarize(records, group_by='codec')
+    assert summary['strategies']['box_trim'] == {'attempts': 2, 'ok': 1, 'declined': 1, 'error': 0, 'seconds': 1.0}
+    assert summary['strategies']['stream_copy']['ok'] == 1
+
+
+def test_cancelled_and_unsucceeded_groups():
+    records = [record(None, [('fast_reencode', 'declined')], status='cancelled')]
+    [summary] = summarize(records, group_by='strategy')
+    assert summary['group'] == '(none succeeded)'
+    assert summary['cancelled'] == 1
+    assert summary['median_realtime'] is None
+
+
+def test_records_round_trip(tmp_path):
+    path = tmp_path / "exports.jsonl"
+    export = ExportRecord("in.mp4", "out.mp4", 1.0, 3.0)
+    export.attempt('box_trim', 0.2, 'ok')
+    append_record(export.finish('ok'), path)
+    with open(path, "a") as f:
+        f.write("not json\n")
+
+    [loaded] = load_records(path)
+    assert loaded['strategy'] == 'box_trim'
+    assert loaded['range_duration'] == pytest.approx(2.0)
@@ -0,0 +1,80 @@
+import os
+
+import pytest
+
+from trimmothy.watcher import WatchFolder
+
+
+class FakeProcessor:
+    """Records the cache work an ingest asks for; files named "bad*" fail to thumbnail."""
+
+    background = False
+
+    def __init__(self):
+        self.calls = []
+
+    def get_video_info(self, path, persist=False):
+        self.calls.append(("probe", os.path.basename(path), persist))
+
+    def get_frame_index(self, path):
+        self.calls.append(("index", os.path.basename(path)))
+
+    def cache_thumbnails(self, path, count=8):
+        self.calls.append(("thumbnails", os.path.basename(path), count))
+        return not os.path.basename(path).startswith("bad")
+
+
+@pytest.fixture
+def watch(tmp_path):
+    ingested = []
+    watch = WatchFolder(str(tmp_path), FakeProcessor(), thumbnail_count=4, on_ingested=ingested.append)
+    watch.ingested = ingested
+    return watch
+
+
+def test_processor_runs_as_background_work(watch):
+    assert watch.processor.background is True
+
+
+def test_file_ingested_once_it_settles(watch, tmp_path):
+    video = tmp_path / "a.mp4"
+    video.write_bytes(b"1")
+    (tmp_path / "notes.txt").write_bytes(b"1")
+    (tmp_path / ".hidden.mp4").write_bytes(b"1")
+
+    assert watch.poll_once() == []
+    video.write_bytes(b"12")           # Still being copied in
+    assert watch.poll_once() == []
+    assert watch.poll_once() == []
+    assert watch.poll_once() == [str(video)]
+
+    assert watch.ingest(str(video))
+    assert watch.processor.calls == [("probe", "a.mp4", True), ("index", "a.mp4"), ("thumbnails", "a.mp4", 4)]
+    assert watch.ingested == [str(video)]
+    assert watch.poll_once() == []
+
+
+def test_failed_ingest_retried_only_after_change(watch, tmp_path):
+    video = tmp_path / "bad.mov"
+    video.write_bytes(b"1")
+    for _ in range(WatchFolder.STABLE_POLLS):
+        watch.poll_once()
+    [path] = watch.poll_once()
+    assert not watch.ingest(path)
+    assert watch.ingested == []
+    for _ in range(WatchFolder.STABLE_POLLS + 1):
+        assert watch.poll_once() == []
+
+    video.write_bytes(b"changed")
+    for _ in range(WatchFolder.STABLE_POLLS):
+        watch.poll_once()
+    assert watch.poll_once() == [path]
+
+
+def test_run_once_ingests_subfolders(watch, tmp_path):
+    (tmp_path / "day1").mkdir()
+    (tmp_path / "day1" / "b.mkv").write_bytes(b"1")
+    (tmp_path / "c.mp4").write_bytes(b"1")
+    watch.POLL_INTERVAL = 0.0
+    watch.run(once=True)
+    assert sorted(os.path.basename(path) for path in watch.ingested) == ["b.mkv", "c.mp4"]